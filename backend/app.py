@@ -1,24 +1,129 @@
 """
 Flask GPIO Control API Server
 Provides REST API and WebSocket interface for GPIO control
+
+Run standalone with `python3 app.py`, which creates a backend GPIOController.
+The Qt app can instead host this API in its own process (main.py --api-port),
+binding it to an adapter over its controller through init_app().
 """
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
+from werkzeug.serving import is_running_from_reloader
+import os
 import threading
 import time
 from gpio_controller import GPIOController, PinMode, PullMode
+from frontend_files import register_frontend
+from client_queues import STREAM_EVENTS, ClientFanout
+from monitor_scheduler import MonitorScheduler
+from sensor_stream import SensorStream
+
+import shared_modules  # noqa: F401 - makes qt5-app/src importable
+from StructuredLog import get_logger, setup_logging
+from SessionLog import SessionRecorder
+from PinProfiles import ProfileStore
+from PulseMeter import DEFAULT_WINDOW_MS
+
+log = get_logger('api')
 
-app = Flask(__name__)
+# No built-in /static route: /static/* belongs to the frontend build (frontend_files.py)
+app = Flask(__name__, static_folder=None)
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(cors_allowed_origins="*")
+# Broadcasts go through bounded per-client queues (client_queues.py)
+clients = ClientFanout(socketio)
+# Sensor readings for web clients; started by __main__ or fed by the Qt app
+sensors = SensorStream(clients)
+
+# GPIO controller serving the API, set by init_app()
+gpio = None
+
+# Session recorder (SessionLog.py), set by start_recording()
+recorder = None
+
+# Named pin profiles kept on the device (PinProfiles.py), set by init_app()
+PROFILES_FILE = os.environ.get(
+    'PIN_PROFILES_FILE', os.path.expanduser('~/.config/reterminal/pin_profiles.json'))
+profiles = None
+
+# Pin monitoring (one scheduler shared by all clients)
+monitor = None
+monitor_lock = threading.Lock()
+
+
+def init_app(controller, async_mode='threading', frontend_dir=None):
+    """
+    Bind the API to a GPIO controller and serve the frontend build
+
+    Args:
+        controller: A GPIOController, or any object with the same interface
+            (e.g. the Qt app's adapter in qt5-app/src/EmbeddedAPI.py)
+        async_mode: Socket.IO async mode. Client senders, the monitor
+            scheduler, the sensor sampler and the event stream run on OS
+            threads and block on threading primitives, which only the
+            'threading' mode serves; auto-detection (None) would pick
+            eventlet or gevent when installed and stall them.
+        frontend_dir: React build directory (default FRONTEND_BUILD_DIR or
+            ../frontend/build); the UI is not served if it does not exist
+
+    Returns:
+        (app, socketio)
+    """
+    global gpio, profiles
+    gpio = controller
+    gpio.add_rule_listener(emit_rule_fired)
+    gpio.add_encoder_listener(emit_encoder_changed)
+    gpio.add_alarm_listener(emit_alarm_changed)
+    profiles = ProfileStore(PROFILES_FILE, available_pins=set(gpio.get_available_pins()))
+    register_frontend(app, frontend_dir)
+    socketio.init_app(app, async_mode=async_mode)
+    return app, socketio
+
+
+def start_recording(path):
+    """
+    Record API calls, client events, input changes and sensor samples to a
+    session log, for replay with qt5-app/benchmarks/replay_session.py
+
+    Returns:
+        The SessionRecorder (close() it to finish the log)
+    """
+    global recorder
+    recorder = SessionRecorder(path, source='backend')
+    gpio.recorder = recorder
+    if sensors.source is not None:
+        sensors.source.add_stage(recorder)
+    return recorder
+
+
+def record_event(event, data=None):
+    """Record a Socket.IO event received from a client"""
+    if recorder is not None:
+        recorder.ws(event, data)
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
 
-# Initialize GPIO controller
-gpio = GPIOController()
+@app.after_request
+def record_request(response):
+    # The event stream is a subscription, not a call to replay
+    if recorder is not None and request.path.startswith('/api/') and request.path != '/api/events':
+        duration_us = (time.perf_counter() - g.request_started) * 1e6
+        recorder.api(request.method, request.full_path.rstrip('?'),
+                     request.get_json(silent=True), response.status_code, duration_us)
+    return response
 
-# Background monitoring
-monitoring_active = False
-monitoring_thread = None
+
+def internal_error(e):
+    """Response for an unexpected controller error"""
+    if isinstance(e, TimeoutError):
+        # The embedded Qt controller's GUI thread was too busy; the call did not run
+        return jsonify({'error': f'Controller busy: {str(e)}'}), 503
+    return jsonify({'error': f'Internal error: {str(e)}'}), 500
 
 
 @app.route('/api/health', methods=['GET'])
@@ -92,14 +197,14 @@ def configure_pin(pin):
         )
 
         # Emit configuration change via WebSocket
-        socketio.emit('pin_configured', result)
+        clients.emit('pin_configured', result)
 
         return jsonify(result)
 
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'error': f'Internal error: {str(e)}'}), 500
+        return internal_error(e)
 
 
 @app.route('/api/pins/<int:pin>/write', methods=['POST'])
@@ -122,14 +227,14 @@ def write_pin(pin):
         result = gpio.write_pin(pin, value)
 
         # Emit value change via WebSocket
-        socketio.emit('pin_changed', result)
+        clients.emit('pin_changed', result)
 
         return jsonify(result)
 
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'error': f'Internal error: {str(e)}'}), 500
+        return internal_error(e)
 
 
 @app.route('/api/pins/<int:pin>/read', methods=['GET'])
@@ -142,7 +247,7 @@ def read_pin(pin):
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'error': f'Internal error: {str(e)}'}), 500
+        return internal_error(e)
 
 
 @app.route('/api/pins/<int:pin>/pwm', methods=['POST'])
@@ -167,50 +272,599 @@ def set_pwm(pin):
         result = gpio.set_pwm(pin, duty_cycle, frequency)
 
         # Emit PWM change via WebSocket
-        socketio.emit('pin_changed', result)
+        clients.emit('pin_changed', result)
+
+        return jsonify(result)
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return internal_error(e)
+
+
+@app.route('/api/pins/<int:pin>/measurement', methods=['POST'])
+def start_measurement(pin):
+    """
+    Start measuring frequency, period and pulse width on an input pin
 
+    Request body (optional):
+    {
+        "window_ms": float (10-60000, default 1000)
+    }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        result = gpio.start_measurement(pin, data.get('window_ms', DEFAULT_WINDOW_MS))
         return jsonify(result)
 
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'error': f'Internal error: {str(e)}'}), 500
+        return internal_error(e)
+
+
+@app.route('/api/pins/<int:pin>/measurement', methods=['GET'])
+def get_measurement(pin):
+    """Get the frequency, period and pulse width measured on a pin"""
+    result = gpio.get_measurement(pin)
+    if result is None:
+        return jsonify({'error': f'Pin {pin} is not being measured'}), 404
+    return jsonify(result)
+
+
+@app.route('/api/pins/<int:pin>/measurement', methods=['DELETE'])
+def stop_measurement(pin):
+    """Stop measuring a pin"""
+    try:
+        gpio.stop_measurement(pin)
+        return jsonify({'message': f'Measurement on pin {pin} stopped'})
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return internal_error(e)
+
+
+@app.route('/api/measurements', methods=['GET'])
+def get_measurements():
+    """Get the measurements of every measured pin"""
+    return jsonify({'measurements': gpio.get_all_measurements()})
 
 
 @app.route('/api/pins/<int:pin>', methods=['DELETE'])
 def cleanup_pin(pin):
     """Cleanup/release a specific pin"""
     try:
+        configured = gpio.get_pin_info(pin) is not None
         gpio._cleanup_pin(pin)
+        if configured:
+            clients.emit('pin_released', {'pin': pin})
         return jsonify({'message': f'Pin {pin} cleaned up successfully'})
 
     except Exception as e:
-        return jsonify({'error': f'Internal error: {str(e)}'}), 500
+        return internal_error(e)
 
 
 @app.route('/api/cleanup', methods=['POST'])
 def cleanup_all():
     """Cleanup all GPIO pins"""
     try:
+        configured = [info['pin'] for info in gpio.get_all_pins_info()]
         gpio.cleanup_all()
+        for pin in configured:
+            clients.emit('pin_released', {'pin': pin})
         return jsonify({'message': 'All pins cleaned up successfully'})
 
     except Exception as e:
-        return jsonify({'error': f'Internal error: {str(e)}'}), 500
+        return internal_error(e)
+
+
+@app.route('/api/groups', methods=['GET'])
+def get_groups():
+    """Get all pin groups"""
+    return jsonify({'groups': gpio.get_all_groups_info()})
+
+
+@app.route('/api/groups', methods=['POST'])
+def create_group():
+    """
+    Configure pins as a named group carrying one integer value
+
+    Request body:
+    {
+        "name": "lcd_data",
+        "pins": [pin numbers, least significant bit first],
+        "mode": "output" | "input" (default output),
+        "pull": "none" | "up" | "down" (for input),
+        "initial_value": int (for output)
+    }
+    """
+    try:
+        data = request.get_json()
+
+        name = data.get('name')
+        pins = data.get('pins')
+        if not name or not pins:
+            return jsonify({'error': 'name and pins are required'}), 400
+
+        result = gpio.create_group(
+            name=name,
+            pins=pins,
+            mode=PinMode(data.get('mode', 'output')),
+            pull=PullMode(data.get('pull', 'none')),
+            initial_value=data.get('initial_value', 0)
+        )
+
+        clients.emit('group_configured', result)
+
+        return jsonify(result)
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return internal_error(e)
+
+
+@app.route('/api/groups/<name>', methods=['GET'])
+def get_group(name):
+    """Get group configuration and last known value"""
+    info = gpio.get_group_info(name)
+
+    if not info:
+        return jsonify({'error': f'Group {name} does not exist'}), 404
+
+    return jsonify(info)
+
+
+@app.route('/api/groups/<name>/write', methods=['POST'])
+def write_group(name):
+    """
+    Write an integer across an output group (all bits change together)
+
+    Request body:
+    {
+        "value": int (0 to 2^width - 1)
+    }
+    """
+    try:
+        data = request.get_json()
+        value = data.get('value')
+
+        if not isinstance(value, int) or isinstance(value, bool):
+            return jsonify({'error': 'value must be an integer'}), 400
+
+        result = gpio.write_group(name, value)
+
+        # One event for the whole group instead of one per pin
+        clients.emit('group_changed', result)
+
+        return jsonify(result)
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return internal_error(e)
+
+
+@app.route('/api/groups/<name>/read', methods=['GET'])
+def read_group(name):
+    """Sample all pins of an input group at once"""
+    try:
+        result = gpio.read_group(name)
+        return jsonify(result)
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return internal_error(e)
+
+
+@app.route('/api/groups/<name>', methods=['DELETE'])
+def delete_group(name):
+    """Delete a group and release its pins"""
+    try:
+        gpio.delete_group(name)
+        clients.emit('group_released', {'name': name})
+        return jsonify({'message': f'Group {name} deleted successfully'})
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return internal_error(e)
+
+
+@app.route('/api/encoders', methods=['GET'])
+def get_encoders():
+    """Get all quadrature encoders"""
+    return jsonify({'encoders': gpio.get_all_encoders_info()})
+
+
+@app.route('/api/encoders', methods=['POST'])
+def create_encoder():
+    """
+    Configure two input pins as a quadrature encoder
+
+    Request body:
+    {
+        "name": "jog",
+        "pin_a": 17,
+        "pin_b": 27,
+        "pull": "up" | "down" | "none" (default "up")
+    }
+    """
+    try:
+        data = request.get_json()
+        name = data.get('name')
+        pin_a = data.get('pin_a')
+        pin_b = data.get('pin_b')
+
+        if not name or pin_a is None or pin_b is None:
+            return jsonify({'error': 'name, pin_a and pin_b are required'}), 400
+
+        result = gpio.create_encoder(name, pin_a, pin_b, PullMode(data.get('pull', 'up')))
+        clients.emit('encoder_configured', result)
+
+        return jsonify(result)
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return internal_error(e)
+
+
+@app.route('/api/encoders/<name>', methods=['GET'])
+def get_encoder(name):
+    """Get an encoder's position, velocity and illegal transition count"""
+    info = gpio.get_encoder_info(name)
+    if info is None:
+        return jsonify({'error': f'Encoder {name} does not exist'}), 404
+    return jsonify(info)
+
+
+@app.route('/api/encoders/<name>/position', methods=['POST'])
+def set_encoder_position(name):
+    """
+    Set an encoder's position
+
+    Request body (optional):
+    {
+        "position": int (default 0)
+    }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        position = data.get('position', 0)
+        if not isinstance(position, int) or isinstance(position, bool):
+            return jsonify({'error': 'position must be an integer'}), 400
+
+        result = gpio.reset_encoder(name, position)
+        return jsonify(result)
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return internal_error(e)
+
+
+@app.route('/api/encoders/<name>', methods=['DELETE'])
+def delete_encoder(name):
+    """Delete an encoder and release its pins"""
+    try:
+        gpio.delete_encoder(name)
+        clients.emit('encoder_released', {'name': name})
+        return jsonify({'message': f'Encoder {name} deleted successfully'})
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return internal_error(e)
+
+
+def emit_encoder_changed(report):
+    """Encoder listener: report an encoder's movement (rate-capped per encoder)"""
+    clients.emit('encoder_changed', report)
+
+
+@app.route('/api/rules', methods=['GET'])
+def get_rules():
+    """Get all input-to-output rules with their fire counts and latency stats"""
+    return jsonify({'rules': gpio.get_rules(), 'stats': gpio.get_rule_stats()})
+
+
+@app.route('/api/rules', methods=['POST'])
+def set_rule():
+    """
+    Add a rule, or replace the rule with the same name
+
+    Request body:
+    {
+        "name": "estop",
+        "trigger": {"pin": 17, "edge": "rising" | "falling" | "both"},
+        "actions": [
+            {"type": "write", "pin": 22, "value": 1},
+            {"type": "pwm", "pin": 18, "duty_cycle": 0},
+            {"type": "group", "group": "relays", "value": 0}
+        ],
+        "enabled": true
+    }
+
+    Rules run on the device in the GPIO edge callback once the trigger pin
+    is configured as input.
+    """
+    try:
+        result = gpio.set_rule(request.get_json())
+        return jsonify(result)
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return internal_error(e)
+
+
+@app.route('/api/rules/<name>', methods=['DELETE'])
+def delete_rule(name):
+    """Remove a rule"""
+    try:
+        gpio.remove_rule(name)
+        return jsonify({'message': f'Rule {name} removed successfully'})
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return internal_error(e)
+
+
+def emit_rule_fired(event):
+    """Rule listener: report a fired rule and the outputs it changed"""
+    clients.emit('rule_fired', {key: event[key] for key in ('rule', 'pin', 'edge')})
+    for info in event.get('outputs', []):
+        clients.emit('group_changed' if 'name' in info else 'pin_changed', info)
+
+
+@app.route('/api/alarms', methods=['GET'])
+def get_alarms():
+    """Get all sensor threshold alarms with their state and latency stats"""
+    return jsonify({'alarms': gpio.get_alarms(), 'stats': gpio.get_alarm_stats()})
+
+
+@app.route('/api/alarms', methods=['POST'])
+def set_alarm():
+    """
+    Add a sensor threshold alarm, or replace the alarm with the same name
+
+    Request body:
+    {
+        "name": "impact",
+        "signal": "accel_x" | "accel_y" | "accel_z" | "accel" | "tilt" | "light",
+        "above": 2.5,              (or "below": 50)
+        "hysteresis": 0.3,
+        "hold_off_ms": 2000,
+        "actions": [
+            {"type": "pwm", "pin": 18, "duty_cycle": 0},
+            {"type": "write", "pin": 22, "value": 1}
+        ],
+        "clear_actions": [{"type": "write", "pin": 22, "value": 0}],
+        "enabled": true
+    }
+
+    Alarms run on the device on the sensor thread, right after each sample.
+    """
+    try:
+        result = gpio.set_alarm(request.get_json())
+        return jsonify(result)
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return internal_error(e)
+
+
+@app.route('/api/alarms/<name>', methods=['DELETE'])
+def delete_alarm(name):
+    """Remove a sensor alarm"""
+    try:
+        gpio.remove_alarm(name)
+        return jsonify({'message': f'Alarm {name} removed successfully'})
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return internal_error(e)
+
+
+def emit_alarm_changed(event):
+    """Alarm listener: report a triggered or cleared alarm and the outputs it changed"""
+    clients.emit(f"alarm_{event['state']}",
+                 {key: event[key] for key in ('alarm', 'signal', 'value', 'threshold')})
+    for info in event.get('outputs', []):
+        clients.emit('group_changed' if 'name' in info else 'pin_changed', info)
+
+
+@app.route('/api/profiles', methods=['GET'])
+def get_profiles():
+    """Get all stored pin profiles"""
+    return jsonify({'profiles': profiles.list()})
+
+
+@app.route('/api/profiles/<name>', methods=['GET'])
+def get_profile(name):
+    """Get a stored pin profile"""
+    profile = profiles.get(name)
+    if profile is None:
+        return jsonify({'error': f'Profile {name} does not exist'}), 404
+    return jsonify(profile)
+
+
+@app.route('/api/profiles', methods=['POST'])
+def save_profile():
+    """
+    Store a pin profile, or replace the profile with the same name
+
+    Request body:
+    {
+        "name": "labeler",
+        "pins": [
+            {"pin": 17, "mode": "input", "pull": "up"},
+            {"pin": 22, "mode": "output", "value": 1},
+            {"pin": 18, "mode": "pwm", "pwm_frequency": 1000, "pwm_duty_cycle": 25}
+        ],
+        "release_others": true (release configured pins the profile does not list)
+    }
+    """
+    try:
+        return jsonify(profiles.save(request.get_json()))
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return internal_error(e)
+
+
+@app.route('/api/profiles/<name>', methods=['DELETE'])
+def delete_profile(name):
+    """Delete a stored pin profile"""
+    try:
+        profiles.delete(name)
+        return jsonify({'message': f'Profile {name} deleted successfully'})
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return internal_error(e)
+
+
+@app.route('/api/profiles/<name>/apply', methods=['POST'])
+def apply_profile(name):
+    """
+    Apply a stored pin profile as one transaction
+
+    Only pins whose configuration differs are changed. If any change fails,
+    the pins are put back as they were. Clients get one 'profile_applied'
+    event with the resulting state of every pin.
+    """
+    profile = profiles.get(name)
+    if profile is None:
+        return jsonify({'error': f'Profile {name} does not exist'}), 404
+    try:
+        result = gpio.apply_profile(profile)
+        clients.emit('profile_applied', result)
+        return jsonify(result)
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return internal_error(e)
+
+
+@app.route('/api/pwm/stats', methods=['GET'])
+def get_pwm_stats():
+    """
+    Get software PWM timing statistics
+
+    Per pin: frequency, duty cycle, edge count, missed periods and a
+    histogram of edge timing errors in microseconds
+    """
+    return jsonify({'pins': gpio.get_pwm_stats()})
+
+
+@app.route('/api/sensors/latest', methods=['GET'])
+def get_sensors_latest():
+    """Get the most recent sensor sample (acceleration in g, light in lux)"""
+    sample = sensors.latest()
+    if sample is None:
+        return jsonify({'error': 'No sensor data available'}), 404
+    return jsonify(sample)
+
+
+@app.route('/api/sensors/history', methods=['GET'])
+def get_sensors_history():
+    """
+    Get recent sensor samples
+
+    Query parameters:
+        seconds: Window ending at the newest sample (default 10)
+        since: Only samples newer than this timestamp (overrides seconds)
+        max_points: Decimate to at most this many samples (default 1000)
+    """
+    seconds = request.args.get('seconds', 10.0, type=float)
+    since = request.args.get('since', type=float)
+    max_points = request.args.get('max_points', 1000, type=int)
+    if seconds <= 0 or max_points <= 0:
+        return jsonify({'error': 'seconds and max_points must be positive'}), 400
+    return jsonify(sensors.window(seconds=seconds, since=since, max_points=max_points))
+
+
+@app.route('/api/monitoring', methods=['GET'])
+def get_monitoring():
+    """
+    Get monitoring scheduler statistics
+
+    Ticks run, overruns, deadlines skipped or caught up, a histogram of tick
+    lateness (us) and tick work time (ms). scheduler is null if monitoring
+    was never started.
+    """
+    return jsonify(get_monitoring_stats())
+
+
+@app.route('/api/clients', methods=['GET'])
+def get_clients():
+    """
+    Get per-client WebSocket send queue statistics
+
+    Per client: queue depth and high-water mark, events sent, dropped and
+    coalesced, transport stalls, and the pin_readings rate divisor (2 = every
+    2nd reading) applied to clients that fall behind
+    """
+    return jsonify({'clients': clients.get_stats()})
+
+
+@app.route('/api/events', methods=['GET'])
+def event_stream():
+    """
+    Server-Sent Events stream of pin, group, rule, alarm and profile changes
+
+    Query params:
+        events: Comma-separated events to receive (default all stream events)
+        last_event_id: Resume after this event id, for clients that cannot
+            send the Last-Event-ID header
+    """
+    if socketio.async_mode != 'threading':
+        # The stream blocks on a threading.Condition between events; under
+        # eventlet or gevent that would stall every other request
+        return jsonify({'error': "The event stream needs Socket.IO async_mode 'threading', "
+                                 f"not '{socketio.async_mode}'"}), 501
+
+    events = request.args.get('events')
+    if events:
+        events = [event.strip() for event in events.split(',') if event.strip()]
+        unknown = sorted(set(events) - STREAM_EVENTS)
+        if unknown:
+            return jsonify({'error': f"Unknown events: {', '.join(unknown)}; "
+                                     f"available: {', '.join(sorted(STREAM_EVENTS))}"}), 400
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    client, missed = clients.open_stream(events or None, last_event_id)
+    log.info("Event stream opened", sid=client.sid, resumed=last_event_id,
+             missed=len(missed) if missed is not None else 'lost')
+    return Response(clients.stream(client, missed), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 
 # WebSocket events
 @socketio.on('connect')
 def handle_connect():
     """Handle WebSocket connection"""
-    print('Client connected')
+    log.info("Client connected", sid=request.sid)
+    clients.connect(request.sid)
     emit('connected', {'message': 'Connected to GPIO Control API'})
 
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle WebSocket disconnection"""
-    print('Client disconnected')
+    log.info("Client disconnected", sid=request.sid)
+    sensors.unsubscribe(request.sid)
+    clients.disconnect(request.sid)
 
 
 @socketio.on('start_monitoring')
@@ -220,10 +874,15 @@ def start_monitoring(data):
 
     data: {
         "pins": [pin numbers to monitor],
-        "interval": polling interval in ms (default 100)
+        "interval": polling interval in ms (default 100),
+        "overrun": "skip" | "catch_up" (default "skip")
     }
+
+    Readings are taken on fixed monotonic deadlines (monitor_scheduler.py).
+    Starting again replaces the running monitor.
     """
-    global monitoring_active, monitoring_thread
+    global monitor
+    record_event('start_monitoring', data)
 
     pins = data.get('pins', [])
     interval = data.get('interval', 100) / 1000.0  # Convert to seconds
@@ -232,56 +891,118 @@ def start_monitoring(data):
         emit('error', {'message': 'No pins specified for monitoring'})
         return
 
-    monitoring_active = True
+    def read_pins(timestamp, tick):
+        """Monitoring tick: read the pins and queue the readings"""
+        readings = []
+        for pin in pins:
+            try:
+                info = gpio.get_pin_info(pin)
+                if info:
+                    # If it's an input pin, read current value
+                    if info['mode'] == 'input':
+                        info = gpio.read_pin(pin)
+                    readings.append(info)
+            except Exception as e:
+                log.error("Error reading pin", pin=pin, error=e)
+
+        if readings:
+            clients.emit_readings({
+                'timestamp': timestamp,
+                'tick': tick,
+                'readings': readings
+            })
 
-    def monitor_loop():
-        """Background monitoring loop"""
-        while monitoring_active:
-            readings = []
-            for pin in pins:
-                try:
-                    info = gpio.get_pin_info(pin)
-                    if info:
-                        # If it's an input pin, read current value
-                        if info['mode'] == 'input':
-                            info = gpio.read_pin(pin)
-                        readings.append(info)
-                except Exception as e:
-                    print(f"Error reading pin {pin}: {e}")
-
-            if readings:
-                socketio.emit('pin_readings', {
-                    'timestamp': time.time(),
-                    'readings': readings
-                })
-
-            time.sleep(interval)
+    try:
+        scheduler = MonitorScheduler(interval, read_pins, policy=data.get('overrun', 'skip'))
+    except ValueError as e:
+        emit('error', {'message': str(e)})
+        return
 
-    monitoring_thread = threading.Thread(target=monitor_loop, daemon=True)
-    monitoring_thread.start()
+    with monitor_lock:
+        if monitor is not None:
+            monitor.stop()
+        monitor = scheduler
+        clients.monitor_interval_ms = interval * 1000
+        monitor.start()
 
-    emit('monitoring_started', {'pins': pins, 'interval': interval * 1000})
+    emit('monitoring_started', {'pins': pins, 'interval': interval * 1000,
+                                'scheduler': monitor.get_stats()})
 
 
 @socketio.on('stop_monitoring')
 def stop_monitoring():
     """Stop monitoring pins"""
-    global monitoring_active
-    monitoring_active = False
+    record_event('stop_monitoring')
+    with monitor_lock:
+        if monitor is not None:
+            monitor.stop()
     emit('monitoring_stopped', {'message': 'Monitoring stopped'})
 
 
+@socketio.on('monitoring_status')
+def monitoring_status():
+    """Reply with the monitoring scheduler statistics"""
+    record_event('monitoring_status')
+    emit('monitoring_status', get_monitoring_stats())
+
+
+@socketio.on('subscribe_sensors')
+def subscribe_sensors(data=None):
+    """
+    Stream sensor_readings to this client
+
+    data: {
+        "decimation": send every Nth sample (default 1)
+    }
+    """
+    record_event('subscribe_sensors', data)
+    try:
+        result = sensors.subscribe(request.sid, (data or {}).get('decimation', 1))
+    except ValueError as e:
+        emit('error', {'message': str(e)})
+        return
+    emit('sensors_subscribed', result)
+
+
+@socketio.on('unsubscribe_sensors')
+def unsubscribe_sensors():
+    """Stop streaming sensor_readings to this client"""
+    record_event('unsubscribe_sensors')
+    sensors.unsubscribe(request.sid)
+    emit('sensors_unsubscribed', {'message': 'Sensor stream stopped'})
+
+
+def get_monitoring_stats():
+    monitor_stats = monitor.get_stats() if monitor is not None else None
+    return {'active': bool(monitor_stats and monitor_stats['running']), 'scheduler': monitor_stats}
+
+
 if __name__ == '__main__':
+    setup_logging(level=os.environ.get('LOG_LEVEL', 'INFO'),
+                  rate=float(os.environ.get('LOG_RATE', '10')))
+    init_app(GPIOController())
+    sensors.start(interval_ms=float(os.environ.get('SENSOR_INTERVAL_MS', '50')))
+    # Alarms act on outputs, so they run first after each sample
+    sensors.source.add_stage(gpio.alarms, first=True)
+    port = int(os.environ.get('PORT', '5000'))
+
+    # Only the reloader's child process serves requests, so only it records
+    if os.environ.get('RETERMINAL_RECORD_SESSION') and is_running_from_reloader():
+        start_recording(os.environ['RETERMINAL_RECORD_SESSION'])
+
     try:
         print('Starting GPIO Control API Server...')
         print(f'Available pins: {gpio.get_available_pins()}')
         print(f'Reserved pins: {list(gpio.RESERVED_PINS)}')
-        print('Server running on http://0.0.0.0:5000')
+        print(f'Server running on http://0.0.0.0:{port}')
 
-        socketio.run(app, host='0.0.0.0', port=5000, debug=True)
+        socketio.run(app, host='0.0.0.0', port=port, debug=True, allow_unsafe_werkzeug=True)
     except KeyboardInterrupt:
         print('\nShutting down...')
         gpio.cleanup_all()
     except Exception as e:
         print(f'Error: {e}')
         gpio.cleanup_all()
+    finally:
+        if recorder is not None:
+            recorder.close()
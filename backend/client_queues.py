@@ -0,0 +1,408 @@
+"""
+Per-Client Outbound Queues
+Bounded Socket.IO send queues with per-event drop/coalesce policies
+
+socketio.emit() to all clients hands every packet to every client's
+Engine.IO queue, which is unbounded: one panel on bad Wi-Fi makes the server
+buffer everything the others receive. ClientFanout gives each client its own
+bounded queue and a sender thread that only passes packets on while the
+client's transport queue is short (it drains as fast as the socket writes).
+When a client falls behind, its queue fills and the policies decide what to
+lose:
+    coalesce     a newer event with the same key (e.g. pin_changed for the
+                 same pin) replaces the queued one, so the client still ends
+                 up with the latest state
+    drop_oldest  when the queue is full the oldest queued event is dropped
+
+Clients that keep losing more than a few pin_readings get them at a lower
+rate (every 2nd, 4th, ... reading) and are told so with a 'monitoring_rate'
+event; the rate recovers once they keep up again.
+
+Server-Sent Events clients (GET /api/events) get a queue of the same kind,
+limited to the state change events in STREAM_EVENTS, drained by their HTTP
+response instead of a sender thread. Those events are numbered and kept in a
+bounded EventLog, so a client that reconnects with Last-Event-ID is sent what
+it missed before it goes live.
+"""
+import json
+import time
+import threading
+from collections import OrderedDict, deque
+from itertools import islice
+
+import shared_modules  # noqa: F401 - makes qt5-app/src importable
+from StructuredLog import get_logger
+
+log = get_logger('api.clients')
+
+# Event -> (policy, field of the event data that forms the coalesce key)
+POLICIES = {
+    'pin_readings': ('coalesce', None),
+    'pin_configured': ('coalesce', 'pin'),
+    'pin_changed': ('coalesce', 'pin'),
+    'pin_released': ('coalesce', 'pin'),
+    'group_configured': ('coalesce', 'name'),
+    'group_changed': ('coalesce', 'name'),
+    'sensor_readings': ('coalesce', None),
+    'profile_applied': ('coalesce', None),
+    'encoder_configured': ('coalesce', 'name'),
+    'encoder_changed': ('coalesce', 'name'),
+}
+DEFAULT_POLICY = ('drop_oldest', None)
+
+# Events numbered in the event log and sent to Server-Sent Events clients
+STREAM_EVENTS = frozenset({
+    'pin_configured', 'pin_changed', 'pin_released',
+    'group_configured', 'group_changed', 'group_released',
+    'rule_fired', 'alarm_triggered', 'alarm_cleared', 'profile_applied',
+    'encoder_configured', 'encoder_released',
+})
+EVENT_LOG_SIZE = 1024     # stream events kept for Last-Event-ID resume
+KEEPALIVE_INTERVAL = 15.0 # seconds of silence before an SSE comment line
+RETRY_MS = 2000           # SSE reconnect delay suggested to clients
+
+MAX_DEPTH = 64            # queued events per client
+TRANSPORT_LIMIT = 8       # Engine.IO packets in flight before a client counts as stalled
+STALL_WAIT = 0.01         # seconds between transport checks while stalled
+
+HEALTH_PERIOD = 1.0       # seconds per health evaluation
+LOSS_TOLERANCE = 0.1      # fraction of pin_readings a period may lose and still count as clean
+DOWNGRADE_AFTER = 3       # consecutive lossy periods before halving the reading rate
+UPGRADE_AFTER = 10        # consecutive clean periods before doubling it again
+MAX_RATE_DIVISOR = 16
+
+
+class EventLog:
+    """
+    Bounded log of numbered stream events
+
+    Event ids are "<epoch>-<seq>": seq counts events, epoch identifies this
+    log, so ids from before a server restart are not mistaken for new ones.
+    """
+
+    def __init__(self, size=EVENT_LOG_SIZE):
+        self.epoch = format(time.time_ns() // 1000000, 'x')
+        self.seq = 0
+        self._entries = deque(maxlen=size)  # (seq, event, data), oldest first
+
+    @property
+    def last_id(self):
+        return f"{self.epoch}-{self.seq}"
+
+    def append(self, event, data):
+        """Number an event and keep it; returns its id"""
+        self.seq += 1
+        self._entries.append((self.seq, event, data))
+        return f"{self.epoch}-{self.seq}"
+
+    def since(self, event_id):
+        """
+        Events after an event id
+
+        Returns:
+            [(id, event, data)], or None if the events after it are not all
+            in the log (id from another epoch, unknown or too old)
+        """
+        epoch, _, seq = event_id.partition('-')
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > self.seq:
+            return None
+        seq = int(seq)
+        oldest = self._entries[0][0] if self._entries else self.seq + 1
+        if seq < oldest - 1:
+            return None
+        return [(f"{self.epoch}-{n}", event, data)
+                for n, event, data in islice(self._entries, seq - oldest + 1, None)]
+
+
+def format_sse(event, data, event_id=None):
+    """Encode one Server-Sent Events message"""
+    lines = f"id: {event_id}\n" if event_id else ''
+    return f"{lines}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class ClientQueue:
+    """Bounded outbound queue and counters of one Socket.IO or SSE client"""
+
+    def __init__(self, sid, max_depth=MAX_DEPTH, transport='socketio', events=None):
+        """
+        Args:
+            sid: Client id (Socket.IO sid, or a generated one for SSE)
+            max_depth: Queued events
+            transport: 'socketio' or 'sse'
+            events: Events the client receives (None = all)
+        """
+        self.sid = sid
+        self.max_depth = max_depth
+        self.transport = transport
+        self.events = events
+        self.connected_at = time.time()
+
+        self._items = OrderedDict()  # {key: (event, data, event id)}, oldest first
+        self._seq = 0
+        self.cond = threading.Condition()
+        self.closed = False
+
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.stalls = 0
+        self.high_water = 0
+        self.rate_divisor = 1
+        self.readings_offered = 0  # pin_readings queued since the last health check
+        self.readings_lost = 0     # of which dropped or coalesced
+        self.lossy_periods = 0
+        self.clean_periods = 0
+
+    def put(self, event, data, event_id=None):
+        """Queue an event, coalescing or dropping per its policy"""
+        if self.events is not None and event not in self.events:
+            return
+        policy, field = POLICIES.get(event, DEFAULT_POLICY)
+        with self.cond:
+            if self.closed:
+                return
+            if event == 'pin_readings':
+                self.readings_offered += 1
+            if policy == 'coalesce':
+                key = (event, data.get(field) if field and isinstance(data, dict) else None)
+                if key in self._items:
+                    del self._items[key]
+                    self.coalesced += 1
+                    if event == 'pin_readings':
+                        self.readings_lost += 1
+            else:
+                self._seq += 1
+                key = ('#', self._seq)
+            self._items[key] = (event, data, event_id)
+
+            if len(self._items) > self.max_depth:
+                _, (dropped_event, _, _) = self._items.popitem(last=False)
+                self.dropped += 1
+                if dropped_event == 'pin_readings':
+                    self.readings_lost += 1
+
+            self.high_water = max(self.high_water, len(self._items))
+            self.cond.notify()
+
+    def pop(self):
+        """Remove and return the oldest (event, data, event id), or None"""
+        with self.cond:
+            if not self._items:
+                return None
+            return self._items.popitem(last=False)[1]
+
+    def wait(self, timeout):
+        """Wait until an event is queued or the client is closed"""
+        with self.cond:
+            if not self._items and not self.closed:
+                self.cond.wait(timeout)
+            return bool(self._items)
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self._items.clear()
+            self.cond.notify()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class ClientFanout:
+    """Delivers broadcast events to every client through its own bounded queue"""
+
+    def __init__(self, socketio, max_depth=MAX_DEPTH, transport_limit=TRANSPORT_LIMIT):
+        """
+        Initialize fanout
+
+        Args:
+            socketio: flask_socketio.SocketIO used to send to single clients
+            max_depth: Queued events per client
+            transport_limit: Engine.IO packets a client may have in flight
+        """
+        self.socketio = socketio
+        self.max_depth = max_depth
+        self.transport_limit = transport_limit
+        self.monitor_interval_ms = None  # base pin_readings interval, for rate notices
+
+        self.log = EventLog()
+
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._readings_tick = 0
+        self._streams = 0
+
+    def connect(self, sid):
+        """Register a client and start its sender thread"""
+        client = ClientQueue(sid, self.max_depth)
+        with self._lock:
+            self._clients[sid] = client
+        threading.Thread(target=self._sender, args=(client,),
+                         name=f'client-{sid[:8]}', daemon=True).start()
+
+    def disconnect(self, sid):
+        with self._lock:
+            client = self._clients.pop(sid, None)
+        if client is not None:
+            client.close()
+
+    def open_stream(self, events=None, last_event_id=None):
+        """
+        Register a Server-Sent Events client
+
+        Args:
+            events: Stream events to send (None = all of STREAM_EVENTS)
+            last_event_id: Id of the last event the client received, to
+                resume after it
+
+        Returns:
+            (client, missed): missed is the [(id, event, data)] to send
+            before live events, or None if they are no longer in the log
+        """
+        events = STREAM_EVENTS if events is None else STREAM_EVENTS & frozenset(events)
+        with self._lock:
+            self._streams += 1
+            client = ClientQueue(f'sse-{self._streams}', self.max_depth,
+                                 transport='sse', events=events)
+            # Same lock as emit(): every event is either in missed or queued, never both
+            self._clients[client.sid] = client
+            missed = self.log.since(last_event_id) if last_event_id else []
+        if missed:
+            missed = [entry for entry in missed if entry[1] in events]
+        return client, missed
+
+    def stream(self, client, missed, keepalive=KEEPALIVE_INTERVAL):
+        """
+        Server-Sent Events body of a client from open_stream(); runs in the
+        response's thread, blocking on the client's queue between events
+
+        Yields:
+            Encoded SSE messages; a 'resync' event (with the current event id)
+            first if missed events were lost, after which the client should
+            re-read the state it tracks
+        """
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            if missed is None:
+                yield format_sse('resync', {'last_event_id': self.log.last_id}, self.log.last_id)
+            else:
+                for event_id, event, data in missed:
+                    yield format_sse(event, data, event_id)
+                    client.sent += 1
+            while not client.closed:
+                if not client.wait(keepalive):
+                    if not client.closed:
+                        yield ": keepalive\n\n"
+                    continue
+                item = client.pop()
+                if item is not None:
+                    yield format_sse(*item)
+                    client.sent += 1
+        finally:
+            self.disconnect(client.sid)
+
+    def emit(self, event, data):
+        """Queue an event for every client (drop-in for socketio.emit broadcasts)"""
+        with self._lock:
+            event_id = self.log.append(event, data) if event in STREAM_EVENTS else None
+            clients = list(self._clients.values())
+        for client in clients:
+            client.put(event, data, event_id)
+
+    def send(self, sid, event, data):
+        """Queue an event for one client"""
+        client = self._clients.get(sid)
+        if client is not None:
+            client.put(event, data)
+
+    def emit_readings(self, data):
+        """Queue pin_readings, skipping clients whose rate has been lowered"""
+        self._readings_tick += 1
+        with self._lock:
+            clients = list(self._clients.values())
+        for client in clients:
+            if self._readings_tick % client.rate_divisor == 0:
+                client.put('pin_readings', data)
+
+    def get_stats(self):
+        """Per-client queue depth, drop counters and reading rate"""
+        with self._lock:
+            clients = list(self._clients.values())
+        now = time.time()
+        return [{
+            'sid': client.sid,
+            'transport': client.transport,
+            'connected_s': round(now - client.connected_at, 1),
+            'depth': len(client),
+            'high_water': client.high_water,
+            'max_depth': client.max_depth,
+            'transport_backlog': self._backlog(client.sid) if client.transport == 'socketio' else 0,
+            'sent': client.sent,
+            'dropped': client.dropped,
+            'coalesced': client.coalesced,
+            'stalls': client.stalls,
+            'rate_divisor': client.rate_divisor,
+            'monitoring_interval_ms': (self.monitor_interval_ms * client.rate_divisor
+                                       if self.monitor_interval_ms else None),
+        } for client in clients]
+
+    def _backlog(self, sid):
+        """Packets waiting in the client's Engine.IO queue (0 if unknown)"""
+        try:
+            server = self.socketio.server
+            eio_sid = server.manager.eio_sid_from_sid(sid, '/')
+            return server.eio.sockets[eio_sid].queue.qsize()
+        except (AttributeError, KeyError, TypeError):
+            return 0
+
+    def _sender(self, client):
+        next_check = time.monotonic() + HEALTH_PERIOD
+        while not client.closed:
+            if time.monotonic() >= next_check:
+                self._check_health(client)
+                next_check = time.monotonic() + HEALTH_PERIOD
+
+            if not client.wait(HEALTH_PERIOD):
+                continue
+
+            if self._backlog(client.sid) >= self.transport_limit:
+                # The socket is not draining; let the queue absorb (and shed) events
+                client.stalls += 1
+                time.sleep(STALL_WAIT)
+                continue
+
+            item = client.pop()
+            if item is None:
+                continue
+            try:
+                self.socketio.emit(item[0], item[1], to=client.sid)
+                client.sent += 1
+            except Exception as e:
+                log.warning("Send to client failed", sid=client.sid, event=item[0], error=e)
+
+    def _check_health(self, client):
+        """Lower the reading rate of clients that keep losing readings, restore it when they recover"""
+        with client.cond:
+            lost, client.readings_lost = client.readings_lost, 0
+            offered, client.readings_offered = client.readings_offered, 0
+
+        if lost > offered * LOSS_TOLERANCE:
+            client.lossy_periods += 1
+            client.clean_periods = 0
+        else:
+            client.clean_periods += 1
+            client.lossy_periods = 0
+
+        divisor = client.rate_divisor
+        if client.lossy_periods >= DOWNGRADE_AFTER and divisor < MAX_RATE_DIVISOR:
+            divisor *= 2
+        elif client.clean_periods >= UPGRADE_AFTER and divisor > 1:
+            divisor //= 2
+        else:
+            return
+
+        client.rate_divisor = divisor
+        client.lossy_periods = client.clean_periods = 0
+        log.info("Client reading rate changed", sid=client.sid, divisor=divisor, lost=lost)
+        interval = self.monitor_interval_ms * divisor if self.monitor_interval_ms else None
+        client.put('monitoring_rate', {'rate_divisor': divisor, 'interval': interval})
@@ -0,0 +1,449 @@
+"""
+Fleet Gateway Core
+Keeps persistent connections to many backend instances (app.py) and
+aggregates them for a supervisory dashboard
+
+- Each backend is reached through one requests.Session with a small pool of
+  keep-alive connections, so REST calls never pay a TCP handshake after the
+  first, and one Socket.IO client that stays connected and reconnects.
+- Batched commands fan out to all (or selected) backends concurrently; the
+  commands for one backend run in order over its pool.
+- Events from every backend (pin_readings, pin_changed, rule_fired, ...) are
+  merged into one feed, flushed as batches of {node, event, data} so a busy
+  fleet costs the dashboard one message per flush interval, not one per
+  backend event. Within a flush only the latest pin_readings of each
+  backend is kept.
+- Fleet-wide /api/pins snapshots are cached per backend and refreshed
+  concurrently when stale. A backend's entry is invalidated as soon as it
+  reports a configuration change or receives a command.
+
+Flask-independent: gateway.py exposes it over REST and Socket.IO.
+"""
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import socketio
+from requests.adapters import HTTPAdapter
+
+import shared_modules  # noqa: F401 - makes qt5-app/src importable
+from LatencyStats import LatencyStats
+from StructuredLog import get_logger
+
+log = get_logger('fleet')
+
+COMMAND_METHODS = ('GET', 'POST', 'DELETE')
+
+# Backend events that change what /api/pins returns
+CONFIG_EVENTS = {
+    'pin_configured', 'pin_released', 'pin_changed',
+    'group_configured', 'group_changed', 'group_released', 'rule_fired',
+    'profile_applied', 'encoder_configured', 'encoder_released',
+}
+
+# Backend events forwarded into the merged feed
+FEED_EVENTS = CONFIG_EVENTS | {'pin_readings', 'monitoring_started', 'monitoring_stopped', 'error'}
+
+
+def parse_nodes(spec):
+    """
+    Parse a node list such as "rt1=http://10.0.0.21:5000,rt2=http://10.0.0.22:5000"
+
+    Entries without a name are named after their host and port.
+
+    Returns:
+        {name: base url}
+
+    Raises:
+        ValueError: If an entry is not a http(s) URL or a name repeats
+    """
+    nodes = {}
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, url = entry.partition('=') if '=' in entry.split('://')[0] else ('', '', entry)
+        url = url.rstrip('/')
+        if not url.startswith(('http://', 'https://')):
+            raise ValueError(f"Node URL must start with http:// or https://, got {url!r}")
+        name = name or url.split('://', 1)[1]
+        if name in nodes:
+            raise ValueError(f"Duplicate node name {name!r}")
+        nodes[name] = url
+    return nodes
+
+
+class BackendNode:
+    """One backend instance: pooled REST session and a persistent Socket.IO client"""
+
+    def __init__(self, name, url, pool_size=4, timeout=5.0, on_event=None, on_state=None):
+        """
+        Initialize node
+
+        Args:
+            name: Node name used in the fleet feed and results
+            url: Backend base URL (http://host:port)
+            pool_size: Keep-alive connections kept open to the backend
+            timeout: REST request timeout in seconds
+            on_event: Callable(node, event, data) for every backend event
+            on_state: Callable(node, connected) when the Socket.IO link changes
+        """
+        self.name = name
+        self.url = url
+        self.timeout = timeout
+        self.on_event = on_event
+        self.on_state = on_state
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.sio = socketio.Client(reconnection=True, reconnection_delay=1,
+                                   reconnection_delay_max=10, logger=False)
+        self.sio.on('connect', self._on_connect)
+        self.sio.on('disconnect', self._on_disconnect)
+        self.sio.on('*', self._on_any)
+
+        self.connected = False
+        self.last_error = None
+        self.requests = 0
+        self.failures = 0
+        self.latency = LatencyStats(window=256)
+        self._closed = threading.Event()
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # REST
+    # ------------------------------------------------------------------
+
+    def request(self, method, path, body=None):
+        """
+        Run one REST call over the pooled session
+
+        Returns:
+            {"status": HTTP status or None, "body": decoded JSON or None,
+             "error": message (only when the call failed)}
+        """
+        start = time.perf_counter()
+        self.requests += 1
+        try:
+            response = self.session.request(method, self.url + path, json=body, timeout=self.timeout)
+        except requests.RequestException as e:
+            self.failures += 1
+            self.last_error = str(e)
+            return {'status': None, 'body': None, 'error': str(e)}
+        self.latency.add(time.perf_counter() - start)
+
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        result = {'status': response.status_code, 'body': data}
+        if response.status_code >= 400:
+            self.failures += 1
+            result['error'] = data.get('error') if isinstance(data, dict) else response.reason
+        return result
+
+    # ------------------------------------------------------------------
+    # Socket.IO
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Connect the Socket.IO client in the background, retrying until closed"""
+        self._thread = threading.Thread(target=self._run, name=f'fleet-{self.name}', daemon=True)
+        self._thread.start()
+
+    def emit(self, event, data=None):
+        """Send an event to the backend; returns False if it is not connected"""
+        if not self.connected:
+            return False
+        try:
+            self.sio.emit(event, data)
+            return True
+        except socketio.exceptions.SocketIOError as e:
+            self.last_error = str(e)
+            return False
+
+    def close(self):
+        self._closed.set()
+        try:
+            self.sio.disconnect()
+        except Exception:
+            pass
+        self.session.close()
+
+    def info(self):
+        """Node status for GET /api/fleet/nodes"""
+        return {
+            'name': self.name,
+            'url': self.url,
+            'connected': self.connected,
+            'requests': self.requests,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'latency': self.latency.summary(digits=2),
+        }
+
+    def _run(self):
+        # socketio.Client reconnects by itself once connected; the first
+        # connection is retried here so the gateway can start before its nodes
+        delay = 1.0
+        while not self._closed.is_set():
+            try:
+                self.sio.connect(self.url, transports=['websocket'], wait_timeout=self.timeout)
+            except socketio.exceptions.ConnectionError as e:
+                self.last_error = str(e)
+                self._closed.wait(delay)
+                delay = min(delay * 2, 10.0)
+                continue
+            self.sio.wait()
+            return
+
+    def _on_connect(self):
+        self.connected = True
+        log.info("Node connected", node=self.name, url=self.url)
+        if self.on_state:
+            self.on_state(self, True)
+
+    def _on_disconnect(self, *args):
+        self.connected = False
+        log.warning("Node disconnected", node=self.name)
+        if self.on_state:
+            self.on_state(self, False)
+
+    def _on_any(self, event, data=None):
+        if self.on_event:
+            self.on_event(self, event, data)
+
+
+class FleetGateway:
+    """Aggregates a fleet of backends: fan-out commands, merged feed, cached snapshots"""
+
+    def __init__(self, nodes, emit_feed=None, snapshot_ttl=2.0, feed_interval=0.05,
+                 pool_size=4, timeout=5.0, max_workers=32):
+        """
+        Initialize gateway
+
+        Args:
+            nodes: {name: base url}
+            emit_feed: Callable(events) receiving each merged feed batch, a
+                list of {"node", "event", "data"} in arrival order
+            snapshot_ttl: Seconds a cached /api/pins snapshot stays fresh
+            feed_interval: Seconds between merged feed flushes
+            pool_size: Keep-alive connections per backend
+            timeout: REST timeout per request in seconds
+            max_workers: Threads running fan-out requests concurrently
+        """
+        self.nodes = {
+            name: BackendNode(name, url, pool_size=pool_size, timeout=timeout,
+                              on_event=self._on_node_event, on_state=self._on_node_state)
+            for name, url in nodes.items()
+        }
+        self.emit_feed = emit_feed
+        self.snapshot_ttl = snapshot_ttl
+        self.feed_interval = feed_interval
+
+        self._executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(self.nodes) or 1)),
+                                            thread_name_prefix='fleet-request')
+
+        # {name: {"pins": ..., "fetched": monotonic, "generation": ..., "error": ...}}
+        self._snapshots = {}
+        self._snapshot_locks = {name: threading.Lock() for name in self.nodes}
+        # Bumped by invalidate(); a snapshot is stale once its node's generation moved on
+        self._generations = dict.fromkeys(self.nodes, 0)
+
+        self._feed = []
+        self._feed_readings = {}  # {name: index of its pin_readings in _feed}
+        self._feed_lock = threading.Lock()
+        self._running = threading.Event()
+        self._flush_thread = None
+
+        # Monitoring requested by gateway clients, replayed to nodes that (re)connect
+        self._monitoring = None
+
+    def start(self):
+        """Connect to every node and start flushing the merged feed"""
+        self._running.set()
+        for node in self.nodes.values():
+            node.start()
+        self._flush_thread = threading.Thread(target=self._flush_loop, name='fleet-feed', daemon=True)
+        self._flush_thread.start()
+        log.info("Fleet gateway started", nodes=len(self.nodes))
+
+    def stop(self):
+        self._running.clear()
+        for node in self.nodes.values():
+            node.close()
+        self._executor.shutdown(wait=False)
+
+    def get_nodes(self):
+        return [node.info() for node in self.nodes.values()]
+
+    def _select(self, names):
+        """Resolve a node name list (None = all nodes)"""
+        if names is None:
+            return list(self.nodes.values())
+        unknown = [name for name in names if name not in self.nodes]
+        if unknown:
+            raise ValueError(f"Unknown nodes: {', '.join(map(str, unknown))}")
+        return [self.nodes[name] for name in names]
+
+    # ------------------------------------------------------------------
+    # Fan-out commands
+    # ------------------------------------------------------------------
+
+    def fan_out(self, commands, nodes=None):
+        """
+        Run a batch of REST commands on many backends at once
+
+        Args:
+            commands: [{"method": "POST", "path": "/api/pins/17/write", "body": {...}}, ...]
+                run in order on each backend
+            nodes: Node names (None = all nodes)
+
+        Returns:
+            {name: [result per command]}, results as in BackendNode.request()
+
+        Raises:
+            ValueError: If a command or node name is invalid
+        """
+        if not isinstance(commands, list) or not commands:
+            raise ValueError("At least one command is required")
+        batch = []
+        for command in commands:
+            method = str(command.get('method', 'GET')).upper() if isinstance(command, dict) else None
+            path = command.get('path') if isinstance(command, dict) else None
+            if method not in COMMAND_METHODS:
+                raise ValueError(f"Command method must be one of {', '.join(COMMAND_METHODS)}")
+            if not isinstance(path, str) or not path.startswith('/api/'):
+                raise ValueError("Command path must start with /api/")
+            batch.append((method, path, command.get('body')))
+
+        targets = self._select(nodes)
+        futures = {node.name: self._executor.submit(self._run_batch, node, batch) for node in targets}
+        return {name: future.result() for name, future in futures.items()}
+
+    def _run_batch(self, node, batch):
+        results = [node.request(method, path, body) for method, path, body in batch]
+        if any(method != 'GET' for method, _, _ in batch):
+            self.invalidate(node.name)
+        return results
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+
+    def get_pins(self, max_age=None, nodes=None):
+        """
+        Get every node's /api/pins, from cache where fresh enough
+
+        Stale nodes are refreshed concurrently; concurrent callers share one
+        refresh per node.
+
+        Args:
+            max_age: Oldest acceptable snapshot in seconds (None = snapshot_ttl)
+            nodes: Node names (None = all nodes)
+
+        Returns:
+            {name: {"pins": ..., "age_ms": ..., "error": ...}}
+        """
+        max_age = self.snapshot_ttl if max_age is None else max_age
+        targets = self._select(nodes)
+        futures = {node.name: self._executor.submit(self._snapshot, node, max_age) for node in targets}
+
+        result = {}
+        for name, future in futures.items():
+            snapshot = future.result()
+            now = time.monotonic()
+            entry = {'pins': snapshot['pins'], 'age_ms': round((now - snapshot['fetched']) * 1000, 1)}
+            if snapshot.get('error'):
+                entry['error'] = snapshot['error']
+            result[name] = entry
+        return result
+
+    def invalidate(self, name):
+        """
+        Mark a node's cached snapshot as stale
+
+        Also covers a refresh already in flight: its GET may have been
+        answered before the change, so its snapshot is stored as stale.
+        """
+        if name in self._generations:
+            self._generations[name] += 1
+
+    def _snapshot(self, node, max_age):
+        with self._snapshot_locks[node.name]:
+            cached = self._snapshots.get(node.name)
+            if (cached and cached['generation'] == self._generations[node.name]
+                    and time.monotonic() - cached['fetched'] <= max_age):
+                return cached
+
+            # Read before the request: an invalidate() during it leaves the result stale
+            generation = self._generations[node.name]
+            result = node.request('GET', '/api/pins')
+            snapshot = {'pins': result['body'], 'fetched': time.monotonic(), 'generation': generation}
+            if result.get('error'):
+                # Keep serving the last good pins, flagged with the error
+                snapshot['pins'] = cached['pins'] if cached else None
+                snapshot['error'] = result['error']
+            self._snapshots[node.name] = snapshot
+            return snapshot
+
+    # ------------------------------------------------------------------
+    # Monitoring and the merged feed
+    # ------------------------------------------------------------------
+
+    def start_monitoring(self, pins, interval=100, nodes=None):
+        """
+        Start pin monitoring on the selected nodes
+
+        Nodes that connect later (or reconnect) get the same request.
+
+        Returns:
+            Names of the nodes the request was sent to
+        """
+        targets = self._select(nodes)
+        self._monitoring = {'pins': pins, 'interval': interval,
+                            'nodes': None if nodes is None else set(nodes)}
+        return [node.name for node in targets
+                if node.emit('start_monitoring', {'pins': pins, 'interval': interval})]
+
+    def stop_monitoring(self):
+        self._monitoring = None
+        for node in self.nodes.values():
+            node.emit('stop_monitoring')
+
+    def _on_node_state(self, node, connected):
+        self.invalidate(node.name)
+        monitoring = self._monitoring
+        if connected and monitoring and (monitoring['nodes'] is None or node.name in monitoring['nodes']):
+            node.emit('start_monitoring', {'pins': monitoring['pins'], 'interval': monitoring['interval']})
+        self._queue(node.name, 'node_connected' if connected else 'node_disconnected', None)
+
+    def _on_node_event(self, node, event, data):
+        if event in CONFIG_EVENTS:
+            self.invalidate(node.name)
+        if event in FEED_EVENTS:
+            self._queue(node.name, event, data)
+
+    def _queue(self, name, event, data):
+        entry = {'node': name, 'event': event, 'data': data}
+        with self._feed_lock:
+            if event == 'pin_readings':
+                index = self._feed_readings.get(name)
+                if index is not None:
+                    self._feed[index] = entry
+                    return
+                self._feed_readings[name] = len(self._feed)
+            self._feed.append(entry)
+
+    def _flush_loop(self):
+        while self._running.is_set():
+            time.sleep(self.feed_interval)
+            with self._feed_lock:
+                batch, self._feed = self._feed, []
+                self._feed_readings = {}
+            if batch and self.emit_feed:
+                try:
+                    self.emit_feed(batch)
+                except Exception as e:
+                    log.error("Feed emit failed", error=e)
@@ -0,0 +1,116 @@
+"""
+Frontend Static Files
+Serves the React production build (frontend/build) from the API server
+
+- Content-hashed assets (static/js/main.3f2a9c1e.js) never change under the
+  same name, so they are cached for a year as immutable and never revalidated.
+- index.html and other unhashed files are sent with no-cache and a strong
+  ETag, so reopening the UI costs one conditional request answered with 304.
+- When the client accepts brotli or gzip and the build has a precompressed
+  sibling (name.br / name.gz, written by frontend/scripts/compress-build.js),
+  that file is sent as is with Content-Encoding. Nothing is compressed at
+  request time.
+- Unknown paths without a file extension get index.html (client-side routes).
+"""
+import os
+import re
+import mimetypes
+
+from flask import abort, request, send_file
+from werkzeug.security import safe_join
+
+import shared_modules  # noqa: F401 - makes qt5-app/src importable
+from StructuredLog import get_logger
+
+log = get_logger('api.frontend')
+
+DEFAULT_BUILD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 '..', 'frontend', 'build')
+
+# name.<hex hash>.ext or name.<hex hash>.chunk.ext, as produced by react-scripts
+HASHED_ASSET = re.compile(r'\.[0-9a-f]{8,}(\.chunk)?\.[A-Za-z0-9]+$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# (Accept-Encoding token, file suffix), most preferred first
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+def _select_variant(path, stat):
+    """
+    Pick the best precompressed variant the client accepts
+
+    Returns:
+        (path to send, content encoding or None)
+    """
+    for token, suffix in ENCODINGS:
+        if request.accept_encodings[token] <= 0:
+            continue
+        try:
+            variant_stat = os.stat(path + suffix)
+        except OSError:
+            continue
+        # A variant left over from a previous build is older than the original
+        if variant_stat.st_mtime + 1 >= stat.st_mtime:
+            return path + suffix, token
+    return path, None
+
+
+def _send(path):
+    """Send a build file with its cache policy and best encoding"""
+    stat = os.stat(path)
+    send_path, encoding = _select_variant(path, stat)
+
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    # Strong validator per representation: size and mtime of the original
+    etag = f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+    if encoding:
+        etag += f"-{encoding}"
+
+    # send_file marks the response no-cache when max_age is None
+    hashed = HASHED_ASSET.search(os.path.basename(path)) is not None
+    # download_name: the disposition names the requested file, not the .gz/.br on disk
+    response = send_file(send_path, mimetype=mimetype, etag=etag, conditional=True,
+                         download_name=os.path.basename(path), last_modified=stat.st_mtime,
+                         max_age=IMMUTABLE_MAX_AGE if hashed else None)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+
+    response.cache_control.public = True
+    if hashed:
+        response.cache_control.immutable = True
+    return response
+
+
+def register_frontend(app, build_dir=None):
+    """
+    Serve the frontend build from `app`
+
+    Args:
+        app: Flask application
+        build_dir: Build directory (default FRONTEND_BUILD_DIR or ../frontend/build)
+
+    Returns:
+        bool: True if a build was found and is being served
+    """
+    build_dir = os.path.abspath(build_dir or os.environ.get('FRONTEND_BUILD_DIR', DEFAULT_BUILD_DIR))
+    index_path = os.path.join(build_dir, 'index.html')
+    if not os.path.isfile(index_path):
+        log.info("No frontend build found, not serving the UI", build_dir=build_dir)
+        return False
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def frontend(path):
+        if path.startswith('api/'):
+            abort(404)
+
+        full_path = safe_join(build_dir, path) if path else index_path
+        if full_path is None or not os.path.isfile(full_path):
+            if os.path.splitext(path)[1]:
+                abort(404)
+            full_path = index_path
+        return _send(full_path)
+
+    log.info("Serving frontend", build_dir=build_dir)
+    return True
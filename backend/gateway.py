@@ -0,0 +1,198 @@
+"""
+Fleet Gateway Server
+One REST and Socket.IO endpoint in front of many GPIO backends (app.py)
+
+A supervisory dashboard connects here once instead of to every reTerminal.
+The gateway keeps pooled persistent connections to each backend (fleet.py),
+fans out batched commands, merges the backends' event streams into one
+'fleet_events' feed and caches fleet-wide pin snapshots.
+
+Run with:
+    python3 gateway.py --nodes rt1=http://10.0.0.21:5000,rt2=http://10.0.0.22:5000
+or set FLEET_NODES to the same list.
+"""
+from flask import Flask, jsonify, request
+from flask_cors import CORS
+from flask_socketio import SocketIO, emit
+import os
+import argparse
+
+from fleet import FleetGateway, parse_nodes
+
+import shared_modules  # noqa: F401 - makes qt5-app/src importable
+from StructuredLog import get_logger, setup_logging
+
+log = get_logger('gateway')
+
+app = Flask(__name__, static_folder=None)
+CORS(app)
+# Backend requests and Socket.IO clients block, so the gateway runs on threads
+socketio = SocketIO(cors_allowed_origins="*", async_mode='threading')
+
+# Fleet being served, set by init_gateway()
+fleet = None
+
+
+def init_gateway(nodes, **options):
+    """
+    Create the fleet gateway for a set of backends and bind the server to it
+
+    Args:
+        nodes: {name: backend base url}
+        options: FleetGateway options (snapshot_ttl, feed_interval, pool_size, ...)
+
+    Returns:
+        (app, socketio)
+    """
+    global fleet
+    fleet = FleetGateway(nodes, emit_feed=emit_fleet_events, **options)
+    socketio.init_app(app)
+    fleet.start()
+    return app, socketio
+
+
+def emit_fleet_events(events):
+    """Feed listener: send one merged batch of backend events to all clients"""
+    socketio.emit('fleet_events', {'events': events})
+
+
+@app.route('/api/health', methods=['GET'])
+def health_check():
+    connected = sum(1 for node in fleet.nodes.values() if node.connected)
+    return jsonify({'status': 'ok', 'nodes': len(fleet.nodes), 'connected': connected})
+
+
+@app.route('/api/fleet/nodes', methods=['GET'])
+def get_nodes():
+    """Get every backend with its connection state and REST latency"""
+    return jsonify({'nodes': fleet.get_nodes()})
+
+
+@app.route('/api/fleet/pins', methods=['GET'])
+def get_fleet_pins():
+    """
+    Get /api/pins of every backend
+
+    Query parameters:
+        max_age: Oldest acceptable cached snapshot in ms (default: snapshot TTL;
+            0 refetches from every backend)
+        nodes: Comma-separated node names (default: all)
+    """
+    try:
+        max_age = request.args.get('max_age', type=float)
+        nodes = request.args.get('nodes')
+        result = fleet.get_pins(max_age=None if max_age is None else max_age / 1000.0,
+                                nodes=nodes.split(',') if nodes else None)
+        return jsonify({'nodes': result})
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Internal error: {str(e)}'}), 500
+
+
+@app.route('/api/fleet/commands', methods=['POST'])
+def run_commands():
+    """
+    Run a batch of commands on many backends concurrently
+
+    Request body:
+    {
+        "nodes": ["rt1", "rt2"],    (optional, default: all)
+        "commands": [
+            {"method": "POST", "path": "/api/pins/17/config", "body": {"mode": "output"}},
+            {"method": "POST", "path": "/api/pins/17/write", "body": {"value": 1}}
+        ]
+    }
+
+    Commands run in order on each backend. The response has one result
+    ({"status", "body", "error"}) per command per node.
+    """
+    try:
+        data = request.get_json() or {}
+        results = fleet.fan_out(data.get('commands'), nodes=data.get('nodes'))
+        return jsonify({'results': results})
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': f'Internal error: {str(e)}'}), 500
+
+
+# WebSocket events
+@socketio.on('connect')
+def handle_connect():
+    """Handle WebSocket connection"""
+    log.info("Client connected", sid=request.sid)
+    emit('connected', {'message': 'Connected to GPIO fleet gateway', 'nodes': fleet.get_nodes()})
+
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    """Handle WebSocket disconnection"""
+    log.info("Client disconnected", sid=request.sid)
+
+
+@socketio.on('start_monitoring')
+def start_monitoring(data):
+    """
+    Start monitoring pins on the backends
+
+    data: {
+        "pins": [pin numbers to monitor],
+        "interval": polling interval in ms (default 100),
+        "nodes": [node names] (optional, default: all)
+    }
+
+    Readings arrive in the merged 'fleet_events' feed.
+    """
+    pins = data.get('pins', [])
+    interval = data.get('interval', 100)
+
+    if not pins:
+        emit('error', {'message': 'No pins specified for monitoring'})
+        return
+
+    try:
+        started = fleet.start_monitoring(pins, interval, nodes=data.get('nodes'))
+    except ValueError as e:
+        emit('error', {'message': str(e)})
+        return
+    emit('monitoring_started', {'pins': pins, 'interval': interval, 'nodes': started})
+
+
+@socketio.on('stop_monitoring')
+def stop_monitoring():
+    """Stop monitoring on all backends"""
+    fleet.stop_monitoring()
+    emit('monitoring_stopped', {'message': 'Monitoring stopped'})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="GPIO fleet gateway")
+    parser.add_argument('--nodes', default=os.environ.get('FLEET_NODES', ''),
+                        help="name=url list, e.g. rt1=http://10.0.0.21:5000,rt2=http://10.0.0.22:5000")
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', '5100')))
+    parser.add_argument('--snapshot-ttl', type=float, default=2.0, help="Seconds pin snapshots are cached")
+    parser.add_argument('--feed-interval', type=float, default=50, help="Merged feed flush interval in ms")
+    parser.add_argument('--pool-size', type=int, default=4, help="Keep-alive connections per backend")
+    args = parser.parse_args()
+
+    setup_logging(level=os.environ.get('LOG_LEVEL', 'INFO'),
+                  rate=float(os.environ.get('LOG_RATE', '10')))
+
+    nodes = parse_nodes(args.nodes)
+    if not nodes:
+        parser.error("No backends given (--nodes or FLEET_NODES)")
+
+    init_gateway(nodes, snapshot_ttl=args.snapshot_ttl,
+                 feed_interval=args.feed_interval / 1000.0, pool_size=args.pool_size)
+
+    try:
+        print(f'Starting GPIO fleet gateway for {len(nodes)} backends...')
+        print(f'Server running on http://0.0.0.0:{args.port}')
+        socketio.run(app, host='0.0.0.0', port=args.port, allow_unsafe_werkzeug=True)
+    except KeyboardInterrupt:
+        print('\nShutting down...')
+    finally:
+        fleet.stop()
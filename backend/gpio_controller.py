@@ -2,15 +2,34 @@
 GPIO Controller - Hardware abstraction layer for Raspberry Pi GPIO
 Provides safe, high-level interface for GPIO operations
 """
+import time
 import platform
 from typing import Dict, List, Optional
-from dataclasses import dataclass
 from enum import Enum
 
+import shared_modules  # noqa: F401 - makes qt5-app/src importable
+from GPIOSimulator import GPIOSimulator, simulator_requested
+from PinGroups import GroupIO, PinGroup
+from PinProfiles import apply_changes, normalise_profile, plan_profile
+from PinTable import PinTable
+from PulseMeter import DEFAULT_WINDOW_MS, PulseMeter
+from QuadratureEncoder import EncoderBank
+from RuleEngine import RuleEngine
+from SensorAlarms import SensorAlarms
+from SoftwarePWM import SoftwarePWMEngine
+from StructuredLog import get_logger
+
+log = get_logger('gpio')
+
 # Import RPi.GPIO only on Raspberry Pi
 IS_RASPBERRY_PI = platform.machine().startswith('arm') or platform.machine().startswith('aarch')
 
-if IS_RASPBERRY_PI:
+# RETERMINAL_GPIO=sim runs against the GPIO simulator on any machine
+SIMULATED = simulator_requested()
+
+if SIMULATED:
+    GPIO = GPIOSimulator()
+elif IS_RASPBERRY_PI:
     import RPi.GPIO as GPIO
 else:
     # Mock GPIO for development on non-Pi systems
@@ -82,17 +101,6 @@ class PullMode(str, Enum):
     DOWN = "down"
 
 
-@dataclass
-class PinConfig:
-    """Configuration for a single GPIO pin"""
-    pin: int
-    mode: PinMode
-    value: int = 0
-    pull: PullMode = PullMode.NONE
-    pwm_frequency: Optional[int] = None
-    pwm_duty_cycle: Optional[float] = None
-
-
 class GPIOController:
     """
     Safe GPIO controller with conflict detection and current limiting warnings
@@ -104,51 +112,63 @@ class GPIOController:
     # Safe GPIO pins (BCM numbering)
     SAFE_PINS = {4, 5, 7, 8, 9, 10, 11, 12, 14, 15, 16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 26, 27}
 
+    # Hardware PWM capable pins (BCM2711); other pins use the software PWM engine
+    HARDWARE_PWM_PINS = {12, 18, 19}
+
     # Maximum safe current per pin (mA)
     MAX_CURRENT_PER_PIN = 16
     MAX_TOTAL_CURRENT = 50
 
     def __init__(self):
         """Initialize GPIO controller"""
-        self.pins: Dict[int, PinConfig] = {}
-        self.pwm_instances: Dict[int, any] = {}
+        # State of every pin, indexed by pin number (PinTable.py)
+        self.table = PinTable(self.RESERVED_PINS, self.SAFE_PINS, self.HARDWARE_PWM_PINS)
+        self.groups: Dict[str, PinGroup] = {}
 
         # Setup GPIO
         GPIO.setmode(GPIO.BCM)
         GPIO.setwarnings(False)
 
+        # One thread drives all software PWM pins (not used with the mock GPIO)
+        self.soft_pwm = SoftwarePWMEngine(GPIO.output) if SIMULATED or IS_RASPBERRY_PI else None
+
+        # Bulk access for pin groups (GPIO registers on the Pi)
+        self.group_io = GroupIO(GPIO)
+
+        # Input-to-output rules, run in the GPIO edge callback
+        self.rules = RuleEngine(self._rule_write, self._rule_pwm, self._rule_write_group,
+                                on_fired=self._rule_fired, available_pins=self.SAFE_PINS)
+        self._rule_listeners = []
+        # Sensor threshold alarms, a stage on the sensor pipeline (app.py adds it)
+        self.alarms = SensorAlarms(self._rule_write, self._rule_pwm, self._rule_write_group,
+                                   on_change=self._alarm_changed, available_pins=self.SAFE_PINS)
+        self._alarm_listeners = []
+        self._edge_pins = set()  # Input pins with edge detection for rules, meters and encoders
+
+        # Frequency / pulse width meters on input pins, fed by the edge callback
+        self.meters: Dict[int, PulseMeter] = {}
+
+        # Quadrature encoders on input pin pairs, decoded in the edge callback
+        self.encoders = EncoderBank(GPIO.input)
+
+        # Session recorder (qt5-app/src/SessionLog.py) receiving input level changes
+        self.recorder = None
+
     def get_available_pins(self) -> List[int]:
         """Get list of available GPIO pins"""
         return sorted(list(self.SAFE_PINS))
 
     def is_pin_available(self, pin: int) -> bool:
         """Check if pin is available for use"""
-        return pin in self.SAFE_PINS
+        return self.table.is_safe(pin)
 
     def get_pin_info(self, pin: int) -> Optional[Dict]:
-        """Get current pin configuration and state"""
-        if pin not in self.pins:
-            return None
-
-        config = self.pins[pin]
-        info = {
-            'pin': config.pin,
-            'mode': config.mode.value,
-            'value': config.value,
-            'pull': config.pull.value,
-            'is_reserved': pin in self.RESERVED_PINS,
-            'is_available': pin in self.SAFE_PINS
-        }
-
-        if config.mode == PinMode.PWM:
-            info['pwm_frequency'] = config.pwm_frequency
-            info['pwm_duty_cycle'] = config.pwm_duty_cycle
-
-        return info
+        """Get current pin configuration and state (cached, do not modify)"""
+        return self.table.info(pin)
 
     def get_all_pins_info(self) -> List[Dict]:
-        """Get information about all configured pins"""
-        return [self.get_pin_info(pin) for pin in sorted(self.pins.keys())]
+        """Get information about all configured pins (cached, do not modify)"""
+        return self.table.all_info()
 
     def configure_pin(
         self,
@@ -177,16 +197,38 @@ class GPIOController:
         if not self.is_pin_available(pin):
             raise ValueError(f"Pin {pin} is not available (reserved or invalid)")
 
+        group = self._group_of(pin)
+        if group:
+            raise ValueError(f"Pin {pin} belongs to group '{group.name}', delete the group first")
+        encoder = self.encoders.of_pin(pin)
+        if encoder:
+            raise ValueError(f"Pin {pin} belongs to encoder '{encoder.name}', delete the encoder first")
+
+        if mode == PinMode.PWM and not pwm_frequency:
+            raise ValueError("PWM mode requires pwm_frequency parameter")
+
         # Cleanup existing configuration
-        if pin in self.pins:
+        if self.table.is_configured(pin):
             self._cleanup_pin(pin)
 
-        # Configure based on mode
-        if mode == PinMode.INPUT:
+        mode = PinMode(mode).value
+        self._setup_pin(pin, mode,
+                        pull=PullMode(pull).value if mode == 'input' else 'none',
+                        value=initial_value if mode == 'output' else 0,
+                        pwm_frequency=pwm_frequency if mode == 'pwm' else 0)
+
+        self._sync_edge_detection()
+        return self.get_pin_info(pin)
+
+    def _setup_pin(self, pin: int, mode: str, pull: str = 'none', value: int = 0,
+                   pwm_frequency: float = 0, pwm_duty_cycle: float = 0):
+        """Internal: set up a released pin and record it in the table (PinTable.configure() arguments)"""
+        pwm = None
+        if mode == 'input':
             pull_mode = None
-            if pull == PullMode.UP:
+            if pull == 'up':
                 pull_mode = GPIO.PUD_UP
-            elif pull == PullMode.DOWN:
+            elif pull == 'down':
                 pull_mode = GPIO.PUD_DOWN
 
             if pull_mode:
@@ -197,40 +239,19 @@ class GPIOController:
             # Read current value
             value = GPIO.input(pin)
 
-            self.pins[pin] = PinConfig(
-                pin=pin,
-                mode=mode,
-                value=value,
-                pull=pull
-            )
-
-        elif mode == PinMode.OUTPUT:
+        elif mode == 'output':
             GPIO.setup(pin, GPIO.OUT)
-            GPIO.output(pin, initial_value)
-
-            self.pins[pin] = PinConfig(
-                pin=pin,
-                mode=mode,
-                value=initial_value
-            )
-
-        elif mode == PinMode.PWM:
-            if not pwm_frequency:
-                raise ValueError("PWM mode requires pwm_frequency parameter")
+            GPIO.output(pin, value)
 
+        elif mode == 'pwm':
             GPIO.setup(pin, GPIO.OUT)
-            pwm = GPIO.PWM(pin, pwm_frequency)
-            pwm.start(0)
+            if self.soft_pwm and not self.table.is_hardware_pwm(pin):
+                pwm = self.soft_pwm.PWM(pin, pwm_frequency)
+            else:
+                pwm = GPIO.PWM(pin, pwm_frequency)
+            pwm.start(pwm_duty_cycle)
 
-            self.pwm_instances[pin] = pwm
-            self.pins[pin] = PinConfig(
-                pin=pin,
-                mode=mode,
-                pwm_frequency=pwm_frequency,
-                pwm_duty_cycle=0
-            )
-
-        return self.get_pin_info(pin)
+        self.table.configure(pin, mode, pull, value, pwm_frequency, pwm_duty_cycle, pwm)
 
     def write_pin(self, pin: int, value: int) -> Dict:
         """
@@ -246,14 +267,10 @@ class GPIOController:
         Raises:
             ValueError: If pin is not configured as output
         """
-        if pin not in self.pins:
-            raise ValueError(f"Pin {pin} is not configured")
-
-        if self.pins[pin].mode != PinMode.OUTPUT:
-            raise ValueError(f"Pin {pin} is not configured as output (mode: {self.pins[pin].mode})")
+        self._require_mode(pin, 'output')
 
         GPIO.output(pin, value)
-        self.pins[pin].value = value
+        self.table.set_value(pin, value)
 
         return self.get_pin_info(pin)
 
@@ -270,14 +287,12 @@ class GPIOController:
         Raises:
             ValueError: If pin is not configured as input
         """
-        if pin not in self.pins:
-            raise ValueError(f"Pin {pin} is not configured")
-
-        if self.pins[pin].mode != PinMode.INPUT:
-            raise ValueError(f"Pin {pin} is not configured as input (mode: {self.pins[pin].mode})")
+        self._require_mode(pin, 'input')
 
         value = GPIO.input(pin)
-        self.pins[pin].value = value
+        self.table.set_value(pin, value)
+        if self.recorder is not None:
+            self.recorder.input(pin, value)
 
         return self.get_pin_info(pin)
 
@@ -296,40 +311,557 @@ class GPIOController:
         Raises:
             ValueError: If pin is not configured as PWM
         """
-        if pin not in self.pins:
-            raise ValueError(f"Pin {pin} is not configured")
-
-        if self.pins[pin].mode != PinMode.PWM:
-            raise ValueError(f"Pin {pin} is not configured as PWM (mode: {self.pins[pin].mode})")
+        self._require_mode(pin, 'pwm')
 
         if not (0 <= duty_cycle <= 100):
             raise ValueError(f"Duty cycle must be 0-100, got {duty_cycle}")
 
-        pwm = self.pwm_instances[pin]
+        pwm = self.table.pwm[pin]
 
         if frequency:
             pwm.ChangeFrequency(frequency)
-            self.pins[pin].pwm_frequency = frequency
 
         pwm.ChangeDutyCycle(duty_cycle)
-        self.pins[pin].pwm_duty_cycle = duty_cycle
+        self.table.set_pwm(pin, frequency or None, duty_cycle)
 
         return self.get_pin_info(pin)
 
+    def _require_mode(self, pin: int, mode: str):
+        """Internal: raise ValueError unless the pin is configured in this mode"""
+        current = self.table.mode(pin)
+        if current != mode:
+            if not current:
+                raise ValueError(f"Pin {pin} is not configured")
+            what = 'PWM' if mode == 'pwm' else mode
+            raise ValueError(f"Pin {pin} is not configured as {what} (mode: {current})")
+
+    def get_group_info(self, name: str) -> Optional[Dict]:
+        """Get group configuration and its last known value"""
+        group = self.groups.get(name)
+        if group is None:
+            return None
+
+        levels = self.table.value
+        value = 0
+        for bit, pin in enumerate(group.pins):
+            value |= levels[pin] << bit
+
+        return {
+            'name': group.name,
+            'mode': group.mode,
+            'pins': list(group.pins),
+            'width': group.width,
+            'value': value,
+            'bulk': self.group_io.method
+        }
+
+    def get_all_groups_info(self) -> List[Dict]:
+        """Get information about all pin groups"""
+        return [self.get_group_info(name) for name in sorted(self.groups)]
+
+    def create_group(
+        self,
+        name: str,
+        pins: List[int],
+        mode: PinMode = PinMode.OUTPUT,
+        pull: PullMode = PullMode.NONE,
+        initial_value: int = 0
+    ) -> Dict:
+        """
+        Configure pins as a named group carrying one integer value
+
+        Args:
+            name: Group name
+            pins: BCM pin numbers, least significant bit first
+            mode: PinMode.OUTPUT or PinMode.INPUT (for all pins)
+            pull: Pull resistor mode (for inputs)
+            initial_value: Initial group value for outputs
+
+        Returns:
+            Group info
+
+        Raises:
+            ValueError: If the name is taken or a pin is unavailable or grouped
+        """
+        mode = PinMode(mode)
+        if name in self.groups:
+            raise ValueError(f"Group '{name}' already exists")
+        if mode not in (PinMode.OUTPUT, PinMode.INPUT):
+            raise ValueError(f"Group mode must be input or output, got {mode}")
+
+        group = PinGroup(name, pins, mode.value)
+        group.masks(initial_value)
+        for pin in group.pins:
+            if not self.is_pin_available(pin):
+                raise ValueError(f"Pin {pin} is not available (reserved or invalid)")
+            other = self._group_of(pin)
+            if other:
+                raise ValueError(f"Pin {pin} already belongs to group '{other.name}'")
+            encoder = self.encoders.of_pin(pin)
+            if encoder:
+                raise ValueError(f"Pin {pin} belongs to encoder '{encoder.name}'")
+
+        for pin in group.pins:
+            self.configure_pin(pin, mode, pull=pull)
+        self.groups[name] = group
+
+        if mode == PinMode.OUTPUT and initial_value:
+            return self.write_group(name, initial_value)
+        return self.get_group_info(name)
+
+    def write_group(self, name: str, value: int) -> Dict:
+        """
+        Write an integer across an output group, all bits in one operation
+        where the GPIO backend allows it
+
+        Raises:
+            ValueError: If the group does not exist, is not an output group,
+                or value does not fit in it
+        """
+        group = self._get_group(name)
+        if group.mode != PinMode.OUTPUT.value:
+            raise ValueError(f"Group '{name}' is not an output group")
+
+        self.group_io.write(group, value)
+        for pin, level in group.bits(value):
+            self.table.set_value(pin, level)
+
+        return self.get_group_info(name)
+
+    def read_group(self, name: str) -> Dict:
+        """
+        Sample all pins of an input group at once
+
+        Raises:
+            ValueError: If the group does not exist or is not an input group
+        """
+        group = self._get_group(name)
+        if group.mode != PinMode.INPUT.value:
+            raise ValueError(f"Group '{name}' is not an input group")
+
+        value = self.group_io.read(group)
+        for pin, level in group.bits(value):
+            self.table.set_value(pin, level)
+
+        return self.get_group_info(name)
+
+    def delete_group(self, name: str):
+        """
+        Delete a group and release its pins
+
+        Raises:
+            ValueError: If the group does not exist
+        """
+        group = self._get_group(name)
+        del self.groups[name]
+        for pin in group.pins:
+            self._cleanup_pin(pin)
+
+    def _get_group(self, name: str) -> PinGroup:
+        if name not in self.groups:
+            raise ValueError(f"Group '{name}' does not exist")
+        return self.groups[name]
+
+    def _group_of(self, pin: int) -> Optional[PinGroup]:
+        for group in self.groups.values():
+            if pin in group.pins:
+                return group
+        return None
+
+    def apply_profile(self, profile: Dict) -> Dict:
+        """
+        Bring the pins to a profile's configuration, all or nothing
+
+        Only pins whose configuration differs are touched (see
+        PinProfiles.plan_profile). If a change fails, every pin changed so
+        far is put back as it was and the error is raised.
+
+        Args:
+            profile: Profile definition (see PinProfiles.py)
+
+        Returns:
+            {"profile": name, "changes": [{"pin", "action"}], "pins": all pin info}
+
+        Raises:
+            ValueError: If the profile is invalid or names a grouped pin
+        """
+        profile = normalise_profile(profile, self.SAFE_PINS)
+        group_pins = {pin for group in self.groups.values() for pin in group.pins} | self.encoders.pins()
+        changes = plan_profile(profile, self.get_all_pins_info(), group_pins)
+
+        saved = {change.pin: self._save_pin(change.pin) for change in changes}
+        try:
+            apply_changes(changes, self._apply_profile_change,
+                          lambda pin: self._restore_pin(pin, saved.get(pin)))
+        finally:
+            self._sync_edge_detection()
+
+        log.info("Profile applied", profile=profile['name'], changes=len(changes))
+        return {
+            'profile': profile['name'],
+            'changes': [{'pin': change.pin, 'action': change.action} for change in changes],
+            'pins': self.get_all_pins_info(),
+        }
+
+    def _apply_profile_change(self, change):
+        """Internal: make one profile change (PinProfiles.ProfileChange)"""
+        pin, spec = change.pin, change.spec
+        if change.action == 'release':
+            self._cleanup_pin(pin)
+        elif change.action == 'setup':
+            if self.table.is_configured(pin):
+                self._cleanup_pin(pin)
+            self._setup_pin(pin, spec['mode'], pull=spec.get('pull', 'none'),
+                            value=spec.get('value', 0),
+                            pwm_frequency=spec.get('pwm_frequency', 0),
+                            pwm_duty_cycle=spec.get('pwm_duty_cycle', 0))
+        elif change.action == 'write':
+            GPIO.output(pin, spec['value'])
+            self.table.set_value(pin, spec['value'])
+        elif change.action == 'pwm':
+            pwm = self.table.pwm[pin]
+            if self.table.pwm_frequency[pin] != spec['pwm_frequency']:
+                pwm.ChangeFrequency(spec['pwm_frequency'])
+            pwm.ChangeDutyCycle(spec['pwm_duty_cycle'])
+            self.table.set_pwm(pin, spec['pwm_frequency'], spec['pwm_duty_cycle'])
+
+    def _save_pin(self, pin: int) -> tuple:
+        """
+        Internal: what _restore_pin needs to put a pin back: its
+        PinTable.snapshot(), its meter's window (None = not measured) and
+        the info of the encoder it belongs to (None = none)
+        """
+        meter = self.meters.get(pin)
+        encoder = self.encoders.of_pin(pin)
+        return (self.table.snapshot(pin), meter.window_ms if meter else None,
+                encoder.info() if encoder else None)
+
+    def _restore_pin(self, pin: int, saved: Optional[tuple]):
+        """Internal: put a pin back to a _save_pin() state (None = released)"""
+        if self.table.is_configured(pin):
+            self._cleanup_pin(pin)
+        else:
+            GPIO.cleanup(pin)
+        snapshot, window_ms, encoder = saved if saved is not None else (None, None, None)
+        if snapshot is None:
+            return
+        self._setup_pin(pin, *snapshot)
+
+        if window_ms is not None:
+            self.meters[pin] = PulseMeter(GPIO.input(pin), window_ms)
+        # The encoder comes back once both of its pins are inputs again
+        if (encoder and not self.encoders.get(encoder['name'])
+                and self.table.mode(encoder['pin_a']) == self.table.mode(encoder['pin_b']) == 'input'):
+            decoder = self.encoders.add(encoder['name'], encoder['pin_a'], encoder['pin_b'])
+            decoder.set_position(encoder['position'])
+
+    def get_rules(self) -> List[Dict]:
+        """Get all rules with their fire and error counts"""
+        return self.rules.get_rules()
+
+    def set_rule(self, rule: Dict) -> Dict:
+        """
+        Add or replace an input-to-output rule (see RuleEngine)
+
+        The rule runs once its trigger pin is configured as input.
+
+        Raises:
+            ValueError: If the rule is malformed
+        """
+        rule = self.rules.set_rule(rule)
+        self._sync_edge_detection()
+        return rule
+
+    def remove_rule(self, name: str):
+        """
+        Remove a rule
+
+        Raises:
+            ValueError: If there is no such rule
+        """
+        self.rules.remove_rule(name)
+        self._sync_edge_detection()
+
+    def get_rule_stats(self) -> Dict:
+        """Get edge-to-actions latency and per-rule fire/error counts"""
+        return self.rules.get_stats()
+
+    def add_rule_listener(self, callback):
+        """
+        Call callback(event) after a rule fired (on the GPIO event thread)
+
+        event: {"rule", "pin", "edge", "outputs": [pin/group info]}
+        """
+        self._rule_listeners.append(callback)
+
+    def get_alarms(self) -> List[Dict]:
+        """Get all sensor alarms with their state and counters"""
+        return self.alarms.get_alarms()
+
+    def set_alarm(self, alarm: Dict) -> Dict:
+        """
+        Add or replace a sensor threshold alarm (see SensorAlarms)
+
+        The alarm is evaluated on every sensor sample once self.alarms is a
+        stage of the sensor pipeline.
+
+        Raises:
+            ValueError: If the alarm is malformed
+        """
+        return self.alarms.set_alarm(alarm)
+
+    def remove_alarm(self, name: str):
+        """
+        Remove a sensor alarm
+
+        Raises:
+            ValueError: If there is no such alarm
+        """
+        self.alarms.remove_alarm(name)
+
+    def get_alarm_stats(self) -> Dict:
+        """Get trigger-to-action latency and per-alarm counters"""
+        return self.alarms.get_stats()
+
+    def add_alarm_listener(self, callback):
+        """
+        Call callback(event) after a sensor alarm triggered or cleared (on
+        the sensor thread)
+
+        event: {"alarm", "state", "signal", "value", "threshold",
+                "outputs": [pin/group info]}
+        """
+        self._alarm_listeners.append(callback)
+
+    def start_measurement(self, pin: int, window_ms: float = DEFAULT_WINDOW_MS) -> Dict:
+        """
+        Measure frequency, period and pulse width on an input pin (see
+        PulseMeter); restarts a measurement already running on the pin
+
+        Args:
+            pin: Input pin
+            window_ms: Sliding window length
+
+        Returns:
+            The new measurement
+
+        Raises:
+            ValueError: If the pin is not configured as input or the window is invalid
+        """
+        self._require_mode(pin, 'input')
+        self.meters[pin] = PulseMeter(GPIO.input(pin), window_ms)
+        self._sync_edge_detection()
+        log.info("Measuring pin", pin=pin, window_ms=window_ms)
+        return self.get_measurement(pin)
+
+    def stop_measurement(self, pin: int):
+        """
+        Stop measuring a pin
+
+        Raises:
+            ValueError: If the pin is not being measured
+        """
+        if self.meters.pop(pin, None) is None:
+            raise ValueError(f"Pin {pin} is not being measured")
+        self._sync_edge_detection()
+
+    def get_measurement(self, pin: int) -> Optional[Dict]:
+        """Get a pin's measurement ({"pin", "frequency_hz", ...}), or None if it is not measured"""
+        meter = self.meters.get(pin)
+        if meter is None:
+            return None
+        return dict(meter.read(), pin=pin)
+
+    def get_all_measurements(self) -> List[Dict]:
+        """Get the measurements of every measured pin"""
+        return [self.get_measurement(pin) for pin in sorted(self.meters)]
+
+    def create_encoder(self, name: str, pin_a: int, pin_b: int, pull: PullMode = PullMode.UP) -> Dict:
+        """
+        Configure two input pins as a quadrature encoder (see QuadratureEncoder)
+
+        Args:
+            name: Encoder name
+            pin_a: BCM pin of the A output (A leading B counts up)
+            pin_b: BCM pin of the B output
+            pull: Pull resistor mode of both pins
+
+        Returns:
+            Encoder info
+
+        Raises:
+            ValueError: If the name is taken or a pin is unavailable, grouped or in an encoder
+        """
+        if self.encoders.get(name):
+            raise ValueError(f"Encoder '{name}' already exists")
+        if pin_a == pin_b:
+            raise ValueError("Encoder pins A and B must differ")
+        for pin in (pin_a, pin_b):
+            if not self.is_pin_available(pin):
+                raise ValueError(f"Pin {pin} is not available (reserved or invalid)")
+
+        for pin in (pin_a, pin_b):
+            self.configure_pin(pin, PinMode.INPUT, pull=pull)
+        self.encoders.add(name, pin_a, pin_b)
+        self._sync_edge_detection()
+        return self.get_encoder_info(name)
+
+    def get_encoder_info(self, name: str) -> Optional[Dict]:
+        """Get encoder info ({"name", "pin_a", "pin_b", "position", "velocity", ...}), or None"""
+        encoder = self.encoders.get(name)
+        return encoder.info() if encoder else None
+
+    def get_all_encoders_info(self) -> List[Dict]:
+        """Get information about all encoders"""
+        return [self.get_encoder_info(name) for name in self.encoders.names()]
+
+    def reset_encoder(self, name: str, position: int = 0) -> Dict:
+        """
+        Set an encoder's position
+
+        Raises:
+            ValueError: If the encoder does not exist
+        """
+        encoder = self._get_encoder(name)
+        encoder.set_position(position)
+        return encoder.info()
+
+    def delete_encoder(self, name: str):
+        """
+        Delete an encoder and release its pins
+
+        Raises:
+            ValueError: If the encoder does not exist
+        """
+        encoder = self._get_encoder(name)
+        self.encoders.remove(name)
+        for pin in (encoder.pin_a, encoder.pin_b):
+            self._cleanup_pin(pin)
+
+    def add_encoder_listener(self, callback):
+        """
+        Call callback(report) when an encoder moved, at a capped rate per
+        encoder (on the encoder reporter thread)
+
+        report: encoder info plus "delta", the change since the previous report
+        """
+        self.encoders.add_listener(callback)
+
+    def _get_encoder(self, name: str):
+        encoder = self.encoders.get(name)
+        if encoder is None:
+            raise ValueError(f"Encoder '{name}' does not exist")
+        return encoder
+
+    def _sync_edge_detection(self):
+        """Internal: detect edges on exactly the input pins rules trigger on, meters measure or encoders use"""
+        wanted = {pin for pin in self.rules.trigger_pins() | set(self.meters) | self.encoders.pins()
+                  if self.table.mode(pin) == 'input'}
+
+        for pin in self._edge_pins - wanted:
+            self._remove_edge_detection(pin)
+
+        for pin in wanted - self._edge_pins:
+            try:
+                GPIO.add_event_detect(pin, GPIO.BOTH, callback=self._on_edge)
+            except (RuntimeError, AttributeError) as e:
+                log.warning("No edge detection, rules and meters on this pin will not work",
+                            pin=pin, error=e)
+                continue
+            self._edge_pins.add(pin)
+            self.rules.seed(pin, GPIO.input(pin))
+
+    def _remove_edge_detection(self, pin: int):
+        self._edge_pins.discard(pin)
+        try:
+            GPIO.remove_event_detect(pin)
+        except (RuntimeError, AttributeError):
+            pass
+
+    def _on_edge(self, pin: int):
+        """Internal: GPIO edge callback (GPIO event thread)"""
+        now_ns = time.monotonic_ns()
+        level = GPIO.input(pin)
+        meter = self.meters.get(pin)
+        if meter is not None:
+            meter.edge(level, now_ns)
+        self.encoders.on_edge(pin, level, now_ns)
+        self.rules.on_edge(pin, level, now_ns)
+        if self.recorder is not None:
+            self.recorder.input(pin, level)
+
+    def _rule_write(self, pin: int, value: int):
+        if self.table.mode(pin) != 'output':
+            raise ValueError(f"Pin {pin} is not configured as output")
+        GPIO.output(pin, value)
+        self.table.set_value(pin, value)
+
+    def _rule_pwm(self, pin: int, duty_cycle: float):
+        pwm = self.table.pwm[pin] if self.table.mode(pin) == 'pwm' else None
+        if pwm is None:
+            raise ValueError(f"Pin {pin} is not configured as PWM")
+        pwm.ChangeDutyCycle(duty_cycle)
+        self.table.set_pwm(pin, duty_cycle=duty_cycle)
+
+    def _rule_write_group(self, name: str, value: int):
+        self.write_group(name, value)
+
+    def _rule_fired(self, name: str, pin: int, level: int, actions: List[Dict]):
+        if not self._rule_listeners:
+            return
+
+        event = {'rule': name, 'pin': pin, 'edge': 'rising' if level else 'falling',
+                 'outputs': self._outputs(actions)}
+        for callback in self._rule_listeners:
+            callback(event)
+
+    def _alarm_changed(self, event: Dict):
+        if not self._alarm_listeners:
+            return
+
+        event = dict(event)
+        event['outputs'] = self._outputs(event.pop('actions'))
+        for callback in self._alarm_listeners:
+            callback(event)
+
+    def _outputs(self, actions: List[Dict]) -> List[Dict]:
+        """Internal: pin/group info of the outputs rule or alarm actions changed"""
+        outputs = []
+        for action in actions:
+            if action['type'] == 'group':
+                info = self.get_group_info(action['group'])
+            else:
+                info = self.get_pin_info(action['pin'])
+            if info:
+                outputs.append(info)
+        return outputs
+
+    def get_pwm_stats(self) -> Dict:
+        """Get software PWM timing statistics per pin (see SoftwarePWMEngine.get_stats)"""
+        return self.soft_pwm.get_stats() if self.soft_pwm else {}
+
     def _cleanup_pin(self, pin: int):
-        """Internal: Cleanup a single pin"""
-        if pin in self.pwm_instances:
-            self.pwm_instances[pin].stop()
-            del self.pwm_instances[pin]
+        """Internal: Cleanup a single pin (a group it belongs to is dissolved)"""
+        group = self._group_of(pin)
+        if group:
+            del self.groups[group.name]
+        encoder = self.encoders.of_pin(pin)
+        if encoder:
+            self.encoders.remove(encoder.name)
+
+        self.meters.pop(pin, None)
+        if pin in self._edge_pins:
+            self._remove_edge_detection(pin)
+
+        pwm = self.table.release(pin)
+        if pwm is not None:
+            pwm.stop()
 
         GPIO.cleanup(pin)
 
-        if pin in self.pins:
-            del self.pins[pin]
-
     def cleanup_all(self):
         """Cleanup all GPIO pins"""
-        for pin in list(self.pins.keys()):
+        for pin in self.table.configured_pins():
             self._cleanup_pin(pin)
 
         GPIO.cleanup()
@@ -0,0 +1,150 @@
+"""
+Monitor Scheduler
+Runs pin monitoring ticks on absolute time.monotonic() deadlines
+
+Tick N is due at start + N * interval, regardless of how long earlier ticks
+took, so the period does not stretch by the work time and does not drift.
+When a tick overruns past the next deadline, the overrun policy decides
+what happens to the ticks that are already due:
+    skip       drop them and continue at the next deadline still ahead
+    catch_up   run them back to back (at most MAX_CATCH_UP in a row; older
+               ones are skipped) so the tick count keeps up with elapsed time
+
+Each tick's lateness (start time minus deadline) goes into a histogram.
+Tick timestamps are wall-clock times derived from the monotonic deadline and
+one wall-clock anchor taken at start, so NTP adjustments cannot make them
+jump or run backwards.
+"""
+import time
+import threading
+
+import shared_modules  # noqa: F401 - makes qt5-app/src importable
+from LatencyStats import LatencyStats
+from SoftwarePWM import EdgeHistogram
+from StructuredLog import get_logger
+
+log = get_logger('api.monitor')
+
+OVERRUN_POLICIES = ('skip', 'catch_up')
+
+# Lateness histogram bucket bounds in microseconds
+LATENESS_BOUNDS_US = (100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000)
+
+MAX_CATCH_UP = 5
+
+
+class MonitorScheduler:
+    """Calls tick(timestamp, tick_number) every interval on a background thread"""
+
+    def __init__(self, interval, tick, policy='skip'):
+        """
+        Initialize scheduler
+
+        Args:
+            interval: Period in seconds
+            tick: Callable(timestamp, tick_number); timestamp is the tick's
+                deadline as a wall-clock time (seconds since the epoch)
+            policy: Overrun policy, 'skip' or 'catch_up'
+
+        Raises:
+            ValueError: If interval is not positive or the policy is unknown
+        """
+        if not interval or interval <= 0:
+            raise ValueError("Monitoring interval must be positive")
+        if policy not in OVERRUN_POLICIES:
+            raise ValueError(f"Overrun policy must be one of {', '.join(OVERRUN_POLICIES)}, got {policy!r}")
+
+        self.interval = interval
+        self.policy = policy
+        self._tick = tick
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_mono = None
+        self._start_wall = None
+
+        self.ticks = 0
+        self.overruns = 0    # ticks whose work ran past the next deadline
+        self.skipped = 0     # deadlines dropped by the overrun policy
+        self.caught_up = 0   # ticks run late, back to back
+        self.lateness = EdgeHistogram(LATENESS_BOUNDS_US)
+        self.work = LatencyStats(window=256)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._start_mono = time.monotonic()
+        self._start_wall = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """Stop the scheduler and wait for a running tick to finish"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def get_stats(self):
+        """
+        Get scheduling statistics
+
+        Returns:
+            {"interval_ms", "policy", "running", "ticks", "overruns", "skipped",
+             "caught_up", "lateness": histogram in us, "work": tick duration in ms}
+        """
+        return {
+            'interval_ms': self.interval * 1000,
+            'policy': self.policy,
+            'running': self.running,
+            'ticks': self.ticks,
+            'overruns': self.overruns,
+            'skipped': self.skipped,
+            'caught_up': self.caught_up,
+            'lateness': self.lateness.as_dict(),
+            'work': self.work.summary(digits=3),
+        }
+
+    def _run(self):
+        clock = time.monotonic
+        deadline = self._start_mono
+        backlog = 0  # consecutive catch-up ticks run so far
+
+        while not self._stop.is_set():
+            now = clock()
+            if now < deadline:
+                if self._stop.wait(deadline - now):
+                    break
+                now = clock()
+
+            self.lateness.add(int((now - deadline) * 1e9))
+            try:
+                self._tick(self._start_wall + (deadline - self._start_mono), self.ticks)
+            except Exception as e:
+                log.error("Monitoring tick failed", error=e)
+            self.ticks += 1
+
+            end = clock()
+            self.work.add(end - now)
+            deadline += self.interval
+            if end < deadline:
+                backlog = 0
+                continue
+
+            # Overrun: one or more deadlines are already due
+            self.overruns += 1
+            due = int((end - deadline) // self.interval) + 1
+            if self.policy == 'catch_up' and backlog < MAX_CATCH_UP:
+                # Run the oldest due tick now; drop what exceeds the catch-up budget
+                excess = max(0, due - (MAX_CATCH_UP - backlog))
+                if excess:
+                    self.skipped += excess
+                    deadline += excess * self.interval
+                backlog += 1
+                self.caught_up += 1
+            else:
+                self.skipped += due
+                deadline += due * self.interval
+                backlog = 0
@@ -0,0 +1,165 @@
+"""
+Sensor Stream
+Serves accelerometer and light readings to web clients
+
+One sampling loop feeds everything: SensorStream is a pipeline stage that
+keeps the latest sample and a history ring, and queues 'sensor_readings' to
+subscribed Socket.IO clients, each at its own decimation (every Nth sample).
+The loop is either a SensorSampler started by the standalone server, or the
+Qt app's SensorController when the API is embedded there (EmbeddedAPI.py),
+so the sensors are never read twice however many clients subscribe.
+"""
+import threading
+
+import shared_modules  # noqa: F401 - makes qt5-app/src importable
+from SensorCore import SensorHistory, SensorSampler
+from StructuredLog import get_logger
+
+log = get_logger('api.sensors')
+
+HISTORY_SECONDS = 300
+MAX_DECIMATION = 1000
+
+
+class SensorStream:
+    """Latest sample, history and per-client subscriptions over one sampling loop"""
+
+    def __init__(self, clients, sample_rate=20.0, history_seconds=HISTORY_SECONDS):
+        """
+        Initialize stream
+
+        Args:
+            clients: ClientFanout delivering sensor_readings to single clients
+            sample_rate: Sampling rate of the source in Hz (updated by the
+                source through set_sample_rate())
+            history_seconds: History kept at the source's full sample rate
+        """
+        self.clients = clients
+        self.sample_rate = sample_rate
+        self.history_seconds = history_seconds
+        self.history = SensorHistory(capacity=int(history_seconds * sample_rate))
+        self.samples = 0
+
+        self._source = None
+        self._sampler = None
+        self._subscribers = {}  # {sid: decimation}
+        self._lock = threading.Lock()
+
+    def start(self, interval_ms=50):
+        """Start a headless sampling loop as the source (standalone server)"""
+        if self._source is not None:
+            return
+        self._sampler = SensorSampler(interval_ms)
+        self.attach(self._sampler)
+        self._sampler.start()
+        log.info("Sensor sampling started", rate=self.sample_rate)
+
+    def attach(self, source):
+        """
+        Use an existing sampling loop as the source
+
+        Args:
+            source: Object with add_stage() (SensorSampler, SensorController);
+                subscribe()/unsubscribe() are called when it has them, so an
+                adaptive source samples at full rate while clients listen
+        """
+        self._source = source
+        rate = getattr(source, 'sample_rate', None)
+        if rate is None and getattr(source, 'interval', None):
+            rate = 1.0 / source.interval
+        if rate:
+            self.set_sample_rate(rate)
+            self.history = SensorHistory(capacity=int(self.history_seconds * rate))
+        source.add_stage(self)
+
+    def stop(self):
+        if self._sampler is not None:
+            self._sampler.stop()
+
+    @property
+    def active(self):
+        return self._source is not None
+
+    @property
+    def source(self):
+        """Sampling loop feeding the stream (None until started or attached)"""
+        return self._source
+
+    # ------------------------------------------------------------------
+    # Pipeline stage (sampling thread)
+    # ------------------------------------------------------------------
+
+    def process(self, sample):
+        self.history.add(sample)
+        self.samples += 1
+        subscribers = self._subscribers
+        if not subscribers:
+            return
+
+        data = sample._asdict()
+        for sid, decimation in list(subscribers.items()):
+            if self.samples % decimation == 0:
+                self.clients.send(sid, 'sensor_readings', data)
+
+    def set_sample_rate(self, rate):
+        self.sample_rate = rate
+
+    # ------------------------------------------------------------------
+    # Queries and subscriptions (request threads)
+    # ------------------------------------------------------------------
+
+    def latest(self):
+        sample = self.history.latest()
+        return sample._asdict() if sample is not None else None
+
+    def window(self, seconds=None, since=None, max_points=None):
+        """
+        Get a window of the history
+
+        Returns:
+            {"count", "decimation", "sample_rate", "fields", "samples": [[...], ...]}
+            with one row per sample in field order, oldest first
+        """
+        samples, decimation = self.history.window(seconds=seconds, since=since, max_points=max_points)
+        return {
+            'count': len(samples),
+            'decimation': decimation,
+            'sample_rate': self.sample_rate,
+            'fields': list(samples[0]._fields) if samples else [],
+            'samples': [list(sample) for sample in samples],
+        }
+
+    def subscribe(self, sid, decimation=1):
+        """
+        Stream sensor_readings to a client
+
+        Raises:
+            ValueError: If decimation is not 1-MAX_DECIMATION
+        """
+        if not isinstance(decimation, int) or isinstance(decimation, bool) \
+                or not 1 <= decimation <= MAX_DECIMATION:
+            raise ValueError(f"Decimation must be an integer 1-{MAX_DECIMATION}")
+        with self._lock:
+            first = not self._subscribers
+            self._subscribers = dict(self._subscribers, **{sid: decimation})
+        if first and hasattr(self._source, 'subscribe'):
+            self._source.subscribe('api')
+        return {'decimation': decimation, 'rate': self.sample_rate / decimation}
+
+    def unsubscribe(self, sid):
+        with self._lock:
+            if sid not in self._subscribers:
+                return
+            self._subscribers = {k: v for k, v in self._subscribers.items() if k != sid}
+            last = not self._subscribers
+        if last and hasattr(self._source, 'unsubscribe'):
+            self._source.unsubscribe('api')
+
+    def get_stats(self):
+        return {
+            'active': self.active,
+            'sample_rate': self.sample_rate,
+            'samples': self.samples,
+            'history': len(self.history),
+            'subscribers': len(self._subscribers),
+        }
@@ -0,0 +1,15 @@
+"""
+Shared Modules - Access to the Qt-independent modules of the Qt5 app
+Importing this module puts qt5-app/src on sys.path
+"""
+import os
+import sys
+
+# Override with RETERMINAL_QT_SRC when the backend is deployed apart from the Qt app
+QT_APP_SRC = os.environ.get(
+    'RETERMINAL_QT_SRC',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'qt5-app', 'src')
+)
+
+if os.path.abspath(QT_APP_SRC) not in map(os.path.abspath, sys.path):
+    sys.path.append(os.path.abspath(QT_APP_SRC))
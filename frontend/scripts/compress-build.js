@@ -0,0 +1,62 @@
+/**
+ * Precompress the production build
+ *
+ * Runs after `npm run build` (postbuild) and writes .gz and .br siblings next
+ * to every compressible file in build/, which the Flask backend serves to
+ * clients that accept them. Variants that would not save at least 5% are
+ * skipped, so the backend falls back to the original file.
+ */
+const fs = require('fs');
+const path = require('path');
+const zlib = require('zlib');
+
+const BUILD_DIR = path.join(__dirname, '..', 'build');
+const COMPRESSIBLE = new Set(['.html', '.js', '.css', '.json', '.svg', '.txt', '.ico', '.map']);
+const MIN_SIZE = 1024;
+
+function* walk(dir) {
+  for (const entry of fs.readdirSync(dir, { withFileTypes: true })) {
+    const full = path.join(dir, entry.name);
+    if (entry.isDirectory()) {
+      yield* walk(full);
+    } else {
+      yield full;
+    }
+  }
+}
+
+const encoders = {
+  '.gz': (data) => zlib.gzipSync(data, { level: zlib.constants.Z_BEST_COMPRESSION }),
+  '.br': (data) => zlib.brotliCompressSync(data, {
+    params: {
+      [zlib.constants.BROTLI_PARAM_QUALITY]: zlib.constants.BROTLI_MAX_QUALITY,
+      [zlib.constants.BROTLI_PARAM_SIZE_HINT]: data.length,
+    },
+  }),
+};
+
+let original = 0;
+let compressed = 0;
+
+for (const file of walk(BUILD_DIR)) {
+  if (!COMPRESSIBLE.has(path.extname(file))) continue;
+  const data = fs.readFileSync(file);
+  if (data.length < MIN_SIZE) continue;
+
+  for (const [suffix, encode] of Object.entries(encoders)) {
+    const output = encode(data);
+    if (output.length > data.length * 0.95) continue;
+    fs.writeFileSync(file + suffix, output);
+    // Same mtime as the original, so the backend can tell stale variants apart
+    const { atime, mtime } = fs.statSync(file);
+    fs.utimesSync(file + suffix, atime, mtime);
+    if (suffix === '.br') {
+      original += data.length;
+      compressed += output.length;
+    }
+  }
+}
+
+if (original) {
+  console.log(`Precompressed build: ${(original / 1024).toFixed(1)} kB -> ${(compressed / 1024).toFixed(1)} kB (brotli)`);
+}
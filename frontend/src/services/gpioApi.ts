@@ -5,10 +5,14 @@
 import axios from 'axios';
 import { io, Socket } from 'socket.io-client';
 
-// Use relative URL when served from same origin, fallback to localhost
-const API_BASE_URL = window.location.origin.includes('localhost') || window.location.origin.includes('192.168.0.3')
+// Production builds are served by the Flask backend itself, so the API is
+// same-origin unless REACT_APP_API_URL says otherwise. In development, use the
+// page origin on known hosts and fall back to localhost.
+const API_BASE_URL = process.env.NODE_ENV === 'production' && !process.env.REACT_APP_API_URL
   ? window.location.origin
-  : (process.env.REACT_APP_API_URL || 'http://localhost:5000');
+  : window.location.origin.includes('localhost') || window.location.origin.includes('192.168.0.3')
+    ? window.location.origin
+    : (process.env.REACT_APP_API_URL || 'http://localhost:5000');
 
 export interface PinInfo {
   pin: number;
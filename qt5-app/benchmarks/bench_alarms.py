@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Sensor alarm hysteresis, hold-off and trigger-to-action latency benchmark
+
+Feeds scripted sensor samples to a controller's alarm stage on a sampling
+thread, as SensorController / SensorSampler would, and checks what the
+alarm does to an output pin:
+    backend    backend/gpio_controller.py alarms, on the GPIO simulator
+    qt         qt5-app GPIOController alarm_stage (alarmChanged signal), on the
+               GPIO simulator
+    qt-mock    the same in mock mode (no RETERMINAL_GPIO=sim, off the Pi),
+               outputs logged as the write action returns; runs on its own
+
+Each impact is one sample well above the threshold, followed by samples
+hovering just around the threshold (inside the hysteresis band) and then a
+return to rest. The alarm must trigger and clear exactly once per impact,
+and keep the output high for at least the hold-off. Latency is from the
+sample's reading (SensorSample.timestamp) to the output edge on the
+simulator (to the end of the write action in mock mode); the alarm's own trigger-to-action statistics are shown next to
+it. Exits with status 1 if a check fails.
+
+Usage:
+    python3 benchmarks/bench_alarms.py [--events 100] [--rate 500] [--hold-off-ms 20] [--target all|backend|qt|qt-mock]
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'backend'))
+
+from LatencyStats import LatencyStats  # noqa: E402
+from SensorCore import SensorSample  # noqa: E402
+
+OUTPUT_PIN = 22
+THRESHOLD_G = 2.5
+HYSTERESIS_G = 0.3
+IMPACT_G = 3.2
+HOVER_G = (2.3, 2.6)  # inside the hysteresis band, crossing the threshold
+HOVER_SAMPLES = 8
+REST_SAMPLES = 20
+HOLD_OFF_SLACK_MS = 0.5
+
+
+def alarm(hold_off_ms):
+    return {'name': 'impact', 'signal': 'accel', 'above': THRESHOLD_G,
+            'hysteresis': HYSTERESIS_G, 'hold_off_ms': hold_off_ms,
+            'actions': [{'type': 'write', 'pin': OUTPUT_PIN, 'value': 1}],
+            'clear_actions': [{'type': 'write', 'pin': OUTPUT_PIN, 'value': 0}]}
+
+
+def feed(stage, events, rate):
+    """
+    Run the scripted samples through the stage on this thread
+
+    Returns:
+        time.monotonic_ns() of each impact sample's reading, to match output
+        edges against
+    """
+    interval = 1.0 / rate
+    impacts = []
+    next_tick = time.perf_counter()
+
+    def sample(z):
+        nonlocal next_tick
+        while time.perf_counter() < next_tick:
+            pass
+        next_tick += interval
+        stamp = time.time()
+        read_ns = time.monotonic_ns()
+        stage.process(SensorSample(stamp, 0.0, 0.0, z, 300))
+        return read_ns
+
+    for _ in range(REST_SAMPLES):
+        sample(1.0)
+    for _ in range(events):
+        impacts.append(sample(IMPACT_G))
+        for i in range(HOVER_SAMPLES):
+            sample(HOVER_G[i % 2])
+        for _ in range(REST_SAMPLES):
+            sample(1.0)
+    return impacts
+
+
+def analyse(edge_log, impacts):
+    """Output high times and sample-to-edge latency from the simulator's edge log"""
+    rises = [t for t, pin, level in edge_log if pin == OUTPUT_PIN and level]
+    falls = [t for t, pin, level in edge_log if pin == OUTPUT_PIN and not level]
+    high_ms = [(fall - rise) / 1e6 for rise, fall in zip(rises, falls)]
+    latency = LatencyStats(window=max(1, len(impacts)))
+    for read_ns, rise in zip(impacts, rises):
+        latency.add((rise - read_ns) / 1e9)
+    return len(rises), len(falls), high_ms, latency
+
+
+def run_backend(args):
+    import gpio_controller
+    from gpio_controller import GPIOController, PinMode
+
+    sim = gpio_controller.GPIO
+    sim.edge_log = deque(maxlen=4 * args.events + 16)
+    gpio = GPIOController()
+    gpio.configure_pin(OUTPUT_PIN, PinMode.OUTPUT)
+    gpio.set_alarm(alarm(args.hold_off_ms))
+    changes = []
+    gpio.add_alarm_listener(changes.append)
+
+    impacts = feed(gpio.alarms, args.events, args.rate)
+    info = gpio.get_alarms()[0]
+    stats = gpio.get_alarm_stats()['latency']
+    gpio.cleanup_all()
+    return impacts, list(sim.edge_log), info, stats, len(changes)
+
+
+def run_qt(args, mock=False):
+    import json
+    try:
+        from PySide2.QtCore import QCoreApplication, QMetaObject, Qt
+    except ImportError:
+        from PyQt5.QtCore import QCoreApplication, QMetaObject, Qt
+    import GPIOController as qt_module
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    gpio = qt_module.GPIOController()
+    if mock:
+        # No hardware to log edges: log the alarm's write action as it returns
+        edge_log = []
+        stage = gpio.alarm_stage
+        write = stage._actions['write']
+
+        def logged_write(pin, value):
+            write(pin, value)
+            edge_log.append((time.monotonic_ns(), pin, value))
+        stage._actions['write'] = logged_write
+    else:
+        edge_log = qt_module.GPIO.edge_log = deque(maxlen=4 * args.events + 16)
+    gpio.configurePin(OUTPUT_PIN, 'output', 'none')
+    gpio.setAlarm(json.dumps(alarm(args.hold_off_ms)))
+    changes = []
+    gpio.alarmChanged.connect(lambda name, triggered, value: changes.append(triggered))
+
+    result = {}
+
+    def worker():
+        time.sleep(0.1)  # let the event loop start
+        result['impacts'] = feed(gpio.alarm_stage, args.events, args.rate)
+        time.sleep(0.1)
+        QMetaObject.invokeMethod(app, 'quit', Qt.QueuedConnection)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    app.exec_()
+    thread.join()
+
+    info = json.loads(gpio.getAlarms())[0]
+    stats = json.loads(gpio.getAlarmStats())['latency']
+    gpio.cleanup()
+    return result['impacts'], list(edge_log), info, stats, len(changes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sensor alarm hysteresis, hold-off and latency benchmark")
+    parser.add_argument('--events', type=int, default=100, help="Impacts to feed")
+    parser.add_argument('--rate', type=float, default=500.0, help="Sample rate (Hz)")
+    parser.add_argument('--hold-off-ms', type=float, default=20.0)
+    parser.add_argument('--target', choices=('all', 'backend', 'qt', 'qt-mock'), default='all')
+    args = parser.parse_args()
+
+    # The GPIO backend is chosen when the controllers are imported
+    if args.target == 'qt-mock':
+        os.environ.pop('RETERMINAL_GPIO', None)
+    else:
+        os.environ['RETERMINAL_GPIO'] = 'sim'
+    targets = ('backend', 'qt') if args.target == 'all' else (args.target,)
+    failed = False
+
+    print(f"{args.events} impacts at {args.rate:g} Hz, threshold {THRESHOLD_G}g, "
+          f"hysteresis {HYSTERESIS_G}g, hold-off {args.hold_off_ms:g} ms")
+    for target in targets:
+        if target == 'backend':
+            impacts, edge_log, info, engine, changes = run_backend(args)
+        else:
+            impacts, edge_log, info, engine, changes = run_qt(args, mock=target == 'qt-mock')
+        rises, falls, high_ms, latency = analyse(edge_log, impacts)
+
+        checks = {
+            'triggers': info['triggered'] == args.events and rises == args.events,
+            'clears': falls == args.events,
+            # Hold-off runs from the trigger sample; the rising edge comes after the actions
+            'hold-off': bool(high_ms) and min(high_ms) >= args.hold_off_ms - HOLD_OFF_SLACK_MS,
+            'notified': changes == 2 * args.events,
+            'actions': info['errors'] == 0,
+        }
+        failed |= not all(checks.values())
+
+        s = latency.summary(scale=1e6, unit='us', digits=1)
+        print(f"  {target:<8} {info['triggered']} triggers, {rises} rising / {falls} falling output edges, "
+              f"shortest high {min(high_ms) if high_ms else float('nan'):.1f} ms")
+        print(f"  {'':<8} sample-to-output mean {s.get('mean_us')}us  p99 {s.get('p99_us')}us  "
+              f"max {s.get('max_us')}us; alarm trigger-to-action mean {engine.get('mean_us')}us")
+        print(f"  {'':<8} " + '  '.join(f"{name}: {'ok' if ok else 'FAILED'}" for name, ok in checks.items()))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Quadrature encoder decoding correctness and throughput benchmark
+
+Drives a quadrature signal into two input pins on the GPIO simulator as fast
+as the edge path takes it: a random walk of steps (mostly forward, with
+reversals) and, every so often, a missed edge (a level change the edge
+callback never sees, so the next edge changes both bits at once). Checks
+that the controller's decoder ends at the expected position with exactly
+one illegal transition per missed edge, that the last position report
+matches it, and that reports never came faster than the rate cap:
+    backend    backend/gpio_controller.py encoders (edge callback)
+    qt         qt5-app GPIOController encoders (PinWatcher edge hook,
+               encoderChanged signal)
+
+A missed edge loses its two steps; the expected position accounts for that.
+The simulator runs edge callbacks on the thread that changes the input,
+like the RPi.GPIO event thread. Exits with status 1 if a check fails.
+
+Usage:
+    python3 benchmarks/bench_encoder.py [--steps 200000] [--missed 50] [--reverse 0.2] [--target all|backend|qt]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+
+os.environ['RETERMINAL_GPIO'] = 'sim'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'backend'))
+
+PIN_A = 17
+PIN_B = 27
+# Gray code states (A, B) in counting-up order, starting from both pulled up
+SEQUENCE = ((1, 1), (0, 1), (0, 0), (1, 0))
+REPORT_SETTLE_S = 0.5
+
+
+def drive(sim, steps, missed, reverse, seed):
+    """
+    Generate the quadrature signal on this thread
+
+    Returns:
+        (expected decoded position, edges driven, seconds)
+    """
+    rng = random.Random(seed)
+    missed_at = set(rng.sample(range(steps), missed)) if missed else set()
+    index = 0
+    position = 0
+    direction = 1
+    edges = 0
+
+    start = time.perf_counter()
+    for step in range(steps):
+        if rng.random() < reverse:
+            direction = -direction
+        if step in missed_at:
+            # Two steps the same way, the first one unseen: the decoder sees
+            # both bits change and cannot count either
+            for notify in (False, True):
+                index = (index + direction) % 4
+                a, b = SEQUENCE[index]
+                pin, level = (PIN_A, a) if sim.get_level(PIN_A) != a else (PIN_B, b)
+                sim.set_input(pin, level, notify=notify)
+                edges += notify
+            continue
+
+        index = (index + direction) % 4
+        position += direction
+        a, b = SEQUENCE[index]
+        pin, level = (PIN_A, a) if sim.get_level(PIN_A) != a else (PIN_B, b)
+        sim.set_input(pin, level)
+        edges += 1
+
+    return position, edges, time.perf_counter() - start
+
+
+def run_backend(args):
+    import gpio_controller
+    from gpio_controller import GPIOController
+
+    gpio = GPIOController()
+    gpio.encoders.max_rate_hz = args.rate
+    reports = []
+    gpio.add_encoder_listener(lambda report: reports.append((time.monotonic(), report)))
+    gpio.create_encoder('bench', PIN_A, PIN_B)
+
+    expected, edges, seconds = drive(gpio_controller.GPIO, args.steps, args.missed,
+                                     args.reverse, args.seed)
+    time.sleep(REPORT_SETTLE_S)
+    info = gpio.get_encoder_info('bench')
+    gpio.cleanup_all()
+    return expected, edges, seconds, info, [(t, r['position']) for t, r in reports]
+
+
+def run_qt(args):
+    import json
+    try:
+        from PySide2.QtCore import QCoreApplication, QMetaObject, Qt
+    except ImportError:
+        from PyQt5.QtCore import QCoreApplication, QMetaObject, Qt
+    import GPIOController as qt_module
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    gpio = qt_module.GPIOController()
+    gpio.encoder_bank.max_rate_hz = args.rate
+    reports = []
+    gpio.encoderChanged.connect(lambda name, position, delta: reports.append((time.monotonic(), position)))
+    gpio.createEncoder('bench', PIN_A, PIN_B, 'up')
+
+    result = {}
+
+    def worker():
+        time.sleep(0.1)  # let the event loop start
+        result['run'] = drive(qt_module.GPIO, args.steps, args.missed, args.reverse, args.seed)
+        time.sleep(REPORT_SETTLE_S)
+        QMetaObject.invokeMethod(app, 'quit', Qt.QueuedConnection)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    app.exec_()
+    thread.join()
+
+    info = json.loads(gpio.getEncoders())[0]
+    gpio.cleanup()
+    return result['run'] + (info, reports)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quadrature encoder decoding correctness and throughput benchmark")
+    parser.add_argument('--steps', type=int, default=200000, help="Quadrature steps to drive")
+    parser.add_argument('--missed', type=int, default=50, help="Edges the decoder does not see")
+    parser.add_argument('--reverse', type=float, default=0.2, help="Chance of reversing at each step")
+    parser.add_argument('--rate', type=float, default=50.0, help="Report rate cap (Hz)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--target', choices=('all', 'backend', 'qt'), default='all')
+    args = parser.parse_args()
+
+    targets = ('backend', 'qt') if args.target == 'all' else (args.target,)
+    failed = False
+
+    print(f"{args.steps} steps, {args.missed} missed edges, reversal chance {args.reverse:g}, "
+          f"reports capped at {args.rate:g} Hz")
+    for target in targets:
+        runner = run_backend if target == 'backend' else run_qt
+        expected, edges, seconds, info, reports = runner(args)
+
+        checks = {
+            'position': info['position'] == expected,
+            'illegal': info['illegal'] == args.missed,
+            'last report': bool(reports) and reports[-1][1] == info['position'],
+        }
+        intervals = [b[0] - a[0] for a, b in zip(reports, reports[1:])]
+        min_interval = min(intervals) if intervals else None
+        if args.rate > 0 and min_interval is not None:
+            # Reports are timed on the reporter thread; allow for receiver-side jitter
+            checks['rate cap'] = min_interval >= 0.5 / args.rate
+        failed |= not all(checks.values())
+
+        print(f"  {target:<8} position {info['position']} (expected {expected}), "
+              f"illegal {info['illegal']} (expected {args.missed})")
+        print(f"  {'':<8} {edges / seconds:,.0f} edges/s, {seconds / edges * 1e6:.1f} us/edge; "
+              f"{len(reports)} reports, min interval "
+              f"{min_interval * 1000 if min_interval is not None else float('nan'):.1f} ms")
+        print(f"  {'':<8} " + '  '.join(f"{name}: {'ok' if ok else 'FAILED'}" for name, ok in checks.items()))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
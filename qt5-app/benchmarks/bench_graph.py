@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Sensor graph frame time benchmark: native SensorGraph vs QML Canvas
+
+Renders one accelerometer graph (three lines, grid and zero line) in an
+offscreen QQuickView and times frames while one new sample arrives per
+frame, for increasing numbers of points on screen:
+    canvas     the Canvas the Sensor screen used before SensorGraph: JS arrays
+               shifted per sample, requestPaint() replots every point
+    native     SensorGraph reading a SensorHistory: draws the new strip into
+               its circular image and copies the image to the item
+
+A frame is timed from the update request to QQuickWindow::frameSwapped,
+as CPU time of the process (all threads; time waiting for the next frame
+is not counted) and as wall time. Uses the software scene graph, as the
+offscreen platform has no OpenGL; on the device the copy to the screen is
+done by the GPU, the drawing is the same.
+
+Usage:
+    python3 benchmarks/bench_graph.py [--frames 300] [--points 100,1000,5000] [--rate 20] [--target all|canvas|native]
+"""
+import os
+import sys
+import time
+import math
+import argparse
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ.setdefault('QT_QUICK_BACKEND', 'software')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+try:
+    from PySide2.QtCore import QEventLoop, QMetaObject, QTimer, QUrl, Q_ARG
+    from PySide2.QtGui import QGuiApplication
+    from PySide2.QtQuick import QQuickView
+except ImportError:
+    from PyQt5.QtCore import QEventLoop, QMetaObject, QTimer, QUrl, Q_ARG
+    from PyQt5.QtGui import QGuiApplication
+    from PyQt5.QtQuick import QQuickView
+
+from LatencyStats import LatencyStats  # noqa: E402
+from SensorCore import SensorHistory, SensorSample  # noqa: E402
+import SensorGraph  # noqa: E402
+
+WIDTH = 1180   # graph size on the 1280x720 Sensor screen
+HEIGHT = 120
+FRAME_TIMEOUT_MS = 1000
+
+# The accelerometer Canvas of qml/SensorScreen.qml before SensorGraph
+CANVAS_QML = '''
+import QtQuick 2.9
+
+Rectangle {
+    color: "#0a0e27"
+    property var accelXData: []
+    property var accelYData: []
+    property var accelZData: []
+    property int maxDataPoints: %(points)d
+
+    function addSample(x, y, z) {
+        accelXData.push(x)
+        accelYData.push(y)
+        accelZData.push(z)
+        if (accelXData.length > maxDataPoints) {
+            accelXData.shift()
+            accelYData.shift()
+            accelZData.shift()
+        }
+        accelCanvas.requestPaint()
+    }
+
+    Canvas {
+        id: accelCanvas
+        anchors.fill: parent
+
+        onPaint: {
+            var ctx = getContext("2d")
+            ctx.clearRect(0, 0, width, height)
+
+            if (accelXData.length === 0) return
+
+            ctx.strokeStyle = "#1a1f3a"
+            ctx.lineWidth = 1
+            for (var i = 0; i <= 4; i++) {
+                var y = (height / 4) * i
+                ctx.beginPath()
+                ctx.moveTo(0, y)
+                ctx.lineTo(width, y)
+                ctx.stroke()
+            }
+
+            ctx.strokeStyle = "#333"
+            ctx.lineWidth = 2
+            var zeroY = height / 2
+            ctx.beginPath()
+            ctx.moveTo(0, zeroY)
+            ctx.lineTo(width, zeroY)
+            ctx.stroke()
+
+            function drawLine(data, color) {
+                ctx.strokeStyle = color
+                ctx.lineWidth = 2
+                ctx.beginPath()
+
+                var xStep = width / (maxDataPoints - 1)
+                for (var i = 0; i < data.length; i++) {
+                    var x = i * xStep
+                    var value = data[i]
+                    var y = height / 2 - (value / 2) * (height / 2)
+
+                    if (i === 0) {
+                        ctx.moveTo(x, y)
+                    } else {
+                        ctx.lineTo(x, y)
+                    }
+                }
+                ctx.stroke()
+            }
+
+            drawLine(accelXData, "#ff006e")
+            drawLine(accelYData, "#00ff41")
+            drawLine(accelZData, "#00f3ff")
+        }
+    }
+}
+'''
+
+NATIVE_QML = '''
+import QtQuick 2.9
+import ReTerminal 1.0
+
+Rectangle {
+    color: "#0a0e27"
+
+    SensorGraph {
+        objectName: "accelGraph"
+        anchors.fill: parent
+        interval: 0
+        duration: %(duration)f
+        channels: ["accel_x", "accel_y", "accel_z"]
+        colors: ["#ff006e", "#00ff41", "#00f3ff"]
+        minimum: -2
+        maximum: 2
+        zeroLine: true
+    }
+}
+'''
+
+
+def accel(i):
+    """Synthetic accelerometer reading number i"""
+    return 1.5 * math.sin(i / 13.0), math.cos(i / 7.0), 1.0 + 0.3 * math.sin(i / 3.0)
+
+
+def show(qml, path):
+    with open(path, 'w') as f:
+        f.write(qml)
+    view = QQuickView()
+    view.setResizeMode(QQuickView.SizeRootObjectToView)
+    view.resize(WIDTH, HEIGHT)
+    view.setSource(QUrl.fromLocalFile(path))
+    if view.status() != QQuickView.Ready:
+        raise RuntimeError(f"QML failed to load: {[e.toString() for e in view.errors()]}")
+    view.show()
+    return view
+
+
+def run_frames(view, update, frames):
+    """Time `frames` frames, each started by update(i)"""
+    cpu = LatencyStats(window=frames)
+    wall = LatencyStats(window=frames)
+    loop = QEventLoop()
+    timeout = QTimer()
+    timeout.setSingleShot(True)
+    timeout.timeout.connect(loop.quit)
+    swaps = [0]
+    missed = 0
+
+    def swapped():
+        swaps[0] += 1
+        loop.quit()
+
+    view.frameSwapped.connect(swapped)
+    for i in range(frames):
+        before = swaps[0]
+        began_cpu, began = time.process_time(), time.perf_counter()
+        update(i)
+        timeout.start(FRAME_TIMEOUT_MS)
+        loop.exec_()
+        timeout.stop()
+        if swaps[0] > before:
+            cpu.add(time.process_time() - began_cpu)
+            wall.add(time.perf_counter() - began)
+        else:
+            missed += 1
+    view.frameSwapped.disconnect(swapped)
+    return cpu, wall, missed
+
+
+def bench_canvas(points, frames, tmp):
+    view = show(CANVAS_QML % {'points': points}, os.path.join(tmp, 'bench_canvas.qml'))
+    root = view.rootObject()
+
+    def add(i):
+        x, y, z = accel(i)
+        QMetaObject.invokeMethod(root, 'addSample', Q_ARG('QVariant', x), Q_ARG('QVariant', y),
+                                 Q_ARG('QVariant', z))
+
+    # Start with a full graph, as after the first seconds on the screen
+    for i in range(points):
+        add(i)
+    run_frames(view, lambda i: add(points + i), 5)
+    result = run_frames(view, lambda i: add(points + 5 + i), frames)
+    view.close()
+    return result
+
+
+def bench_native(points, frames, rate, tmp):
+    history = SensorHistory(capacity=max(6000, points * 2))
+    SensorGraph.SensorGraph.default_history = history
+    # Same number of points across the width as the Canvas
+    duration = (points - 1) / rate
+    view = show(NATIVE_QML % {'duration': duration}, os.path.join(tmp, 'bench_native.qml'))
+    graph = view.rootObject().findChild(SensorGraph.SensorGraph, 'accelGraph')
+    start = time.time()
+
+    def add(i):
+        history.add(SensorSample(start + i / rate, *accel(i), 300))
+        graph.tick()
+
+    for i in range(points):
+        history.add(SensorSample(start + i / rate, *accel(i), 300))
+    run_frames(view, lambda i: add(points + i), 5)
+    result = run_frames(view, lambda i: add(points + 5 + i), frames)
+    view.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sensor graph frame time benchmark: native SensorGraph vs QML Canvas")
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--points', default='100,1000,5000', help="Points on screen, comma-separated")
+    parser.add_argument('--rate', type=float, default=20.0, help="Sample rate (Hz), for the native graph's duration")
+    parser.add_argument('--target', choices=('all', 'canvas', 'native'), default='all')
+    args = parser.parse_args()
+
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv)  # noqa: F841
+    SensorGraph.register(SensorHistory())
+    tmp = os.environ.get('TMPDIR', '/tmp')
+    targets = ('canvas', 'native') if args.target == 'all' else (args.target,)
+
+    print(f"Frame time, one new sample per frame, {WIDTH}x{HEIGHT} graph, {args.frames} frames (ms)")
+    for points in (int(p) for p in args.points.split(',')):
+        for target in targets:
+            if target == 'canvas':
+                cpu, wall, missed = bench_canvas(points, args.frames, tmp)
+            else:
+                cpu, wall, missed = bench_native(points, args.frames, args.rate, tmp)
+            c = cpu.summary(scale=1e3, unit='ms', digits=2)
+            w = wall.summary(scale=1e3, unit='ms', digits=2)
+            line = (f"  {points:>6} points  {target:<7} CPU mean {c.get('mean_ms', '-'):>7}  "
+                    f"p99 {c.get('p99_ms', '-'):>7}   wall mean {w.get('mean_ms', '-'):>7}  "
+                    f"p99 {w.get('p99_ms', '-'):>7}")
+            if missed:
+                line += f"  ({missed} frames not rendered)"
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Logging overhead benchmark
+
+Measures GPIOController.writePin operations per second with hot-path
+logging disabled, enabled (rate limited and unlimited), and with the
+previous synchronous print() per operation for comparison.
+
+Output goes to /dev/null. --sink-latency-us adds a busy-wait to every
+write to model a slow consumer such as journald under load: the print()
+case pays it on the calling thread, the logging cases on the background
+writer thread.
+
+Usage:
+    python3 benchmarks/bench_logging.py [--iterations 20000] [--pin 17] [--sink-latency-us 50]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from GPIOController import GPIOController  # noqa: E402
+from StructuredLog import setup_logging, shutdown_logging  # noqa: E402
+
+
+class SlowSink:
+    """File-like sink that takes `latency` seconds per write"""
+
+    def __init__(self, latency):
+        self._devnull = open(os.devnull, 'w')
+        self.latency = latency
+
+    def write(self, text):
+        if self.latency:
+            deadline = time.perf_counter() + self.latency
+            while time.perf_counter() < deadline:
+                pass
+        return self._devnull.write(text)
+
+    def flush(self):
+        self._devnull.flush()
+
+
+def run(controller, pin, iterations, per_op=None):
+    """Time `iterations` writePin calls, returning operations per second"""
+    write = controller.writePin
+    start = time.perf_counter()
+    for i in range(iterations):
+        write(pin, i & 1)
+        if per_op:
+            per_op(pin, i & 1)
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Logging overhead benchmark")
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--pin', type=int, default=17)
+    parser.add_argument('--sink-latency-us', type=float, default=0.0,
+                        help="Simulated cost of each output write in microseconds")
+    args = parser.parse_args()
+
+    sink = SlowSink(args.sink_latency_us / 1e6)
+    setup_logging(level='WARNING', stream=sink)
+
+    controller = GPIOController()
+    if not controller.configurePin(args.pin, 'output', 'none'):
+        print(f"Could not configure pin {args.pin} as output")
+        return 1
+
+    def legacy_print(pin, value):
+        print(f"[GPIOController] Write pin {pin} = {value}", file=sink, flush=True)
+
+    cases = [
+        ('logging disabled (INFO)', dict(level='INFO'), None),
+        ('DEBUG, rate limited 10/s', dict(level='DEBUG', rate=10.0), None),
+        ('DEBUG, unlimited', dict(level='DEBUG', rate=0), None),
+        ('print() per operation (previous)', dict(level='INFO'), legacy_print),
+    ]
+
+    print(f"writePin x {args.iterations} on pin {args.pin}, "
+          f"sink latency {args.sink_latency_us:g}us")
+    print(f"{'case':<36} {'ops/s':>12} {'us/op':>8}")
+    for name, log_options, per_op in cases:
+        setup_logging(stream=sink, **log_options)
+        run(controller, args.pin, min(1000, args.iterations), per_op)  # warm up
+        ops = run(controller, args.pin, args.iterations, per_op)
+        print(f"{name:<36} {ops:>12,.0f} {1e6 / ops:>8.2f}")
+
+    shutdown_logging()
+    controller.cleanup()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
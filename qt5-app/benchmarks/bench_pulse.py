@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Pulse measurement accuracy and edge-path cost benchmark
+
+Drives a square wave into an input pin on the GPIO simulator and compares
+the frequency and duty cycle the controller measures (PulseMeter) with the
+generated ones, and reports the CPU time the edge path takes per edge and as
+a share of one core at that edge rate:
+    backend    backend/gpio_controller.py meters (edge callback)
+    qt         qt5-app GPIOController meters (PinWatcher edge hook)
+
+The simulator runs edge callbacks on the thread that changes the input,
+like the RPi.GPIO event thread; the CPU time of the generator's pacing is
+not counted, only the simulator input change and the callbacks it runs.
+
+Usage:
+    python3 benchmarks/bench_pulse.py [--frequency 2000] [--duty 25] [--seconds 2] [--target all|backend|qt]
+"""
+import os
+import sys
+import time
+import argparse
+
+os.environ['RETERMINAL_GPIO'] = 'sim'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'backend'))
+
+from LatencyStats import LatencyStats  # noqa: E402
+
+INPUT_PIN = 17
+WINDOW_MS = 500
+
+
+def drive(sim, frequency, duty, seconds):
+    """
+    Generate the square wave on this thread
+
+    Returns:
+        (edges, CPU seconds spent in the edge path, LatencyStats of the
+         generator's lateness against the schedule)
+    """
+    period = 1.0 / frequency
+    high = period * duty / 100.0
+    lateness = LatencyStats(window=65536)
+    cpu = 0.0
+    edges = 0
+
+    start = time.perf_counter()
+    end = start + seconds
+    due = start
+    level = 0
+    while due < end:
+        while time.perf_counter() < due:
+            pass
+        lateness.add(time.perf_counter() - due)
+        level ^= 1
+        began = time.thread_time()
+        sim.set_input(INPUT_PIN, level)
+        cpu += time.thread_time() - began
+        edges += 1
+        due += high if level else period - high
+
+    sim.set_input(INPUT_PIN, 0)
+    return edges, cpu, lateness
+
+
+def run_backend(frequency, duty, seconds):
+    import gpio_controller
+    from gpio_controller import GPIOController, PinMode
+
+    gpio = GPIOController()
+    gpio.configure_pin(INPUT_PIN, PinMode.INPUT)
+    gpio.start_measurement(INPUT_PIN, WINDOW_MS)
+    result = drive(gpio_controller.GPIO, frequency, duty, seconds)
+    measurement = gpio.get_measurement(INPUT_PIN)
+    gpio.cleanup_all()
+    return result + (measurement,)
+
+
+def run_qt(frequency, duty, seconds):
+    import json
+    try:
+        from PySide2.QtCore import QCoreApplication
+    except ImportError:
+        from PyQt5.QtCore import QCoreApplication
+    import GPIOController as qt_module
+
+    app = QCoreApplication.instance() or QCoreApplication([])  # noqa: F841
+    gpio = qt_module.GPIOController()
+    gpio.configurePin(INPUT_PIN, 'input', 'none')
+    gpio.startMeasurement(INPUT_PIN, WINDOW_MS)
+    result = drive(qt_module.GPIO, frequency, duty, seconds)
+    measurement = json.loads(gpio.getMeasurement(INPUT_PIN))
+    gpio.cleanup()
+    return result + (measurement,)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pulse measurement accuracy and edge-path cost benchmark")
+    parser.add_argument('--frequency', type=float, default=2000.0, help="Square wave frequency (Hz)")
+    parser.add_argument('--duty', type=float, default=25.0, help="Square wave duty cycle (%%)")
+    parser.add_argument('--seconds', type=float, default=2.0)
+    parser.add_argument('--target', choices=('all', 'backend', 'qt'), default='all')
+    args = parser.parse_args()
+
+    targets = ('backend', 'qt') if args.target == 'all' else (args.target,)
+
+    print(f"{args.frequency:g} Hz square wave at {args.duty:g}% duty for {args.seconds:g}s "
+          f"({WINDOW_MS} ms window)")
+    for target in targets:
+        runner = run_backend if target == 'backend' else run_qt
+        edges, cpu, lateness, m = runner(args.frequency, args.duty, args.seconds)
+        late = lateness.summary(scale=1e6, unit='us', digits=1)
+        rate = edges / args.seconds
+        print(f"  {target:<8} measured {m['frequency_hz']:>10.3f} Hz  duty {m['duty_cycle']}%"
+              f"  pulses {m['count']}")
+        print(f"  {'':<8} edge path {cpu / edges * 1e6:.1f} us/edge, {100 * cpu / args.seconds:.1f}% "
+              f"of a core at {rate:.0f} edges/s; generator lateness p99 {late.get('p99_us')} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Rule engine trigger-to-output latency benchmark
+
+Toggles an input pin on the GPIO simulator and measures the time until a
+rule drives the output pin, from the simulator's output edge timestamps:
+    backend    backend/gpio_controller.py rules (edge callback)
+    qt         qt5-app GPIOController rules (PinWatcher edge hook)
+    qt-signal  no rule: a pinValueChanged handler on the GUI thread writes
+               the output, as a QML handler would (for comparison)
+
+The simulator runs edge callbacks on the thread that changes the input,
+like the RPi.GPIO event thread; the kernel interrupt-to-callback wakeup of
+real hardware is not included.
+
+Usage:
+    python3 benchmarks/bench_rules.py [--iterations 2000] [--interval-ms 2] [--target all|backend|qt|qt-signal]
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+from collections import deque
+
+os.environ['RETERMINAL_GPIO'] = 'sim'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'backend'))
+
+from LatencyStats import LatencyStats  # noqa: E402
+
+INPUT_PIN = 17
+OUTPUT_PIN = 22
+EDGE_TIMEOUT_NS = 500_000_000
+
+# Output follows the inverted input
+RULES = [
+    {'name': 'input_low', 'trigger': {'pin': INPUT_PIN, 'edge': 'falling'},
+     'actions': [{'type': 'write', 'pin': OUTPUT_PIN, 'value': 1}]},
+    {'name': 'input_high', 'trigger': {'pin': INPUT_PIN, 'edge': 'rising'},
+     'actions': [{'type': 'write', 'pin': OUTPUT_PIN, 'value': 0}]},
+]
+
+
+def measure(sim, iterations, interval):
+    """Toggle the input and time each resulting output edge"""
+    stats = LatencyStats(window=iterations)
+    timeouts = 0
+    level = sim.get_level(INPUT_PIN)
+
+    for _ in range(iterations):
+        level ^= 1
+        expected = level ^ 1
+        sim.edge_log.clear()
+
+        start = time.monotonic_ns()
+        sim.set_input(INPUT_PIN, level)
+        while True:
+            edge = next((e for e in list(sim.edge_log)
+                         if e[1] == OUTPUT_PIN and e[2] == expected), None)
+            if edge is not None:
+                stats.add((edge[0] - start) / 1e9)
+                break
+            if time.monotonic_ns() - start > EDGE_TIMEOUT_NS:
+                timeouts += 1
+                break
+            time.sleep(0)
+        time.sleep(interval)
+
+    return stats, timeouts
+
+
+def run_backend(iterations, interval):
+    import gpio_controller
+    from gpio_controller import GPIOController, PinMode
+
+    sim = gpio_controller.GPIO
+    sim.edge_log = deque(maxlen=16)
+    gpio = GPIOController()
+    gpio.configure_pin(INPUT_PIN, PinMode.INPUT, pull=gpio_controller.PullMode.UP)
+    gpio.configure_pin(OUTPUT_PIN, PinMode.OUTPUT)
+    for rule in RULES:
+        gpio.set_rule(rule)
+
+    stats, timeouts = measure(sim, iterations, interval)
+    engine = gpio.get_rule_stats()['latency']
+    gpio.cleanup_all()
+    return stats, timeouts, engine
+
+
+def run_qt(iterations, interval, use_rules):
+    import json
+    try:
+        from PySide2.QtCore import QCoreApplication, QMetaObject, Qt
+    except ImportError:
+        from PyQt5.QtCore import QCoreApplication, QMetaObject, Qt
+    import GPIOController as qt_module
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    sim = qt_module.GPIO
+    sim.edge_log = deque(maxlen=16)
+    gpio = qt_module.GPIOController()
+    gpio.setInputRateLimit(0)
+    gpio.configurePin(INPUT_PIN, 'input', 'up')
+    gpio.configurePin(OUTPUT_PIN, 'output', 'none')
+
+    if use_rules:
+        for rule in RULES:
+            gpio.setRule(json.dumps(rule))
+    else:
+        def on_value(pin, value):
+            if pin == INPUT_PIN:
+                gpio.writePin(OUTPUT_PIN, value ^ 1)
+        gpio.pinValueChanged.connect(on_value)
+
+    result = {}
+
+    def worker():
+        time.sleep(0.1)  # let the event loop start
+        result['stats'], result['timeouts'] = measure(sim, iterations, interval)
+        QMetaObject.invokeMethod(app, 'quit', Qt.QueuedConnection)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    app.exec_()
+    thread.join()
+
+    engine = json.loads(gpio.getRuleStats())['latency'] if use_rules else None
+    gpio.cleanup()
+    return result['stats'], result['timeouts'], engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rule engine trigger-to-output latency benchmark")
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--interval-ms', type=float, default=2.0, help="Pause between input toggles")
+    parser.add_argument('--target', choices=('all', 'backend', 'qt', 'qt-signal'), default='all')
+    args = parser.parse_args()
+
+    interval = args.interval_ms / 1000.0
+    targets = ('backend', 'qt', 'qt-signal') if args.target == 'all' else (args.target,)
+
+    print(f"Trigger-to-output latency, {args.iterations} input toggles (us)")
+    for target in targets:
+        if target == 'backend':
+            stats, timeouts, engine = run_backend(args.iterations, interval)
+        else:
+            stats, timeouts, engine = run_qt(args.iterations, interval, target == 'qt')
+
+        s = stats.summary(scale=1e6, unit='us', digits=1)
+        line = (f"  {target:<10} min {s.get('min_us', '-'):>8}  mean {s.get('mean_us', '-'):>8}"
+                f"  p50 {s.get('p50_us', '-'):>8}  p99 {s.get('p99_us', '-'):>8}"
+                f"  max {s.get('max_us', '-'):>8}")
+        if timeouts:
+            line += f"  ({timeouts} timed out)"
+        print(line)
+        if engine:
+            print(f"  {'':<10} engine edge-to-actions mean {engine.get('mean_us')}us"
+                  f"  p99 {engine.get('p99_us')}us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Software PWM jitter benchmark
+
+Runs the SoftwarePWMEngine against the GPIO simulator, which timestamps every
+output transition, and reports:
+    - the engine's own edge error histogram per pin
+    - period jitter measured independently from the simulator's edge log
+      (deviation of each rising-to-rising interval from the nominal period)
+    - what PWM costs the rest of the process: CPU used, and how late a
+      Python thread sleeping 1 ms at a time wakes up (it needs the GIL the
+      engine's busy-wait holds)
+
+The default pins include a 1 kHz pin, the hardware PWM default, which
+exhausts the engine's busy-wait budget (--max-spin-share).
+
+Use --load to add busy threads competing with the engine, and --compare to
+run the same pins through per-pin threads sleeping relative intervals (the
+RPi.GPIO.PWM approach) for reference.
+
+Usage:
+    python3 benchmarks/bench_soft_pwm.py [--seconds 5] [--pins 17:100:25,22:50:50] [--load 2]
+                                         [--max-spin-share 0.1] [--compare]
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from GPIOSimulator import GPIOSimulator  # noqa: E402
+from SoftwarePWM import SoftwarePWMEngine  # noqa: E402
+
+
+def parse_pins(spec):
+    """'17:100:25,22:50:50' -> [(17, 100.0, 25.0), (22, 50.0, 50.0)]"""
+    pins = []
+    for item in spec.split(','):
+        pin, frequency, duty = item.split(':')
+        pins.append((int(pin), float(frequency), float(duty)))
+    return pins
+
+
+def busy_load(stop):
+    x = 0
+    while not stop.is_set():
+        x += 1
+
+
+def sleep_probe(stop, lateness):
+    """Python thread sleeping 1 ms at a time, recording how late it wakes up (s)"""
+    while not stop.is_set():
+        began = time.perf_counter()
+        time.sleep(0.001)
+        lateness.append(time.perf_counter() - began - 0.001)
+
+
+def naive_pwm(gpio, pin, frequency, duty, stop):
+    """Per-pin thread sleeping relative intervals"""
+    period = 1.0 / frequency
+    high = period * duty / 100.0
+    while not stop.is_set():
+        gpio.output(pin, 1)
+        time.sleep(high)
+        gpio.output(pin, 0)
+        time.sleep(period - high)
+
+
+def period_jitter(edge_log, pin, frequency):
+    """Summarise |rise-to-rise interval - period| in microseconds"""
+    rises = [t for t, p, v in edge_log if p == pin and v == 1]
+    period_ns = 1e9 / frequency
+    errors = sorted(abs((b - a) - period_ns) / 1000.0 for a, b in zip(rises, rises[1:]))
+    if not errors:
+        return None
+    return {
+        'periods': len(errors),
+        'mean_us': sum(errors) / len(errors),
+        'p99_us': errors[min(len(errors) - 1, int(0.99 * len(errors)))],
+        'max_us': errors[-1],
+    }
+
+
+def run(pins, seconds, load, engine_based, spin_us, max_spin_us, max_spin_share):
+    gpio = GPIOSimulator(record_edges=10_000_000)
+    gpio.setmode(gpio.BCM)
+    for pin, _, _ in pins:
+        gpio.setup(pin, gpio.OUT)
+
+    stop = threading.Event()
+    threads = [threading.Thread(target=busy_load, args=(stop,), daemon=True) for _ in range(load)]
+    lateness = []
+    threads.append(threading.Thread(target=sleep_probe, args=(stop, lateness), daemon=True))
+
+    engine = None
+    if engine_based:
+        engine = SoftwarePWMEngine(gpio.output, spin_us=spin_us, max_spin_us=max_spin_us,
+                                   max_spin_share=max_spin_share)
+        for pin, frequency, duty in pins:
+            engine.PWM(pin, frequency).start(duty)
+    else:
+        threads += [threading.Thread(target=naive_pwm, args=(gpio, pin, frequency, duty, stop),
+                                     daemon=True) for pin, frequency, duty in pins]
+
+    for thread in threads:
+        thread.start()
+    began_cpu = time.process_time()
+    time.sleep(seconds)
+    cpu = (time.process_time() - began_cpu) / seconds
+    stats = engine.get_stats() if engine else {}
+    stop.set()
+    if engine:
+        engine.stop()
+    for thread in threads:
+        thread.join()
+
+    print(f"\n{'software PWM engine' if engine_based else 'per-pin sleeping threads'}"
+          f" ({seconds:g}s, {load} load threads)")
+    lateness.sort()
+    if lateness:
+        print(f"  process CPU {cpu * 100:.0f}% of a core; 1 ms sleep in another thread: late mean "
+              f"{sum(lateness) / len(lateness) * 1e3:.2f}ms  p99 "
+              f"{lateness[min(len(lateness) - 1, int(0.99 * len(lateness)))] * 1e3:.2f}ms")
+    for pin, frequency, duty in pins:
+        jitter = period_jitter(gpio.edge_log, pin, frequency)
+        line = f"  GPIO{pin:<3} {frequency:>7g}Hz {duty:>5g}%"
+        if jitter:
+            line += (f"  periods {jitter['periods']:>6}  period error mean {jitter['mean_us']:8.1f}us"
+                     f"  p99 {jitter['p99_us']:8.1f}us  max {jitter['max_us']:8.1f}us")
+        print(line)
+        if pin in stats:
+            s = stats[pin]
+            edge = s['edge_error']
+            print(f"           edge error mean {edge['mean_us']}us  max {edge['max_us']}us  "
+                  f"p99 <= {edge['p99_le_us']}us  missed periods {s['missed_periods']}  "
+                  f"spin {s['spin_us']}us  spins skipped {s['spins_skipped']}")
+            print("           " + "  ".join(
+                f"{'>' + str(edge['buckets'][-2]['le_us']) if b['le_us'] is None else '<=' + str(b['le_us'])}:{b['count']}"
+                for b in edge['buckets'] if b['count']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Software PWM jitter benchmark")
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--pins', default='17:100:25,22:50:50,23:200:10,24:1000:50',
+                        help="pin:frequency:duty list (default 17:100:25,22:50:50,23:200:10,24:1000:50)")
+    parser.add_argument('--load', type=int, default=0, help="Busy threads competing with PWM")
+    parser.add_argument('--spin-us', type=float, default=50.0)
+    parser.add_argument('--max-spin-us', type=float, default=500.0)
+    parser.add_argument('--max-spin-share', type=float, default=0.1,
+                        help="Largest share of the time the engine busy-waits")
+    parser.add_argument('--compare', action='store_true',
+                        help="Also run per-pin sleeping threads for reference")
+    args = parser.parse_args()
+
+    pins = parse_pins(args.pins)
+    run(pins, args.seconds, args.load, True, args.spin_us, args.max_spin_us, args.max_spin_share)
+    if args.compare:
+        run(pins, args.seconds, args.load, False, args.spin_us, args.max_spin_us, args.max_spin_share)
+
+
+if __name__ == '__main__':
+    main()
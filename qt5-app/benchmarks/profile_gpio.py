@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+GPIO operation latency profiler
+
+Times configure_pin, write_pin, read_pin and set_pwm, one call at a time,
+through each GPIO stack and reports min/mean/p50/p99/max in microseconds:
+    backend  backend/gpio_controller.py GPIOController
+    qt       qt5-app/src/GPIOController.py GPIOController
+    http     REST requests through backend/app.py, in-process (Flask test
+             client) or against a running server with --url, which adds the
+             network and server to the request-to-hardware latency
+
+The GPIO backend is whatever the controllers select: RPi.GPIO on a Pi, the
+mock elsewhere, or the simulator with --gpio sim (RETERMINAL_GPIO=sim).
+Run it on the target image before deploying to see the real cost.
+
+The operation with the highest mean latency (or --profile-op target.op) can
+be profiled afterwards: --profile writes cProfile stats (open with
+`python3 -m pstats` or snakeviz), --flamegraph writes folded stacks with
+self time in microseconds (flamegraph.pl, speedscope, inferno).
+
+Usage:
+    python3 benchmarks/profile_gpio.py [--target all|backend|qt|http] [--gpio auto|sim]
+        [--iterations 1000] [--url http://reterminal:5000]
+        [--profile gpio.prof] [--flamegraph gpio.folded] [--json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'backend')
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(1, BACKEND_DIR)
+
+from LatencyStats import LatencyStats  # noqa: E402
+
+OPERATIONS = ('configure_pin', 'write_pin', 'read_pin', 'set_pwm')
+TARGETS = ('backend', 'qt', 'http')
+
+
+def gpio_name(gpio):
+    """Name of the RPi.GPIO implementation a controller module uses"""
+    return getattr(gpio, '__name__', type(gpio).__name__)
+
+
+# ----------------------------------------------------------------------
+# Targets: each returns ({operation: op(i)}, description, teardown)
+# ----------------------------------------------------------------------
+
+def backend_target(args):
+    import gpio_controller
+    from gpio_controller import GPIOController, PinMode
+
+    gpio = GPIOController()
+    gpio.configure_pin(args.input_pin, PinMode.INPUT)
+    gpio.configure_pin(args.pwm_pin, PinMode.PWM, pwm_frequency=args.pwm_frequency)
+
+    ops = {
+        'configure_pin': lambda i: gpio.configure_pin(args.output_pin, PinMode.OUTPUT,
+                                                      initial_value=i & 1),
+        'write_pin': lambda i: gpio.write_pin(args.output_pin, i & 1),
+        'read_pin': lambda i: gpio.read_pin(args.input_pin),
+        'set_pwm': lambda i: gpio.set_pwm(args.pwm_pin, i % 101),
+    }
+    return ops, f"GPIO: {gpio_name(gpio_controller.GPIO)}", gpio.cleanup_all
+
+
+def qt_target(args):
+    try:
+        from PySide2.QtCore import QCoreApplication
+    except ImportError:
+        from PyQt5.QtCore import QCoreApplication
+    import GPIOController as qt_module
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+    gpio = qt_module.GPIOController()
+
+    def check(ok, what):
+        if not ok:
+            raise RuntimeError(f"{what} failed")
+
+    check(gpio.configurePin(args.input_pin, 'input', 'none'), "configurePin(input)")
+    check(gpio.configurePin(args.pwm_pin, 'pwm', 'none'), "configurePin(pwm)")
+    check(gpio.setPWMFrequency(args.pwm_pin, float(args.pwm_frequency)), "setPWMFrequency")
+
+    ops = {
+        'configure_pin': lambda i: check(gpio.configurePin(args.output_pin, 'output', 'none'),
+                                         "configurePin"),
+        'write_pin': lambda i: check(gpio.writePin(args.output_pin, i & 1), "writePin"),
+        'read_pin': lambda i: check(gpio.readPin(args.input_pin) >= 0, "readPin"),
+        'set_pwm': lambda i: check(gpio.setPWMDutyCycle(args.pwm_pin, float(i % 101)),
+                                   "setPWMDutyCycle"),
+    }
+
+    def teardown():
+        gpio.cleanup()
+        app.processEvents()
+
+    gpio_used = gpio_name(qt_module.GPIO) if qt_module.GPIO_AVAILABLE else 'mock'
+    return ops, f"GPIO: {gpio_used}", teardown
+
+
+class HTTPClient:
+    """Minimal keep-alive JSON client for a running backend"""
+
+    def __init__(self, url):
+        import http.client
+        from urllib.parse import urlsplit
+
+        parts = urlsplit(url)
+        connection = (http.client.HTTPSConnection if parts.scheme == 'https'
+                      else http.client.HTTPConnection)
+        self._connect = lambda: connection(parts.hostname, parts.port, timeout=10)
+        self._prefix = parts.path.rstrip('/')
+        self._conn = None
+
+    def request(self, method, path, body=None):
+        if self._conn is None:
+            self._conn = self._connect()
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        payload = json.dumps(body) if body is not None else None
+        self._conn.request(method, self._prefix + path, payload, headers)
+        response = self._conn.getresponse()
+        data = response.read()
+        if response.will_close:
+            self._conn.close()
+            self._conn = None
+        return response.status, data
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+
+
+def http_target(args):
+    if args.url:
+        client = HTTPClient(args.url)
+        request = client.request
+        description = f"server: {args.url}"
+        teardown = client.close
+    else:
+        import app as backend_app
+        import gpio_controller
+        from gpio_controller import GPIOController
+
+        controller = GPIOController()
+        flask_app, _ = backend_app.init_app(controller, async_mode='threading')
+        test_client = flask_app.test_client()
+
+        def request(method, path, body=None):
+            response = test_client.open(path, method=method, json=body)
+            return response.status_code, response.data
+
+        description = f"in-process, GPIO: {gpio_name(gpio_controller.GPIO)}"
+        teardown = controller.cleanup_all
+
+    def call(method, path, body=None):
+        status, data = request(method, path, body)
+        if status >= 400:
+            raise RuntimeError(f"{method} {path} -> {status}: {data[:200]!r}")
+
+    call('POST', f'/api/pins/{args.input_pin}/config', {'mode': 'input'})
+    call('POST', f'/api/pins/{args.pwm_pin}/config',
+         {'mode': 'pwm', 'pwm_frequency': args.pwm_frequency})
+
+    ops = {
+        'configure_pin': lambda i: call('POST', f'/api/pins/{args.output_pin}/config',
+                                        {'mode': 'output', 'initial_value': i & 1}),
+        'write_pin': lambda i: call('POST', f'/api/pins/{args.output_pin}/write', {'value': i & 1}),
+        'read_pin': lambda i: call('GET', f'/api/pins/{args.input_pin}/read'),
+        'set_pwm': lambda i: call('POST', f'/api/pins/{args.pwm_pin}/pwm', {'duty_cycle': i % 101}),
+    }
+
+    def cleanup():
+        try:
+            call('POST', '/api/cleanup')
+        finally:
+            teardown()
+
+    return ops, description, cleanup
+
+
+TARGET_SETUP = {'backend': backend_target, 'qt': qt_target, 'http': http_target}
+
+
+# ----------------------------------------------------------------------
+# Measurement
+# ----------------------------------------------------------------------
+
+def measure(op, iterations, warmup):
+    """Time each call of op; returns the LatencyStats"""
+    for i in range(warmup):
+        op(i)
+
+    stats = LatencyStats(window=iterations)
+    clock = time.perf_counter_ns
+    for i in range(iterations):
+        start = clock()
+        op(i)
+        stats.add((clock() - start) / 1e9)
+    return stats
+
+
+class StackCollector:
+    """
+    sys.setprofile hook accumulating self time per call stack
+
+    Deterministic rather than sampled: every call is seen, at the price of
+    inflating absolute times. Use it for where the time goes, not how much.
+    """
+
+    def __init__(self):
+        self.stacks = {}  # (frame names...) -> ns
+        self._names = []
+        self._last = 0
+
+    @staticmethod
+    def _name(frame, event, arg):
+        if event == 'call':
+            code = frame.f_code
+            return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return getattr(arg, '__qualname__', None) or repr(arg)
+
+    def __call__(self, frame, event, arg):
+        now = time.perf_counter_ns()
+        if self._names:
+            key = tuple(self._names)
+            self.stacks[key] = self.stacks.get(key, 0) + now - self._last
+
+        if event in ('call', 'c_call'):
+            self._names.append(self._name(frame, event, arg))
+        elif self._names:
+            self._names.pop()
+        self._last = time.perf_counter_ns()
+
+    def write_folded(self, path):
+        with open(path, 'w') as f:
+            for stack, ns in sorted(self.stacks.items()):
+                if ns >= 1000:
+                    f.write(f"{';'.join(stack)} {ns // 1000}\n")
+
+
+def profile(op, iterations, profile_path, flamegraph_path, out=sys.stdout):
+    if profile_path:
+        import cProfile
+        import pstats
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        for i in range(iterations):
+            op(i)
+        profiler.disable()
+        profiler.dump_stats(profile_path)
+        print(f"\ncProfile stats written to {profile_path}; top functions by cumulative time:",
+              file=out)
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(15)
+
+    if flamegraph_path:
+        collector = StackCollector()
+        sys.setprofile(collector)
+        try:
+            for i in range(iterations):
+                op(i)
+        finally:
+            sys.setprofile(None)
+        collector.write_folded(flamegraph_path)
+        print(f"Folded stacks written to {flamegraph_path} "
+              f"(e.g. flamegraph.pl {flamegraph_path} > gpio.svg)", file=out)
+
+
+def print_report(target, description, iterations, summaries):
+    print(f"\n{target} ({description}, {iterations} iterations)")
+    print(f"  {'operation':<14} {'min_us':>9} {'mean_us':>9} {'p50_us':>9} {'p99_us':>9} {'max_us':>9}")
+    for operation, s in summaries.items():
+        print(f"  {operation:<14} {s['min_us']:>9} {s['mean_us']:>9} {s['p50_us']:>9} "
+              f"{s['p99_us']:>9} {s['max_us']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GPIO operation latency profiler")
+    parser.add_argument('--target', choices=('all',) + TARGETS, default='all')
+    parser.add_argument('--gpio', choices=('auto', 'sim'), default='auto',
+                        help="auto: RPi.GPIO on a Pi, mock elsewhere; sim: GPIO simulator")
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--output-pin', type=int, default=17)
+    parser.add_argument('--input-pin', type=int, default=27)
+    parser.add_argument('--pwm-pin', type=int, default=22, help="Software PWM pin by default")
+    parser.add_argument('--pwm-frequency', type=int, default=1000)
+    parser.add_argument('--url', help="Profile a running backend instead of an in-process one")
+    parser.add_argument('--profile', metavar='FILE', help="Write cProfile stats of the hottest operation")
+    parser.add_argument('--flamegraph', metavar='FILE',
+                        help="Write folded stacks of the hottest operation")
+    parser.add_argument('--profile-op', metavar='TARGET.OP',
+                        help="Operation to profile instead of the hottest, e.g. http.write_pin")
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+    args = parser.parse_args()
+
+    # The controllers pick their GPIO implementation at import time
+    if args.gpio == 'sim':
+        os.environ['RETERMINAL_GPIO'] = 'sim'
+
+    targets = TARGETS if args.target == 'all' else (args.target,)
+    results = {}
+    hottest = None
+    for target in targets:
+        ops, description, teardown = TARGET_SETUP[target](args)
+        try:
+            summaries = {}
+            for operation in OPERATIONS:
+                stats = measure(ops[operation], args.iterations, args.warmup)
+                summaries[operation] = stats.summary(scale=1e6, unit='us', digits=1)
+                if hottest is None or summaries[operation]['mean_us'] > hottest[2]:
+                    hottest = (target, operation, summaries[operation]['mean_us'])
+        finally:
+            teardown()
+        results[target] = {'description': description, 'operations': summaries}
+        if not args.json:
+            print_report(target, description, args.iterations, summaries)
+
+    if args.json:
+        print(json.dumps({'iterations': args.iterations, 'results': results}, indent=2))
+
+    if args.profile or args.flamegraph:
+        # Keep stdout parseable with --json
+        out = sys.stderr if args.json else sys.stdout
+        if args.profile_op:
+            target, operation = args.profile_op.split('.', 1)
+            if target not in TARGETS or operation not in OPERATIONS:
+                parser.error(f"--profile-op must be one of {TARGETS} . {OPERATIONS}")
+        else:
+            target, operation, mean_us = hottest
+            print(f"\nHottest operation: {target}.{operation} (mean {mean_us}us)", file=out)
+
+        ops, _, teardown = TARGET_SETUP[target](args)
+        try:
+            profile(ops[operation], args.iterations, args.profile, args.flamegraph, out)
+        finally:
+            teardown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Session replay load test
+
+Replays a session log (qt5-app/src/SessionLog.py) against the mock
+backends: the Flask backend (backend/app.py) on the GPIO simulator, and a
+sensor stream fed with the recorded samples instead of the sensor reader.
+    api, call   REST request through the Flask test client
+    ws          Socket.IO event from a test client
+    input       simulator input level change (fires edge callbacks and rules)
+    sensor      sample into the API's sensor stream
+
+Records are replayed at the recorded pace (--speed 1), N times faster
+(--speed N) or as fast as possible (--speed 0). Reported per kind of
+request: handling time, and how late records started against the schedule.
+
+Record a session with RETERMINAL_RECORD_SESSION=path python3 backend/app.py,
+or python3 qt5-app/src/main.py --record-session path.
+
+Usage:
+    python3 benchmarks/replay_session.py SESSION [--speed 1] [--json]
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+os.environ['RETERMINAL_GPIO'] = 'sim'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(1, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'backend'))
+
+from SensorCore import SensorSample  # noqa: E402
+from SessionLog import SessionReplayer, read_session  # noqa: E402
+
+# Pin numbers and names in paths are folded so one key covers e.g. every pin write
+NUMBER_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+def path_key(method, path):
+    path = path.split('?', 1)[0]
+    path = NUMBER_SEGMENT.sub('/<n>', path)
+    path = re.sub(r'^/api/(groups|rules|alarms|encoders)/[^/]+', r'/api/\1/<name>', path)
+    return f"{method} {path}"
+
+
+def build_handlers():
+    """Handlers replaying each record kind against a fresh backend on the simulator"""
+    import app as backend
+    import gpio_controller
+    from gpio_controller import GPIOController
+
+    backend.init_app(GPIOController(), async_mode='threading')
+    sim = gpio_controller.GPIO
+    http = backend.app.test_client()
+    ws = backend.socketio.test_client(backend.app)
+
+    def replay_request(record):
+        method, path, body = record[2], record[3], record[4]
+        response = http.open(path, method=method, json=body)
+        if response.status_code >= 500:
+            raise RuntimeError(f"{method} {path} -> {response.status_code}")
+        return path_key(method, path)
+
+    def replay_event(record):
+        event, data = record[2], record[3]
+        if data is None:
+            ws.emit(event)
+        else:
+            ws.emit(event, data)
+        return f"ws {record[2]}"
+
+    def replay_input(record):
+        sim.set_input(record[2], record[3])
+        return 'input'
+
+    def replay_sensor(record):
+        backend.sensors.process(SensorSample(time.time(), *record[2:6]))
+        return 'sensor'
+
+    handlers = {
+        'api': replay_request,
+        'call': replay_request,
+        'ws': replay_event,
+        'input': replay_input,
+        'sensor': replay_sensor,
+    }
+    return handlers, backend, ws
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a session log against the mock backends")
+    parser.add_argument('session', help="Session log (.rtsession.gz)")
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="1 = recorded pace, N = N times faster, 0 = as fast as possible")
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+    args = parser.parse_args()
+
+    header, records = read_session(args.session)
+    handlers, backend, ws = build_handlers()
+
+    replayer = SessionReplayer(records, handlers, speed=args.speed)
+    stats = replayer.run()
+    stats['source'] = header.get('source')
+    stats['rules'] = backend.gpio.get_rule_stats()
+    ws.disconnect()
+    backend.gpio.cleanup_all()
+
+    if args.json:
+        print(json.dumps(stats, indent=2))
+        return
+
+    pace = 'as fast as possible' if args.speed <= 0 else f"{args.speed:g}x"
+    print(f"Replayed {stats['replayed']} records from a {stats['source']} session "
+          f"({stats['recorded_s']:.1f}s recorded) at {pace} in {stats['duration_s']:.2f}s"
+          f" - {stats['skipped']} skipped, {stats['errors']} failed")
+    if stats['lag']:
+        lag = stats['lag']
+        print(f"  schedule lag (ms)  mean {lag.get('mean_ms', '-')}  p99 {lag.get('p99_ms', '-')}"
+              f"  max {lag.get('max_ms', '-')}")
+    print("  handling time (us)")
+    for key, s in stats['latency'].items():
+        print(f"    {key:<34} n {s.get('count', 0):>6}  mean {s.get('mean_us', '-'):>8}"
+              f"  p50 {s.get('p50_us', '-'):>8}  p99 {s.get('p99_us', '-'):>8}"
+              f"  max {s.get('max_us', '-'):>8}")
+    for name, counts in stats['rules']['rules'].items():
+        print(f"  rule {name}: fired {counts['fired']}, errors {counts['errors']}")
+
+
+if __name__ == '__main__':
+    main()
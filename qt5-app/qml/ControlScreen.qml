@@ -3,49 +3,8 @@ import QtQuick 2.9
 Item {
     id: controlScreen
 
-    // Data model for controllable pins (output and PWM only)
-    property var controllablePins: []
-
-    // Load pins when screen becomes visible
-    onVisibleChanged: {
-        if (visible) {
-            updateControllablePins()
-        }
-    }
-
-    // Update pins when GPIO controller emits changes
-    Connections {
-        target: gpioController
-        onPinsChanged: {
-            if (visible) {
-                updateControllablePins()
-            }
-        }
-        onPinValueChanged: {
-            if (visible) {
-                updateControllablePins()
-            }
-        }
-    }
-
-    Component.onCompleted: {
-        updateControllablePins()
-    }
-
-    function updateControllablePins() {
-        var pinsJson = gpioController.getConfiguredPins()
-        var allPins = JSON.parse(pinsJson)
-
-        // Filter to only output and PWM pins
-        var filtered = []
-        for (var i = 0; i < allPins.length; i++) {
-            if (allPins[i].mode === 'output' || allPins[i].mode === 'pwm') {
-                filtered.push(allPins[i])
-            }
-        }
-
-        controllablePins = filtered
-    }
+    // Configured output and PWM pins come from gpioController.controlPinModel.
+    // Rows are added/removed as pins are configured and updated in place on value changes.
 
     Rectangle {
         anchors.fill: parent
@@ -68,7 +27,7 @@ Item {
             }
 
             Text {
-                text: controllablePins.length === 0 ? "No output or PWM pins configured. Use GPIO screen to configure pins." :
+                text: pinRepeater.count === 0 ? "No output or PWM pins configured. Use GPIO screen to configure pins." :
                       "Control all configured output and PWM pins"
                 font.pixelSize: 14
                 color: "#888"
@@ -99,13 +58,14 @@ Item {
                         spacing: 15
 
                         Repeater {
-                            model: controllablePins
+                            id: pinRepeater
+                            model: gpioController.controlPinModel
                             delegate: Rectangle {
                                 width: pinColumn.width
-                                height: modelData.mode === 'output' ? 90 :
-                                        (modelData.mode === 'pwm' && modelData.pwm_frequency >= 45 && modelData.pwm_frequency <= 55) ? 200 : 130
+                                height: model.mode === 'output' ? 90 :
+                                        (model.mode === 'pwm' && model.pwm_frequency >= 45 && model.pwm_frequency <= 55) ? 200 : 130
                                 color: "#1a1f3a"
-                                border.color: modelData.mode === 'output' ? "#00ff41" : "#ffa500"
+                                border.color: model.mode === 'output' ? "#00ff41" : "#ffa500"
                                 border.width: 2
                                 radius: 6
 
@@ -125,7 +85,7 @@ Item {
                                             spacing: 5
 
                                             Text {
-                                                text: "GPIO " + modelData.pin
+                                                text: "GPIO " + model.pin
                                                 font.pixelSize: 24
                                                 font.bold: true
                                                 font.family: "monospace"
@@ -134,16 +94,16 @@ Item {
                                             }
 
                                             Text {
-                                                text: modelData.mode.toUpperCase()
+                                                text: model.mode.toUpperCase()
                                                 font.pixelSize: 12
                                                 font.bold: true
                                                 font.family: "monospace"
-                                                color: modelData.mode === 'output' ? "#00ff41" : "#ffa500"
+                                                color: model.mode === 'output' ? "#00ff41" : "#ffa500"
                                                 anchors.horizontalCenter: parent.horizontalCenter
                                             }
 
                                             Text {
-                                                visible: modelData.hardware_pwm === true
+                                                visible: model.hardware_pwm === true
                                                 text: "⚡ HW PWM"
                                                 font.pixelSize: 9
                                                 font.family: "monospace"
@@ -161,7 +121,7 @@ Item {
 
                                         // OUTPUT controls: OFF/ON buttons
                                         Row {
-                                            visible: modelData.mode === 'output'
+                                            visible: model.mode === 'output'
                                             width: parent.width
                                             spacing: 10
                                             anchors.verticalCenter: parent.verticalCenter
@@ -169,8 +129,8 @@ Item {
                                             Rectangle {
                                                 width: (parent.width - 10) / 2
                                                 height: 54
-                                                color: modelData.value === 0 ? "#00ff41" : "transparent"
-                                                border.color: modelData.value === 0 ? "#00ff41" : "#666"
+                                                color: model.value === 0 ? "#00ff41" : "transparent"
+                                                border.color: model.value === 0 ? "#00ff41" : "#666"
                                                 border.width: 2
                                                 radius: 4
 
@@ -180,20 +140,20 @@ Item {
                                                     font.pixelSize: 36
                                                     font.bold: true
                                                     font.family: "monospace"
-                                                    color: modelData.value === 0 ? "#000" : "#666"
+                                                    color: model.value === 0 ? "#000" : "#666"
                                                 }
 
                                                 MouseArea {
                                                     anchors.fill: parent
-                                                    onClicked: gpioController.writePin(modelData.pin, 0)
+                                                    onClicked: gpioController.writePin(model.pin, 0)
                                                 }
                                             }
 
                                             Rectangle {
                                                 width: (parent.width - 10) / 2
                                                 height: 54
-                                                color: modelData.value === 1 ? "#00ff41" : "transparent"
-                                                border.color: modelData.value === 1 ? "#00ff41" : "#666"
+                                                color: model.value === 1 ? "#00ff41" : "transparent"
+                                                border.color: model.value === 1 ? "#00ff41" : "#666"
                                                 border.width: 2
                                                 radius: 4
 
@@ -203,25 +163,25 @@ Item {
                                                     font.pixelSize: 36
                                                     font.bold: true
                                                     font.family: "monospace"
-                                                    color: modelData.value === 1 ? "#000" : "#666"
+                                                    color: model.value === 1 ? "#000" : "#666"
                                                 }
 
                                                 MouseArea {
                                                     anchors.fill: parent
-                                                    onClicked: gpioController.writePin(modelData.pin, 1)
+                                                    onClicked: gpioController.writePin(model.pin, 1)
                                                 }
                                             }
                                         }
 
                                         // PWM controls
                                         Column {
-                                            visible: modelData.mode === 'pwm'
+                                            visible: model.mode === 'pwm'
                                             width: parent.width
                                             spacing: 6
 
                                             // Duty Cycle slider
                                             Text {
-                                                text: "DUTY CYCLE: " + modelData.pwm_duty_cycle.toFixed(1) + "%"
+                                                text: "DUTY CYCLE: " + model.pwm_duty_cycle.toFixed(1) + "%"
                                                 font.pixelSize: 14
                                                 font.bold: true
                                                 font.family: "monospace"
@@ -248,7 +208,7 @@ Item {
                                                     Rectangle {
                                                         anchors.left: parent.left
                                                         anchors.verticalCenter: parent.verticalCenter
-                                                        width: parent.width * (modelData.pwm_duty_cycle / 100)
+                                                        width: parent.width * (model.pwm_duty_cycle / 100)
                                                         height: parent.height
                                                         color: "#ffa500"
                                                         radius: 3
@@ -257,7 +217,7 @@ Item {
                                                     // Slider handle
                                                     Rectangle {
                                                         id: dutyHandle
-                                                        x: (parent.width - width) * (modelData.pwm_duty_cycle / 100)
+                                                        x: (parent.width - width) * (model.pwm_duty_cycle / 100)
                                                         anchors.verticalCenter: parent.verticalCenter
                                                         width: 20
                                                         height: 20
@@ -278,9 +238,17 @@ Item {
                                                                 if (drag.active) {
                                                                     var newDuty = Math.max(0, Math.min(100,
                                                                         (dutyHandle.x / (dutyHandle.parent.width - dutyHandle.width)) * 100))
-                                                                    gpioController.setPWMDutyCycle(modelData.pin, newDuty)
+                                                                    gpioController.setPWMDutyCycle(model.pin, newDuty)
                                                                 }
                                                             }
+
+                                                            // Dragging replaced the x binding; restore it so
+                                                            // changes from elsewhere move the handle again
+                                                            onReleased: {
+                                                                dutyHandle.x = Qt.binding(function() {
+                                                                    return (dutyHandle.parent.width - dutyHandle.width) * (model.pwm_duty_cycle / 100)
+                                                                })
+                                                            }
                                                         }
                                                     }
                                                 }
@@ -288,7 +256,7 @@ Item {
 
                                             // Servo position slider (for 45-55Hz PWM)
                                             Column {
-                                                visible: modelData.pwm_frequency >= 45 && modelData.pwm_frequency <= 55
+                                                visible: model.pwm_frequency >= 45 && model.pwm_frequency <= 55
                                                 width: parent.width
                                                 spacing: 6
 
@@ -306,7 +274,7 @@ Item {
                                                     }
 
                                                     Text {
-                                                        property real angle: Math.max(0, Math.min(180, (modelData.pwm_duty_cycle - 5) * 36))
+                                                        property real angle: Math.max(0, Math.min(180, (model.pwm_duty_cycle - 5) * 36))
                                                         text: angle.toFixed(0) + "°"
                                                         font.pixelSize: 24
                                                         font.bold: true
@@ -344,7 +312,7 @@ Item {
                                                         Rectangle {
                                                             anchors.left: parent.left
                                                             anchors.verticalCenter: parent.verticalCenter
-                                                            width: parent.width * ((modelData.pwm_duty_cycle - 5) / 5)
+                                                            width: parent.width * ((model.pwm_duty_cycle - 5) / 5)
                                                             height: parent.height
                                                             color: "#00f3ff"
                                                             opacity: 0.5
@@ -355,7 +323,7 @@ Item {
                                                         Rectangle {
                                                             id: servoHandle
                                                             // Map duty cycle 5-10% to position 0-1
-                                                            property real normalizedPos: (modelData.pwm_duty_cycle - 5) / 5
+                                                            property real normalizedPos: (model.pwm_duty_cycle - 5) / 5
                                                             x: (parent.width - width) * normalizedPos
                                                             anchors.verticalCenter: parent.verticalCenter
                                                             width: 20
@@ -378,9 +346,15 @@ Item {
                                                                         var normalizedPos = servoHandle.x / (servoHandle.parent.width - servoHandle.width)
                                                                         // Map position 0-1 to duty cycle 5-10%
                                                                         var newDuty = 5 + (normalizedPos * 5)
-                                                                        gpioController.setPWMDutyCycle(modelData.pin, newDuty)
+                                                                        gpioController.setPWMDutyCycle(model.pin, newDuty)
                                                                     }
                                                                 }
+
+                                                                onReleased: {
+                                                                    servoHandle.x = Qt.binding(function() {
+                                                                        return (servoHandle.parent.width - servoHandle.width) * servoHandle.normalizedPos
+                                                                    })
+                                                                }
                                                             }
                                                         }
                                                     }
@@ -3,49 +3,29 @@ import QtQuick 2.9
 Item {
     id: gpioScreen
 
-    // Data model for configured pins
-    property var configuredPins: []
+    // Selected pin and a snapshot of its info for the control panel
     property int selectedPin: -1
     property var selectedPinInfo: null
-    property var hardwarePWMPins: []
 
-    // Update configured pins when GPIO controller emits signal
+    // Pin state comes from gpioController.pinModel (one row per BCM pin).
+    // Only the row that changed is updated, so just refresh the selected pin's snapshot.
     Connections {
-        target: gpioController
-        onPinsChanged: {
-            updateConfiguredPins()
-        }
-        onPinValueChanged: {
-            // Update when pin values change (e.g., writePin called)
-            updateConfiguredPins()
+        target: gpioController.pinModel
+        onDataChanged: {
+            if (selectedPin !== -1 && topLeft.row <= selectedPin && selectedPin <= bottomRight.row) {
+                refreshSelectedPin()
+            }
         }
     }
 
-    Component.onCompleted: {
-        updateConfiguredPins()
-        // Get hardware PWM pins
-        var hwPwmJson = gpioController.getHardwarePWMPins()
-        hardwarePWMPins = JSON.parse(hwPwmJson)
-    }
-
-    function updateConfiguredPins() {
-        var pinsJson = gpioController.getConfiguredPins()
-        configuredPins = JSON.parse(pinsJson)
-
-        // Update selected pin info if it's still configured
-        if (selectedPin !== -1) {
-            var found = false
-            for (var i = 0; i < configuredPins.length; i++) {
-                if (configuredPins[i].pin === selectedPin) {
-                    selectedPinInfo = configuredPins[i]
-                    found = true
-                    break
-                }
-            }
-            if (!found) {
-                selectedPin = -1
-                selectedPinInfo = null
-            }
+    function refreshSelectedPin() {
+        var info = gpioController.pinModel.get(selectedPin)
+        if (info.pin === undefined) {
+            // Pin is no longer configured
+            selectedPin = -1
+            selectedPinInfo = null
+        } else {
+            selectedPinInfo = info
         }
     }
 
@@ -112,24 +92,12 @@ Item {
                                     spacing: 10
 
                                     Repeater {
-                                        model: [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 26, 27]
+                                        model: gpioController.pinModel
 
                                         Rectangle {
-                                            property var reservedPins: [2, 3, 6, 13]
-                                            property bool isReserved: reservedPins.indexOf(modelData) !== -1
-                                            property bool isHardwarePWM: hardwarePWMPins.indexOf(modelData) !== -1
-                                            property bool isConfigured: {
-                                                for (var i = 0; i < configuredPins.length; i++) {
-                                                    if (configuredPins[i].pin === modelData) return true
-                                                }
-                                                return false
-                                            }
-                                            property var pinInfo: {
-                                                for (var i = 0; i < configuredPins.length; i++) {
-                                                    if (configuredPins[i].pin === modelData) return configuredPins[i]
-                                                }
-                                                return null
-                                            }
+                                            property bool isReserved: model.reserved
+                                            property bool isHardwarePWM: model.hardware_pwm
+                                            property bool isConfigured: model.configured
 
                                             width: 70
                                             height: 70
@@ -151,7 +119,7 @@ Item {
                                                 }
 
                                                 Text {
-                                                    text: modelData
+                                                    text: model.pin
                                                     font.pixelSize: 20
                                                     font.bold: true
                                                     font.family: "monospace"
@@ -178,15 +146,15 @@ Item {
                                                 }
 
                                                 Text {
-                                                    visible: isConfigured && pinInfo
+                                                    visible: isConfigured
                                                     text: {
-                                                        if (!pinInfo) return ""
-                                                        if (pinInfo.mode === "pwm") {
-                                                            return "PWM:" + pinInfo.pwm_duty_cycle.toFixed(0) + "%"
-                                                        } else if (pinInfo.mode === "output") {
-                                                            return "OUT:" + pinInfo.value
+                                                        if (!isConfigured) return ""
+                                                        if (model.mode === "pwm") {
+                                                            return "PWM:" + model.pwm_duty_cycle.toFixed(0) + "%"
+                                                        } else if (model.mode === "output") {
+                                                            return "OUT:" + model.value
                                                         } else {
-                                                            return "IN:" + pinInfo.value
+                                                            return "IN:" + model.value
                                                         }
                                                     }
                                                     font.pixelSize: 8
@@ -203,11 +171,11 @@ Item {
                                                 onClicked: {
                                                     if (isConfigured) {
                                                         // Select configured pin for control
-                                                        selectedPin = modelData
-                                                        selectedPinInfo = pinInfo
+                                                        selectedPin = model.pin
+                                                        refreshSelectedPin()
                                                     } else {
                                                         // Show configuration dialog for unconfigured pin
-                                                        pinConfigDialog.pinNumber = modelData
+                                                        pinConfigDialog.pinNumber = model.pin
                                                         pinConfigDialog.visible = true
                                                     }
                                                 }
@@ -493,17 +461,10 @@ Item {
 
                                 if (success) {
                                     pinConfigDialog.visible = false
-                                    updateConfiguredPins()
 
                                     // Select the newly added pin
                                     selectedPin = pinConfigDialog.pinNumber
-                                    // Update selected pin info
-                                    for (var i = 0; i < configuredPins.length; i++) {
-                                        if (configuredPins[i].pin === pinConfigDialog.pinNumber) {
-                                            selectedPinInfo = configuredPins[i]
-                                            break
-                                        }
-                                    }
+                                    refreshSelectedPin()
                                 }
                             }
                         }
@@ -1,52 +1,30 @@
 import QtQuick 2.9
+import ReTerminal 1.0
 
 Item {
     id: sensorScreen
 
-    // Data buffers for graphing (keep last 100 points)
-    property var accelXData: []
-    property var accelYData: []
-    property var accelZData: []
-    property var lightData: []
-    property int maxDataPoints: 100
+    // Seconds of sensor history shown by the graphs
+    property real graphDuration: 5
 
-    // Update graphs when sensor data changes
-    Connections {
-        target: sensorData
-        onAccelXChanged: { updateAccelData() }
-        onAccelYChanged: { updateAccelData() }
-        onAccelZChanged: { updateAccelData() }
-        onLightChanged: { updateLightData() }
-    }
+    // Full-rate sampling is only needed while this screen is shown;
+    // otherwise the sensor controller may drop to its idle rate
+    onVisibleChanged: updateSensorSubscription()
+    Component.onCompleted: updateSensorSubscription()
 
-    function updateAccelData() {
-        // Add new data points
-        accelXData.push(sensorData.accelX)
-        accelYData.push(sensorData.accelY)
-        accelZData.push(sensorData.accelZ)
-
-        // Keep only last maxDataPoints
-        if (accelXData.length > maxDataPoints) {
-            accelXData.shift()
-            accelYData.shift()
-            accelZData.shift()
+    function updateSensorSubscription() {
+        if (visible) {
+            sensorController.subscribe("sensorScreen")
+        } else {
+            sensorController.unsubscribe("sensorScreen")
         }
-
-        // Trigger repaint
-        accelCanvas.requestPaint()
     }
 
-    function updateLightData() {
-        // Add new data point
-        lightData.push(sensorData.light)
-
-        // Keep only last maxDataPoints
-        if (lightData.length > maxDataPoints) {
-            lightData.shift()
-        }
-
-        // Trigger repaint
-        lightCanvas.requestPaint()
+    // Repaint spectrum when a new analysis window arrives. The accelerometer
+    // and light graphs read the sensor history themselves (SensorGraph.py).
+    Connections {
+        target: vibrationData
+        onAnalysisChanged: { spectrumCanvas.requestPaint() }
     }
 
     Column {
@@ -57,7 +35,7 @@ Item {
         // Accelerometer section
         Rectangle {
             width: parent.width
-            height: (parent.height - 40) / 2
+            height: (parent.height - 40) / 3
             color: "#1a1f3a"
             border.color: "#00f3ff"
             border.width: 2
@@ -114,64 +92,17 @@ Item {
                     border.width: 1
                     radius: 4
 
-                    Canvas {
-                        id: accelCanvas
+                    // Native scrolling plot, -2g to +2g
+                    SensorGraph {
+                        id: accelGraph
                         anchors.fill: parent
                         anchors.margins: 10
-
-                        onPaint: {
-                            var ctx = getContext("2d")
-                            ctx.clearRect(0, 0, width, height)
-
-                            if (accelXData.length === 0) return
-
-                            // Draw grid
-                            ctx.strokeStyle = "#1a1f3a"
-                            ctx.lineWidth = 1
-                            for (var i = 0; i <= 4; i++) {
-                                var y = (height / 4) * i
-                                ctx.beginPath()
-                                ctx.moveTo(0, y)
-                                ctx.lineTo(width, y)
-                                ctx.stroke()
-                            }
-
-                            // Draw zero line
-                            ctx.strokeStyle = "#333"
-                            ctx.lineWidth = 2
-                            var zeroY = height / 2
-                            ctx.beginPath()
-                            ctx.moveTo(0, zeroY)
-                            ctx.lineTo(width, zeroY)
-                            ctx.stroke()
-
-                            // Helper function to draw line
-                            function drawLine(data, color) {
-                                ctx.strokeStyle = color
-                                ctx.lineWidth = 2
-                                ctx.beginPath()
-
-                                var xStep = width / (maxDataPoints - 1)
-                                for (var i = 0; i < data.length; i++) {
-                                    var x = i * xStep
-                                    // Map -2g to +2g to canvas height
-                                    var value = data[i]
-                                    var y = height / 2 - (value / 2) * (height / 2)
-
-                                    if (i === 0) {
-                                        ctx.moveTo(x, y)
-                                    } else {
-                                        ctx.lineTo(x, y)
-                                    }
-                                }
-                                ctx.stroke()
-                            }
-
-                            // Draw lines for each axis
-                            drawLine(accelXData, "#ff006e")
-                            drawLine(accelYData, "#00ff41")
-                            drawLine(accelZData, "#00f3ff")
-                        }
+                        duration: graphDuration
+                        channels: ["accel_x", "accel_y", "accel_z"]
+                        colors: ["#ff006e", "#00ff41", "#00f3ff"]
+                        minimum: -2
+                        maximum: 2
+                        zeroLine: true
                     }
                 }
             }
@@ -180,7 +111,7 @@ Item {
         // Light sensor section
         Rectangle {
             width: parent.width
-            height: (parent.height - 40) / 2
+            height: (parent.height - 40) / 3
             color: "#1a1f3a"
             border.color: "#ffbe0b"
             border.width: 2
@@ -219,8 +150,98 @@ Item {
                     border.width: 1
                     radius: 4
 
+                    // Native scrolling plot, scaled to the visible readings
+                    SensorGraph {
+                        id: lightGraph
+                        anchors.fill: parent
+                        anchors.margins: 10
+                        duration: graphDuration
+                        channels: ["light"]
+                        colors: ["#ffbe0b"]
+                        fillColor: Qt.rgba(1.0, 190 / 255, 11 / 255, 0.2)
+                        autoRange: true
+                    }
+                }
+            }
+        }
+
+        // Vibration spectrum section
+        Rectangle {
+            width: parent.width
+            height: (parent.height - 40) / 3
+            color: "#1a1f3a"
+            border.color: "#ff006e"
+            border.width: 2
+            radius: 8
+
+            Column {
+                anchors.fill: parent
+                anchors.margins: 20
+                spacing: 15
+
+                // Header with RMS and peak frequency
+                Row {
+                    width: parent.width
+                    spacing: 20
+
+                    Text {
+                        text: "VIBRATION SPECTRUM"
+                        font.pixelSize: 24
+                        font.bold: true
+                        color: "#ff006e"
+                        width: parent.width - 500
+                    }
+
+                    Row {
+                        spacing: 20
+                        visible: vibrationData.available
+
+                        Text {
+                            text: "RMS X: " + vibrationData.rmsX.toFixed(3) + "g"
+                            font.pixelSize: 14
+                            color: "#ff006e"
+                        }
+
+                        Text {
+                            text: "Y: " + vibrationData.rmsY.toFixed(3) + "g"
+                            font.pixelSize: 14
+                            color: "#00ff41"
+                        }
+
+                        Text {
+                            text: "Z: " + vibrationData.rmsZ.toFixed(3) + "g"
+                            font.pixelSize: 14
+                            color: "#00f3ff"
+                        }
+
+                        Text {
+                            text: "Peak: " + vibrationData.peakFrequency.toFixed(1) + "Hz"
+                            font.pixelSize: 14
+                            font.bold: true
+                            color: "#ffbe0b"
+                        }
+                    }
+                }
+
+                // Graph
+                Rectangle {
+                    width: parent.width
+                    height: parent.height - 50
+                    color: "#0a0e27"
+                    border.color: "#333"
+                    border.width: 1
+                    radius: 4
+
+                    Text {
+                        anchors.centerIn: parent
+                        visible: !vibrationData.available
+                        text: "Vibration analysis unavailable (requires NumPy)"
+                        font.pixelSize: 14
+                        color: "#666"
+                    }
+
                     Canvas {
-                        id: lightCanvas
+                        id: spectrumCanvas
                         anchors.fill: parent
                         anchors.margins: 10
 
@@ -228,60 +249,28 @@ Item {
                             var ctx = getContext("2d")
                             ctx.clearRect(0, 0, width, height)
 
-                            if (lightData.length === 0) return
-
-                            // Draw grid
-                            ctx.strokeStyle = "#1a1f3a"
-                            ctx.lineWidth = 1
-                            for (var i = 0; i <= 4; i++) {
-                                var y = (height / 4) * i
-                                ctx.beginPath()
-                                ctx.moveTo(0, y)
-                                ctx.lineTo(width, y)
-                                ctx.stroke()
-                            }
-
-                            // Find min/max for scaling
-                            var minLight = Math.min.apply(null, lightData)
-                            var maxLight = Math.max.apply(null, lightData)
-                            var range = maxLight - minLight
-                            if (range === 0) range = 1  // Prevent division by zero
-
-                            // Draw filled area
-                            ctx.fillStyle = "rgba(255, 190, 11, 0.2)"
-                            ctx.strokeStyle = "#ffbe0b"
-                            ctx.lineWidth = 2
-                            ctx.beginPath()
-
-                            var xStep = width / (maxDataPoints - 1)
+                            var spectrum = vibrationData.spectrum
+                            if (spectrum.length === 0) return
 
-                            // Start from bottom
-                            ctx.moveTo(0, height)
+                            // Scale to the current peak so small vibrations stay visible
+                            var maxMagnitude = vibrationData.peakMagnitude
+                            if (maxMagnitude <= 0) maxMagnitude = 1
 
-                            for (var i = 0; i < lightData.length; i++) {
-                                var x = i * xStep
-                                var normalizedValue = (lightData[i] - minLight) / range
-                                var y = height - (normalizedValue * height)
-                                ctx.lineTo(x, y)
+                            // One bar per frequency bin
+                            var barWidth = width / spectrum.length
+                            ctx.fillStyle = "rgba(255, 0, 110, 0.6)"
+                            for (var i = 0; i < spectrum.length; i++) {
+                                var barHeight = (spectrum[i] / maxMagnitude) * height
+                                ctx.fillRect(i * barWidth, height - barHeight, Math.max(1, barWidth - 1), barHeight)
                             }
 
-                            // Close the path
-                            ctx.lineTo(lightData.length * xStep, height)
-                            ctx.closePath()
-                            ctx.fill()
-
-                            // Draw line
+                            // Mark the peak bin
+                            var peakX = (vibrationData.peakFrequency / vibrationData.binHz) * barWidth
+                            ctx.strokeStyle = "#ffbe0b"
+                            ctx.lineWidth = 2
                             ctx.beginPath()
-                            for (var j = 0; j < lightData.length; j++) {
-                                var x2 = j * xStep
-                                var normalizedValue2 = (lightData[j] - minLight) / range
-                                var y2 = height - (normalizedValue2 * height)
-                                if (j === 0) {
-                                    ctx.moveTo(x2, y2)
-                                } else {
-                                    ctx.lineTo(x2, y2)
-                                }
-                            }
+                            ctx.moveTo(peakX + barWidth / 2, 0)
+                            ctx.lineTo(peakX + barWidth / 2, height)
                             ctx.stroke()
                         }
                     }
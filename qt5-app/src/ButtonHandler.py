@@ -2,9 +2,18 @@
 Button Handler for reTerminal Physical Buttons
 Uses evdev to directly read button events and emit Qt signals
 Based on Seeed's LedsKey.py implementation
+
+The handler thread selects on the input device and a wakeup pipe, so it
+sleeps until a key event arrives, a gesture timer expires or stop() is
+called. Events are decoded from event.code/event.value and carry the kernel
+timestamp of the key event (on CLOCK_MONOTONIC where the kernel allows
+switching the device clock) all the way to the Qt signal.
 """
-import sys
 import os
+import time
+import fcntl
+import select
+import struct
 
 try:
     from PySide2.QtCore import QThread, Signal, Slot
@@ -13,95 +22,292 @@ except ImportError:
 
 from evdev import InputDevice, ecodes
 
+from LatencyStats import LatencyStats
+from StructuredLog import get_logger
+
+log = get_logger('buttons')
+
+# reTerminal button mappings (gpio_keys reports them as keyboard keys)
+BUTTON_CODES = {
+    ecodes.KEY_A: 'F1',
+    ecodes.KEY_S: 'F2',
+    ecodes.KEY_D: 'F3',
+    ecodes.KEY_F: 'O',
+}
+
+# Key event values
+KEY_RELEASED = 0
+KEY_PRESSED = 1
+
+# ioctl selecting the clock used for event timestamps: _IOW('E', 0xa0, int)
+EVIOCSCLOCKID = 0x400445a0
+
+# Delay before reopening the device after an error
+REOPEN_DELAY = 0.5
+
+
+class GestureDetector:
+    """
+    Detects long-press, double-press and chord gestures from key events
+
+    Pure logic, fed with (button, pressed, timestamp) and polled for
+    timer-based gestures, so it does not depend on evdev or Qt. Gestures are
+    returned as (gesture, detail, timestamp) tuples:
+        ('long_press', 'F2', t)     button held for long_press_s
+        ('double_press', 'O', t)    second press within double_press_s
+        ('chord', 'F1+F3', t)       all chord buttons pressed within chord_window_s
+
+    Buttons taking part in a chord do not also report long or double presses.
+    """
+
+    def __init__(self, long_press_s=0.8, double_press_s=0.35, chord_window_s=0.15,
+                 chords=(('F1', 'F3'),)):
+        self.long_press_s = long_press_s
+        self.double_press_s = double_press_s
+        self.chord_window_s = chord_window_s
+        self.chords = [tuple(chord) for chord in chords]
+
+        self._down = {}         # {button: press timestamp}
+        self._consumed = set()  # held buttons that already produced a gesture
+        self._last_press = {}   # {button: timestamp of the last plain press}
+
+    def feed(self, button, pressed, timestamp):
+        """Process a press or release and return the gestures it completes"""
+        gestures = []
+
+        if not pressed:
+            self._down.pop(button, None)
+            self._consumed.discard(button)
+            return gestures
+
+        self._down[button] = timestamp
+
+        for chord in self.chords:
+            if button not in chord or not all(b in self._down for b in chord):
+                continue
+            if timestamp - min(self._down[b] for b in chord) <= self.chord_window_s:
+                self._consumed.update(chord)
+                for b in chord:
+                    self._last_press.pop(b, None)
+                gestures.append(('chord', '+'.join(chord), timestamp))
+        if button in self._consumed:
+            return gestures
+
+        previous = self._last_press.pop(button, None)
+        if previous is not None and timestamp - previous <= self.double_press_s:
+            gestures.append(('double_press', button, timestamp))
+        else:
+            self._last_press[button] = timestamp
+        return gestures
+
+    def poll(self, now):
+        """Return long presses that have become due at `now`"""
+        gestures = []
+        for button, pressed_at in self._down.items():
+            if button not in self._consumed and now - pressed_at >= self.long_press_s:
+                self._consumed.add(button)
+                self._last_press.pop(button, None)
+                gestures.append(('long_press', button, pressed_at + self.long_press_s))
+        return gestures
+
+    def next_deadline(self):
+        """Timestamp of the next possible long press, or None"""
+        pending = [t for b, t in self._down.items() if b not in self._consumed]
+        if not pending:
+            return None
+        return min(pending) + self.long_press_s
+
+    def reset(self):
+        """Forget all held buttons (e.g. after the device was reopened)"""
+        self._down.clear()
+        self._consumed.clear()
+        self._last_press.clear()
+
 
 class ButtonHandler(QThread):
     """
     Qt thread that monitors reTerminal physical buttons
-    Emits signals when buttons are pressed/released
+    Emits signals when buttons are pressed/released and on gestures
     """
-    # Signal: (button_name: str, state: str)
+    # Signal: (button_name: str, state: str, timestamp: float)
     # button_name: 'F1', 'F2', 'F3', 'O'
     # state: 'pressed' or 'released'
-    buttonEvent = Signal(str, str)
+    # timestamp: kernel event time in the clock returned by now()
+    buttonEvent = Signal(str, str, float)
+
+    # Signal: (gesture: str, detail: str, timestamp: float)
+    # gesture: 'long_press', 'double_press' or 'chord'
+    # detail: button name, or 'F1+F3' for chords
+    gestureEvent = Signal(str, str, float)
 
-    def __init__(self, device_path):
+    def __init__(self, device_path, long_press_ms=800, double_press_ms=350, chord_window_ms=150):
         """
         Initialize button handler
 
         Args:
             device_path: Path to input device (e.g., /dev/input/event0)
+            long_press_ms: Hold time that makes a long press
+            double_press_ms: Maximum time between the presses of a double press
+            chord_window_ms: Maximum time between the presses of a chord
         """
         super().__init__()
         self.device_path = device_path
         self.running = True
-        print(f"[ButtonHandler] Initialized with device: {device_path}")
+
+        self.gestures = GestureDetector(long_press_s=long_press_ms / 1000.0,
+                                        double_press_s=double_press_ms / 1000.0,
+                                        chord_window_s=chord_window_ms / 1000.0)
+
+        # Kernel-to-thread delay of key events
+        self.read_latency = LatencyStats(window=256)
+
+        # Event timestamps are CLOCK_REALTIME until the device clock is switched
+        self._clock = time.time
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        log.info("Initialized", device=device_path)
+
+    def now(self):
+        """Current time in the clock used by event timestamps"""
+        return self._clock()
+
+    def get_stats(self):
+        """Get kernel-to-handler read latency statistics"""
+        stats = self.read_latency.summary()
+        stats['clock'] = 'monotonic' if self._clock is time.monotonic else 'realtime'
+        return stats
+
+    # ------------------------------------------------------------------
+    # Thread loop
+    # ------------------------------------------------------------------
 
     def run(self):
-        """Main thread loop - reads button events continuously"""
-        print("[ButtonHandler] Thread started, monitoring buttons...")
+        """Main thread loop - reads button events until stopped"""
+        log.info("Thread started, monitoring buttons...")
 
         while self.running:
+            device = None
             try:
-                # Open device (will auto-close when context ends)
-                device = InputDevice(self.device_path)
+                device = self._open_device()
+                self._read_events(device)
+            except OSError as e:
+                log.error("Device error", error=e)
+            except Exception:
+                log.exception("Unexpected error")
+            finally:
+                if device is not None:
+                    self._close_device(device)
 
-                # Grab device exclusively to prevent X11 from consuming events
-                try:
-                    device.grab()
-                    print("[ButtonHandler] Device grabbed exclusively")
-                except Exception as e:
-                    print(f"[ButtonHandler] Warning: Could not grab device exclusively: {e}")
+            # Device might be temporarily unavailable, retry unless stopped
+            if self.running:
+                self._wait_for_wakeup(REOPEN_DELAY)
+
+        os.close(self._wake_r)
+        log.info("Thread stopped")
+
+    def _open_device(self):
+        """Open and grab the input device, switching it to CLOCK_MONOTONIC"""
+        device = InputDevice(self.device_path)
+
+        # Grab device exclusively to prevent X11 from consuming events
+        try:
+            device.grab()
+            log.info("Device grabbed exclusively")
+        except Exception as e:
+            log.warning("Could not grab device exclusively", error=e)
+
+        try:
+            fcntl.ioctl(device.fd, EVIOCSCLOCKID, struct.pack('i', time.CLOCK_MONOTONIC))
+            self._clock = time.monotonic
+        except OSError as e:
+            log.info("Event timestamps stay on CLOCK_REALTIME", error=e)
+            self._clock = time.time
+
+        self.gestures.reset()
+        return device
+
+    def _close_device(self, device):
+        try:
+            device.ungrab()
+        except Exception:
+            pass
+        try:
+            device.close()
+        except Exception:
+            pass
 
-                # Read events in a loop
-                for event in device.read_loop():
-                    if not self.running:
-                        break
+    def _read_events(self, device):
+        """Dispatch events until stopped or the device fails"""
+        fds = [device.fd, self._wake_r]
 
-                    # Only process keyboard events
+        while self.running:
+            timeout = None
+            deadline = self.gestures.next_deadline()
+            if deadline is not None:
+                timeout = max(0.0, deadline - self._clock())
+
+            readable, _, _ = select.select(fds, [], [], timeout)
+
+            if self._wake_r in readable:
+                self._drain_wakeup()
+            if device.fd in readable:
+                try:
+                    # read() is a generator: the read happens on iteration
+                    events = list(device.read())
+                except BlockingIOError:
+                    # Woken spuriously, or another reader drained the fd
+                    events = ()
+                for event in events:
                     if event.type == ecodes.EV_KEY:
-                        # Parse event representation
-                        # Format: "event at 1234567890.123456, code 30, type 01, val 1"
-                        keyevents = repr(event)
-                        val_list = keyevents.replace('(', '').replace(')', '').replace(' ', '').split(',')
-
-                        if len(val_list) >= 5:
-                            code = val_list[3]  # Key code
-                            value = int(val_list[4])  # 0=released, 1=pressed, 2=held
-
-                            # Map key codes to button names
-                            # reTerminal button mappings:
-                            # F1 = KEY_A (code 30)
-                            # F2 = KEY_S (code 31)
-                            # F3 = KEY_D (code 32)
-                            # O  = KEY_F (code 33)
-                            button_map = {
-                                '30': 'F1',
-                                '31': 'F2',
-                                '32': 'F3',
-                                '33': 'O'
-                            }
-
-                            if code in button_map:
-                                button_name = button_map[code]
-                                # Only emit on press (1) or release (0), ignore hold (2)
-                                if value in [0, 1]:
-                                    state = 'pressed' if value == 1 else 'released'
-                                    print(f"[ButtonHandler] {button_name} {state}")
-                                    self.buttonEvent.emit(button_name, state)
+                        self._handle_key(event.code, event.value,
+                                         event.sec + event.usec / 1000000.0)
 
-            except OSError as e:
-                print(f"[ButtonHandler] Device error: {e}")
-                # Device might be temporarily unavailable, retry
-                import time
-                time.sleep(0.5)
-            except Exception as e:
-                print(f"[ButtonHandler] Unexpected error: {e}")
-                import time
-                time.sleep(0.5)
+            for gesture, detail, timestamp in self.gestures.poll(self._clock()):
+                self._emit_gesture(gesture, detail, timestamp)
+
+    def _handle_key(self, code, value, timestamp):
+        """Emit a button event and feed the gesture detector"""
+        button = BUTTON_CODES.get(code)
+        # Only press (1) and release (0); autorepeat (2) is ignored
+        if button is None or value not in (KEY_PRESSED, KEY_RELEASED):
+            return
 
-        print("[ButtonHandler] Thread stopped")
+        self.read_latency.add(self._clock() - timestamp)
+        state = 'pressed' if value == KEY_PRESSED else 'released'
+        log.debug("Button event", button=button, state=state, timestamp=timestamp)
+        self.buttonEvent.emit(button, state, timestamp)
+
+        for gesture, detail, gesture_time in self.gestures.feed(button, value == KEY_PRESSED,
+                                                                timestamp):
+            self._emit_gesture(gesture, detail, gesture_time)
+
+    def _emit_gesture(self, gesture, detail, timestamp):
+        log.debug("Gesture", gesture=gesture, detail=detail)
+        self.gestureEvent.emit(gesture, detail, timestamp)
+
+    # ------------------------------------------------------------------
+    # Wakeup pipe
+    # ------------------------------------------------------------------
+
+    def _wait_for_wakeup(self, timeout):
+        readable, _, _ = select.select([self._wake_r], [], [], timeout)
+        if readable:
+            self._drain_wakeup()
+
+    def _drain_wakeup(self):
+        try:
+            while os.read(self._wake_r, 64):
+                pass
+        except BlockingIOError:
+            pass
 
     def stop(self):
-        """Stop the button monitoring thread"""
-        print("[ButtonHandler] Stopping...")
+        """Stop the button monitoring thread (returns immediately)"""
+        log.info("Stopping...")
         self.running = False
+        if self._wake_w is not None:
+            try:
+                os.write(self._wake_w, b'x')
+            finally:
+                os.close(self._wake_w)
+                self._wake_w = None
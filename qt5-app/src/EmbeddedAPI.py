@@ -0,0 +1,550 @@
+"""
+Embedded API for reTerminal
+Hosts the Flask REST/Socket.IO backend inside the Qt process
+
+In single-process mode the backend (backend/app.py) is bound to QtGPIOAdapter,
+which exposes the Qt GPIOController through the backend controller interface.
+There is only one controller and one set of pin state: a change made from the
+web UI and one made on the touchscreen are both plain method calls on it.
+
+The web server runs on a worker thread. Qt objects (the controller and its
+item models) are only ever touched on the GUI thread, so every adapter call
+is marshalled there and the worker waits for its result. Touchscreen changes
+are forwarded to Socket.IO clients as the same events the REST routes emit.
+
+Requires Flask, Flask-CORS and Flask-SocketIO (see backend/requirements.txt).
+"""
+import os
+import sys
+import json
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+try:
+    from PySide2.QtCore import QObject, Qt, Signal, Slot
+except ImportError:
+    from PyQt5.QtCore import QObject, Qt, pyqtSignal as Signal, pyqtSlot as Slot
+
+from PinProfiles import apply_changes, normalise_profile, plan_profile
+from PulseMeter import DEFAULT_WINDOW_MS, validate_window
+from StructuredLog import get_logger
+
+log = get_logger('api.embedded')
+
+# Location of backend/app.py, overridable for deployments that copy the sources
+BACKEND_DIR = os.environ.get(
+    'RETERMINAL_BACKEND',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'backend'))
+
+# How long an API request waits for the GUI thread
+GUI_CALL_TIMEOUT = 5.0
+
+
+class GuiThreadInvoker(QObject):
+    """
+    Runs callables on the thread this object lives in (the GUI thread)
+
+    call() from another thread queues the callable and blocks until it has
+    run; from the GUI thread itself it runs it directly.
+    """
+    _invoke = Signal(object)
+
+    def __init__(self):
+        super().__init__()
+        self._owner_thread = threading.get_ident()
+        self._invoke.connect(self._run, Qt.QueuedConnection)
+
+    @Slot(object)
+    def _run(self, call):
+        func, future = call
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func())
+        except BaseException as e:
+            future.set_exception(e)
+
+    def call(self, func, timeout=GUI_CALL_TIMEOUT):
+        """
+        Run func() on the GUI thread and return its result
+
+        Raises:
+            TimeoutError: If the GUI thread did not get to func within timeout;
+                func is cancelled and never runs
+        """
+        if threading.get_ident() == self._owner_thread:
+            return func()
+        future = Future()
+        self._invoke.emit((func, future))
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            if future.cancel():
+                raise TimeoutError(f"GUI thread did not respond within {timeout:g}s") from None
+            # Already running: it is about to finish, report its outcome
+            return future.result()
+
+
+class QtGPIOAdapter:
+    """
+    Backend GPIOController interface over the Qt GPIOController
+
+    Must be created on the GUI thread. Methods raise ValueError on invalid
+    requests, with the message the Qt controller reported through
+    errorOccurred, so the backend routes answer 400 as they do standalone.
+    """
+
+    def __init__(self, controller):
+        self._controller = controller
+        self._model = controller.pinModel
+        self._table = controller.pin_table
+        self._encoders = controller.encoder_bank
+        self._alarms = controller.alarm_stage
+        self._invoker = GuiThreadInvoker()
+
+        self.RESERVED_PINS = set(json.loads(controller.getReservedPins()))
+        self._available_pins = sorted(json.loads(controller.getAvailablePins()))
+
+        # Set while an API call runs on the GUI thread, so its model updates
+        # are not forwarded a second time as touchscreen changes
+        self._in_api_call = False
+        self._last_error = None
+        self._socketio = None
+
+        controller.errorOccurred.connect(self._onError)
+
+    # ------------------------------------------------------------------
+    # Backend controller interface (called on the web server thread)
+    # ------------------------------------------------------------------
+
+    def get_available_pins(self):
+        return list(self._available_pins)
+
+    def is_pin_available(self, pin):
+        return self._table.is_safe(pin)
+
+    def get_pin_info(self, pin):
+        return self._invoker.call(lambda: self._info(pin))
+
+    def get_all_pins_info(self):
+        return self._invoker.call(self._table.all_info)
+
+    def configure_pin(self, pin, mode, pull='none', initial_value=0, pwm_frequency=None):
+        mode = getattr(mode, 'value', mode)
+        pull = getattr(pull, 'value', pull)
+
+        if not self.is_pin_available(pin):
+            raise ValueError(f"Pin {pin} is not available (reserved or invalid)")
+        if mode == 'pwm' and not pwm_frequency:
+            raise ValueError("PWM mode requires pwm_frequency parameter")
+
+        def configure():
+            self._check(self._controller.configurePin(pin, mode, pull),
+                        f"Could not configure pin {pin}")
+            if mode == 'output' and initial_value:
+                self._check(self._controller.writePin(pin, initial_value),
+                            f"Could not write pin {pin}")
+            elif mode == 'pwm':
+                self._check(self._controller.setPWMFrequency(pin, float(pwm_frequency)),
+                            f"Could not set PWM frequency on pin {pin}")
+            return self._info(pin)
+
+        return self._api_call(configure)
+
+    def write_pin(self, pin, value):
+        def write():
+            self._require_mode(pin, 'output')
+            self._check(self._controller.writePin(pin, value), f"Could not write pin {pin}")
+            return self._info(pin)
+
+        return self._api_call(write)
+
+    def read_pin(self, pin):
+        def read():
+            self._require_mode(pin, 'input')
+            if self._controller.readPin(pin) < 0:
+                raise ValueError(f"Could not read pin {pin}")
+            return self._info(pin)
+
+        return self._api_call(read)
+
+    def set_pwm(self, pin, duty_cycle, frequency=None):
+        if not 0 <= duty_cycle <= 100:
+            raise ValueError(f"Duty cycle must be 0-100, got {duty_cycle}")
+
+        def set_pwm():
+            self._require_mode(pin, 'pwm')
+            if frequency:
+                self._check(self._controller.setPWMFrequency(pin, float(frequency)),
+                            f"Could not set PWM frequency on pin {pin}")
+            self._check(self._controller.setPWMDutyCycle(pin, float(duty_cycle)),
+                        f"Could not set PWM duty cycle on pin {pin}")
+            return self._info(pin)
+
+        return self._api_call(set_pwm)
+
+    def get_all_groups_info(self):
+        return self._invoker.call(lambda: json.loads(self._controller.getGroups()))
+
+    def get_group_info(self, name):
+        return self._invoker.call(lambda: self._group_info(name))
+
+    def create_group(self, name, pins, mode='output', pull='none', initial_value=0):
+        mode = getattr(mode, 'value', mode)
+        pull = getattr(pull, 'value', pull)
+
+        def create():
+            self._check(self._controller.createGroup(name, json.dumps(list(pins)), mode, pull),
+                        f"Could not create group {name}")
+            if mode == 'output' and initial_value:
+                self._check(self._controller.writeGroup(name, initial_value),
+                            f"Could not write group {name}")
+            return self._group_info(name)
+
+        return self._api_call(create)
+
+    def write_group(self, name, value):
+        def write():
+            self._check(self._controller.writeGroup(name, value), f"Could not write group {name}")
+            return self._group_info(name)
+
+        return self._api_call(write)
+
+    def read_group(self, name):
+        def read():
+            info = self._group_info(name)
+            if info is None:
+                raise ValueError(f"Group '{name}' does not exist")
+            if info['mode'] != 'input':
+                raise ValueError(f"Group '{name}' is not an input group")
+            if self._controller.readGroup(name) < 0:
+                raise ValueError(f"Could not read group {name}")
+            return self._group_info(name)
+
+        return self._api_call(read)
+
+    def delete_group(self, name):
+        self._api_call(lambda: self._check(self._controller.removeGroup(name),
+                                           f"Group '{name}' does not exist"))
+
+    def apply_profile(self, profile):
+        profile = normalise_profile(profile, set(self._available_pins))
+
+        def apply():
+            group_pins = {pin for group in json.loads(self._controller.getGroups())
+                          for pin in group['pins']} | self._encoders.pins()
+            current = self._table.all_info()
+            changes = plan_profile(profile, current, group_pins)
+            saved = {change.pin: self._save_pin(change.pin) for change in changes}
+            apply_changes(changes, self._apply_profile_change,
+                          lambda pin: self._restore_pin(pin, saved.get(pin)))
+            return {
+                'profile': profile['name'],
+                'changes': [{'pin': change.pin, 'action': change.action} for change in changes],
+                'pins': self._table.all_info(),
+            }
+
+        return self._api_call(apply)
+
+    def get_all_encoders_info(self):
+        # Decoders are safe to read from any thread, no GUI thread round trip
+        return [self._encoders.get(name).info() for name in self._encoders.names()]
+
+    def get_encoder_info(self, name):
+        encoder = self._encoders.get(name)
+        return encoder.info() if encoder else None
+
+    def create_encoder(self, name, pin_a, pin_b, pull='up'):
+        pull = getattr(pull, 'value', pull)
+
+        def create():
+            self._check(self._controller.createEncoder(name, pin_a, pin_b, pull),
+                        f"Could not create encoder {name}")
+            return self._encoders.get(name).info()
+
+        return self._api_call(create)
+
+    def reset_encoder(self, name, position=0):
+        def reset():
+            self._check(self._controller.setEncoderPosition(name, position),
+                        f"Encoder '{name}' does not exist")
+            return self._encoders.get(name).info()
+
+        return self._api_call(reset)
+
+    def delete_encoder(self, name):
+        self._api_call(lambda: self._check(self._controller.removeEncoder(name),
+                                           f"Encoder '{name}' does not exist"))
+
+    def add_encoder_listener(self, callback):
+        # Reports come from the encoder reporter thread, like on the backend
+        self._encoders.add_listener(callback)
+
+    def get_rules(self):
+        return self._invoker.call(lambda: json.loads(self._controller.getRules()))
+
+    def set_rule(self, rule):
+        def set_rule():
+            self._check(self._controller.setRule(json.dumps(rule)), "Invalid rule")
+            return next(r for r in json.loads(self._controller.getRules())
+                        if r['name'] == rule['name'])
+
+        return self._api_call(set_rule)
+
+    def remove_rule(self, name):
+        self._api_call(lambda: self._check(self._controller.removeRule(name),
+                                           f"Rule '{name}' does not exist"))
+
+    def get_rule_stats(self):
+        return self._invoker.call(lambda: json.loads(self._controller.getRuleStats()))
+
+    def add_rule_listener(self, callback):
+        # Output changes reach clients through the model forwarding below;
+        # listeners only get the rule itself
+        self._controller.ruleFired.connect(
+            lambda name, pin, level: callback(
+                {'rule': name, 'pin': pin, 'edge': 'rising' if level else 'falling', 'outputs': []}))
+
+    def get_alarms(self):
+        return self._invoker.call(lambda: json.loads(self._controller.getAlarms()))
+
+    def set_alarm(self, alarm):
+        def set_alarm():
+            self._check(self._controller.setAlarm(json.dumps(alarm)), "Invalid alarm")
+            return self._alarms.get_alarm(alarm['name'])
+
+        return self._api_call(set_alarm)
+
+    def remove_alarm(self, name):
+        self._api_call(lambda: self._check(self._controller.removeAlarm(name),
+                                           f"Alarm '{name}' does not exist"))
+
+    def get_alarm_stats(self):
+        return self._invoker.call(lambda: json.loads(self._controller.getAlarmStats()))
+
+    def add_alarm_listener(self, callback):
+        # As for rules, output changes reach clients through the model forwarding
+        def changed(name, triggered, value):
+            alarm = self._alarms.get_alarm(name) or {}
+            callback({'alarm': name, 'state': 'triggered' if triggered else 'cleared',
+                      'signal': alarm.get('signal'), 'value': value,
+                      'threshold': alarm.get('above', alarm.get('below')), 'outputs': []})
+
+        self._controller.alarmChanged.connect(changed)
+
+    def start_measurement(self, pin, window_ms=DEFAULT_WINDOW_MS):
+        def start():
+            self._require_mode(pin, 'input')
+            validate_window(window_ms)
+            self._check(self._controller.startMeasurement(pin, window_ms),
+                        f"Could not measure pin {pin}")
+            return json.loads(self._controller.getMeasurement(pin))
+
+        return self._api_call(start)
+
+    def stop_measurement(self, pin):
+        self._api_call(lambda: self._check(self._controller.stopMeasurement(pin),
+                                           f"Pin {pin} is not being measured"))
+
+    def get_measurement(self, pin):
+        # Meters are safe to read from any thread, no GUI thread round trip
+        measurement = self._controller.getMeasurement(pin)
+        return json.loads(measurement) if measurement else None
+
+    def get_all_measurements(self):
+        return json.loads(self._controller.getMeasurements())
+
+    def get_pwm_stats(self):
+        # Engine statistics are thread-safe to read, no GUI thread round trip
+        return json.loads(self._controller.getPWMStats())
+
+    def _cleanup_pin(self, pin):
+        self._api_call(lambda: self._controller.removePin(pin))
+
+    def cleanup_all(self):
+        self._api_call(self._controller.cleanupAll)
+
+    # ------------------------------------------------------------------
+    # Helpers (GUI thread)
+    # ------------------------------------------------------------------
+
+    def _api_call(self, func):
+        """Run func on the GUI thread with API-originated updates marked"""
+        def call():
+            self._in_api_call = True
+            self._last_error = None
+            try:
+                return func()
+            finally:
+                self._in_api_call = False
+
+        return self._invoker.call(call)
+
+    def _onError(self, message):
+        self._last_error = message
+
+    def _check(self, ok, fallback):
+        if not ok:
+            raise ValueError(self._last_error or fallback)
+
+    def _apply_profile_change(self, change):
+        if change.action == 'release':
+            self._check(self._controller.removePin(change.pin), f"Could not release pin {change.pin}")
+        elif change.action == 'setup':
+            self._set_pin(change.pin, change.spec)
+        elif change.action == 'write':
+            self._check(self._controller.writePin(change.pin, change.spec['value']),
+                        f"Could not write pin {change.pin}")
+        elif change.action == 'pwm':
+            self._set_pwm(change.pin, change.spec)
+
+    def _save_pin(self, pin):
+        """
+        What _restore_pin needs to put a pin back: its pin info, its
+        measurement window (None = not measured) and the info of the encoder
+        it belongs to (None = none), or None if it is not configured
+        """
+        info = self._table.info(pin)
+        if info is None:
+            return None
+        measurement = self._controller.getMeasurement(pin)
+        encoder = self._encoders.of_pin(pin)
+        return (info, json.loads(measurement)['window_ms'] if measurement else None,
+                encoder.info() if encoder else None)
+
+    def _restore_pin(self, pin, saved):
+        """Put a pin back to a _save_pin() state (None = released)"""
+        if saved is None:
+            self._controller.removePin(pin)
+            return
+        info, window_ms, encoder = saved
+        self._set_pin(pin, info)
+
+        if window_ms is not None:
+            self._check(self._controller.startMeasurement(pin, window_ms),
+                        f"Could not measure pin {pin}")
+        # The encoder comes back once both of its pins are inputs again
+        if (encoder and not self._encoders.get(encoder['name'])
+                and self._table.mode(encoder['pin_a']) == self._table.mode(encoder['pin_b']) == 'input'):
+            self._check(self._controller.createEncoder(encoder['name'], encoder['pin_a'], encoder['pin_b'],
+                                                       info['pull']),
+                        f"Could not create encoder {encoder['name']}")
+            self._controller.setEncoderPosition(encoder['name'], encoder['position'])
+
+    def _set_pin(self, pin, spec):
+        """Configure a pin from a profile entry or a pin info dict"""
+        self._check(self._controller.configurePin(pin, spec['mode'], spec.get('pull', 'none')),
+                    f"Could not configure pin {pin}")
+        if spec['mode'] == 'output' and spec.get('value'):
+            self._check(self._controller.writePin(pin, spec['value']), f"Could not write pin {pin}")
+        elif spec['mode'] == 'pwm':
+            self._set_pwm(pin, spec)
+
+    def _set_pwm(self, pin, spec):
+        self._check(self._controller.setPWMFrequency(pin, float(spec['pwm_frequency'])),
+                    f"Could not set PWM frequency on pin {pin}")
+        self._check(self._controller.setPWMDutyCycle(pin, float(spec['pwm_duty_cycle'])),
+                    f"Could not set PWM duty cycle on pin {pin}")
+
+    def _require_mode(self, pin, mode):
+        if not self._table.is_configured(pin):
+            raise ValueError(f"Pin {pin} is not configured")
+        if self._table.mode(pin) != mode:
+            raise ValueError(f"Pin {pin} is not configured as {mode} (mode: {self._table.mode(pin)})")
+
+    def _group_info(self, name):
+        """Group info in the backend format, or None if there is no such group"""
+        for info in json.loads(self._controller.getGroups()):
+            if info['name'] == name:
+                return info
+        return None
+
+    def _info(self, pin):
+        """Pin info in the backend format, or None if the pin is not configured (cached, do not modify)"""
+        return self._table.info(pin)
+
+    # ------------------------------------------------------------------
+    # Touchscreen changes -> Socket.IO clients
+    # ------------------------------------------------------------------
+
+    def attach_socketio(self, socketio):
+        """
+        Forward changes made outside the API to Socket.IO clients
+
+        Args:
+            socketio: Anything with emit(event, data) broadcasting to all
+                clients (the backend's per-client queue fanout)
+        """
+        self._socketio = socketio
+        self._value_roles = [self._model.role('value')]
+        self._model.dataChanged.connect(self._onPinDataChanged)
+        self._controller.groupValueChanged.connect(self._onGroupValueChanged)
+
+    def _onPinDataChanged(self, top_left, bottom_right, roles=()):
+        if self._in_api_call or self._socketio is None:
+            return
+
+        for pin in range(top_left.row(), bottom_right.row() + 1):
+            if list(roles) == self._value_roles and self._controller.getPinGroup(pin):
+                continue  # reported once for the whole group by _onGroupValueChanged
+            info = self._info(pin)
+            if info is None:
+                self._socketio.emit('pin_released', {'pin': pin})
+            elif not roles:
+                # Empty role list: the pin was (re)configured
+                self._socketio.emit('pin_configured', info)
+            else:
+                self._socketio.emit('pin_changed', info)
+
+    def _onGroupValueChanged(self, name, value):
+        if self._in_api_call or self._socketio is None:
+            return
+        info = self._group_info(name)
+        if info is not None:
+            self._socketio.emit('group_changed', info)
+
+
+def load_backend():
+    """Import backend/app.py as a module"""
+    backend_dir = os.path.abspath(BACKEND_DIR)
+    if backend_dir not in sys.path:
+        sys.path.append(backend_dir)
+    import app as backend_app
+    return backend_app
+
+
+class EmbeddedAPIServer:
+    """
+    Runs the backend API on a daemon thread, bound to the Qt GPIOController
+
+    Create and start() on the GUI thread, after the controller exists.
+    """
+
+    def __init__(self, controller, host='0.0.0.0', port=5000):
+        self.host = host
+        self.port = port
+        self.adapter = QtGPIOAdapter(controller)
+
+        backend = load_backend()
+        # Qt owns the main loop, so Socket.IO must not monkey-patch with eventlet
+        self.app, self.socketio = backend.init_app(self.adapter, async_mode='threading')
+        self.adapter.attach_socketio(backend.clients)
+        # Fed by the Qt app's SensorController (main.py attaches it)
+        self.sensors = backend.sensors
+        self._thread = None
+
+    def start(self):
+        """Start serving in the background"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._serve, name='EmbeddedAPI', daemon=True)
+        self._thread.start()
+        log.info("Serving API", host=self.host, port=self.port)
+
+    def _serve(self):
+        try:
+            self.socketio.run(self.app, host=self.host, port=self.port, debug=False,
+                              use_reloader=False, log_output=False,
+                              allow_unsafe_werkzeug=True)
+        except Exception:
+            log.exception("API server stopped")
@@ -7,23 +7,41 @@ import platform
 from typing import List, Dict, Optional
 
 try:
-    from PySide2.QtCore import QObject, Signal, Slot, Property
+    from PySide2.QtCore import QObject, Qt, Signal, Slot, Property
 except ImportError:
-    from PyQt5.QtCore import QObject, pyqtSignal as Signal, pyqtSlot as Slot, pyqtProperty as Property
+    from PyQt5.QtCore import QObject, Qt, pyqtSignal as Signal, pyqtSlot as Slot, pyqtProperty as Property
+
+from GPIOSimulator import GPIOSimulator, simulator_requested
+from PinGroups import GroupIO, PinGroup
+from PinListModel import PinListModel, ConfiguredPinModel
+from PinTable import PIN_MODES, PULLS, PinTable
+from PinWatcher import PinWatcher
+from PulseMeter import DEFAULT_WINDOW_MS, PulseMeter
+from QuadratureEncoder import EncoderBank
+from RuleEngine import RuleEngine
+from SensorAlarms import SensorAlarms
+from SoftwarePWM import DEFAULT_FREQUENCY as SOFTWARE_PWM_FREQUENCY, SoftwarePWMEngine
+from StructuredLog import get_logger
+
+log = get_logger('gpio')
 
 # Detect if running on Raspberry Pi
 IS_RASPBERRY_PI = platform.machine().startswith('arm') or platform.machine().startswith('aarch')
 
-if IS_RASPBERRY_PI:
+if simulator_requested():
+    GPIO = GPIOSimulator()
+    GPIO_AVAILABLE = True
+    log.info("Using the GPIO simulator (RETERMINAL_GPIO=sim)")
+elif IS_RASPBERRY_PI:
     try:
         import RPi.GPIO as GPIO
         GPIO_AVAILABLE = True
     except ImportError:
-        print("Warning: RPi.GPIO not available, using mock mode")
+        log.warning("RPi.GPIO not available, using mock mode")
         GPIO_AVAILABLE = False
 else:
     GPIO_AVAILABLE = False
-    print("Running on non-Raspberry Pi platform, using mock mode")
+    log.info("Running on non-Raspberry Pi platform, using mock mode")
 
 
 class GPIOController(QObject):
@@ -33,23 +51,29 @@ class GPIOController(QObject):
     """
 
     # Signals
-    pinsChanged = Signal()  # Emitted when pin configuration changes
+    pinsChanged = Signal()  # Emitted when pins are configured or removed (not on value/PWM updates)
     pinValueChanged = Signal(int, int)  # Emitted when a pin value changes (pin, value)
+    groupValueChanged = Signal(str, int)  # Emitted once per pin group value change (name, value)
+    ruleFired = Signal(str, int, int)  # Emitted after a rule's actions ran (rule, trigger pin, level)
+    encoderChanged = Signal(str, int, int)  # Emitted at a capped rate when an encoder moved (name, position, delta)
+    alarmChanged = Signal(str, bool, float)  # Emitted after a sensor alarm triggered or cleared (alarm, triggered, value)
+    alarmsEnabledChanged = Signal(bool)  # Emitted when the first alarm is enabled or the last one removed/disabled
+    _ruleApplied = Signal(str, int, int, object)  # Internal: edge thread -> GUI thread
+    _alarmApplied = Signal(object)  # Internal: sensor thread -> GUI thread
     errorOccurred = Signal(str)  # Emitted when an error occurs
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, input_poll_interval_ms=10, input_max_rate_hz=50.0):
+        """
+        Initialize GPIO controller
 
-        # Pin state tracking
-        self._configured_pins = []  # List of configured pin numbers
-        self._pin_modes = {}  # {pin: 'input', 'output', or 'pwm'}
-        self._pin_values = {}  # {pin: value}
-        self._pin_pull_modes = {}  # {pin: 'up', 'down', or 'none'}
+        Args:
+            input_poll_interval_ms: Poll period for input pins without edge detection
+            input_max_rate_hz: Maximum pinValueChanged emissions per input pin per second
+        """
+        super().__init__()
 
-        # PWM tracking
-        self._pin_pwm = {}  # {pin: PWM object}
-        self._pin_pwm_frequency = {}  # {pin: frequency in Hz}
-        self._pin_pwm_duty_cycle = {}  # {pin: duty cycle 0-100}
+        # Pin groups
+        self._groups = {}  # {name: PinGroup}
 
         # Reserved pins (used by reTerminal hardware)
         # GPIO 2, 3: I2C bus (touchscreen, accelerometer, light sensor, RTC, crypto chip, IO expander)
@@ -68,13 +92,80 @@ class GPIOController(QObject):
         # Note: GPIO 0, 1 (ID EEPROM), GPIO 14, 15 (UART) can be used with caution
         self._available_pins = [4, 5, 7, 8, 9, 10, 11, 12, 14, 15, 16, 17, 18, 19, 20, 21, 22, 23, 24, 25, 26, 27]
 
+        # Pin state: mode, pull, value, PWM object and settings per pin (PinTable.py)
+        self._table = PinTable(self._reserved_pins, self._available_pins, self._hardware_pwm_pins)
+
+        # Item models for QML: one row per pin, updated row-by-row
+        self._pin_model = PinListModel(self._reserved_pins, self._available_pins,
+                                       self._hardware_pwm_pins, self)
+        self._control_pin_model = ConfiguredPinModel(self._pin_model, modes=['output', 'pwm'],
+                                                     parent=self)
+
         # Initialize GPIO if available
+        # Input-to-output rules, run on the edge thread; the resulting state
+        # changes are applied to the models on the GUI thread afterwards
+        self._rules = RuleEngine(self._ruleWrite, self._rulePWM, self._ruleWriteGroup,
+                                 on_fired=self._ruleApplied.emit,
+                                 available_pins=self._available_pins)
+        self._ruleApplied.connect(self._onRuleApplied, Qt.QueuedConnection)
+
+        # Sensor threshold alarms, a stage on the sensor pipeline (main.py
+        # adds alarm_stage); actions run on the sensor thread like rule actions
+        self._alarms = SensorAlarms(self._ruleWrite, self._rulePWM, self._ruleWriteGroup,
+                                    on_change=self._alarmApplied.emit,
+                                    available_pins=self._available_pins)
+        self._alarmApplied.connect(self._onAlarmApplied, Qt.QueuedConnection)
+
+        # Frequency / pulse width meters on input pins, fed by the edge hook
+        self._meters = {}  # {pin: PulseMeter}
+
+        # Quadrature encoders on input pin pairs, decoded in the edge hook and
+        # reported through encoderChanged at a capped rate
+        self._encoders = EncoderBank(GPIO.input if GPIO_AVAILABLE else self._table.value.__getitem__)
+        self._encoders.add_listener(self._onEncoderReport)
+
+        # Session recorder (SessionLog.py), set by set_recorder()
+        self._recorder = None
+        self._recordPaused = False  # set while a group call configures its pins
+
+        self._watcher = None
+        self._soft_pwm = None
+        self._group_io = None
         if GPIO_AVAILABLE:
             GPIO.setmode(GPIO.BCM)
             GPIO.setwarnings(False)
-            print("[GPIOController] Initialized with RPi.GPIO")
+            log.info("Initialized with RPi.GPIO")
+
+            # Pins without hardware PWM share one software PWM timeline
+            self._soft_pwm = SoftwarePWMEngine(GPIO.output)
+
+            # Bulk access for pin groups (GPIO registers on the Pi)
+            self._group_io = GroupIO(GPIO)
+
+            # Input transitions are detected in the background and delivered
+            # to _onInputChanged on the GUI thread (queued connection)
+            self._watcher = PinWatcher(GPIO, poll_interval_ms=input_poll_interval_ms,
+                                       max_rate_hz=input_max_rate_hz)
+            self._watcher.inputChanged.connect(self._onInputChanged)
+            self._watcher.edge_hook = self._rules.on_edge
+            self._watcher.start()
         else:
-            print("[GPIOController] Running in mock mode")
+            log.info("Running in mock mode")
+
+    @Property(QObject, constant=True)
+    def pinModel(self):
+        """List model with one row per BCM pin (roles match getConfiguredPins keys)"""
+        return self._pin_model
+
+    @property
+    def pin_table(self):
+        """PinTable holding every pin's state, with cached API info views (GUI thread)"""
+        return self._table
+
+    @Property(QObject, constant=True)
+    def controlPinModel(self):
+        """List model of configured output and PWM pins"""
+        return self._control_pin_model
 
     @Slot(result=str)
     def getAvailablePins(self):
@@ -86,20 +177,7 @@ class GPIOController(QObject):
     def getConfiguredPins(self):
         """Get list of configured pins with their info as JSON string"""
         import json
-        pins_info = []
-        for pin in self._configured_pins:
-            info = {
-                'pin': pin,
-                'mode': self._pin_modes.get(pin, 'unknown'),
-                'value': self._pin_values.get(pin, 0),
-                'pull_mode': self._pin_pull_modes.get(pin, 'none'),
-                'pwm_enabled': pin in self._pin_pwm,
-                'pwm_frequency': self._pin_pwm_frequency.get(pin, 0),
-                'pwm_duty_cycle': self._pin_pwm_duty_cycle.get(pin, 0),
-                'hardware_pwm': pin in self._hardware_pwm_pins
-            }
-            pins_info.append(info)
-        return json.dumps(pins_info)
+        return json.dumps(self._pin_model.configured_pins_info())
 
     @Slot(result=str)
     def getReservedPins(self):
@@ -128,19 +206,37 @@ class GPIOController(QObject):
         """
         try:
             # Validate pin
-            if pin in self._reserved_pins:
+            if self._table.is_reserved(pin):
                 self.errorOccurred.emit(f"Pin {pin} is reserved by reTerminal hardware")
                 return False
 
-            if pin not in self._available_pins:
+            if not self._table.is_safe(pin):
                 self.errorOccurred.emit(f"Pin {pin} is not a valid GPIO pin")
                 return False
 
+            group = self._groupOf(pin)
+            if group:
+                self.errorOccurred.emit(f"Pin {pin} belongs to group '{group.name}'")
+                return False
+            encoder = self._encoders.of_pin(pin)
+            if encoder:
+                self.errorOccurred.emit(f"Pin {pin} belongs to encoder '{encoder.name}'")
+                return False
+
+            if mode not in PIN_MODES:
+                self.errorOccurred.emit(f"Invalid mode: {mode}")
+                return False
+            if pull_mode not in PULLS:
+                self.errorOccurred.emit(f"Invalid pull mode: {pull_mode}")
+                return False
+
             # Cleanup if already configured
-            if pin in self._configured_pins:
+            if self._table.is_configured(pin):
                 self._cleanupPin(pin)
 
             # Configure pin
+            pwm = None
+            pwm_frequency = 0
             if GPIO_AVAILABLE:
                 if mode == 'input':
                     # Set pull mode
@@ -161,39 +257,52 @@ class GPIOController(QObject):
                     GPIO.setup(pin, GPIO.OUT)
                     GPIO.output(pin, GPIO.LOW)
 
-                    # Create PWM object with default frequency
-                    default_freq = 1000  # 1kHz default
-                    pwm = GPIO.PWM(pin, default_freq)
+                    # Create PWM object with default frequency: 1kHz on hardware PWM pins,
+                    # lower for software PWM, where every edge costs Python time
+                    if self._table.is_hardware_pwm(pin):
+                        pwm_frequency = 1000
+                        pwm = GPIO.PWM(pin, pwm_frequency)
+                    else:
+                        pwm_frequency = SOFTWARE_PWM_FREQUENCY
+                        pwm = self._soft_pwm.PWM(pin, pwm_frequency)
                     pwm.start(0)  # Start with 0% duty cycle
-
-                    # Store PWM object and settings
-                    self._pin_pwm[pin] = pwm
-                    self._pin_pwm_frequency[pin] = default_freq
-                    self._pin_pwm_duty_cycle[pin] = 0
                     value = 0
 
-                    pwm_type = "Hardware" if pin in self._hardware_pwm_pins else "Software"
-                    print(f"[GPIOController] Started {pwm_type} PWM on pin {pin} at {default_freq}Hz")
-                else:
-                    self.errorOccurred.emit(f"Invalid mode: {mode}")
-                    return False
+                    pwm_type = "Hardware" if self._table.is_hardware_pwm(pin) else "Software"
+                    log.info("Started %s PWM", pwm_type, pin=pin, frequency=pwm_frequency)
             else:
                 # Mock mode
+                if mode == 'pwm':
+                    pwm_frequency = 1000 if self._table.is_hardware_pwm(pin) else SOFTWARE_PWM_FREQUENCY
                 value = 0
 
             # Update state
-            self._configured_pins.append(pin)
-            self._pin_modes[pin] = mode
-            self._pin_values[pin] = value
-            self._pin_pull_modes[pin] = pull_mode
-
-            print(f"[GPIOController] Configured pin {pin} as {mode} (pull={pull_mode})")
+            self._table.configure(pin, mode, pull_mode, value, pwm_frequency, 0, pwm)
+            self._pin_model.update_pin(
+                pin,
+                configured=True,
+                mode=mode,
+                value=value,
+                pull_mode=pull_mode,
+                pwm_enabled=mode == 'pwm',
+                pwm_frequency=pwm_frequency,
+                pwm_duty_cycle=0
+            )
+
+            if self._watcher and mode == 'input':
+                self._rules.seed(pin, value)
+                self._watcher.watch(pin, value)
+
+            log.info("Configured pin", pin=pin, mode=mode, pull=pull_mode)
+            self._record('POST', f'/api/pins/{pin}/config',
+                         dict({'mode': mode, 'pull': pull_mode},
+                              **({'pwm_frequency': pwm_frequency} if mode == 'pwm' else {})))
             self.pinsChanged.emit()
             return True
 
         except Exception as e:
             error_msg = f"Error configuring pin {pin}: {str(e)}"
-            print(f"[GPIOController] {error_msg}")
+            log.error(error_msg)
             self.errorOccurred.emit(error_msg)
             return False
 
@@ -209,25 +318,20 @@ class GPIOController(QObject):
             bool: True if successful, False otherwise
         """
         try:
-            if pin not in self._configured_pins:
+            if not self._table.is_configured(pin):
                 return False
 
             self._cleanupPin(pin)
+            self._pin_model.release_pin(pin)
 
-            # Update state
-            self._configured_pins.remove(pin)
-            del self._pin_modes[pin]
-            del self._pin_values[pin]
-            if pin in self._pin_pull_modes:
-                del self._pin_pull_modes[pin]
-
-            print(f"[GPIOController] Removed pin {pin}")
+            log.info("Removed pin", pin=pin)
+            self._record('DELETE', f'/api/pins/{pin}')
             self.pinsChanged.emit()
             return True
 
         except Exception as e:
             error_msg = f"Error removing pin {pin}: {str(e)}"
-            print(f"[GPIOController] {error_msg}")
+            log.error(error_msg)
             self.errorOccurred.emit(error_msg)
             return False
 
@@ -244,25 +348,28 @@ class GPIOController(QObject):
             bool: True if successful, False otherwise
         """
         try:
-            if pin not in self._configured_pins:
+            if not self._table.is_configured(pin):
                 self.errorOccurred.emit(f"Pin {pin} is not configured")
                 return False
 
-            if self._pin_modes.get(pin) != 'output':
+            if self._table.mode(pin) != 'output':
                 self.errorOccurred.emit(f"Pin {pin} is not configured as output")
                 return False
 
             if GPIO_AVAILABLE:
                 GPIO.output(pin, GPIO.HIGH if value else GPIO.LOW)
 
-            self._pin_values[pin] = value
-            print(f"[GPIOController] Write pin {pin} = {value}")
+            self._table.set_value(pin, value)
+            self._pin_model.update_pin(pin, value=value)
+            log.debug("Write pin", pin=pin, value=value)
+            self._record('POST', f'/api/pins/{pin}/write', {'value': value})
             self.pinValueChanged.emit(pin, value)
+            self._notifyGroup(pin)
             return True
 
         except Exception as e:
             error_msg = f"Error writing to pin {pin}: {str(e)}"
-            print(f"[GPIOController] {error_msg}")
+            log.error(error_msg)
             self.errorOccurred.emit(error_msg)
             return False
 
@@ -278,27 +385,25 @@ class GPIOController(QObject):
             int: Pin value (0 or 1), or -1 on error
         """
         try:
-            if pin not in self._configured_pins:
-                return -1
-
-            if self._pin_modes.get(pin) != 'input':
+            if self._table.mode(pin) != 'input':
                 return -1
 
             if GPIO_AVAILABLE:
-                value = GPIO.input(pin)
+                value = 1 if GPIO.input(pin) else 0
             else:
                 # Mock mode - return previous value
-                value = self._pin_values.get(pin, 0)
+                value = self._table.value[pin]
 
             # Update cached value if changed
-            if value != self._pin_values.get(pin):
-                self._pin_values[pin] = value
+            if self._table.set_value(pin, value):
+                self._pin_model.update_pin(pin, value=value)
                 self.pinValueChanged.emit(pin, value)
+                self._notifyGroup(pin)
 
             return value
 
         except Exception as e:
-            print(f"[GPIOController] Error reading pin {pin}: {str(e)}")
+            log.error("Error reading pin", pin=pin, error=e)
             return -1
 
     @Slot(result=bool)
@@ -311,52 +416,642 @@ class GPIOController(QObject):
         """
         try:
             # Cleanup all pins
-            for pin in list(self._configured_pins):
+            for pin in self._table.configured_pins():
                 self._cleanupPin(pin)
+            self._pin_model.release_all()
 
-            # Clear state
-            self._configured_pins.clear()
-            self._pin_modes.clear()
-            self._pin_values.clear()
-            self._pin_pull_modes.clear()
-            self._pin_pwm.clear()
-            self._pin_pwm_frequency.clear()
-            self._pin_pwm_duty_cycle.clear()
-
-            print("[GPIOController] Cleaned up all pins")
+            log.info("Cleaned up all pins")
+            self._record('POST', '/api/cleanup')
             self.pinsChanged.emit()
             return True
 
         except Exception as e:
             error_msg = f"Error during cleanup: {str(e)}"
-            print(f"[GPIOController] {error_msg}")
+            log.error(error_msg)
             self.errorOccurred.emit(error_msg)
             return False
 
+    @Slot(int, int)
+    def _onInputChanged(self, pin, value):
+        """Internal: apply a transition reported by the pin watcher"""
+        if self._table.mode(pin) != 'input' or not self._table.set_value(pin, value):
+            return
+        self._pin_model.update_pin(pin, value=value)
+        self.pinValueChanged.emit(pin, value)
+        self._notifyGroup(pin)
+
+    @Slot(str, str, str, str, result=bool)
+    def createGroup(self, name, pins_json, mode, pull_mode='none'):
+        """
+        Configure pins as a named group carrying one integer value
+
+        Args:
+            name: Group name
+            pins_json: JSON list of BCM pins, least significant bit first
+            mode: 'output' or 'input'
+            pull_mode: 'up', 'down', or 'none' (for input groups)
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        import json
+        try:
+            if name in self._groups:
+                self.errorOccurred.emit(f"Group '{name}' already exists")
+                return False
+
+            group = PinGroup(name, json.loads(pins_json), mode)
+            for pin in group.pins:
+                other = self._groupOf(pin)
+                if other:
+                    self.errorOccurred.emit(f"Pin {pin} already belongs to group '{other.name}'")
+                    return False
+
+            configured = []
+            self._recordPaused = True
+            try:
+                for pin in group.pins:
+                    if not self.configurePin(pin, mode, pull_mode):
+                        for done in configured:
+                            self.removePin(done)
+                        return False
+                    configured.append(pin)
+            finally:
+                self._recordPaused = False
+
+            self._groups[name] = group
+            self._record('POST', '/api/groups', {'name': name, 'pins': list(group.pins),
+                                                 'mode': mode, 'pull': pull_mode})
+            log.info("Created group", group=name, pins=list(group.pins), mode=mode,
+                     bulk=self._group_io.method if self._group_io else 'mock')
+            return True
+
+        except ValueError as e:
+            self.errorOccurred.emit(str(e))
+            return False
+
+    @Slot(str, result=bool)
+    def removeGroup(self, name):
+        """
+        Delete a group and release its pins
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        group = self._groups.pop(name, None)
+        if group is None:
+            self.errorOccurred.emit(f"Group '{name}' does not exist")
+            return False
+
+        self._recordPaused = True
+        try:
+            for pin in group.pins:
+                self.removePin(pin)
+        finally:
+            self._recordPaused = False
+        log.info("Removed group", group=name)
+        self._record('DELETE', f'/api/groups/{name}')
+        return True
+
+    @Slot(str, int, result=bool)
+    def writeGroup(self, name, value):
+        """
+        Write an integer across an output group, all bits in one operation
+        where the GPIO backend allows it
+
+        Args:
+            name: Group name
+            value: Group value, bit N driving the group's Nth pin
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        group = self._groups.get(name)
+        if group is None:
+            self.errorOccurred.emit(f"Group '{name}' does not exist")
+            return False
+        if group.mode != 'output':
+            self.errorOccurred.emit(f"Group '{name}' is not an output group")
+            return False
+
+        try:
+            if self._group_io:
+                self._group_io.write(group, value)
+            else:
+                group.masks(value)  # Mock mode - validate only
+        except (ValueError, RuntimeError) as e:
+            error_msg = f"Error writing group {name}: {str(e)}"
+            log.error(error_msg)
+            self.errorOccurred.emit(error_msg)
+            return False
+
+        for pin, level in group.bits(value):
+            self._table.set_value(pin, level)
+            self._pin_model.update_pin(pin, value=level)
+        log.debug("Write group", group=name, value=value)
+        self._record('POST', f'/api/groups/{name}/write', {'value': value})
+        self.groupValueChanged.emit(name, value)
+        return True
+
+    @Slot(str, result=int)
+    def readGroup(self, name):
+        """
+        Sample all pins of an input group at once
+
+        Returns:
+            int: Group value, or -1 on error
+        """
+        group = self._groups.get(name)
+        if group is None or group.mode != 'input':
+            return -1
+
+        try:
+            value = self._group_io.read(group) if self._group_io else self._groupValue(group)
+        except (ValueError, RuntimeError) as e:
+            log.error("Error reading group", group=name, error=e)
+            return -1
+
+        if value != self._groupValue(group):
+            for pin, level in group.bits(value):
+                self._table.set_value(pin, level)
+                self._pin_model.update_pin(pin, value=level)
+            self.groupValueChanged.emit(name, value)
+        return value
+
+    @Slot(result=str)
+    def getGroups(self):
+        """
+        Get pin groups as JSON string
+
+        Returns:
+            [{"name", "mode", "pins", "width", "value", "bulk"}, ...]
+        """
+        import json
+        bulk = self._group_io.method if self._group_io else 'mock'
+        return json.dumps([{
+            'name': group.name,
+            'mode': group.mode,
+            'pins': list(group.pins),
+            'width': group.width,
+            'value': self._groupValue(group),
+            'bulk': bulk,
+        } for group in self._groups.values()])
+
+    @Slot(int, result=str)
+    def getPinGroup(self, pin):
+        """Get the name of the group a pin belongs to, or an empty string"""
+        group = self._groupOf(pin)
+        return group.name if group else ''
+
+    def _groupOf(self, pin):
+        """Internal: the group a pin belongs to, or None"""
+        for group in self._groups.values():
+            if pin in group.pins:
+                return group
+        return None
+
+    def _groupValue(self, group):
+        """Internal: group value from the cached pin values"""
+        levels = self._table.value
+        value = 0
+        for bit, pin in enumerate(group.pins):
+            value |= levels[pin] << bit
+        return value
+
+    def _notifyGroup(self, pin):
+        """Internal: report a single-pin change as a change of its group"""
+        group = self._groupOf(pin)
+        if group:
+            self.groupValueChanged.emit(group.name, self._groupValue(group))
+
+    @Slot(str, result=bool)
+    def setRule(self, rule_json):
+        """
+        Add an input-to-output rule, or replace the rule with the same name
+
+        Args:
+            rule_json: Rule as JSON, e.g. {"name": "estop",
+                "trigger": {"pin": 17, "edge": "falling"},
+                "actions": [{"type": "write", "pin": 22, "value": 1}]}
+                (see RuleEngine for all action types)
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        import json
+        try:
+            rule = self._rules.set_rule(json.loads(rule_json))
+            self._record('POST', '/api/rules', rule)
+            return True
+        except ValueError as e:
+            self.errorOccurred.emit(f"Invalid rule: {str(e)}")
+            return False
+
+    @Slot(str, result=bool)
+    def removeRule(self, name):
+        """Remove a rule; returns False if there is no such rule"""
+        try:
+            self._rules.remove_rule(name)
+            self._record('DELETE', f'/api/rules/{name}')
+            return True
+        except ValueError as e:
+            self.errorOccurred.emit(str(e))
+            return False
+
+    @Slot(result=str)
+    def getRules(self):
+        """Get all rules with their fire and error counts as JSON string"""
+        import json
+        return json.dumps(self._rules.get_rules())
+
+    @Slot(result=str)
+    def getRuleStats(self):
+        """Get edge-to-actions latency (us) and per-rule counters as JSON string"""
+        import json
+        return json.dumps(self._rules.get_stats())
+
+    # Rule and alarm actions only drive the hardware; _applyActions brings the
+    # table and models up to date on the GUI thread, in mock mode as well
+
+    def _ruleWrite(self, pin, value):
+        """Internal: rule write action (edge or sensor thread)"""
+        if self._table.mode(pin) != 'output':
+            raise ValueError(f"Pin {pin} is not configured as output")
+        if GPIO_AVAILABLE:
+            GPIO.output(pin, GPIO.HIGH if value else GPIO.LOW)
+
+    def _rulePWM(self, pin, duty_cycle):
+        """Internal: rule PWM action (edge or sensor thread)"""
+        if self._table.mode(pin) != 'pwm':
+            raise ValueError(f"Pin {pin} is not configured as PWM")
+        pwm = self._table.pwm[pin]
+        if pwm is not None:  # None in mock mode
+            pwm.ChangeDutyCycle(duty_cycle)
+
+    def _ruleWriteGroup(self, name, value):
+        """Internal: rule group action (edge or sensor thread)"""
+        group = self._groups.get(name)
+        if group is None or group.mode != 'output':
+            raise ValueError(f"Group '{name}' is not an output group")
+        if self._group_io:
+            self._group_io.write(group, value)
+        else:
+            group.masks(value)  # Mock mode - validate only
+
+    @Slot(str, result=bool)
+    def setAlarm(self, alarm_json):
+        """
+        Add a sensor threshold alarm, or replace the alarm with the same name
+
+        Args:
+            alarm_json: Alarm as JSON, e.g. {"name": "dark", "signal": "light",
+                "below": 50, "hysteresis": 10,
+                "actions": [{"type": "write", "pin": 22, "value": 1}]}
+                (see SensorAlarms for signals and options)
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        import json
+        was_enabled = self._alarms.enabled
+        try:
+            alarm = self._alarms.set_alarm(json.loads(alarm_json))
+            self._record('POST', '/api/alarms', alarm)
+            self._notifyAlarmsEnabled(was_enabled)
+            return True
+        except ValueError as e:
+            self.errorOccurred.emit(f"Invalid alarm: {str(e)}")
+            return False
+
+    @Slot(str, result=bool)
+    def removeAlarm(self, name):
+        """Remove a sensor alarm; returns False if there is no such alarm"""
+        was_enabled = self._alarms.enabled
+        try:
+            self._alarms.remove_alarm(name)
+            self._record('DELETE', f'/api/alarms/{name}')
+            self._notifyAlarmsEnabled(was_enabled)
+            return True
+        except ValueError as e:
+            self.errorOccurred.emit(str(e))
+            return False
+
+    @Slot(result=str)
+    def getAlarms(self):
+        """Get all sensor alarms with their state and counters as JSON string"""
+        import json
+        return json.dumps(self._alarms.get_alarms())
+
+    @Slot(result=str)
+    def getAlarmStats(self):
+        """Get trigger-to-action latency (us) and per-alarm counters as JSON string"""
+        import json
+        return json.dumps(self._alarms.get_stats())
+
+    def _notifyAlarmsEnabled(self, was_enabled):
+        """Internal: emit alarmsEnabledChanged if an alarm change flipped it"""
+        if self._alarms.enabled != was_enabled:
+            self.alarmsEnabledChanged.emit(not was_enabled)
+
+    @property
+    def alarm_stage(self):
+        """Sensor pipeline stage evaluating the alarms (SensorAlarms)"""
+        return self._alarms
+
+    def _onRuleApplied(self, name, pin, level, actions):
+        """Internal: bring the models up to date after a rule fired"""
+        self._applyActions(actions)
+        log.debug("Rule fired", rule=name, pin=pin, level=level)
+        self.ruleFired.emit(name, pin, level)
+
+    def _onAlarmApplied(self, event):
+        """Internal: bring the models up to date after an alarm triggered or cleared"""
+        self._applyActions(event['actions'])
+        self.alarmChanged.emit(event['alarm'], event['state'] == 'triggered', event['value'])
+
+    def _applyActions(self, actions):
+        """Internal: apply the state changes of rule or alarm actions to the models"""
+        for action in actions:
+            if action['type'] == 'write':
+                out = action['pin']
+                if self._table.set_value(out, action['value']):
+                    self._pin_model.update_pin(out, value=action['value'])
+                    self.pinValueChanged.emit(out, action['value'])
+                    self._notifyGroup(out)
+            elif action['type'] == 'pwm':
+                out = action['pin']
+                self._table.set_pwm(out, duty_cycle=action['duty_cycle'])
+                self._pin_model.update_pin(out, pwm_duty_cycle=action['duty_cycle'])
+            else:
+                group = self._groups.get(action['group'])
+                if group:
+                    for out, value in group.bits(action['value']):
+                        self._table.set_value(out, value)
+                        self._pin_model.update_pin(out, value=value)
+                    self.groupValueChanged.emit(group.name, action['value'])
+
+    @Slot(result=str)
+    def getPWMStats(self):
+        """
+        Get software PWM timing statistics as JSON string
+
+        Returns:
+            {"<pin>": {"frequency", "duty_cycle", "edges", "missed_periods",
+                       "spin_us", "edge_error": {"count", "min_us", "mean_us",
+                       "max_us", "p99_le_us", "buckets": [...]}}}
+        """
+        import json
+        return json.dumps(self._soft_pwm.get_stats() if self._soft_pwm else {})
+
+    @Slot(float)
+    def setInputRateLimit(self, max_rate_hz):
+        """
+        Set the maximum rate of pinValueChanged emissions per input pin
+
+        Args:
+            max_rate_hz: Emissions per second (0 = unlimited)
+        """
+        if self._watcher:
+            self._watcher.set_max_rate(max_rate_hz)
+
+    @Slot(int, float, result=bool)
+    def startMeasurement(self, pin, window_ms=DEFAULT_WINDOW_MS):
+        """
+        Measure frequency, period and pulse width on an input pin (see
+        PulseMeter); restarts a measurement already running on the pin
+
+        Args:
+            pin: Pin number (BCM), configured as input
+            window_ms: Sliding window length
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if self._table.mode(pin) != 'input':
+            self.errorOccurred.emit(f"Pin {pin} is not configured as input")
+            return False
+        if not self._watcher:
+            self.errorOccurred.emit("Pulse measurement needs GPIO edge detection")
+            return False
+        try:
+            meter = PulseMeter(GPIO.input(pin), window_ms)
+        except ValueError as e:
+            self.errorOccurred.emit(f"Invalid measurement: {str(e)}")
+            return False
+
+        self._meters[pin] = meter
+        self._updateEdgeHook()
+        log.info("Measuring pin", pin=pin, window_ms=window_ms)
+        self._record('POST', f'/api/pins/{pin}/measurement', {'window_ms': window_ms})
+        return True
+
+    @Slot(int, result=bool)
+    def stopMeasurement(self, pin):
+        """Stop measuring a pin; returns False if it is not being measured"""
+        if self._meters.pop(pin, None) is None:
+            self.errorOccurred.emit(f"Pin {pin} is not being measured")
+            return False
+        self._updateEdgeHook()
+        self._record('DELETE', f'/api/pins/{pin}/measurement')
+        return True
+
+    @Slot(int, result=str)
+    def getMeasurement(self, pin):
+        """
+        Get a pin's measurement as JSON string, or an empty string if it is
+        not being measured
+
+        Returns:
+            {"pin", "frequency_hz", "period_us", "pulse_width_us",
+             "last_pulse_width_us", "duty_cycle", "count", "edges", "level",
+             "window_ms", "periods"}
+        """
+        import json
+        meter = self._meters.get(pin)
+        return json.dumps(dict(meter.read(), pin=pin)) if meter else ''
+
+    @Slot(result=str)
+    def getMeasurements(self):
+        """Get the measurements of every measured pin as JSON string"""
+        import json
+        return json.dumps([dict(self._meters[pin].read(), pin=pin) for pin in sorted(self._meters)])
+
+    @Slot(str, int, int, str, result=bool)
+    def createEncoder(self, name, pin_a, pin_b, pull_mode='up'):
+        """
+        Configure two input pins as a quadrature encoder (see QuadratureEncoder)
+
+        Args:
+            name: Encoder name
+            pin_a: BCM pin of the A output (A leading B counts up)
+            pin_b: BCM pin of the B output
+            pull_mode: 'up', 'down', or 'none' for both pins
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if self._encoders.get(name):
+            self.errorOccurred.emit(f"Encoder '{name}' already exists")
+            return False
+        if pin_a == pin_b:
+            self.errorOccurred.emit("Encoder pins A and B must differ")
+            return False
+        if not self._watcher:
+            self.errorOccurred.emit("Encoders need GPIO edge detection")
+            return False
+
+        configured = []
+        self._recordPaused = True
+        try:
+            for pin in (pin_a, pin_b):
+                if not self.configurePin(pin, 'input', pull_mode):
+                    for done in configured:
+                        self.removePin(done)
+                    return False
+                configured.append(pin)
+        finally:
+            self._recordPaused = False
+
+        self._encoders.add(name, pin_a, pin_b)
+        self._updateEdgeHook()
+        self._record('POST', '/api/encoders', {'name': name, 'pin_a': pin_a, 'pin_b': pin_b,
+                                               'pull': pull_mode})
+        self.pinsChanged.emit()
+        return True
+
+    @Slot(str, result=bool)
+    def removeEncoder(self, name):
+        """Delete an encoder and release its pins; returns False if there is no such encoder"""
+        encoder = self._encoders.remove(name)
+        if encoder is None:
+            self.errorOccurred.emit(f"Encoder '{name}' does not exist")
+            return False
+
+        self._recordPaused = True
+        try:
+            for pin in (encoder.pin_a, encoder.pin_b):
+                self.removePin(pin)
+        finally:
+            self._recordPaused = False
+        self._updateEdgeHook()
+        log.info("Removed encoder", encoder=name)
+        self._record('DELETE', f'/api/encoders/{name}')
+        return True
+
+    @Slot(str, int, result=bool)
+    def setEncoderPosition(self, name, position):
+        """Set an encoder's position; returns False if there is no such encoder"""
+        encoder = self._encoders.get(name)
+        if encoder is None:
+            self.errorOccurred.emit(f"Encoder '{name}' does not exist")
+            return False
+        encoder.set_position(position)
+        self._record('POST', f'/api/encoders/{name}/position', {'position': position})
+        return True
+
+    @Slot(result=str)
+    def getEncoders(self):
+        """
+        Get all encoders as JSON string
+
+        Returns:
+            [{"name", "pin_a", "pin_b", "position", "velocity" (counts/s),
+              "illegal", "transitions"}]
+        """
+        import json
+        return json.dumps([self._encoders.get(name).info() for name in self._encoders.names()])
+
+    @property
+    def encoder_bank(self):
+        """The EncoderBank (QuadratureEncoder.py) decoding this controller's encoders"""
+        return self._encoders
+
+    def _onEncoderReport(self, report):
+        """Internal: encoder reporter thread -> encoderChanged (queued to receivers' threads)"""
+        self.encoderChanged.emit(report['name'], report['position'], report['delta'])
+
+    def _updateEdgeHook(self):
+        """Internal: chain meters, encoders, rules and the session recorder on the watcher's edge hook"""
+        if not self._watcher:
+            return
+        on_edge = self._rules.on_edge
+        meters = self._meters
+        encoders = self._encoders if self._encoders.pins() else None
+        recorder = self._recorder
+        if not meters and encoders is None and recorder is None:
+            self._watcher.edge_hook = on_edge
+            return
+
+        def edge_hook(pin, level, timestamp_ns):
+            meter = meters.get(pin)
+            if meter is not None:
+                meter.edge(level, timestamp_ns)
+            if encoders is not None:
+                encoders.on_edge(pin, level, timestamp_ns)
+            on_edge(pin, level, timestamp_ns)
+            if recorder is not None:
+                recorder.input(pin, level)
+        self._watcher.edge_hook = edge_hook
+
     def _cleanupPin(self, pin):
-        """Internal: cleanup a single pin"""
+        """Internal: cleanup a single pin (a group it belongs to is dissolved)"""
+        group = self._groupOf(pin)
+        if group:
+            del self._groups[group.name]
+            log.info("Dissolved group", group=group.name, pin=pin)
+
+        encoder = self._encoders.of_pin(pin)
+        if encoder:
+            self._encoders.remove(encoder.name)
+            log.info("Dissolved encoder", encoder=encoder.name, pin=pin)
+        if self._meters.pop(pin, None) is not None or encoder:
+            self._updateEdgeHook()
+
+        if self._watcher:
+            self._watcher.unwatch(pin)
+
         # Stop PWM if running
-        if pin in self._pin_pwm:
+        pwm = self._table.release(pin)
+        if pwm is not None:
             try:
-                self._pin_pwm[pin].stop()
-                del self._pin_pwm[pin]
-                if pin in self._pin_pwm_frequency:
-                    del self._pin_pwm_frequency[pin]
-                if pin in self._pin_pwm_duty_cycle:
-                    del self._pin_pwm_duty_cycle[pin]
+                pwm.stop()
             except Exception as e:
-                print(f"[GPIOController] Warning: Error stopping PWM on pin {pin}: {e}")
+                log.warning("Error stopping PWM", pin=pin, error=e)
 
         if GPIO_AVAILABLE:
             try:
                 GPIO.cleanup(pin)
             except Exception as e:
-                print(f"[GPIOController] Warning: Error cleaning up pin {pin}: {e}")
+                log.warning("Error cleaning up pin", pin=pin, error=e)
+
+    def set_recorder(self, recorder):
+        """
+        Record controller calls and input level changes to a session log
+
+        Calls are recorded as their backend REST equivalents, so a session
+        recorded on the touchscreen replays against the backend.
+
+        Args:
+            recorder: SessionRecorder, or None to stop recording
+        """
+        self._recorder = recorder
+        self._updateEdgeHook()
+
+    def _record(self, method, path, body=None):
+        """Internal: record a successful call in the session log"""
+        if self._recorder is not None and not self._recordPaused:
+            self._recorder.call(method, path, body)
 
     def cleanup(self):
         """Cleanup on exit"""
-        print("[GPIOController] Shutting down...")
+        log.info("Shutting down...")
+        if self._watcher:
+            self._watcher.stop()
+            self._watcher.wait()
+        self._encoders.stop()
         self.cleanupAll()
+        if self._soft_pwm:
+            self._soft_pwm.stop()
         if GPIO_AVAILABLE:
             GPIO.cleanup()
 
@@ -373,24 +1068,26 @@ class GPIOController(QObject):
             bool: True if successful, False otherwise
         """
         try:
-            if pin not in self._pin_pwm:
+            if self._table.mode(pin) != 'pwm':
                 self.errorOccurred.emit(f"Pin {pin} is not configured for PWM")
                 return False
 
             # Clamp duty cycle to valid range
             duty_cycle = max(0.0, min(100.0, duty_cycle))
 
-            if GPIO_AVAILABLE:
-                self._pin_pwm[pin].ChangeDutyCycle(duty_cycle)
+            pwm = self._table.pwm[pin]
+            if pwm is not None:
+                pwm.ChangeDutyCycle(duty_cycle)
 
-            self._pin_pwm_duty_cycle[pin] = duty_cycle
-            print(f"[GPIOController] Set PWM duty cycle on pin {pin} to {duty_cycle}%")
-            self.pinsChanged.emit()
+            self._table.set_pwm(pin, duty_cycle=duty_cycle)
+            self._pin_model.update_pin(pin, pwm_duty_cycle=duty_cycle)
+            log.debug("Set PWM duty cycle", pin=pin, duty_cycle=duty_cycle)
+            self._record('POST', f'/api/pins/{pin}/pwm', {'duty_cycle': duty_cycle})
             return True
 
         except Exception as e:
             error_msg = f"Error setting PWM duty cycle on pin {pin}: {str(e)}"
-            print(f"[GPIOController] {error_msg}")
+            log.error(error_msg)
             self.errorOccurred.emit(error_msg)
             return False
 
@@ -407,23 +1104,26 @@ class GPIOController(QObject):
             bool: True if successful, False otherwise
         """
         try:
-            if pin not in self._pin_pwm:
+            if self._table.mode(pin) != 'pwm':
                 self.errorOccurred.emit(f"Pin {pin} is not configured for PWM")
                 return False
 
             # Clamp frequency to valid range
             frequency = max(0.1, min(100000.0, frequency))
 
-            if GPIO_AVAILABLE:
-                self._pin_pwm[pin].ChangeFrequency(frequency)
+            pwm = self._table.pwm[pin]
+            if pwm is not None:
+                pwm.ChangeFrequency(frequency)
 
-            self._pin_pwm_frequency[pin] = frequency
-            print(f"[GPIOController] Set PWM frequency on pin {pin} to {frequency}Hz")
-            self.pinsChanged.emit()
+            self._table.set_pwm(pin, frequency=frequency)
+            self._pin_model.update_pin(pin, pwm_frequency=frequency)
+            log.debug("Set PWM frequency", pin=pin, frequency=frequency)
+            self._record('POST', f'/api/pins/{pin}/pwm',
+                         {'duty_cycle': self._table.pwm_duty_cycle[pin], 'frequency': frequency})
             return True
 
         except Exception as e:
             error_msg = f"Error setting PWM frequency on pin {pin}: {str(e)}"
-            print(f"[GPIOController] {error_msg}")
+            log.error(error_msg)
             self.errorOccurred.emit(error_msg)
             return False
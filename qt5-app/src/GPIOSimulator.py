@@ -0,0 +1,209 @@
+"""
+GPIO Simulator for reTerminal
+In-memory stand-in for the RPi.GPIO module
+
+Unlike the no-op mocks, the simulator keeps pin levels and modes, enforces
+the same setup rules as RPi.GPIO, runs edge-detection callbacks when an input
+is driven with set_input(), and can record every output transition with a
+monotonic timestamp. This lets the full controller code paths (pin watcher,
+software PWM engine) run and be measured on any Linux machine.
+
+Select it for either controller with:
+    RETERMINAL_GPIO=sim python3 main.py
+    RETERMINAL_GPIO=sim python3 app.py
+"""
+import os
+import time
+import threading
+from collections import deque
+
+
+def simulator_requested():
+    """True if the RETERMINAL_GPIO environment variable selects the simulator"""
+    return os.environ.get('RETERMINAL_GPIO', '').lower() in ('sim', 'simulator')
+
+
+class SimulatedPWM:
+    """Minimal RPi.GPIO.PWM stand-in that only keeps its settings"""
+
+    def __init__(self, pin, frequency):
+        self.pin = pin
+        self.frequency = frequency
+        self.duty_cycle = 0
+        self.running = False
+
+    def start(self, duty_cycle):
+        self.duty_cycle = duty_cycle
+        self.running = True
+
+    def ChangeDutyCycle(self, duty_cycle):
+        self.duty_cycle = duty_cycle
+
+    def ChangeFrequency(self, frequency):
+        self.frequency = frequency
+
+    def stop(self):
+        self.running = False
+
+
+class GPIOSimulator:
+    """
+    RPi.GPIO-compatible simulated pin bank (BCM numbering, pins 0-27)
+
+    Edge callbacks are called synchronously from set_input(), on the caller's
+    thread (RPi.GPIO calls them from its own event thread).
+    """
+    BCM = 11
+    BOARD = 10
+    IN = 1
+    OUT = 0
+    HIGH = 1
+    LOW = 0
+    PUD_OFF = 20
+    PUD_DOWN = 21
+    PUD_UP = 22
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    PIN_COUNT = 28
+
+    def __init__(self, record_edges=0):
+        """
+        Initialize simulator
+
+        Args:
+            record_edges: Keep the last N output transitions in edge_log as
+                (monotonic_ns, pin, value) tuples (0 = don't record)
+        """
+        self._lock = threading.Lock()
+        self._mode = None
+        self._directions = {}  # {pin: IN or OUT}
+        self._levels = [0] * self.PIN_COUNT
+        self._edge_detect = {}  # {pin: (edge, [callbacks])}
+        self.edge_log = deque(maxlen=record_edges) if record_edges else None
+
+    # ------------------------------------------------------------------
+    # RPi.GPIO interface
+    # ------------------------------------------------------------------
+
+    def setmode(self, mode):
+        self._mode = mode
+
+    def getmode(self):
+        return self._mode
+
+    def setwarnings(self, flag):
+        pass
+
+    def setup(self, pin, direction, pull_up_down=None, initial=None):
+        self._check_pin(pin)
+        with self._lock:
+            self._directions[pin] = direction
+            if direction == self.IN:
+                # Floating inputs read as their pull, or low
+                self._levels[pin] = 1 if pull_up_down == self.PUD_UP else 0
+            elif initial is not None:
+                self._set_level(pin, 1 if initial else 0)
+
+    def output(self, pin, value):
+        with self._lock:
+            if self._directions.get(pin) != self.OUT:
+                raise RuntimeError("The GPIO channel has not been set up as an OUTPUT")
+            self._set_level(pin, 1 if value else 0)
+
+    def input(self, pin):
+        with self._lock:
+            if pin not in self._directions:
+                raise RuntimeError("You must setup() the GPIO channel first")
+            return self._levels[pin]
+
+    def cleanup(self, pin=None):
+        with self._lock:
+            pins = [pin] if pin is not None else list(self._directions)
+            for p in pins:
+                self._directions.pop(p, None)
+                self._edge_detect.pop(p, None)
+                self._levels[p] = 0
+
+    def add_event_detect(self, pin, edge, callback=None, bouncetime=None):
+        with self._lock:
+            if self._directions.get(pin) != self.IN:
+                raise RuntimeError("You must setup() the GPIO channel as an input first")
+            if pin in self._edge_detect:
+                raise RuntimeError("Conflicting edge detection already enabled for this GPIO channel")
+            self._edge_detect[pin] = (edge, [callback] if callback else [])
+
+    def add_event_callback(self, pin, callback):
+        with self._lock:
+            if pin not in self._edge_detect:
+                raise RuntimeError("Add event detection using add_event_detect first")
+            self._edge_detect[pin][1].append(callback)
+
+    def remove_event_detect(self, pin):
+        with self._lock:
+            self._edge_detect.pop(pin, None)
+
+    def PWM(self, pin, frequency):
+        return SimulatedPWM(pin, frequency)
+
+    # ------------------------------------------------------------------
+    # Bulk access (like writing GPSET0/GPCLR0 and reading GPLEV0)
+    # ------------------------------------------------------------------
+
+    def output_mask(self, set_mask, clear_mask):
+        """Set several output pins in one atomic update (bit N = GPIO N)"""
+        with self._lock:
+            pins = [pin for pin in range(self.PIN_COUNT) if (set_mask | clear_mask) >> pin & 1]
+            for pin in pins:
+                if self._directions.get(pin) != self.OUT:
+                    raise RuntimeError("The GPIO channel has not been set up as an OUTPUT")
+            now = time.monotonic_ns()
+            for pin in pins:
+                self._set_level(pin, set_mask >> pin & 1, now)
+
+    def input_mask(self):
+        """Get the level of all pins as a bitmask (bit N = GPIO N)"""
+        with self._lock:
+            return sum(level << pin for pin, level in enumerate(self._levels))
+
+    # ------------------------------------------------------------------
+    # Simulation helpers
+    # ------------------------------------------------------------------
+
+    def set_input(self, pin, value, notify=True):
+        """
+        Drive an input pin from outside, running edge callbacks on a transition
+
+        notify=False changes the level without running them, like an edge
+        the kernel did not report.
+        """
+        value = 1 if value else 0
+        with self._lock:
+            if self._levels[pin] == value:
+                return
+            self._levels[pin] = value
+            if not notify:
+                return
+            edge, callbacks = self._edge_detect.get(pin, (None, []))
+            fire = (edge == self.BOTH
+                    or (edge == self.RISING and value)
+                    or (edge == self.FALLING and not value))
+            callbacks = list(callbacks) if fire else []
+
+        for callback in callbacks:
+            callback(pin)
+
+    def get_level(self, pin):
+        """Current level of any pin, whatever its direction"""
+        return self._levels[pin]
+
+    def _set_level(self, pin, value, now=None):
+        if self._levels[pin] != value:
+            self._levels[pin] = value
+            if self.edge_log is not None:
+                self.edge_log.append((now or time.monotonic_ns(), pin, value))
+
+    def _check_pin(self, pin):
+        if not 0 <= pin < self.PIN_COUNT:
+            raise ValueError("The channel sent is invalid on a Raspberry Pi")
@@ -0,0 +1,72 @@
+"""
+Latency Statistics for reTerminal
+Fixed-size latency sample windows with min/mean/percentile summaries
+
+Usage:
+    from LatencyStats import LatencyStats
+
+    stats = LatencyStats()
+    stats.add(0.0021)              # seconds
+    stats.summary()
+    -> {'count': 1, 'min_ms': 2.1, 'mean_ms': 2.1, 'p50_ms': 2.1, 'p99_ms': 2.1, 'max_ms': 2.1}
+
+add() is O(1) and safe to call from any thread; percentiles are only
+computed when a summary is requested.
+"""
+import threading
+from collections import deque
+
+
+class LatencyStats:
+    """Keeps the last `window` latency samples (in seconds) and summarises them"""
+
+    def __init__(self, window=1024):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def add(self, seconds):
+        """Record one latency sample"""
+        with self._lock:
+            self._samples.append(seconds)
+            self.total += 1
+
+    def reset(self):
+        """Discard all samples"""
+        with self._lock:
+            self._samples.clear()
+            self.total = 0
+
+    def __len__(self):
+        return len(self._samples)
+
+    def summary(self, scale=1000.0, unit='ms', digits=3):
+        """
+        Summarise the current window
+
+        Args:
+            scale: Multiplier applied to the second values (1000 = ms, 1e6 = us)
+            unit: Suffix of the summary keys
+            digits: Decimal places to round to
+
+        Returns:
+            dict with count and min/mean/p50/p99/max in the requested unit
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+            total = self.total
+
+        summary = {'count': total}
+        if not samples:
+            return summary
+
+        def percentile(p):
+            return samples[min(len(samples) - 1, int(p / 100.0 * len(samples)))]
+
+        for name, value in (('min', samples[0]),
+                            ('mean', sum(samples) / len(samples)),
+                            ('p50', percentile(50)),
+                            ('p99', percentile(99)),
+                            ('max', samples[-1])):
+            summary[f"{name}_{unit}"] = round(value * scale, digits)
+        return summary
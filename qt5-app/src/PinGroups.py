@@ -0,0 +1,183 @@
+"""
+Pin Groups for reTerminal
+Named groups of GPIO pins read and written as one integer
+
+Bit N of a group's value is its Nth pin (LSB first), e.g. the data lines of
+a parallel display or a relay bank. GroupIO writes and reads a whole group
+through the fastest bulk access the GPIO backend offers:
+    register   BCM2711 GPSET0/GPCLR0 through /dev/gpiomem: one register
+               write raises every bit going high, the next lowers the rest
+               (the two land tens of nanoseconds apart)
+    simulator  GPIOSimulator.output_mask(): all bits in one locked update
+    per-pin    GPIO.output() per pin, anywhere else
+Reads sample all pins at once from GPLEV0 (or the simulator) where available.
+
+Qt-independent: used by both GPIOControllers.
+"""
+import os
+import mmap
+import struct
+
+from StructuredLog import get_logger
+
+log = get_logger('gpio.groups')
+
+# Bank 0 registers cover GPIO 0-31, which includes every header pin
+MAX_GROUP_WIDTH = 32
+
+
+class GPIORegisters:
+    """
+    BCM2711 GPIO bank 0 level/set/clear registers through /dev/gpiomem
+
+    /dev/gpiomem is accessible to members of the gpio group without root.
+    Pins must already be set up (direction, pulls) through RPi.GPIO.
+    """
+    GPIOMEM_PATH = '/dev/gpiomem'
+    GPSET0_OFFSET = 0x1C
+    GPCLR0_OFFSET = 0x28
+    GPLEV0_OFFSET = 0x34
+
+    def __init__(self, writable=False):
+        fd = os.open(self.GPIOMEM_PATH, os.O_RDWR | os.O_SYNC)
+        try:
+            prot = mmap.PROT_READ | (mmap.PROT_WRITE if writable else 0)
+            self._mem = mmap.mmap(fd, 4096, mmap.MAP_SHARED, prot)
+        finally:
+            os.close(fd)
+        self._word = struct.Struct('<I')
+
+    def read_levels(self):
+        """Get a bitmask of pin levels (bit N = GPIO N)"""
+        return self._word.unpack_from(self._mem, self.GPLEV0_OFFSET)[0]
+
+    def write_masks(self, set_mask, clear_mask):
+        """Drive the pins in set_mask high, then the pins in clear_mask low"""
+        if set_mask:
+            self._word.pack_into(self._mem, self.GPSET0_OFFSET, set_mask)
+        if clear_mask:
+            self._word.pack_into(self._mem, self.GPCLR0_OFFSET, clear_mask)
+
+    def close(self):
+        self._mem.close()
+
+
+class PinGroup:
+    """An ordered set of pins carrying one integer value"""
+
+    def __init__(self, name, pins, mode='output'):
+        """
+        Initialize group
+
+        Args:
+            name: Group name
+            pins: BCM pin numbers, least significant bit first
+            mode: 'output' or 'input'
+
+        Raises:
+            ValueError: If the pin list is empty, has duplicates or is too wide
+        """
+        pins = tuple(int(pin) for pin in pins)
+        if not name:
+            raise ValueError("Group name is required")
+        if not pins:
+            raise ValueError("A group needs at least one pin")
+        if len(set(pins)) != len(pins):
+            raise ValueError("Group pins must be unique")
+        if len(pins) > MAX_GROUP_WIDTH or not all(0 <= pin < 32 for pin in pins):
+            raise ValueError(f"Group pins must be GPIO 0-31, at most {MAX_GROUP_WIDTH} of them")
+        if mode not in ('output', 'input'):
+            raise ValueError(f"Group mode must be 'output' or 'input', got {mode!r}")
+
+        self.name = name
+        self.pins = pins
+        self.mode = mode
+        self.width = len(pins)
+        self.max_value = (1 << self.width) - 1
+        self.mask = 0
+        for pin in pins:
+            self.mask |= 1 << pin
+
+    def masks(self, value):
+        """
+        Translate a group value into GPIO bank masks
+
+        Returns:
+            (set_mask, clear_mask) with bit N = GPIO N
+
+        Raises:
+            ValueError: If value does not fit in the group
+        """
+        if not 0 <= value <= self.max_value:
+            raise ValueError(f"Value must be 0-{self.max_value} for group '{self.name}', got {value}")
+        set_mask = 0
+        for bit, pin in enumerate(self.pins):
+            if value >> bit & 1:
+                set_mask |= 1 << pin
+        return set_mask, self.mask & ~set_mask
+
+    def decode(self, levels):
+        """Extract the group value from a GPIO bank level mask"""
+        value = 0
+        for bit, pin in enumerate(self.pins):
+            value |= (levels >> pin & 1) << bit
+        return value
+
+    def bits(self, value):
+        """Split a group value into (pin, level) pairs"""
+        return [(pin, value >> bit & 1) for bit, pin in enumerate(self.pins)]
+
+
+class GroupIO:
+    """Bulk group access over an RPi.GPIO-compatible module"""
+
+    def __init__(self, gpio, use_registers=True):
+        """
+        Initialize group I/O
+
+        Args:
+            gpio: RPi.GPIO module, GPIOSimulator, or a mock
+            use_registers: Try /dev/gpiomem register access (real Pi only)
+        """
+        self._gpio = gpio
+        self._registers = None
+
+        if hasattr(gpio, 'output_mask'):
+            self.method = 'simulator'
+        else:
+            self.method = 'per-pin'
+            if use_registers and getattr(gpio, '__name__', '') == 'RPi.GPIO':
+                try:
+                    self._registers = GPIORegisters(writable=True)
+                    self.method = 'register'
+                except (OSError, ValueError) as e:
+                    log.info("GPIO registers not accessible, writing groups pin by pin", error=e)
+
+    def write(self, group, value):
+        """Drive all pins of a group to value (all bits together where possible)"""
+        set_mask, clear_mask = group.masks(value)
+        if self._registers is not None:
+            self._registers.write_masks(set_mask, clear_mask)
+        elif self.method == 'simulator':
+            self._gpio.output_mask(set_mask, clear_mask)
+        else:
+            output = self._gpio.output
+            for pin, level in group.bits(value):
+                output(pin, level)
+
+    def read(self, group):
+        """Sample all pins of a group and return its value"""
+        if self._registers is not None:
+            return group.decode(self._registers.read_levels())
+        if self.method == 'simulator':
+            return group.decode(self._gpio.input_mask())
+        read = self._gpio.input
+        value = 0
+        for bit, pin in enumerate(group.pins):
+            value |= (1 if read(pin) else 0) << bit
+        return value
+
+    def close(self):
+        if self._registers is not None:
+            self._registers.close()
+            self._registers = None
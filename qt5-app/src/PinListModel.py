@@ -0,0 +1,187 @@
+"""
+Pin List Model for reTerminal
+Qt item models exposing GPIO pin state to QML
+
+PinListModel has one fixed row per BCM pin (0-27), so configuring, writing or
+changing PWM on a pin only ever emits dataChanged for that single row and QML
+delegates update in place. ConfiguredPinModel filters it down to the
+configured pins, optionally restricted to some modes.
+"""
+try:
+    from PySide2.QtCore import (QAbstractListModel, QSortFilterProxyModel, QModelIndex,
+                                QByteArray, Qt, Slot)
+except ImportError:
+    from PyQt5.QtCore import (QAbstractListModel, QSortFilterProxyModel, QModelIndex,
+                              QByteArray, Qt, pyqtSlot as Slot)
+
+
+# Role names match the keys of GPIOController.getConfiguredPins()
+PIN_ROLES = [
+    'pin',
+    'configured',
+    'reserved',
+    'available',
+    'hardware_pwm',
+    'mode',
+    'value',
+    'pull_mode',
+    'pwm_enabled',
+    'pwm_frequency',
+    'pwm_duty_cycle',
+]
+
+# Fields reset when a pin is released
+PIN_CONFIG_DEFAULTS = {
+    'configured': False,
+    'mode': '',
+    'value': 0,
+    'pull_mode': 'none',
+    'pwm_enabled': False,
+    'pwm_frequency': 0,
+    'pwm_duty_cycle': 0,
+}
+
+# Fields reported by getConfiguredPins()/get()
+PIN_INFO_FIELDS = [
+    'pin',
+    'mode',
+    'value',
+    'pull_mode',
+    'pwm_enabled',
+    'pwm_frequency',
+    'pwm_duty_cycle',
+    'hardware_pwm',
+]
+
+
+class PinListModel(QAbstractListModel):
+    """
+    List model with one row per BCM GPIO pin
+
+    Row index is the pin number. Rows are never inserted or removed.
+    """
+    PIN_COUNT = 28
+    FIRST_ROLE = Qt.UserRole + 1
+
+    def __init__(self, reserved_pins, available_pins, hardware_pwm_pins, parent=None):
+        super().__init__(parent)
+        self._role_ids = {name: self.FIRST_ROLE + i for i, name in enumerate(PIN_ROLES)}
+        self._role_names = {role: name for name, role in self._role_ids.items()}
+
+        self._rows = []
+        for pin in range(self.PIN_COUNT):
+            row = {
+                'pin': pin,
+                'reserved': pin in reserved_pins,
+                'available': pin in available_pins,
+                'hardware_pwm': pin in hardware_pwm_pins,
+            }
+            row.update(PIN_CONFIG_DEFAULTS)
+            self._rows.append(row)
+
+    # ------------------------------------------------------------------
+    # QAbstractListModel interface
+    # ------------------------------------------------------------------
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._rows):
+            return None
+        name = self._role_names.get(role)
+        if name is None:
+            if role == Qt.DisplayRole:
+                return self._rows[index.row()]['pin']
+            return None
+        return self._rows[index.row()][name]
+
+    def roleNames(self):
+        return {role: QByteArray(name.encode()) for role, name in self._role_names.items()}
+
+    def role(self, name):
+        """Get the role id for a role name"""
+        return self._role_ids[name]
+
+    # ------------------------------------------------------------------
+    # Updates from GPIOController
+    # ------------------------------------------------------------------
+
+    def update_pin(self, pin, **fields):
+        """
+        Update fields of one pin and notify views of the roles that changed
+
+        Returns:
+            bool: True if anything changed
+        """
+        row = self._rows[pin]
+        changed = [name for name, value in fields.items() if row[name] != value]
+        if not changed:
+            return False
+
+        row.update(fields)
+        index = self.index(pin, 0)
+        if 'configured' in changed or 'mode' in changed:
+            # An empty role list makes filtering proxies re-evaluate the row
+            self.dataChanged.emit(index, index, [])
+        else:
+            self.dataChanged.emit(index, index, [self._role_ids[name] for name in changed])
+        return True
+
+    def release_pin(self, pin):
+        """Reset a pin to its unconfigured state"""
+        return self.update_pin(pin, **PIN_CONFIG_DEFAULTS)
+
+    def release_all(self):
+        """Reset every pin to its unconfigured state"""
+        for pin in range(self.PIN_COUNT):
+            self.release_pin(pin)
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+
+    def pin_info(self, pin):
+        """Get the info dict for a pin (same keys as getConfiguredPins())"""
+        row = self._rows[pin]
+        return {name: row[name] for name in PIN_INFO_FIELDS}
+
+    def configured_pins_info(self):
+        """Get info dicts for all configured pins, by pin number"""
+        return [self.pin_info(row['pin']) for row in self._rows if row['configured']]
+
+    @Slot(int, result='QVariantMap')
+    def get(self, pin):
+        """Get the info of a configured pin for QML, or an empty map"""
+        if not 0 <= pin < self.PIN_COUNT or not self._rows[pin]['configured']:
+            return {}
+        return self.pin_info(pin)
+
+
+class ConfiguredPinModel(QSortFilterProxyModel):
+    """
+    Proxy over PinListModel that only shows configured pins
+
+    Optionally restricted to a set of modes (e.g. output and PWM pins for
+    the Control screen). Filtering is dynamic, so rows appear and disappear
+    as pins are configured and released.
+    """
+
+    def __init__(self, source, modes=None, parent=None):
+        super().__init__(parent)
+        self._modes = set(modes) if modes else None
+        self._configured_role = source.role('configured')
+        self._mode_role = source.role('mode')
+        self.setSourceModel(source)
+        self.setDynamicSortFilter(True)
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        source = self.sourceModel()
+        index = source.index(source_row, 0, source_parent)
+        if not source.data(index, self._configured_role):
+            return False
+        if self._modes is None:
+            return True
+        return source.data(index, self._mode_role) in self._modes
@@ -0,0 +1,263 @@
+"""
+Pin Profiles for reTerminal
+Named whole-header pin setups, applied as one transaction
+
+A profile lists the configuration every pin should have for one job:
+
+    {"name": "labeler",
+     "pins": [{"pin": 17, "mode": "input", "pull": "up"},
+              {"pin": 22, "mode": "output", "value": 1},
+              {"pin": 18, "mode": "pwm", "pwm_frequency": 1000, "pwm_duty_cycle": 25}],
+     "release_others": true}
+
+Applying a profile diffs it against the pins' current state and only
+touches pins that differ, with the cheapest change that gets them there:
+    setup     mode or pull differs, or the pin is not configured: set it up again
+    write     output value differs: drive the pin
+    pwm       PWM frequency or duty cycle differs: change them on the running PWM
+    release   configured but not in the profile (with release_others): release it
+Pins in pin groups and encoders are left alone; a profile may not name them.
+
+apply_changes() runs the changes in order and, if one fails, puts every pin
+it touched back the way it was, so a profile is either applied completely
+or not at all. Profiles are kept on the device by ProfileStore.
+
+Qt-independent: used by the backend GPIOController and the embedded API.
+"""
+import os
+import json
+import threading
+from collections import namedtuple
+
+from PinTable import PIN_MODES, PULLS as PULL_MODES
+from StructuredLog import get_logger
+
+log = get_logger('gpio.profiles')
+
+# One step of applying a profile; spec is the pin's normalised profile entry
+# (None for release)
+ProfileChange = namedtuple('ProfileChange', ['pin', 'action', 'spec'])
+
+
+def normalise_profile(profile, available_pins=None):
+    """
+    Validate a profile definition and fill in defaults
+
+    Returns:
+        {"name", "pins": [pin entries sorted by pin], "release_others"}
+
+    Raises:
+        ValueError: If the profile is malformed
+    """
+    if not isinstance(profile, dict):
+        raise ValueError("A profile must be an object")
+
+    name = profile.get('name')
+    if not name or not isinstance(name, str):
+        raise ValueError("Profile name is required")
+
+    entries = profile.get('pins')
+    if not isinstance(entries, list):
+        raise ValueError("Profile pins must be a list")
+
+    pins = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise ValueError("Each profile pin must be an object")
+        pin = entry.get('pin')
+        if not isinstance(pin, int) or isinstance(pin, bool):
+            raise ValueError("Profile pin must be an integer")
+        if available_pins is not None and pin not in available_pins:
+            raise ValueError(f"Pin {pin} is not available (reserved or invalid)")
+        if pin in pins:
+            raise ValueError(f"Pin {pin} appears twice in profile '{name}'")
+        pins[pin] = _normalise_pin(pin, entry)
+
+    return {'name': name, 'pins': [pins[pin] for pin in sorted(pins)],
+            'release_others': bool(profile.get('release_others', True))}
+
+
+def _normalise_pin(pin, entry):
+    mode = entry.get('mode')
+    if mode not in PIN_MODES:
+        raise ValueError(f"Pin {pin}: mode must be one of {', '.join(PIN_MODES)}, got {mode!r}")
+
+    if mode == 'input':
+        pull = entry.get('pull', 'none')
+        if pull not in PULL_MODES:
+            raise ValueError(f"Pin {pin}: pull must be one of {', '.join(PULL_MODES)}, got {pull!r}")
+        return {'pin': pin, 'mode': mode, 'pull': pull}
+
+    if mode == 'output':
+        value = entry.get('value', 0)
+        if value not in (0, 1):
+            raise ValueError(f"Pin {pin}: output value must be 0 or 1")
+        return {'pin': pin, 'mode': mode, 'value': value}
+
+    frequency = entry.get('pwm_frequency')
+    if not isinstance(frequency, (int, float)) or isinstance(frequency, bool) or frequency <= 0:
+        raise ValueError(f"Pin {pin}: PWM mode requires a positive pwm_frequency")
+    duty_cycle = entry.get('pwm_duty_cycle', 0)
+    if not isinstance(duty_cycle, (int, float)) or not 0 <= duty_cycle <= 100:
+        raise ValueError(f"Pin {pin}: pwm_duty_cycle must be 0-100")
+    return {'pin': pin, 'mode': mode, 'pwm_frequency': frequency, 'pwm_duty_cycle': duty_cycle}
+
+
+def plan_profile(profile, current, group_pins=()):
+    """
+    Work out the changes that take the pins from their current state to a profile
+
+    Args:
+        profile: Normalised profile
+        current: Pin info dicts of the configured pins (get_all_pins_info())
+        group_pins: Pins that belong to pin groups or encoders
+
+    Returns:
+        List of ProfileChange, releases first, then by pin
+
+    Raises:
+        ValueError: If the profile names a pin that belongs to a group or encoder
+    """
+    current = {info['pin']: info for info in current}
+    changes = []
+
+    if profile['release_others']:
+        wanted = {entry['pin'] for entry in profile['pins']}
+        changes.extend(ProfileChange(pin, 'release', None) for pin in sorted(current)
+                       if pin not in wanted and pin not in group_pins)
+
+    for entry in profile['pins']:
+        pin = entry['pin']
+        if pin in group_pins:
+            raise ValueError(f"Pin {pin} belongs to a group or encoder, delete it first")
+
+        info = current.get(pin)
+        if info is None or info['mode'] != entry['mode'] \
+                or (entry['mode'] == 'input' and info['pull'] != entry['pull']):
+            changes.append(ProfileChange(pin, 'setup', entry))
+        elif entry['mode'] == 'output' and info['value'] != entry['value']:
+            changes.append(ProfileChange(pin, 'write', entry))
+        elif entry['mode'] == 'pwm' and (info['pwm_frequency'] != entry['pwm_frequency']
+                                         or info['pwm_duty_cycle'] != entry['pwm_duty_cycle']):
+            changes.append(ProfileChange(pin, 'pwm', entry))
+
+    return changes
+
+
+def apply_changes(changes, apply, restore):
+    """
+    Apply profile changes in order, all or nothing
+
+    Args:
+        changes: ProfileChange list from plan_profile()
+        apply: Callable(change) making one change
+        restore: Callable(pin) putting a pin back to its state before the
+            profile was applied; called for every pin touched, the failed
+            one included, newest first
+
+    Raises:
+        Whatever apply raised, after restoring
+    """
+    touched = []
+    for change in changes:
+        touched.append(change.pin)
+        try:
+            apply(change)
+        except Exception as e:
+            log.error("Profile change failed, rolling back", pin=change.pin,
+                      action=change.action, error=e)
+            for pin in reversed(touched):
+                try:
+                    restore(pin)
+                except Exception as restore_error:
+                    log.error("Could not restore pin", pin=pin, error=restore_error)
+            raise
+
+
+class ProfileStore:
+    """Named profiles kept in a JSON file on the device"""
+
+    def __init__(self, path, available_pins=None):
+        """
+        Initialize store
+
+        Args:
+            path: JSON file holding the profiles (created on first save)
+            available_pins: Pins profiles may use (None = any)
+        """
+        self.path = path
+        self._available_pins = available_pins
+        self._lock = threading.Lock()
+        self._profiles = self._load()
+
+    def list(self):
+        with self._lock:
+            return [self._profiles[name] for name in sorted(self._profiles)]
+
+    def get(self, name):
+        """Get a profile, or None"""
+        with self._lock:
+            return self._profiles.get(name)
+
+    def save(self, profile):
+        """
+        Add a profile, or replace the profile with the same name
+
+        Returns:
+            The normalised profile
+
+        Raises:
+            ValueError: If the profile is malformed
+        """
+        profile = normalise_profile(profile, self._available_pins)
+        with self._lock:
+            self._profiles[profile['name']] = profile
+            self._write()
+        log.info("Profile saved", profile=profile['name'], pins=len(profile['pins']))
+        return profile
+
+    def delete(self, name):
+        """
+        Delete a profile
+
+        Raises:
+            ValueError: If there is no such profile
+        """
+        with self._lock:
+            if name not in self._profiles:
+                raise ValueError(f"Profile '{name}' does not exist")
+            del self._profiles[name]
+            self._write()
+        log.info("Profile deleted", profile=name)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            log.error("Could not read profiles", path=self.path, error=e)
+            return {}
+
+        profiles = {}
+        for profile in stored.get('profiles', []):
+            try:
+                profile = normalise_profile(profile, self._available_pins)
+                profiles[profile['name']] = profile
+            except ValueError as e:
+                log.warning("Skipping invalid profile", path=self.path, error=e)
+        return profiles
+
+    def _write(self):
+        """Write all profiles (lock held); the file is replaced atomically"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'profiles': [self._profiles[name] for name in sorted(self._profiles)]},
+                      f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
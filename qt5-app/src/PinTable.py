@@ -0,0 +1,241 @@
+"""
+Pin Table for reTerminal
+Fixed-size, array-backed state of every BCM pin
+
+BCM pins run from 0 to 27, so pin state lives in preallocated arrays indexed
+by pin number instead of per-pin dicts and objects:
+    mode, pull, value       bytearrays of small codes
+    pwm_frequency/duty      array('d')
+    pwm                     list of PWM objects (None where there is none)
+Pin sets are integer bitmasks (bit N = GPIO N): reserved, safe (usable),
+hardware PWM and configured, so membership tests are a shift and a mask.
+
+Info dicts in the API format ({"pin", "mode", "value", "pull", ...}) are
+built on first use and cached until the pin changes, and the list of all
+configured pins' info is cached the same way, so serving unchanged state
+allocates nothing. Cached dicts are shared: callers must not modify them.
+
+Updates come from several threads (GUI or request threads, and rules and
+alarms on the edge and sensor threads) while request threads read info, with
+no lock. Every update bumps a per-pin generation after writing the arrays; a
+dict built while the generation moved is not kept, so the cache never holds
+a state older than the arrays.
+
+Qt-independent: used by both GPIOControllers.
+"""
+from array import array
+
+PIN_COUNT = 28
+
+# Codes stored in the mode and pull arrays; mode 0 = not configured
+MODES = ('', 'input', 'output', 'pwm')
+PIN_MODES = MODES[1:]
+PULLS = ('none', 'up', 'down')
+MODE_CODES = {mode: code for code, mode in enumerate(MODES)}
+PULL_CODES = {pull: code for code, pull in enumerate(PULLS)}
+
+
+def pin_mask(pins):
+    """Bitmask of a collection of pin numbers"""
+    mask = 0
+    for pin in pins:
+        mask |= 1 << pin
+    return mask
+
+
+def mask_pins(mask):
+    """Sorted pin numbers of a bitmask"""
+    pins = []
+    while mask:
+        low = mask & -mask
+        pins.append(low.bit_length() - 1)
+        mask ^= low
+    return pins
+
+
+def _number(value):
+    """Report whole-number floats as ints, as they were given"""
+    return int(value) if value.is_integer() else value
+
+
+class PinTable:
+    """Configuration and last known state of every pin"""
+
+    def __init__(self, reserved_pins, safe_pins, hardware_pwm_pins, count=PIN_COUNT):
+        """
+        Initialize table
+
+        Args:
+            reserved_pins: Pins used by the reTerminal hardware
+            safe_pins: Pins that may be configured
+            hardware_pwm_pins: Pins with a hardware PWM channel
+            count: Number of pins
+        """
+        self.count = count
+        self.reserved_mask = pin_mask(reserved_pins)
+        self.safe_mask = pin_mask(safe_pins)
+        self.hardware_pwm_mask = pin_mask(hardware_pwm_pins)
+        self.configured_mask = 0
+
+        self._mode = bytearray(count)
+        self._pull = bytearray(count)
+        self.value = bytearray(count)
+        self.pwm_frequency = array('d', bytes(8 * count))
+        self.pwm_duty_cycle = array('d', bytes(8 * count))
+        self.pwm = [None] * count
+
+        self._info = [None] * count
+        self._all_info = None
+        self._configured = ()
+        self._generations = [0] * count  # bumped by every update of the pin
+        self._generation = 0             # bumped by every update of any pin
+
+    # ------------------------------------------------------------------
+    # Pin sets (O(1))
+    # ------------------------------------------------------------------
+
+    def _has(self, mask, pin):
+        return 0 <= pin < self.count and bool(mask >> pin & 1)
+
+    def is_reserved(self, pin):
+        return self._has(self.reserved_mask, pin)
+
+    def is_safe(self, pin):
+        return self._has(self.safe_mask, pin)
+
+    def is_hardware_pwm(self, pin):
+        return self._has(self.hardware_pwm_mask, pin)
+
+    def is_configured(self, pin):
+        return self._has(self.configured_mask, pin)
+
+    def configured_pins(self):
+        """Configured pin numbers in ascending order (cached tuple)"""
+        return self._configured
+
+    def mode(self, pin):
+        """Mode name of a pin ('' if it is not configured)"""
+        return MODES[self._mode[pin]] if 0 <= pin < self.count else ''
+
+    def pull(self, pin):
+        return PULLS[self._pull[pin]]
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def configure(self, pin, mode, pull='none', value=0, pwm_frequency=0.0,
+                  pwm_duty_cycle=0.0, pwm=None):
+        """Record a pin's new configuration (mode and pull are names)"""
+        self._mode[pin] = MODE_CODES[getattr(mode, 'value', mode)]
+        self._pull[pin] = PULL_CODES[getattr(pull, 'value', pull)]
+        self.value[pin] = 1 if value else 0
+        self.pwm_frequency[pin] = pwm_frequency or 0.0
+        self.pwm_duty_cycle[pin] = pwm_duty_cycle or 0.0
+        self.pwm[pin] = pwm
+        if not self.configured_mask >> pin & 1:
+            self.configured_mask |= 1 << pin
+            self._configured = tuple(mask_pins(self.configured_mask))
+        self._changed(pin)
+
+    def release(self, pin):
+        """
+        Forget a pin's configuration
+
+        Returns:
+            The pin's PWM object, if it had one (for the caller to stop)
+        """
+        pwm = self.pwm[pin]
+        self._mode[pin] = self._pull[pin] = self.value[pin] = 0
+        self.pwm_frequency[pin] = self.pwm_duty_cycle[pin] = 0.0
+        self.pwm[pin] = None
+        if self.configured_mask >> pin & 1:
+            self.configured_mask &= ~(1 << pin)
+            self._configured = tuple(mask_pins(self.configured_mask))
+        self._changed(pin)
+        return pwm
+
+    def set_value(self, pin, value):
+        """
+        Record a pin level
+
+        Returns:
+            bool: True if it differs from the last one recorded
+        """
+        value = 1 if value else 0
+        if self.value[pin] == value:
+            return False
+        self.value[pin] = value
+        self._changed(pin)
+        return True
+
+    def set_pwm(self, pin, frequency=None, duty_cycle=None):
+        """Record a PWM frequency and/or duty cycle"""
+        if frequency is not None:
+            self.pwm_frequency[pin] = frequency
+        if duty_cycle is not None:
+            self.pwm_duty_cycle[pin] = duty_cycle
+        self._changed(pin)
+
+    def snapshot(self, pin):
+        """
+        Get a pin's configuration as configure() arguments, or None if it is
+        not configured (the PWM object is not included)
+        """
+        if not self.is_configured(pin):
+            return None
+        return (self.mode(pin), self.pull(pin), self.value[pin],
+                self.pwm_frequency[pin], self.pwm_duty_cycle[pin])
+
+    def _changed(self, pin):
+        """Invalidate a pin's cached info (after its arrays were written)"""
+        self._generations[pin] += 1
+        self._generation += 1
+        self._info[pin] = self._all_info = None
+
+    # ------------------------------------------------------------------
+    # Cached info views
+    # ------------------------------------------------------------------
+
+    def info(self, pin):
+        """
+        API info dict of a configured pin, or None
+
+        {"pin", "mode", "value", "pull", "is_reserved", "is_available"
+         [, "pwm_frequency", "pwm_duty_cycle"]}
+        """
+        info = self._info[pin] if 0 <= pin < self.count else None
+        if info is not None or not self.is_configured(pin):
+            return info
+
+        generation = self._generations[pin]
+        mode = MODES[self._mode[pin]]
+        info = {
+            'pin': pin,
+            'mode': mode,
+            'value': self.value[pin],
+            'pull': PULLS[self._pull[pin]],
+            'is_reserved': bool(self.reserved_mask >> pin & 1),
+            'is_available': bool(self.safe_mask >> pin & 1),
+        }
+        if mode == 'pwm':
+            info['pwm_frequency'] = _number(self.pwm_frequency[pin])
+            info['pwm_duty_cycle'] = _number(self.pwm_duty_cycle[pin])
+        if self._generations[pin] == generation:
+            self._info[pin] = info
+            # An update between the check and the store may have missed it
+            if self._generations[pin] != generation:
+                self._info[pin] = None
+        return info
+
+    def all_info(self):
+        """Info dicts of every configured pin, by pin number (cached list)"""
+        infos = self._all_info
+        if infos is None:
+            generation = self._generation
+            infos = [self.info(pin) for pin in self._configured]
+            if self._generation == generation:
+                self._all_info = infos
+                if self._generation != generation:
+                    self._all_info = None
+        return infos
@@ -0,0 +1,248 @@
+"""
+Pin Watcher for reTerminal
+Background detection of input pin transitions
+
+Input pins are watched with RPi.GPIO edge detection where the kernel allows
+it. Pins where edge detection cannot be added are polled instead; all polled
+pins are read together from the GPLEV0 level register through /dev/gpiomem
+(one 32-bit read per poll), falling back to GPIO.input() per pin when the
+register is not accessible.
+
+edge_hook, if set, sees every level report before any rate limiting: it is
+called as edge_hook(pin, value, monotonic_ns) on the RPi.GPIO event thread
+for edges and on the watcher thread for polled pins. The rule engine runs
+there.
+
+Transitions are coalesced per pin and emitted at most max_rate_hz times per
+second: if a pin toggles faster than that, the latest level is emitted once
+the rate-limit window has passed (and only if it differs from the last
+emitted level).
+"""
+import threading
+import time
+
+try:
+    from PySide2.QtCore import QThread, Signal
+except ImportError:
+    from PyQt5.QtCore import QThread, pyqtSignal as Signal
+
+from PinGroups import GPIORegisters
+from StructuredLog import get_logger
+
+log = get_logger('gpio.watcher')
+
+
+class PinWatcher(QThread):
+    """
+    Qt thread that watches input pins and reports level transitions
+
+    inputChanged is emitted from this thread; connect it to a slot of an
+    object living in the GUI thread and Qt queues the call there.
+    """
+    # Signal: (pin, value) emitted once per (rate-limited) transition
+    inputChanged = Signal(int, int)
+
+    def __init__(self, gpio, poll_interval_ms=10, max_rate_hz=50.0):
+        """
+        Initialize pin watcher
+
+        Args:
+            gpio: The RPi.GPIO module
+            poll_interval_ms: Poll period for pins without edge detection
+            max_rate_hz: Maximum inputChanged emissions per pin per second
+                (0 = unlimited)
+        """
+        super().__init__()
+        self._gpio = gpio
+        self.poll_interval = poll_interval_ms / 1000.0
+        self.max_rate_hz = max_rate_hz
+        self.running = True
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._edge_pins = set()
+        self._polled_pins = set()
+        self._emitted = {}    # {pin: last emitted value}
+        self._emitted_at = {}  # {pin: monotonic time of last emission}
+        self._pending = {}    # {pin: latest value not yet emitted}
+        self.edge_hook = None
+
+        try:
+            self._level_reader = GPIORegisters()
+        except (OSError, ValueError) as e:
+            log.info("GPLEV0 not accessible, polling pins individually", error=e)
+            self._level_reader = None
+
+    # ------------------------------------------------------------------
+    # Pin management (called from the GUI thread)
+    # ------------------------------------------------------------------
+
+    def watch(self, pin, value):
+        """
+        Start watching an input pin
+
+        Args:
+            pin: BCM pin number, already set up as input
+            value: Current level, used as the baseline for transitions
+        """
+        self.unwatch(pin)
+        with self._lock:
+            self._emitted[pin] = value
+            self._emitted_at[pin] = 0.0
+
+        try:
+            self._gpio.add_event_detect(pin, self._gpio.BOTH, callback=self._on_edge)
+            with self._lock:
+                self._edge_pins.add(pin)
+            mode = 'edge detection'
+        except (RuntimeError, AttributeError) as e:
+            with self._lock:
+                self._polled_pins.add(pin)
+            mode = f'polling ({e})'
+
+        log.info("Watching pin", pin=pin, using=mode)
+        self._wake.set()
+
+    def unwatch(self, pin):
+        """Stop watching a pin"""
+        with self._lock:
+            had_edge = pin in self._edge_pins
+            self._edge_pins.discard(pin)
+            self._polled_pins.discard(pin)
+            self._emitted.pop(pin, None)
+            self._emitted_at.pop(pin, None)
+            self._pending.pop(pin, None)
+
+        if had_edge:
+            try:
+                self._gpio.remove_event_detect(pin)
+            except RuntimeError:
+                pass
+
+    def unwatch_all(self):
+        """Stop watching every pin"""
+        with self._lock:
+            pins = list(self._edge_pins | self._polled_pins)
+        for pin in pins:
+            self.unwatch(pin)
+
+    def set_max_rate(self, max_rate_hz):
+        """Change the per-pin emission rate cap (0 = unlimited)"""
+        self.max_rate_hz = max(0.0, max_rate_hz)
+        self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Detection
+    # ------------------------------------------------------------------
+
+    def _on_edge(self, pin):
+        """RPi.GPIO edge callback (runs on the RPi.GPIO event thread)"""
+        now_ns = time.monotonic_ns()
+        try:
+            value = self._gpio.input(pin)
+        except RuntimeError:
+            return
+        hook = self.edge_hook
+        if hook is not None:
+            hook(pin, value, now_ns)
+        with self._lock:
+            if pin in self._edge_pins:
+                self._pending[pin] = value
+        self._wake.set()
+
+    def _poll(self):
+        """Read all polled pins, preferring one register read for all of them"""
+        with self._lock:
+            pins = list(self._polled_pins)
+        if not pins:
+            return
+
+        values = {}
+        now_ns = time.monotonic_ns()
+        if self._level_reader is not None:
+            levels = self._level_reader.read_levels()
+            for pin in pins:
+                values[pin] = (levels >> pin) & 1
+        else:
+            for pin in pins:
+                try:
+                    values[pin] = self._gpio.input(pin)
+                except RuntimeError:
+                    pass
+
+        hook = self.edge_hook
+        if hook is not None:
+            for pin, value in values.items():
+                hook(pin, value, now_ns)
+
+        with self._lock:
+            for pin, value in values.items():
+                if pin in self._polled_pins:
+                    self._pending[pin] = value
+
+    def _flush(self, now):
+        """
+        Emit pending transitions allowed by the rate cap
+
+        Returns:
+            Seconds until the next rate-limited emission is due, or None
+        """
+        min_interval = 1.0 / self.max_rate_hz if self.max_rate_hz > 0 else 0.0
+        due = []
+        next_due = None
+
+        with self._lock:
+            for pin, value in list(self._pending.items()):
+                if value == self._emitted.get(pin):
+                    del self._pending[pin]
+                    continue
+                wait = self._emitted_at.get(pin, 0.0) + min_interval - now
+                if wait > 0:
+                    next_due = wait if next_due is None else min(next_due, wait)
+                    continue
+                del self._pending[pin]
+                self._emitted[pin] = value
+                self._emitted_at[pin] = now
+                due.append((pin, value))
+
+        for pin, value in due:
+            self.inputChanged.emit(pin, value)
+        return next_due
+
+    def run(self):
+        """Main thread loop - polls and flushes transitions"""
+        log.info("Thread started")
+        next_due = None
+
+        while self.running:
+            with self._lock:
+                polling = bool(self._polled_pins)
+
+            timeout = 0.5
+            if polling:
+                timeout = self.poll_interval
+            if next_due is not None:
+                timeout = min(timeout, next_due)
+
+            if self._wake.wait(timeout):
+                self._wake.clear()
+            if not self.running:
+                break
+
+            try:
+                self._poll()
+                next_due = self._flush(time.monotonic())
+            except Exception as e:
+                log.error("Watcher error", error=e)
+
+        if self._level_reader is not None:
+            self._level_reader.close()
+            self._level_reader = None
+        log.info("Thread stopped")
+
+    def stop(self):
+        """Stop the watcher thread and remove edge detection"""
+        log.info("Stopping...")
+        self.running = False
+        self._wake.set()
+        self.unwatch_all()
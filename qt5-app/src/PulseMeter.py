@@ -0,0 +1,191 @@
+"""
+Pulse Meter for reTerminal
+Frequency, period and pulse width of an input pin, measured from its edges
+
+For flow meters, fan tachometers and other pulse outputs. Each edge is
+timestamped (time.monotonic_ns()) in the edge callback and fed to
+PulseMeter.edge(), which keeps two ring buffers over a sliding window:
+    rising edge times    frequency = (edges - 1) / (newest - oldest)
+    high pulse widths    with a running sum for the mean pulse width
+Both are preallocated arrays, and entries older than the window are dropped
+as new ones arrive, so an edge costs O(1) (amortised) with no allocation and
+no lock. The window always keeps the last full period, so signals slower
+than the window are still measured.
+
+Readers (REST, Qt) run on other threads; read() retries if an edge arrived
+while it was reading, so it never reports a half-updated window. When no
+rising edge has arrived for the window (or twice the last period, if that
+is longer) the signal is considered stopped and the frequency reads 0.
+
+Qt-independent: used by both GPIOControllers.
+"""
+import time
+from array import array
+
+DEFAULT_WINDOW_MS = 1000
+MIN_WINDOW_MS = 10
+MAX_WINDOW_MS = 60000
+# Ring capacity; at rates above capacity/window the window shortens to the
+# last `capacity` periods
+CAPACITY = 4096
+
+
+def validate_window(window_ms):
+    """
+    Check a measurement window
+
+    Raises:
+        ValueError: If it is not a number of milliseconds in range
+    """
+    if not isinstance(window_ms, (int, float)) or isinstance(window_ms, bool) \
+            or not MIN_WINDOW_MS <= window_ms <= MAX_WINDOW_MS:
+        raise ValueError(f"window_ms must be {MIN_WINDOW_MS}-{MAX_WINDOW_MS}")
+    return window_ms
+
+
+class PulseMeter:
+    """Sliding-window frequency and pulse width of one input pin"""
+
+    def __init__(self, level=0, window_ms=DEFAULT_WINDOW_MS, capacity=CAPACITY):
+        """
+        Initialize meter
+
+        Args:
+            level: Current pin level
+            window_ms: Sliding window length
+            capacity: Periods and pulses kept at most
+        """
+        self.window_ms = validate_window(window_ms)
+        self.capacity = capacity
+        self.level = 1 if level else 0
+        self.started_ns = time.monotonic_ns()
+        self.count = 0  # rising edges (pulses) since started
+        self.edges = 0  # level changes since started
+
+        self._window_ns = int(window_ms * 1e6)
+        self._rises = array('q', bytes(8 * capacity))
+        self._rise_head = 0
+        self._rise_len = 0
+        self._widths = array('q', bytes(8 * capacity))
+        self._width_ends = array('q', bytes(8 * capacity))
+        self._width_head = 0
+        self._width_len = 0
+        self._width_sum = 0
+        self._last_rise = None
+        self._last_width = 0
+
+    # ------------------------------------------------------------------
+    # Edge path (edge thread)
+    # ------------------------------------------------------------------
+
+    def edge(self, level, timestamp_ns):
+        """
+        Record a pin level change
+
+        Reports that do not change the level (bounce, polling) are ignored.
+        """
+        level = 1 if level else 0
+        if level == self.level:
+            return
+        self.level = level
+        cap = self.capacity
+        limit = timestamp_ns - self._window_ns
+
+        if level:
+            rises = self._rises
+            head = self._rise_head
+            n = self._rise_len
+            rises[(head + n) % cap] = timestamp_ns
+            if n == cap:
+                head = (head + 1) % cap
+            else:
+                n += 1
+            # Keep at least the last period
+            while n > 2 and rises[head] < limit:
+                head = (head + 1) % cap
+                n -= 1
+            self._rise_head = head
+            self._rise_len = n
+            self._last_rise = timestamp_ns
+            self.count += 1
+
+        elif self._last_rise is not None:
+            width = timestamp_ns - self._last_rise
+            widths = self._widths
+            ends = self._width_ends
+            head = self._width_head
+            n = self._width_len
+            total = self._width_sum + width
+            tail = (head + n) % cap
+            widths[tail] = width
+            ends[tail] = timestamp_ns
+            if n == cap:
+                total -= widths[head]
+                head = (head + 1) % cap
+            else:
+                n += 1
+            while n > 1 and ends[head] < limit:
+                total -= widths[head]
+                head = (head + 1) % cap
+                n -= 1
+            self._width_head = head
+            self._width_len = n
+            self._width_sum = total
+            self._last_width = width
+
+        self.edges += 1
+
+    # ------------------------------------------------------------------
+    # Readers (any thread)
+    # ------------------------------------------------------------------
+
+    def read(self, now_ns=None):
+        """
+        Current measurement
+
+        Returns:
+            {"frequency_hz", "period_us", "pulse_width_us" (mean high time),
+             "last_pulse_width_us", "duty_cycle" (%), "count" (pulses since
+             started), "edges", "level", "window_ms", "periods" (in the window)}
+            Period, pulse widths and duty cycle are None until measured, and
+            frequency is 0 once the signal has stopped.
+        """
+        for _ in range(8):
+            edges = self.edges
+            result = self._read(time.monotonic_ns() if now_ns is None else now_ns)
+            if self.edges == edges:
+                break
+        return result
+
+    def _read(self, now_ns):
+        cap = self.capacity
+        n = self._rise_len
+        periods = 0
+        frequency = 0.0
+        period_ns = None
+        if n >= 2:
+            oldest = self._rises[self._rise_head]
+            newest = self._rises[(self._rise_head + n - 1) % cap]
+            last_period = newest - self._rises[(self._rise_head + n - 2) % cap]
+            if now_ns - newest <= max(self._window_ns, 2 * last_period) and newest > oldest:
+                periods = n - 1
+                period_ns = (newest - oldest) / periods
+                frequency = 1e9 / period_ns
+
+        width_ns = self._width_sum / self._width_len if self._width_len else None
+        duty_cycle = None
+        if period_ns and width_ns is not None:
+            duty_cycle = round(min(100.0, 100.0 * width_ns / period_ns), 2)
+
+        return {
+            'frequency_hz': round(frequency, 3),
+            'period_us': round(period_ns / 1e3, 1) if period_ns else None,
+            'pulse_width_us': round(width_ns / 1e3, 1) if width_ns is not None else None,
+            'last_pulse_width_us': round(self._last_width / 1e3, 1) if self._width_len else None,
+            'duty_cycle': duty_cycle,
+            'count': self.count,
+            'edges': self.edges,
+            'level': self.level,
+            'window_ms': self.window_ms,
+            'periods': periods,
+        }
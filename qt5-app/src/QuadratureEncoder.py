@@ -0,0 +1,283 @@
+"""
+Quadrature Encoder for reTerminal
+Edge-driven decoding of rotary encoders on input pin pairs
+
+An encoder's A and B outputs form a 2-bit Gray code state (A << 1 | B) that
+moves one step per detent quarter. Every edge on either pin looks up
+(previous state << 2 | new state) in a 16-entry transition table:
+    +1 / -1    one step forward / back (A leading B counts up)
+    0          no change (bounce, or the other pin's edge already counted)
+    illegal    both bits changed: an edge was missed, direction unknown;
+               counted in `illegal`, position left as it was
+so an edge costs one table lookup (full x4 resolution), on the edge thread,
+without a lock.
+
+Velocity (counts/s) is estimated over the last COUNT_HISTORY counts within
+VELOCITY_WINDOW_MS, from a preallocated ring of count timestamps; it reads 0
+once the encoder has stopped.
+
+EncoderBank holds a controller's encoders and reports position changes to
+listeners at a capped rate per encoder: edges only mark an encoder as
+changed, and a reporter thread sends at most max_rate_hz reports per encoder
+with the position and the delta since the previous report.
+
+Qt-independent: used by both GPIOControllers.
+"""
+import threading
+import time
+from array import array
+
+from StructuredLog import get_logger
+
+log = get_logger('gpio.encoders')
+
+ILLEGAL = 2
+
+# (previous state << 2 | new state) -> step, state = A << 1 | B
+TRANSITIONS = (
+    0, -1, 1, ILLEGAL,
+    1, 0, ILLEGAL, -1,
+    -1, ILLEGAL, 0, 1,
+    ILLEGAL, 1, -1, 0,
+)
+
+DEFAULT_RATE_HZ = 50.0
+COUNT_HISTORY = 32
+VELOCITY_WINDOW_MS = 250
+
+
+class QuadratureDecoder:
+    """Position, velocity and illegal transition count of one encoder"""
+
+    def __init__(self, name, pin_a, pin_b, a=0, b=0):
+        self.name = name
+        self.pin_a = pin_a
+        self.pin_b = pin_b
+        self.state = (1 if a else 0) << 1 | (1 if b else 0)
+        self.position = 0
+        self.illegal = 0
+        self.transitions = 0
+
+        # Reporting (EncoderBank)
+        self.changed = False
+        self.reported = 0
+        self.next_report = 0.0
+
+        self._times = array('q', bytes(8 * COUNT_HISTORY))
+        self._positions = array('q', bytes(8 * COUNT_HISTORY))
+        self._counts = 0
+
+    def update(self, a, b, timestamp_ns):
+        """
+        Decode a new A/B state (edge thread)
+
+        Returns:
+            bool: True if the state changed
+        """
+        state = (1 if a else 0) << 1 | (1 if b else 0)
+        step = TRANSITIONS[self.state << 2 | state]
+        if not step:
+            return False
+        self.state = state
+        self.transitions += 1
+        if step == ILLEGAL:
+            self.illegal += 1
+            return True
+
+        self.position += step
+        i = self._counts % COUNT_HISTORY
+        self._times[i] = timestamp_ns
+        self._positions[i] = self.position
+        self._counts += 1
+        return True
+
+    def set_position(self, position=0):
+        self.position = self.reported = position
+        self._counts = 0
+
+    def velocity(self, now_ns=None):
+        """Counts per second over the recent counts (0 when stopped)"""
+        n = min(self._counts, COUNT_HISTORY)
+        if n < 2:
+            return 0.0
+        now_ns = time.monotonic_ns() if now_ns is None else now_ns
+        newest = (self._counts - 1) % COUNT_HISTORY
+        t_newest = self._times[newest]
+        last_interval = t_newest - self._times[(newest - 1) % COUNT_HISTORY]
+        window = VELOCITY_WINDOW_MS * 1000000
+        if now_ns - t_newest > max(window, 2 * last_interval):
+            return 0.0
+
+        oldest = newest
+        for back in range(1, n):
+            i = (newest - back) % COUNT_HISTORY
+            if t_newest - self._times[i] > window and back > 1:
+                break
+            oldest = i
+        span = t_newest - self._times[oldest]
+        if span <= 0:
+            return 0.0
+        return (self._positions[newest] - self._positions[oldest]) * 1e9 / span
+
+    def info(self):
+        return {
+            'name': self.name,
+            'pin_a': self.pin_a,
+            'pin_b': self.pin_b,
+            'position': self.position,
+            'velocity': round(self.velocity(), 1),
+            'illegal': self.illegal,
+            'transitions': self.transitions,
+        }
+
+
+class EncoderBank:
+    """A controller's encoders, decoded on edges and reported at a capped rate"""
+
+    def __init__(self, read, max_rate_hz=DEFAULT_RATE_HZ):
+        """
+        Initialize bank
+
+        Args:
+            read: Callable(pin) returning a pin level (GPIO.input), used to
+                read the other pin of the pair on an edge
+            max_rate_hz: Reports per encoder per second (0 = unlimited)
+        """
+        self._read = read
+        self.max_rate_hz = max_rate_hz
+        self._encoders = {}  # {name: QuadratureDecoder}
+        self._by_pin = {}    # {pin: QuadratureDecoder}
+        self._listeners = []
+        self._wake = threading.Event()
+        self._thread = None
+        self._running = False
+
+    # ------------------------------------------------------------------
+    # Encoder management (any thread)
+    # ------------------------------------------------------------------
+
+    def add(self, name, pin_a, pin_b):
+        """
+        Start decoding an encoder on two input pins (already set up)
+
+        Raises:
+            ValueError: If the name is taken or a pin belongs to another encoder
+        """
+        if name in self._encoders:
+            raise ValueError(f"Encoder '{name}' already exists")
+        if pin_a == pin_b:
+            raise ValueError("Encoder pins A and B must differ")
+        for pin in (pin_a, pin_b):
+            other = self._by_pin.get(pin)
+            if other is not None:
+                raise ValueError(f"Pin {pin} already belongs to encoder '{other.name}'")
+
+        decoder = QuadratureDecoder(name, pin_a, pin_b, self._read(pin_a), self._read(pin_b))
+        self._encoders[name] = decoder
+        self._by_pin[pin_a] = self._by_pin[pin_b] = decoder
+        self._start()
+        log.info("Decoding encoder", encoder=name, pin_a=pin_a, pin_b=pin_b)
+        return decoder
+
+    def remove(self, name):
+        """Stop decoding an encoder; returns it, or None if there is no such encoder"""
+        decoder = self._encoders.pop(name, None)
+        if decoder is not None:
+            self._by_pin.pop(decoder.pin_a, None)
+            self._by_pin.pop(decoder.pin_b, None)
+        return decoder
+
+    def get(self, name):
+        return self._encoders.get(name)
+
+    def of_pin(self, pin):
+        """The encoder a pin belongs to, or None"""
+        return self._by_pin.get(pin)
+
+    def pins(self):
+        return set(self._by_pin)
+
+    def names(self):
+        return sorted(self._encoders)
+
+    def add_listener(self, callback):
+        """
+        Call callback(report) when an encoder moved, at most max_rate_hz
+        times per encoder (on the reporter thread)
+
+        report: {"name", "pin_a", "pin_b", "position", "delta", "velocity",
+                 "illegal", "transitions"}; delta is the change since the
+                 previous report
+        """
+        self._listeners.append(callback)
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Edge path (edge thread)
+    # ------------------------------------------------------------------
+
+    def on_edge(self, pin, level, timestamp_ns=None):
+        """Decode an edge on an encoder pin (other pins are ignored)"""
+        decoder = self._by_pin.get(pin)
+        if decoder is None:
+            return
+        if pin == decoder.pin_a:
+            changed = decoder.update(level, self._read(decoder.pin_b), timestamp_ns or time.monotonic_ns())
+        else:
+            changed = decoder.update(self._read(decoder.pin_a), level, timestamp_ns or time.monotonic_ns())
+        if changed and not decoder.changed:
+            decoder.changed = True
+            self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Reporter thread
+    # ------------------------------------------------------------------
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='EncoderReporter', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while self._running:
+            self._wake.wait()
+            self._wake.clear()
+            while self._running:
+                delay = self._report_due()
+                if delay is None:
+                    break
+                time.sleep(delay)
+
+    def _report_due(self):
+        """
+        Report the encoders that changed and whose rate allows it
+
+        Returns:
+            Seconds until the next changed encoder may report, or None
+        """
+        now = time.monotonic()
+        interval = 1.0 / self.max_rate_hz if self.max_rate_hz > 0 else 0.0
+        wait = None
+        for decoder in list(self._encoders.values()):
+            if not decoder.changed:
+                continue
+            if now < decoder.next_report:
+                due = decoder.next_report - now
+                wait = due if wait is None else min(wait, due)
+                continue
+            # Clear first: an edge from here on marks the encoder changed again
+            decoder.changed = False
+            decoder.next_report = now + interval
+            report = decoder.info()
+            report['delta'] = report['position'] - decoder.reported
+            decoder.reported = report['position']
+            for callback in self._listeners:
+                try:
+                    callback(report)
+                except Exception as e:
+                    log.error("Encoder listener failed", encoder=decoder.name, error=e)
+        return wait
@@ -0,0 +1,294 @@
+"""
+Rule Engine for reTerminal
+Input-to-output reactions evaluated in the GPIO edge callback
+
+A rule reacts to an edge on an input pin with a list of output actions:
+
+    {"name": "estop",
+     "trigger": {"pin": 17, "edge": "falling"},
+     "actions": [{"type": "write", "pin": 22, "value": 1},
+                 {"type": "pwm", "pin": 18, "duty_cycle": 0}]}
+
+Edges are rising, falling or both. Actions:
+    write   {"pin", "value"}        drive an output pin
+    pwm     {"pin", "duty_cycle"}   change a PWM duty cycle (0 stops the output)
+    group   {"group", "value"}      write a pin group value
+
+Rules are compiled into a table keyed by (pin, level) holding pre-bound
+action calls, so an edge costs one dict lookup plus the actions themselves.
+The table is rebuilt on every rule change and swapped in whole, so the edge
+path never takes a lock. Actions run on the thread reporting the edge (the
+RPi.GPIO event thread), without going through any UI or browser.
+
+Qt-independent: used by both GPIOControllers.
+"""
+import time
+import threading
+from functools import partial
+
+from LatencyStats import LatencyStats
+from StructuredLog import get_logger
+
+log = get_logger('gpio.rules')
+
+# Edge name -> input levels that trigger it
+EDGES = {
+    'rising': (1,),
+    'falling': (0,),
+    'both': (0, 1),
+}
+
+ACTION_TYPES = ('write', 'pwm', 'group')
+
+
+def normalise_actions(actions, available_pins=None, what='A rule'):
+    """
+    Validate a list of output actions
+
+    Args:
+        actions: Action definitions
+        available_pins: Pins actions may drive (None = any)
+        what: Owner named in the error for an empty list
+
+    Raises:
+        ValueError: If an action is malformed
+    """
+    if not actions or not isinstance(actions, list):
+        raise ValueError(f"{what} needs at least one action")
+
+    normalised = []
+    for action in actions:
+        kind = action.get('type') if isinstance(action, dict) else None
+        if kind not in ACTION_TYPES:
+            raise ValueError(f"Action type must be one of {', '.join(ACTION_TYPES)}, got {kind!r}")
+
+        if kind == 'write':
+            value = action.get('value')
+            if value not in (0, 1):
+                raise ValueError("write action value must be 0 or 1")
+            normalised.append({'type': kind, 'pin': _check_pin(action.get('pin'), 'write', available_pins),
+                               'value': value})
+        elif kind == 'pwm':
+            duty_cycle = action.get('duty_cycle')
+            if not isinstance(duty_cycle, (int, float)) or not 0 <= duty_cycle <= 100:
+                raise ValueError("pwm action duty_cycle must be 0-100")
+            normalised.append({'type': kind, 'pin': _check_pin(action.get('pin'), 'pwm', available_pins),
+                               'duty_cycle': float(duty_cycle)})
+        else:
+            group, value = action.get('group'), action.get('value')
+            if not group or not isinstance(value, int) or value < 0:
+                raise ValueError("group action needs a group name and a non-negative value")
+            normalised.append({'type': kind, 'group': group, 'value': value})
+    return normalised
+
+
+def bind_actions(actions, write, set_pwm, write_group):
+    """Pre-bind normalised actions to the controller's action callables"""
+    calls = []
+    for action in actions:
+        if action['type'] == 'group':
+            calls.append(partial(write_group, action['group'], action['value']))
+        elif action['type'] == 'pwm':
+            calls.append(partial(set_pwm, action['pin'], action['duty_cycle']))
+        else:
+            calls.append(partial(write, action['pin'], action['value']))
+    return tuple(calls)
+
+
+def _check_pin(pin, what, available_pins=None):
+    if not isinstance(pin, int) or isinstance(pin, bool):
+        raise ValueError(f"{what} pin must be an integer")
+    if available_pins is not None and pin not in available_pins:
+        raise ValueError(f"{what} pin {pin} is not available (reserved or invalid)")
+    return pin
+
+
+class RuleEngine:
+    """Compiles rules into a (pin, level) table and runs them on edges"""
+
+    def __init__(self, write, set_pwm, write_group, on_fired=None, available_pins=None):
+        """
+        Initialize rule engine
+
+        Args:
+            write: Callable(pin, value) driving an output pin
+            set_pwm: Callable(pin, duty_cycle) changing a PWM duty cycle
+            write_group: Callable(name, value) writing a pin group
+            on_fired: Optional callable(name, pin, level, actions) run after a
+                rule's actions succeeded, on the edge thread (e.g. to update
+                controller state and notify clients)
+            available_pins: Pins rules may use (None = any)
+
+        The action callables run on the edge thread and should raise
+        ValueError when the target pin is not configured for the action.
+        """
+        self._actions = {'write': write, 'set_pwm': set_pwm, 'write_group': write_group}
+        self.on_fired = on_fired
+        self._available_pins = set(available_pins) if available_pins is not None else None
+
+        self._lock = threading.Lock()  # serialises rule changes, not edges
+        self._rules = {}    # {name: normalised rule}
+        self._table = {}    # {(pin, level): ((name, actions, calls), ...)}
+        self._levels = {}   # {pin: last level seen}
+        self._fired = {}    # {name: count}
+        self._errors = {}   # {name: count}
+        self.latency = LatencyStats()
+
+    # ------------------------------------------------------------------
+    # Rule management (any thread)
+    # ------------------------------------------------------------------
+
+    def set_rule(self, rule):
+        """
+        Add a rule, or replace the rule with the same name
+
+        Returns:
+            The normalised rule
+
+        Raises:
+            ValueError: If the rule is malformed
+        """
+        rule = self._normalise(rule)
+        with self._lock:
+            self._rules[rule['name']] = rule
+            self._fired.setdefault(rule['name'], 0)
+            self._errors.setdefault(rule['name'], 0)
+            self._compile()
+        log.info("Rule set", rule=rule['name'], trigger=rule['trigger'])
+        return rule
+
+    def remove_rule(self, name):
+        """
+        Remove a rule
+
+        Raises:
+            ValueError: If there is no such rule
+        """
+        with self._lock:
+            if name not in self._rules:
+                raise ValueError(f"Rule '{name}' does not exist")
+            del self._rules[name]
+            self._fired.pop(name, None)
+            self._errors.pop(name, None)
+            self._compile()
+        log.info("Rule removed", rule=name)
+
+    def clear(self):
+        """Remove all rules"""
+        with self._lock:
+            self._rules.clear()
+            self._fired.clear()
+            self._errors.clear()
+            self._compile()
+
+    def get_rules(self):
+        """Get all rules with their fire and error counts"""
+        with self._lock:
+            return [dict(rule, fired=self._fired.get(name, 0), errors=self._errors.get(name, 0))
+                    for name, rule in sorted(self._rules.items())]
+
+    def trigger_pins(self):
+        """Get the input pins rules are triggered by"""
+        return {pin for pin, _ in self._table}
+
+    def get_stats(self):
+        """
+        Get edge-to-actions latency (us) and per-rule counters
+
+        Returns:
+            {"latency": {"count", "min_us", "mean_us", ...},
+             "rules": {name: {"fired", "errors"}}}
+        """
+        with self._lock:
+            rules = {name: {'fired': self._fired[name], 'errors': self._errors[name]}
+                     for name in self._rules}
+        return {'latency': self.latency.summary(scale=1e6, unit='us', digits=1), 'rules': rules}
+
+    # ------------------------------------------------------------------
+    # Edge path (edge thread)
+    # ------------------------------------------------------------------
+
+    def seed(self, pin, level):
+        """Set the known level of a pin without firing rules"""
+        self._levels[pin] = 1 if level else 0
+
+    def on_edge(self, pin, level, timestamp_ns=None):
+        """
+        Run the rules triggered by a pin reaching a level
+
+        Reports that do not change the pin's level (bounce, polling) are
+        ignored.
+
+        Args:
+            pin: Input pin
+            level: Level read after the edge
+            timestamp_ns: time.monotonic_ns() when the edge was reported,
+                for the latency statistics
+        """
+        level = 1 if level else 0
+        if self._levels.get(pin) == level:
+            return
+        self._levels[pin] = level
+
+        entries = self._table.get((pin, level))
+        if not entries:
+            return
+
+        fired = []
+        for name, actions, calls in entries:
+            try:
+                for call in calls:
+                    call()
+            except Exception as e:
+                self._errors[name] = self._errors.get(name, 0) + 1
+                log.warning("Rule action failed", rule=name, error=e)
+                continue
+            self._fired[name] = self._fired.get(name, 0) + 1
+            fired.append((name, actions))
+
+        if timestamp_ns is not None:
+            self.latency.add((time.monotonic_ns() - timestamp_ns) / 1e9)
+
+        if self.on_fired:
+            for name, actions in fired:
+                try:
+                    self.on_fired(name, pin, level, actions)
+                except Exception as e:
+                    log.error("Rule listener failed", rule=name, error=e)
+
+    # ------------------------------------------------------------------
+    # Compilation
+    # ------------------------------------------------------------------
+
+    def _compile(self):
+        """Rebuild the (pin, level) table from the enabled rules (lock held)"""
+        table = {}
+        for name, rule in sorted(self._rules.items()):
+            if not rule['enabled']:
+                continue
+            calls = bind_actions(rule['actions'], **self._actions)
+            entry = (name, rule['actions'], calls)
+            for level in EDGES[rule['trigger']['edge']]:
+                key = (rule['trigger']['pin'], level)
+                table[key] = table.get(key, ()) + (entry,)
+        self._table = table
+
+    def _normalise(self, rule):
+        """Validate a rule definition and fill in defaults"""
+        if not isinstance(rule, dict):
+            raise ValueError("A rule must be an object")
+
+        name = rule.get('name')
+        if not name or not isinstance(name, str):
+            raise ValueError("Rule name is required")
+
+        trigger = rule.get('trigger') or {}
+        edge = trigger.get('edge', 'both')
+        if edge not in EDGES:
+            raise ValueError(f"Trigger edge must be one of {', '.join(EDGES)}, got {edge!r}")
+        trigger = {'pin': _check_pin(trigger.get('pin'), 'Trigger', self._available_pins),
+                   'edge': edge}
+        actions = normalise_actions(rule.get('actions'), self._available_pins)
+
+        return {'name': name, 'trigger': trigger, 'actions': actions,
+                'enabled': bool(rule.get('enabled', True))}
@@ -0,0 +1,303 @@
+"""
+Sensor Alarms for reTerminal
+Threshold alarms on the sensor stream that drive GPIO outputs
+
+An alarm watches one signal of every SensorSample and runs output actions
+when it crosses a threshold:
+
+    {"name": "impact",
+     "signal": "accel", "above": 2.5, "hysteresis": 0.3, "hold_off_ms": 2000,
+     "actions": [{"type": "pwm", "pin": 18, "duty_cycle": 0},
+                 {"type": "write", "pin": 22, "value": 1}],
+     "clear_actions": [{"type": "write", "pin": 22, "value": 0}]}
+
+Signals:
+    accel_x, accel_y, accel_z   acceleration along one axis (g)
+    accel                       acceleration magnitude (g), for impacts
+    tilt                        angle between the acceleration and the z axis
+                                (degrees, 0 = lying flat at rest)
+    light                       ambient light (lux)
+
+An alarm has either "above" or "below" as its threshold. It triggers when
+the signal crosses it and clears once the signal is back past the threshold
+by "hysteresis", so a signal hovering at the threshold does not toggle the
+outputs. After triggering it stays triggered for at least "hold_off_ms",
+so a single spike cannot switch the outputs on and off faster than that.
+Actions are the rule actions (see RuleEngine): write, pwm and group.
+"clear_actions" (optional) run when the alarm clears.
+
+SensorAlarms is a sensor pipeline stage: it runs on the sensor thread right
+after each reading, and actions go straight to the controller's action
+callables without going through any UI or browser. Alarms are held in a
+tuple rebuilt on every change and swapped in whole, so the sample path
+never takes a lock. The trigger-to-action latency, from the sensor reading
+(SensorSample.timestamp) to the last action done, is kept in `latency`.
+
+Qt-independent: used by both GPIOControllers.
+"""
+import math
+import time
+import threading
+from operator import attrgetter
+
+from LatencyStats import LatencyStats
+from RuleEngine import bind_actions, normalise_actions
+from StructuredLog import get_logger
+
+log = get_logger('gpio.alarms')
+
+
+def _magnitude(sample):
+    return math.sqrt(sample.accel_x * sample.accel_x +
+                     sample.accel_y * sample.accel_y +
+                     sample.accel_z * sample.accel_z)
+
+
+def _tilt(sample):
+    magnitude = _magnitude(sample)
+    if not magnitude:
+        return 0.0
+    return math.degrees(math.acos(max(-1.0, min(1.0, sample.accel_z / magnitude))))
+
+
+# Signal name -> callable(sample) returning its value
+SIGNALS = {
+    'accel_x': attrgetter('accel_x'),
+    'accel_y': attrgetter('accel_y'),
+    'accel_z': attrgetter('accel_z'),
+    'accel': _magnitude,
+    'tilt': _tilt,
+    'light': attrgetter('light'),
+}
+
+
+class _Alarm:
+    """A compiled alarm and its state (state is only written on the sensor thread)"""
+
+    __slots__ = ('definition', 'name', 'read', 'above', 'threshold', 'release', 'hold_off_ns',
+                 'trigger_calls', 'clear_calls', 'active', 'since_ns', 'value',
+                 'triggered', 'errors')
+
+    def __init__(self, definition, calls):
+        self.definition = definition
+        self.name = definition['name']
+        self.read = SIGNALS[definition['signal']]
+        self.above = 'above' in definition
+        self.threshold = definition['above'] if self.above else definition['below']
+        hysteresis = definition['hysteresis']
+        self.release = self.threshold - hysteresis if self.above else self.threshold + hysteresis
+        self.hold_off_ns = int(definition['hold_off_ms'] * 1e6)
+        self.trigger_calls, self.clear_calls = calls
+        self.active = False
+        self.since_ns = 0
+        self.value = None
+        self.triggered = 0
+        self.errors = 0
+
+
+class SensorAlarms:
+    """Threshold alarms evaluated on every sensor sample (a pipeline stage)"""
+
+    def __init__(self, write, set_pwm, write_group, on_change=None, available_pins=None):
+        """
+        Initialize alarms
+
+        Args:
+            write: Callable(pin, value) driving an output pin
+            set_pwm: Callable(pin, duty_cycle) changing a PWM duty cycle
+            write_group: Callable(name, value) writing a pin group
+            on_change: Optional callable(event) run after an alarm triggered
+                or cleared and its actions ran, on the sensor thread; event:
+                {"alarm", "state" ("triggered" | "cleared"), "signal",
+                 "value", "threshold", "actions"}
+            available_pins: Pins actions may drive (None = any)
+
+        The action callables are the ones rules use (see RuleEngine).
+        """
+        self._actions = {'write': write, 'set_pwm': set_pwm, 'write_group': write_group}
+        self.on_change = on_change
+        self._available_pins = set(available_pins) if available_pins is not None else None
+
+        self._lock = threading.Lock()  # serialises alarm changes, not samples
+        self._alarms = {}   # {name: _Alarm}
+        self._table = ()    # enabled alarms, read by the sensor thread
+        self.latency = LatencyStats()
+
+    # ------------------------------------------------------------------
+    # Alarm management (any thread)
+    # ------------------------------------------------------------------
+
+    def set_alarm(self, alarm):
+        """
+        Add an alarm, or replace the alarm with the same name (which starts
+        again cleared; outputs are left as they are)
+
+        Returns:
+            The normalised alarm
+
+        Raises:
+            ValueError: If the alarm is malformed
+        """
+        alarm = self._normalise(alarm)
+        calls = (bind_actions(alarm['actions'], **self._actions),
+                 bind_actions(alarm['clear_actions'], **self._actions))
+        with self._lock:
+            self._alarms[alarm['name']] = _Alarm(alarm, calls)
+            self._compile()
+        log.info("Alarm set", alarm=alarm['name'], signal=alarm['signal'])
+        return alarm
+
+    def remove_alarm(self, name):
+        """
+        Remove an alarm (its clear actions do not run)
+
+        Raises:
+            ValueError: If there is no such alarm
+        """
+        with self._lock:
+            if name not in self._alarms:
+                raise ValueError(f"Alarm '{name}' does not exist")
+            del self._alarms[name]
+            self._compile()
+        log.info("Alarm removed", alarm=name)
+
+    def clear(self):
+        """Remove all alarms"""
+        with self._lock:
+            self._alarms.clear()
+            self._compile()
+
+    @property
+    def enabled(self):
+        """True while any alarm is enabled (the sensor loop should not idle)"""
+        return bool(self._table)
+
+    def get_alarm(self, name):
+        """Get an alarm's definition, or None if there is no such alarm"""
+        alarm = self._alarms.get(name)
+        return alarm.definition if alarm is not None else None
+
+    def get_alarms(self):
+        """Get all alarms with their state, last value and counters"""
+        with self._lock:
+            alarms = sorted(self._alarms.items())
+        return [dict(alarm.definition, active=alarm.active,
+                     value=round(alarm.value, 3) if alarm.value is not None else None,
+                     triggered=alarm.triggered, errors=alarm.errors)
+                for _, alarm in alarms]
+
+    def get_stats(self):
+        """
+        Get trigger-to-action latency (us) and per-alarm counters
+
+        Returns:
+            {"latency": {"count", "min_us", "mean_us", ...},
+             "alarms": {name: {"active", "triggered", "errors"}}}
+        """
+        with self._lock:
+            alarms = {name: {'active': alarm.active, 'triggered': alarm.triggered,
+                             'errors': alarm.errors}
+                      for name, alarm in self._alarms.items()}
+        return {'latency': self.latency.summary(scale=1e6, unit='us', digits=1), 'alarms': alarms}
+
+    # ------------------------------------------------------------------
+    # Pipeline stage (sensor thread)
+    # ------------------------------------------------------------------
+
+    def process(self, sample):
+        table = self._table
+        if not table:
+            return
+
+        now_ns = time.monotonic_ns()
+        for alarm in table:
+            value = alarm.read(sample)
+            alarm.value = value
+            if alarm.active:
+                if now_ns - alarm.since_ns < alarm.hold_off_ns:
+                    continue
+                if (value < alarm.release) if alarm.above else (value > alarm.release):
+                    self._change(alarm, False, value, sample, now_ns)
+            elif (value > alarm.threshold) if alarm.above else (value < alarm.threshold):
+                self._change(alarm, True, value, sample, now_ns)
+
+    def _change(self, alarm, active, value, sample, now_ns):
+        """Trigger or clear an alarm and run its actions"""
+        alarm.active = active
+        alarm.since_ns = now_ns
+        if active:
+            alarm.triggered += 1
+
+        calls = alarm.trigger_calls if active else alarm.clear_calls
+        try:
+            for call in calls:
+                call()
+        except Exception as e:
+            alarm.errors += 1
+            log.warning("Alarm action failed", alarm=alarm.name, error=e)
+        else:
+            if calls:
+                self.latency.add(time.time() - sample.timestamp)
+
+        definition = alarm.definition
+        log.info("Alarm triggered" if active else "Alarm cleared", alarm=alarm.name,
+                 value=round(value, 3))
+        if self.on_change:
+            event = {'alarm': alarm.name, 'state': 'triggered' if active else 'cleared',
+                     'signal': definition['signal'], 'value': round(value, 3),
+                     'threshold': alarm.threshold,
+                     'actions': definition['actions'] if active else definition['clear_actions']}
+            try:
+                self.on_change(event)
+            except Exception as e:
+                log.error("Alarm listener failed", alarm=alarm.name, error=e)
+
+    # ------------------------------------------------------------------
+    # Compilation
+    # ------------------------------------------------------------------
+
+    def _compile(self):
+        """Rebuild the tuple of enabled alarms (lock held)"""
+        self._table = tuple(alarm for _, alarm in sorted(self._alarms.items())
+                            if alarm.definition['enabled'])
+
+    def _normalise(self, alarm):
+        """Validate an alarm definition and fill in defaults"""
+        if not isinstance(alarm, dict):
+            raise ValueError("An alarm must be an object")
+
+        name = alarm.get('name')
+        if not name or not isinstance(name, str):
+            raise ValueError("Alarm name is required")
+
+        signal = alarm.get('signal')
+        if signal not in SIGNALS:
+            raise ValueError(f"Alarm signal must be one of {', '.join(SIGNALS)}, got {signal!r}")
+
+        bounds = [key for key in ('above', 'below') if key in alarm]
+        if len(bounds) != 1:
+            raise ValueError("An alarm needs exactly one of above or below")
+        threshold = alarm[bounds[0]]
+        if not _is_number(threshold):
+            raise ValueError(f"{bounds[0]} must be a number")
+
+        hysteresis = alarm.get('hysteresis', 0)
+        if not _is_number(hysteresis) or hysteresis < 0:
+            raise ValueError("hysteresis must be a non-negative number")
+        hold_off_ms = alarm.get('hold_off_ms', 0)
+        if not _is_number(hold_off_ms) or hold_off_ms < 0:
+            raise ValueError("hold_off_ms must be a non-negative number")
+
+        actions = normalise_actions(alarm.get('actions'), self._available_pins, 'An alarm')
+        clear_actions = alarm.get('clear_actions') or []
+        if clear_actions:
+            clear_actions = normalise_actions(clear_actions, self._available_pins, 'An alarm')
+
+        return {'name': name, 'signal': signal, bounds[0]: float(threshold),
+                'hysteresis': float(hysteresis), 'hold_off_ms': float(hold_off_ms),
+                'actions': actions, 'clear_actions': clear_actions,
+                'enabled': bool(alarm.get('enabled', True))}
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
@@ -2,8 +2,9 @@
 Sensor Controller for reTerminal
 Monitors accelerometer, light sensor, and provides data via Qt signals
 """
-import sys
-import platform
+import json
+import math
+import threading
 import time
 
 try:
@@ -11,19 +12,7 @@ try:
 except ImportError:
     from PyQt5.QtCore import QThread, QObject, pyqtSignal as Signal, pyqtSlot as Slot, pyqtProperty as Property
 
-# Detect if running on Raspberry Pi
-IS_RASPBERRY_PI = platform.machine().startswith('arm') or platform.machine().startswith('aarch')
-
-if IS_RASPBERRY_PI:
-    try:
-        import seeed_python_reterminal.core as rt
-        import seeed_python_reterminal.acceleration as rt_accel
-        RETERMINAL_AVAILABLE = True
-    except ImportError:
-        print("Warning: seeed-python-reterminal not installed. Using mock sensors.")
-        RETERMINAL_AVAILABLE = False
-else:
-    RETERMINAL_AVAILABLE = False
+from SensorCore import SensorReader
 
 
 class SensorController(QThread):
@@ -35,119 +24,210 @@ class SensorController(QThread):
     # Format: {"timestamp": float, "accel_x": float, "accel_y": float, "accel_z": float, "light": int}
     sensorData = Signal(str)
 
-    def __init__(self, interval_ms=50):
+    # Signal: emitted when adaptive scheduling changes the sampling rate (Hz)
+    sampleRateChanged = Signal(float)
+
+    def __init__(self, interval_ms=50, ui_interval_ms=50, idle_interval_ms=None,
+                 motion_threshold=0.0004, idle_after_s=5.0):
         """
         Initialize sensor controller
 
         Args:
-            interval_ms: Update interval in milliseconds (default 50ms = 20Hz)
+            interval_ms: Sampling interval in milliseconds (default 50ms = 20Hz)
+            ui_interval_ms: Minimum interval between sensorData emissions, so a
+                high sampling rate does not flood the UI thread
+            idle_interval_ms: Sampling interval while idle, or None to always
+                sample at interval_ms
+            motion_threshold: Variance of the acceleration magnitude (g^2)
+                above which the device is considered to be moving
+            idle_after_s: How long the device must stay still, with no UI
+                subscribers, before dropping to the idle rate
         """
         super().__init__()
         self.interval = interval_ms / 1000.0  # Convert to seconds
+        self.ui_interval = ui_interval_ms / 1000.0
         self.running = True
 
-        # Initialize sensors
-        if RETERMINAL_AVAILABLE:
-            try:
-                self.accel_device = rt.get_acceleration_device()
-                print("[SensorController] Real sensors initialized")
-                self.use_mock = False
-            except Exception as e:
-                print(f"[SensorController] Error initializing sensors: {e}, using mock")
-                self.use_mock = True
-        else:
-            print("[SensorController] Using mock sensors")
-            self.use_mock = True
+        # Adaptive scheduling
+        self.idle_interval = idle_interval_ms / 1000.0 if idle_interval_ms else None
+        self.motion_threshold = motion_threshold
+        self.idle_after = idle_after_s
+        self._subscribers = set()
+        self._idle = False
+        self._still_since = time.monotonic()
+        self._wake = threading.Event()  # Cuts an idle sleep short
+        # Exponentially weighted mean/variance of |a|, ~1s time constant at 20Hz
+        self._motion_alpha = 0.05
+        self._motion_mean = 1.0
+        self._motion_var = 0.0
+
+        # Rate metrics
+        self.rate_changes = 0
+        self._state_since = time.monotonic()
+        self._time_active = 0.0
+        self._time_idle = 0.0
+
+        # Pipeline stages, called on this thread with every SensorSample.
+        # Replaced as a whole (never mutated) so run() can iterate without locking.
+        self._stages = ()
+
+        # Sensor access (real hardware or mock), shared with the headless sampler
+        self.reader = SensorReader('SensorController')
+
+    def add_stage(self, stage, first=False):
+        """
+        Attach a pipeline stage
 
-        # State tracking
-        self.accel_values = {'X': 0.0, 'Y': 0.0, 'Z': 1.0}  # At rest, Z = 1g
-        self.light_value = 300
+        Args:
+            stage: Object with a process(sample) method. It is called on the
+                sensor thread right after each reading, so it must not block.
+            first: Run it before the stages already attached (e.g. alarms
+                that act on outputs)
+        """
+        self._stages = (stage,) + self._stages if first else self._stages + (stage,)
 
-        # Mock sensor simulation
-        if self.use_mock:
-            import random
-            self.random = random
-            self.accel_drift = {'X': 0.0, 'Y': 0.0, 'Z': 0.0}
+    def remove_stage(self, stage):
+        """Detach a pipeline stage"""
+        self._stages = tuple(s for s in self._stages if s is not stage)
+
+    @property
+    def current_interval(self):
+        """Sampling interval currently in effect, in seconds"""
+        return self.idle_interval if self._idle else self.interval
+
+    @Slot(str)
+    def subscribe(self, name):
+        """
+        Register a consumer that needs full-rate data (e.g. a visible screen)
+
+        Sampling ramps up immediately and stays at full rate while any
+        subscriber is registered.
+        """
+        self._subscribers.add(name)
+        # Wake the sensor thread, which switches to full rate on its next tick
+        self._wake.set()
+
+    @Slot(str)
+    def unsubscribe(self, name):
+        """Remove a consumer registered with subscribe()"""
+        self._subscribers.discard(name)
+        self._still_since = time.monotonic()
+
+    @Slot(result=str)
+    def getStats(self):
+        """Get sampling rate metrics as JSON string"""
+        now = time.monotonic()
+        time_active = self._time_active
+        time_idle = self._time_idle
+        if self._idle:
+            time_idle += now - self._state_since
+        else:
+            time_active += now - self._state_since
+
+        return json.dumps({
+            'sample_rate': 1.0 / self.current_interval,
+            'idle': self._idle,
+            'rate_changes': self.rate_changes,
+            'time_active_s': round(time_active, 3),
+            'time_idle_s': round(time_idle, 3),
+            'subscribers': sorted(self._subscribers),
+            'motion_variance': self._motion_var,
+        })
+
+    def _set_idle(self, idle):
+        """Switch between full and idle rate, recording the change"""
+        if idle == self._idle or (idle and not self.idle_interval):
+            return
+
+        now = time.monotonic()
+        if self._idle:
+            self._time_idle += now - self._state_since
+        else:
+            self._time_active += now - self._state_since
+        self._state_since = now
+        self._idle = idle
+        if not idle:
+            self._still_since = now
+        self.rate_changes += 1
+
+        rate = 1.0 / self.current_interval
+        print(f"[SensorController] Sampling {'idle' if idle else 'active'} at {rate:.1f}Hz")
+        for stage in self._stages:
+            set_sample_rate = getattr(stage, 'set_sample_rate', None)
+            if set_sample_rate:
+                set_sample_rate(rate)
+        self.sampleRateChanged.emit(rate)
+
+    def _update_motion(self, sample):
+        """Track acceleration variance and pick the sampling rate"""
+        magnitude = math.sqrt(sample.accel_x * sample.accel_x +
+                              sample.accel_y * sample.accel_y +
+                              sample.accel_z * sample.accel_z)
+        alpha = self._motion_alpha
+        delta = magnitude - self._motion_mean
+        self._motion_mean += alpha * delta
+        self._motion_var = (1.0 - alpha) * (self._motion_var + alpha * delta * delta)
+
+        # A single large jump counts as motion even before the variance catches up
+        moving = (self._motion_var > self.motion_threshold or
+                  delta * delta > 16.0 * self.motion_threshold)
+        now = time.monotonic()
+        if moving or self._subscribers:
+            self._still_since = now
+            self._set_idle(False)
+        elif now - self._still_since >= self.idle_after:
+            self._set_idle(True)
 
     def run(self):
         """Main thread loop - reads sensors continuously"""
         print(f"[SensorController] Thread started, monitoring sensors at {1/self.interval:.1f}Hz...")
 
+        next_tick = time.monotonic()
+        next_ui_emit = next_tick
+
         while self.running:
             try:
                 # Read all sensors
-                if not self.use_mock:
-                    self._read_real_sensors()
-                else:
-                    self._read_mock_sensors()
-
-                # Emit sensor data as JSON
-                import json
-                data = {
-                    'timestamp': time.time(),
-                    'accel_x': self.accel_values['X'],
-                    'accel_y': self.accel_values['Y'],
-                    'accel_z': self.accel_values['Z'],
-                    'light': self.light_value
-                }
-                self.sensorData.emit(json.dumps(data))
-
-                # Wait for next interval
-                time.sleep(self.interval)
-
-            except Exception as e:
-                print(f"[SensorController] Error: {e}")
-                time.sleep(self.interval)
+                sample = self.reader.read()
 
-        print("[SensorController] Thread stopped")
-
-    def _read_real_sensors(self):
-        """Read real sensor values from hardware"""
-        try:
-            # Read accelerometer
-            events = self.accel_device.read()
-            for event in events:
-                accelEvent = rt_accel.AccelerationEvent(event)
-                if accelEvent.name:
-                    # Update acceleration values
-                    self.accel_values[accelEvent.name.name] = accelEvent.value
-
-            # Read light sensor
-            with open('/sys/bus/iio/devices/iio:device0/in_illuminance_input', 'r') as f:
-                self.light_value = int(f.read().strip())
-
-        except BlockingIOError:
-            # No accelerometer events available - this is normal
-            pass
-        except Exception as e:
-            print(f"[SensorController] Error reading real sensors: {e}")
+                if self.idle_interval:
+                    self._update_motion(sample)
 
-    def _read_mock_sensors(self):
-        """Generate mock sensor values for development"""
-        # Mock accelerometer with smooth random motion
-        for axis in ['X', 'Y', 'Z']:
-            self.accel_drift[axis] += self.random.uniform(-0.05, 0.05)
-            self.accel_drift[axis] *= 0.95  # Damping
+                for stage in self._stages:
+                    try:
+                        stage.process(sample)
+                    except Exception as e:
+                        print(f"[SensorController] Stage {type(stage).__name__} error: {e}")
 
-            # Update value with drift
-            self.accel_values[axis] += self.accel_drift[axis]
+                # Emit sensor data as JSON, decimated to the UI rate
+                now = time.monotonic()
+                if now >= next_ui_emit:
+                    next_ui_emit = now + self.ui_interval
+                    self.sensorData.emit(json.dumps(sample._asdict()))
 
-            # Clamp to realistic range (-2g to +2g)
-            self.accel_values[axis] = max(-2.0, min(2.0, self.accel_values[axis]))
+            except Exception as e:
+                print(f"[SensorController] Error: {e}")
 
-        # Z axis should average around 1g (gravity)
-        self.accel_values['Z'] = self.accel_values['Z'] * 0.9 + 1.0 * 0.1
+            # Wait for next tick against absolute deadlines so the read time does
+            # not stretch the period; resynchronise if we fell more than a tick behind.
+            # subscribe() and stop() set _wake to cut a long idle sleep short.
+            interval = self.current_interval
+            next_tick += interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                if self._wake.wait(delay):
+                    self._wake.clear()
+                    next_tick = time.monotonic()
+            elif delay < -interval:
+                next_tick = time.monotonic()
 
-        # Mock light sensor - slowly varying
-        change = self.random.uniform(-20, 20)
-        self.light_value += change
-        self.light_value = max(50, min(800, self.light_value))
-        self.light_value = int(self.light_value)
+        print("[SensorController] Thread stopped")
 
     def stop(self):
         """Stop the sensor monitoring thread"""
         print("[SensorController] Stopping...")
         self.running = False
+        self._wake.set()
 
 
 class SensorDataModel(QObject):
@@ -176,7 +256,6 @@ class SensorDataModel(QObject):
         Args:
             json_data: JSON string with sensor data
         """
-        import json
         try:
             data = json.loads(json_data)
 
@@ -0,0 +1,279 @@
+"""
+Sensor Core for reTerminal
+Qt-independent sensor data types, reading logic and sampling loop
+
+SensorReader reads the accelerometer and light sensor (or simulates them
+off the Pi). SensorController drives it from a QThread in the Qt app;
+SensorSampler drives it from a plain thread where there is no Qt, such as
+the Flask backend. Both feed SensorSample objects to pipeline stages.
+"""
+import bisect
+import platform
+import random
+import threading
+import time
+from collections import deque, namedtuple
+from itertools import islice, takewhile
+
+# One reading of every sensor, as produced by SensorController on each tick
+# timestamp is wall-clock seconds (time.time()), acceleration is in g, light in lux
+SensorSample = namedtuple('SensorSample', ['timestamp', 'accel_x', 'accel_y', 'accel_z', 'light'])
+
+# Detect if running on Raspberry Pi
+IS_RASPBERRY_PI = platform.machine().startswith('arm') or platform.machine().startswith('aarch')
+
+if IS_RASPBERRY_PI:
+    try:
+        import seeed_python_reterminal.core as rt
+        import seeed_python_reterminal.acceleration as rt_accel
+        RETERMINAL_AVAILABLE = True
+    except ImportError:
+        print("Warning: seeed-python-reterminal not installed. Using mock sensors.")
+        RETERMINAL_AVAILABLE = False
+else:
+    RETERMINAL_AVAILABLE = False
+
+LIGHT_SENSOR_PATH = '/sys/bus/iio/devices/iio:device0/in_illuminance_input'
+
+
+class SensorReader:
+    """
+    Reads all reTerminal sensors into a SensorSample
+
+    The accelerometer is an evdev device whose events are consumed by the
+    reader, so only one SensorReader per process should read the hardware.
+    """
+
+    def __init__(self, name='SensorReader'):
+        self.name = name
+
+        # Initialize sensors
+        if RETERMINAL_AVAILABLE:
+            try:
+                self.accel_device = rt.get_acceleration_device()
+                print(f"[{self.name}] Real sensors initialized")
+                self.use_mock = False
+            except Exception as e:
+                print(f"[{self.name}] Error initializing sensors: {e}, using mock")
+                self.use_mock = True
+        else:
+            print(f"[{self.name}] Using mock sensors")
+            self.use_mock = True
+
+        # State tracking
+        self.accel_values = {'X': 0.0, 'Y': 0.0, 'Z': 1.0}  # At rest, Z = 1g
+        self.light_value = 300
+
+        # Mock sensor simulation
+        if self.use_mock:
+            self.random = random
+            self.accel_drift = {'X': 0.0, 'Y': 0.0, 'Z': 0.0}
+
+    def read(self):
+        """Read every sensor and return a SensorSample stamped with time.time()"""
+        if not self.use_mock:
+            self._read_real_sensors()
+        else:
+            self._read_mock_sensors()
+
+        return SensorSample(
+            time.time(),
+            self.accel_values['X'],
+            self.accel_values['Y'],
+            self.accel_values['Z'],
+            self.light_value
+        )
+
+    def _read_real_sensors(self):
+        """Read real sensor values from hardware"""
+        try:
+            # Read accelerometer
+            events = self.accel_device.read()
+            for event in events:
+                accelEvent = rt_accel.AccelerationEvent(event)
+                if accelEvent.name:
+                    # Update acceleration values
+                    self.accel_values[accelEvent.name.name] = accelEvent.value
+
+            # Read light sensor
+            with open(LIGHT_SENSOR_PATH, 'r') as f:
+                self.light_value = int(f.read().strip())
+
+        except BlockingIOError:
+            # No accelerometer events available - this is normal
+            pass
+        except Exception as e:
+            print(f"[{self.name}] Error reading real sensors: {e}")
+
+    def _read_mock_sensors(self):
+        """Generate mock sensor values for development"""
+        # Mock accelerometer with smooth random motion
+        for axis in ['X', 'Y', 'Z']:
+            self.accel_drift[axis] += self.random.uniform(-0.05, 0.05)
+            self.accel_drift[axis] *= 0.95  # Damping
+
+            # Update value with drift
+            self.accel_values[axis] += self.accel_drift[axis]
+
+            # Clamp to realistic range (-2g to +2g)
+            self.accel_values[axis] = max(-2.0, min(2.0, self.accel_values[axis]))
+
+        # Z axis should average around 1g (gravity)
+        self.accel_values['Z'] = self.accel_values['Z'] * 0.9 + 1.0 * 0.1
+
+        # Mock light sensor - slowly varying
+        change = self.random.uniform(-20, 20)
+        self.light_value += change
+        self.light_value = max(50, min(800, self.light_value))
+        self.light_value = int(self.light_value)
+
+
+class SensorHistory:
+    """
+    Ring buffer of the most recent samples with time-window queries
+
+    Also a pipeline stage (process() adds the sample). since() and recent()
+    cost O(samples returned), not O(capacity), so a reader polling for new
+    samples every frame (SensorGraph) stays cheap however long the history.
+    """
+
+    def __init__(self, capacity=6000):
+        self._samples = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._count = 0
+
+    def add(self, sample):
+        with self._lock:
+            self._samples.append(sample)
+            self._count += 1
+
+    process = add
+
+    @property
+    def count(self):
+        """Samples added since creation (including those dropped from the ring)"""
+        return self._count
+
+    def since(self, count):
+        """
+        Get the samples added after the first `count`, oldest first
+
+        Returns:
+            (samples, new count); samples that already left the ring are lost
+        """
+        with self._lock:
+            total = self._count
+            samples = list(islice(reversed(self._samples), min(total - count, len(self._samples))))
+        samples.reverse()
+        return samples, total
+
+    def recent(self, seconds):
+        """
+        Get the samples of the last `seconds` up to the newest one, oldest first
+
+        Returns:
+            (samples, count)
+        """
+        with self._lock:
+            total = self._count
+            if not self._samples:
+                return [], total
+            cutoff = self._samples[-1].timestamp - seconds
+            samples = list(takewhile(lambda s: s.timestamp >= cutoff, reversed(self._samples)))
+        samples.reverse()
+        return samples, total
+
+    def latest(self):
+        """Most recent sample, or None"""
+        with self._lock:
+            return self._samples[-1] if self._samples else None
+
+    def window(self, seconds=None, since=None, max_points=None):
+        """
+        Get the samples of a time window, oldest first
+
+        Args:
+            seconds: Window length ending at the newest sample (None = all)
+            since: Only samples with a timestamp after this (overrides seconds)
+            max_points: Keep at most this many samples by taking every Nth one
+
+        Returns:
+            (samples, decimation)
+        """
+        with self._lock:
+            samples = list(self._samples)
+        if samples and (since is not None or seconds is not None):
+            cutoff = since if since is not None else samples[-1].timestamp - seconds
+            # Timestamps are time.time() values, in order unless the clock is stepped
+            start = bisect.bisect_right([s.timestamp for s in samples], cutoff)
+            samples = samples[start:]
+
+        decimation = 1
+        if max_points and len(samples) > max_points:
+            decimation = -(-len(samples) // max_points)
+            # Keep the newest sample, stepping back from it
+            samples = samples[::-1][::decimation][::-1]
+        return samples, decimation
+
+    def __len__(self):
+        return len(self._samples)
+
+
+class SensorSampler:
+    """
+    Headless sampling loop: reads a SensorReader on absolute deadlines and
+    passes every sample to its stages, on its own thread
+
+    Stage interface as for SensorController.add_stage().
+    """
+
+    def __init__(self, interval_ms=50, reader=None):
+        self.interval = interval_ms / 1000.0
+        self.reader = reader or SensorReader('SensorSampler')
+        self._stages = ()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def sample_rate(self):
+        return 1.0 / self.interval
+
+    def add_stage(self, stage, first=False):
+        self._stages = (stage,) + self._stages if first else self._stages + (stage,)
+
+    def remove_stage(self, stage):
+        self._stages = tuple(s for s in self._stages if s is not stage)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='SensorSampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                sample = self.reader.read()
+                for stage in self._stages:
+                    try:
+                        stage.process(sample)
+                    except Exception as e:
+                        print(f"[SensorSampler] Stage {type(stage).__name__} error: {e}")
+            except Exception as e:
+                print(f"[SensorSampler] Error: {e}")
+
+            # Absolute deadlines; resynchronise after falling more than a tick behind
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                self._stop.wait(delay)
+            elif delay < -self.interval:
+                next_tick = time.monotonic()
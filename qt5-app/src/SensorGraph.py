@@ -0,0 +1,365 @@
+"""
+Sensor Graph for reTerminal
+Native scrolling plot of the sensor history for QML
+
+SensorGraph is a QQuickPaintedItem that plots sample fields (accel_x,
+accel_y, accel_z, light) over the last `duration` seconds, reading straight
+from a SensorHistory ring buffer. It keeps the plot in an image used as a
+circular buffer of pixel columns: each tick it takes only the samples added
+since the last one (SensorHistory.since()), clears the strip of columns they
+cover and draws their line segments there, and paint() copies the image to
+the item in two parts starting at the oldest column. A frame therefore
+costs the same whatever the history length or the number of points on
+screen, unlike a Canvas that replots every point in JavaScript.
+
+The whole plot is only redrawn (from SensorHistory.recent()) when the item
+is resized, a property changes, it becomes visible again, or an autoRange
+graph needs a new range: when a sample leaves the range, and once per
+`duration` so the range also shrinks.
+
+Usage from QML, after register() on the GUI thread:
+
+    import ReTerminal 1.0
+    SensorGraph {
+        channels: ["accel_x", "accel_y", "accel_z"]
+        colors: ["#ff006e", "#00ff41", "#00f3ff"]
+        minimum: -2; maximum: 2; zeroLine: true
+    }
+"""
+import math
+
+try:
+    from PySide2.QtCore import QPointF, QRectF, QLineF, QTimer, Qt, Signal, Property
+    from PySide2.QtGui import QColor, QImage, QPainter, QPen, QPolygonF
+    from PySide2.QtQml import qmlRegisterType
+    from PySide2.QtQuick import QQuickPaintedItem
+except ImportError:
+    from PyQt5.QtCore import (QPointF, QRectF, QLineF, QTimer, Qt, pyqtSignal as Signal,
+                              pyqtProperty as Property)
+    from PyQt5.QtGui import QColor, QImage, QPainter, QPen, QPolygonF
+    from PyQt5.QtQml import qmlRegisterType
+    from PyQt5.QtQuick import QQuickPaintedItem
+
+CHANNELS = ('accel_x', 'accel_y', 'accel_z', 'light')
+DEFAULT_DURATION = 5.0      # seconds across the width
+DEFAULT_INTERVAL_MS = 50    # poll for new samples at the UI rate
+AUTO_RANGE_MARGIN = 0.1     # fraction of the span added above and below
+ZERO_LINE_COLOR = QColor('#333')
+
+
+def register(history, uri='ReTerminal', major=1, minor=0):
+    """
+    Register SensorGraph as a QML type (import ReTerminal 1.0)
+
+    Args:
+        history: SensorHistory every SensorGraph reads from
+    """
+    SensorGraph.default_history = history
+    qmlRegisterType(SensorGraph, uri, major, minor, 'SensorGraph')
+
+
+class SensorGraph(QQuickPaintedItem):
+    """Scrolling line plot of sensor history fields, drawn one strip per new sample"""
+
+    default_history = None  # set by register()
+
+    styleChanged = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.history = SensorGraph.default_history
+
+        self._channels = ['accel_x']
+        self._colors = [QColor('#00f3ff')]
+        self._minimum = 0.0
+        self._maximum = 1.0
+        self._auto_range = False
+        self._duration = DEFAULT_DURATION
+        self._line_width = 2.0
+        self._fill_color = QColor(Qt.transparent)
+        self._grid_color = QColor('#1a1f3a')
+        self._grid_lines = 4
+        self._zero_line = False
+
+        self._image = None
+        self._stale = True      # full redraw on the next tick
+        self._count = 0         # history samples consumed
+        self._t0 = 0.0          # timestamp at x = 0
+        self._last = None       # (x, [y per channel]) of the newest point
+        self._range = (0.0, 1.0)
+        self._range_x = 0.0     # x of the last auto range
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(DEFAULT_INTERVAL_MS)
+        self._timer.timeout.connect(self.tick)
+        self._timer.start()
+        self.visibleChanged.connect(self._invalidate)
+
+    # ------------------------------------------------------------------
+    # Properties
+    # ------------------------------------------------------------------
+
+    def _set(self, name, value):
+        if getattr(self, name) != value:
+            setattr(self, name, value)
+            self._invalidate()
+            self.styleChanged.emit()
+
+    def _get_channels(self):
+        return list(self._channels)
+
+    def _set_channels(self, channels):
+        unknown = [channel for channel in channels if channel not in CHANNELS]
+        if unknown:
+            raise ValueError(f"Unknown channels {unknown}, use {', '.join(CHANNELS)}")
+        self._set('_channels', list(channels))
+
+    channels = Property('QStringList', _get_channels, _set_channels, notify=styleChanged)
+
+    def _get_colors(self):
+        return [color.name() for color in self._colors]
+
+    def _set_colors(self, colors):
+        self._set('_colors', [QColor(color) for color in colors])
+
+    colors = Property('QStringList', _get_colors, _set_colors, notify=styleChanged)
+
+    def _get_minimum(self):
+        return self._minimum
+
+    def _set_minimum(self, value):
+        self._set('_minimum', float(value))
+
+    minimum = Property(float, _get_minimum, _set_minimum, notify=styleChanged)
+
+    def _get_maximum(self):
+        return self._maximum
+
+    def _set_maximum(self, value):
+        self._set('_maximum', float(value))
+
+    maximum = Property(float, _get_maximum, _set_maximum, notify=styleChanged)
+
+    def _get_auto_range(self):
+        return self._auto_range
+
+    def _set_auto_range(self, value):
+        self._set('_auto_range', bool(value))
+
+    # Scale to the visible samples instead of minimum/maximum
+    autoRange = Property(bool, _get_auto_range, _set_auto_range, notify=styleChanged)
+
+    def _get_duration(self):
+        return self._duration
+
+    def _set_duration(self, seconds):
+        self._set('_duration', max(0.1, float(seconds)))
+
+    duration = Property(float, _get_duration, _set_duration, notify=styleChanged)
+
+    def _get_line_width(self):
+        return self._line_width
+
+    def _set_line_width(self, width):
+        self._set('_line_width', float(width))
+
+    lineWidth = Property(float, _get_line_width, _set_line_width, notify=styleChanged)
+
+    def _get_fill_color(self):
+        return self._fill_color
+
+    def _set_fill_color(self, color):
+        self._set('_fill_color', QColor(color))
+
+    # Area under the first channel (transparent = no fill)
+    fillColor = Property(QColor, _get_fill_color, _set_fill_color, notify=styleChanged)
+
+    def _get_grid_color(self):
+        return self._grid_color
+
+    def _set_grid_color(self, color):
+        self._set('_grid_color', QColor(color))
+
+    gridColor = Property(QColor, _get_grid_color, _set_grid_color, notify=styleChanged)
+
+    def _get_grid_lines(self):
+        return self._grid_lines
+
+    def _set_grid_lines(self, count):
+        self._set('_grid_lines', int(count))
+
+    gridLines = Property(int, _get_grid_lines, _set_grid_lines, notify=styleChanged)
+
+    def _get_zero_line(self):
+        return self._zero_line
+
+    def _set_zero_line(self, value):
+        self._set('_zero_line', bool(value))
+
+    zeroLine = Property(bool, _get_zero_line, _set_zero_line, notify=styleChanged)
+
+    def _get_interval(self):
+        return self._timer.interval()
+
+    def _set_interval(self, interval_ms):
+        if self._timer.interval() != interval_ms or self._timer.isActive() != (interval_ms > 0):
+            self._timer.setInterval(int(interval_ms))
+            if interval_ms > 0:
+                self._timer.start()
+            else:
+                self._timer.stop()
+            self.styleChanged.emit()
+
+    # Poll period for new samples (ms); 0 = only when tick() is called
+    interval = Property(int, _get_interval, _set_interval, notify=styleChanged)
+
+    # ------------------------------------------------------------------
+    # Updates (GUI thread)
+    # ------------------------------------------------------------------
+
+    def tick(self):
+        """Draw the samples added since the last tick and schedule a repaint"""
+        if self.history is None or not self.isVisible():
+            return
+        width, height = int(self.width()), int(self.height())
+        if width < 2 or height < 2:
+            return
+
+        if self._stale or self._image is None or self._image.width() != width \
+                or self._image.height() != height:
+            self._redraw(width, height)
+            self.update()
+            return
+
+        samples, self._count = self.history.since(self._count)
+        if not samples:
+            return
+        if self._auto_range and (self._out_of_range(samples) or
+                                 self._last is not None and self._last[0] - self._range_x > width):
+            self._redraw(width, height)
+        else:
+            self._draw(samples)
+        self.update()
+
+    def geometryChanged(self, new_geometry, old_geometry):
+        super().geometryChanged(new_geometry, old_geometry)
+        if new_geometry.size() != old_geometry.size():
+            self._invalidate()
+
+    def _invalidate(self):
+        self._stale = True
+
+    def _redraw(self, width, height):
+        """Replot the whole duration from the history"""
+        samples, self._count = self.history.recent(self._duration)
+        self._image = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+        self._image.fill(Qt.transparent)
+        self._stale = False
+        self._last = None
+        self._t0 = samples[0].timestamp if samples else 0.0
+
+        if self._auto_range and samples:
+            values = [getattr(sample, channel) for sample in samples for channel in self._channels]
+            low, high = min(values), max(values)
+            margin = (high - low) * AUTO_RANGE_MARGIN or 1.0
+            self._range = (low - margin, high + margin)
+        elif not self._auto_range:
+            self._range = (self._minimum, self._maximum)
+        self._range_x = 0.0
+
+        # Grid over the whole image; strips redraw it as they are cleared
+        painter = QPainter(self._image)
+        self._draw_background(painter, 0, width)
+        painter.end()
+        self._draw(samples)
+
+    def _out_of_range(self, samples):
+        low, high = self._range
+        for sample in samples:
+            for channel in self._channels:
+                value = getattr(sample, channel)
+                if value < low or value > high:
+                    return True
+        return False
+
+    def _draw(self, samples):
+        """Append samples to the circular image, one strip per line segment"""
+        image = self._image
+        width, height = image.width(), image.height()
+        scale = width / self._duration
+        low, high = self._range
+        span = (high - low) or 1.0
+        channels = self._channels
+
+        painter = QPainter(image)
+        pens = [QPen(self._colors[i % len(self._colors)], self._line_width) for i in range(len(channels))]
+        last = self._last
+        for sample in samples:
+            x = (sample.timestamp - self._t0) * scale
+            ys = [height - (getattr(sample, channel) - low) / span * height for channel in channels]
+            if last is not None:
+                x = max(x, last[0])  # the clock may step back
+                self._segment(painter, pens, last, x, ys, width, height)
+            last = (x, ys)
+        painter.end()
+        self._last = last
+
+    def _segment(self, painter, pens, last, x, ys, width, height):
+        """Clear the columns after the previous point and draw one segment into them"""
+        x0, ys0 = last
+        # Columns [floor(x0) + 1, floor(x) + 1): strips tile exactly, and the
+        # previous segment's end stays in place
+        left, right = math.floor(x0) + 1, math.floor(x) + 1
+        margin = self._line_width
+        fill = self._fill_color.alpha() > 0
+        for wrap in range(math.floor((x0 - margin) / width), math.floor((x + margin) / width) + 1):
+            offset = wrap * width
+            painter.save()
+            painter.translate(-offset, 0)
+            if right > left:
+                self._draw_background(painter, left, right)
+            if fill:
+                painter.setRenderHint(QPainter.Antialiasing, False)
+                painter.setPen(Qt.NoPen)
+                painter.setBrush(self._fill_color)
+                painter.drawPolygon(QPolygonF([QPointF(x0, ys0[0]), QPointF(x, ys[0]),
+                                               QPointF(x, height), QPointF(x0, height)]))
+            painter.setRenderHint(QPainter.Antialiasing, True)
+            for pen, y0, y in zip(pens, ys0, ys):
+                painter.setPen(pen)
+                painter.drawLine(QLineF(x0, y0, x, y))
+            painter.restore()
+
+    def _draw_background(self, painter, left, right):
+        """Clear columns [left, right) and draw the grid and zero line across them"""
+        height = self._image.height()
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        painter.fillRect(QRectF(left, 0, right - left, height), Qt.transparent)
+        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+
+        # Rectangles rather than lines, so that strips join without gaps
+        if self._grid_lines > 0:
+            for i in range(self._grid_lines + 1):
+                y = min(height - 1, height * i // self._grid_lines)
+                painter.fillRect(left, y, right - left, 1, self._grid_color)
+
+        low, high = self._range
+        if self._zero_line and low < 0 < high:
+            y = round(height - (0 - low) / (high - low) * height)
+            painter.fillRect(left, y - 1, right - left, 2, ZERO_LINE_COLOR)
+
+    # ------------------------------------------------------------------
+    # Painting (scene graph sync, GUI thread blocked)
+    # ------------------------------------------------------------------
+
+    def paint(self, painter):
+        image = self._image
+        if image is None or self._last is None:
+            return
+        width, height = image.width(), image.height()
+        # Oldest visible column first; until the plot fills the width it
+        # grows from the left edge
+        start = max(0, math.ceil(self._last[0]) - width) % width
+        painter.drawImage(QPointF(0, 0), image, QRectF(start, 0, width - start, height))
+        if start:
+            painter.drawImage(QPointF(width - start, 0), image, QRectF(0, 0, start, height))
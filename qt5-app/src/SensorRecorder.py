@@ -0,0 +1,335 @@
+"""
+Sensor Recorder for reTerminal
+Streams sensor samples to disk in a compact fixed-width binary format
+
+The recorder is a SensorController pipeline stage: process() runs on the
+sensor thread and only appends to an in-memory queue, while a background
+writer thread packs and writes records in batches. Recordings can be read
+back through SensorRecording, which memory-maps the file for fast offline
+analysis.
+
+File layout (little endian):
+    header  (32 bytes): magic b'RTSR', version u16, record size u16,
+                        start time f64, 16 reserved bytes
+    records (24 bytes): timestamp f64, accel_x f32, accel_y f32,
+                        accel_z f32, light u32
+"""
+import os
+import mmap
+import struct
+import threading
+import time
+from collections import deque
+
+from SensorCore import SensorSample
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+FILE_MAGIC = b'RTSR'
+FILE_VERSION = 1
+FILE_EXTENSION = '.rtsr'
+
+HEADER_STRUCT = struct.Struct('<4sHHd16x')
+RECORD_STRUCT = struct.Struct('<dfffI')
+
+HEADER_SIZE = HEADER_STRUCT.size
+RECORD_SIZE = RECORD_STRUCT.size
+
+# NumPy view of a record, used by SensorRecording.as_array()
+RECORD_DTYPE = [
+    ('timestamp', '<f8'),
+    ('accel_x', '<f4'),
+    ('accel_y', '<f4'),
+    ('accel_z', '<f4'),
+    ('light', '<u4'),
+]
+
+
+class SensorRecorder:
+    """
+    Sensor pipeline stage that records every sample to rotating files
+
+    The sensor thread never blocks on disk: samples go into a bounded deque
+    (append/popleft are atomic, so no lock is taken per sample) and the
+    writer thread drains it every flush interval. If the writer falls behind
+    far enough to fill the queue, the oldest samples are dropped and counted.
+    """
+
+    def __init__(self, directory, max_file_bytes=64 * 1024 * 1024, max_file_seconds=3600,
+                 max_files=None, queue_size=65536, flush_interval_ms=250):
+        """
+        Initialize sensor recorder
+
+        Args:
+            directory: Directory that receives the recording files
+            max_file_bytes: Rotate once the current file reaches this size
+            max_file_seconds: Rotate once the current file is this old
+            max_files: Keep at most this many recordings (None = keep all)
+            queue_size: Maximum number of samples buffered in memory
+            flush_interval_ms: How often the writer thread drains the queue
+        """
+        self.directory = directory
+        self.max_file_bytes = max_file_bytes
+        self.max_file_seconds = max_file_seconds
+        self.max_files = max_files
+        self.flush_interval = flush_interval_ms / 1000.0
+
+        self._queue = deque(maxlen=queue_size)
+        self._queue_size = queue_size
+        self._batch = bytearray(RECORD_SIZE * 1024)
+
+        self._file = None
+        self._file_path = None
+        self._file_bytes = 0
+        self._file_opened_at = 0.0
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        # Statistics
+        self.samples_written = 0
+        self.samples_dropped = 0
+        self.files_written = 0
+
+    # ------------------------------------------------------------------
+    # Pipeline stage interface (called on the sensor thread)
+    # ------------------------------------------------------------------
+
+    def process(self, sample):
+        """Queue a sample for writing"""
+        if len(self._queue) >= self._queue_size:
+            self.samples_dropped += 1
+        self._queue.append(sample)
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the background writer thread"""
+        if self._thread is not None:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._writer_loop, name='SensorRecorder',
+                                        daemon=True)
+        self._thread.start()
+        print(f"[SensorRecorder] Recording to {self.directory}")
+
+    def stop(self):
+        """Flush pending samples and stop the writer thread"""
+        if self._thread is None:
+            return
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        print(f"[SensorRecorder] Stopped ({self.samples_written} samples written, "
+              f"{self.samples_dropped} dropped)")
+
+    @property
+    def current_file(self):
+        """Path of the file currently being written, or None"""
+        return self._file_path
+
+    def get_stats(self):
+        """Get recorder statistics"""
+        return {
+            'samples_written': self.samples_written,
+            'samples_dropped': self.samples_dropped,
+            'files_written': self.files_written,
+            'queue_depth': len(self._queue),
+            'current_file': self._file_path,
+        }
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+
+    def _writer_loop(self):
+        """Drain the queue every flush interval until stopped"""
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self._drain()
+            except OSError as e:
+                print(f"[SensorRecorder] Write error: {e}")
+
+        try:
+            self._drain()
+        except OSError as e:
+            print(f"[SensorRecorder] Write error: {e}")
+        self._close_file()
+
+    def _drain(self):
+        """Write all queued samples, packing them into batches"""
+        queue = self._queue
+        batch = self._batch
+        pack_into = RECORD_STRUCT.pack_into
+        capacity = len(batch) // RECORD_SIZE
+
+        while queue:
+            self._rotate_if_needed()
+
+            # Never let a batch overshoot the size limit by more than one record
+            room = (self.max_file_bytes - self._file_bytes) // RECORD_SIZE
+            limit = max(1, min(capacity, room))
+
+            count = 0
+            offset = 0
+            while count < limit and queue:
+                ts, ax, ay, az, light = queue.popleft()
+                pack_into(batch, offset, ts, ax, ay, az, int(light))
+                offset += RECORD_SIZE
+                count += 1
+
+            self._file.write(memoryview(batch)[:offset])
+            self._file_bytes += offset
+            self.samples_written += count
+
+        if self._file is not None:
+            self._file.flush()
+
+    def _rotate_if_needed(self):
+        """Open a new file when there is none or the current one is full or old"""
+        if self._file is not None:
+            too_big = self._file_bytes >= self.max_file_bytes
+            too_old = time.monotonic() - self._file_opened_at >= self.max_file_seconds
+            if not (too_big or too_old):
+                return
+            self._close_file()
+
+        self._open_file()
+        self._enforce_retention()
+
+    def _open_file(self):
+        """Create a new recording file and write its header"""
+        start_time = time.time()
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(start_time))
+        path = os.path.join(self.directory, f"sensors-{stamp}{FILE_EXTENSION}")
+        suffix = 1
+        while os.path.exists(path):
+            path = os.path.join(self.directory, f"sensors-{stamp}-{suffix}{FILE_EXTENSION}")
+            suffix += 1
+
+        self._file = open(path, 'wb')
+        self._file.write(HEADER_STRUCT.pack(FILE_MAGIC, FILE_VERSION, RECORD_SIZE, start_time))
+        self._file_path = path
+        self._file_bytes = HEADER_SIZE
+        self._file_opened_at = time.monotonic()
+        self.files_written += 1
+
+    def _close_file(self):
+        """Close the current recording file"""
+        if self._file is None:
+            return
+        try:
+            self._file.close()
+        except OSError as e:
+            print(f"[SensorRecorder] Error closing {self._file_path}: {e}")
+        self._file = None
+        self._file_path = None
+
+    def _enforce_retention(self):
+        """Delete the oldest recordings beyond max_files"""
+        if not self.max_files:
+            return
+
+        recordings = list_recordings(self.directory)
+        for path in recordings[:-self.max_files]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"[SensorRecorder] Could not remove {path}: {e}")
+
+
+class SensorRecording:
+    """
+    Read-only, memory-mapped view of a recording file
+
+    Records are decoded lazily from the mapping, so opening a large file is
+    cheap. A truncated trailing record (e.g. after a power loss) is ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER_SIZE:
+            self._file.close()
+            raise ValueError(f"{path} is not a sensor recording (file too short)")
+
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, start_time = HEADER_STRUCT.unpack_from(self._mmap, 0)
+        if magic != FILE_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a sensor recording (bad magic)")
+        if version != FILE_VERSION or record_size != RECORD_SIZE:
+            self.close()
+            raise ValueError(f"{path} has unsupported format version {version}")
+
+        self.start_time = start_time
+        self._count = (size - HEADER_SIZE) // RECORD_SIZE
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('record index out of range')
+        return SensorSample(*RECORD_STRUCT.unpack_from(self._mmap, HEADER_SIZE + index * RECORD_SIZE))
+
+    def __iter__(self):
+        end = HEADER_SIZE + self._count * RECORD_SIZE
+        view = memoryview(self._mmap)[HEADER_SIZE:end]
+        try:
+            for record in RECORD_STRUCT.iter_unpack(view):
+                yield SensorSample(*record)
+        finally:
+            view.release()
+
+    def as_array(self, copy=True):
+        """
+        Get all records as a NumPy structured array
+
+        Args:
+            copy: Return a copy that outlives the recording. With False the
+                array is a zero-copy view of the mapping: every reference to
+                it must be dropped before close(), which otherwise raises
+                BufferError.
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy is required for SensorRecording.as_array()")
+        view = np.frombuffer(self._mmap, dtype=np.dtype(RECORD_DTYPE),
+                             count=self._count, offset=HEADER_SIZE)
+        return view.copy() if copy else view
+
+    def close(self):
+        """Release the memory mapping and file handle"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def list_recordings(directory):
+    """Get recording file paths in a directory, oldest first"""
+    if not os.path.isdir(directory):
+        return []
+    paths = [os.path.join(directory, name) for name in os.listdir(directory)
+             if name.endswith(FILE_EXTENSION)]
+    return sorted(paths, key=lambda path: (os.path.getmtime(path), path))
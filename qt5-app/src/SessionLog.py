@@ -0,0 +1,233 @@
+"""
+Session Log for reTerminal
+Records API traffic and hardware events of a session, and replays them
+
+A session log is a gzip-compressed JSON lines file. The first line is a
+header ({"format": "rtsession", "version": 1, "started": epoch seconds,
+"source": ...}); every other line is one record, a JSON array starting with
+the seconds since the session started (monotonic clock) and a kind:
+
+    [t, "api", method, path, body, status, duration_us]   REST call
+    [t, "ws", event, data]                                Socket.IO event from a client
+    [t, "call", method, path, body]                       Qt controller call (touchscreen,
+                                                          QML), as its REST equivalent
+    [t, "input", pin, level]                              input pin level change
+    [t, "sensor", accel_x, accel_y, accel_z, light]       sensor sample
+
+Recording never blocks the caller: records go into a bounded deque and a
+writer thread encodes and writes them in batches (as SensorRecorder does).
+SessionReplayer feeds a log back, at the recorded pace, N times faster or
+as fast as possible, into handlers for the mock GPIO and sensor backends,
+and measures how long each record took to handle and how late it started.
+
+Qt-independent: used by backend/app.py, the Qt app and
+benchmarks/replay_session.py.
+"""
+import gzip
+import json
+import threading
+import time
+from collections import deque
+
+from LatencyStats import LatencyStats
+from StructuredLog import get_logger
+
+log = get_logger('session')
+
+LOG_FORMAT = 'rtsession'
+LOG_VERSION = 1
+FILE_EXTENSION = '.rtsession.gz'
+
+KINDS = ('api', 'ws', 'call', 'input', 'sensor')
+
+
+class SessionRecorder:
+    """
+    Appends session records to a log file from any thread
+
+    Also a sensor pipeline stage: process(sample) records a sensor sample.
+    """
+
+    def __init__(self, path, source='backend', queue_size=65536, flush_interval=0.5):
+        """
+        Initialize recorder
+
+        Args:
+            path: Log file to create (gzip JSON lines)
+            source: Recorded component, stored in the header
+            queue_size: Records buffered before the oldest are dropped
+            flush_interval: Seconds between writer batches
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.records = 0
+        self.dropped = 0
+
+        self._queue = deque(maxlen=queue_size)
+        self._levels = {}  # {pin: last recorded level}
+        self._start = time.monotonic()
+        self._file = gzip.open(path, 'wt', encoding='utf-8', compresslevel=6)
+        self._file.write(json.dumps({'format': LOG_FORMAT, 'version': LOG_VERSION,
+                                     'started': time.time(), 'source': source}) + '\n')
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='SessionRecorder', daemon=True)
+        self._thread.start()
+        log.info("Recording session", path=path, source=source)
+
+    def _elapsed(self):
+        return round(time.monotonic() - self._start, 6)
+
+    def _put(self, record):
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append(record)
+        self.records += 1
+
+    def api(self, method, path, body, status, duration_us):
+        self._put((self._elapsed(), 'api', method, path, body, status, round(duration_us)))
+
+    def ws(self, event, data):
+        self._put((self._elapsed(), 'ws', event, data))
+
+    def call(self, method, path, body=None):
+        self._put((self._elapsed(), 'call', method, path, body))
+
+    def input(self, pin, level):
+        """Record an input level, if it differs from the last one recorded for the pin"""
+        level = 1 if level else 0
+        if self._levels.get(pin) == level:
+            return
+        self._levels[pin] = level
+        self._put((self._elapsed(), 'input', pin, level))
+
+    def process(self, sample):
+        """Sensor pipeline stage: record a sample"""
+        self._put((self._elapsed(), 'sensor', sample.accel_x, sample.accel_y,
+                   sample.accel_z, sample.light))
+
+    def close(self):
+        """Write the remaining records and close the file"""
+        self._stop.set()
+        self._thread.join(2.0)
+        self._write_batch()
+        self._file.close()
+        log.info("Session recorded", path=self.path, records=self.records, dropped=self.dropped)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self._write_batch()
+
+    def _write_batch(self):
+        lines = []
+        popleft = self._queue.popleft
+        try:
+            while True:
+                lines.append(json.dumps(popleft(), separators=(',', ':')))
+        except IndexError:
+            pass
+        if lines:
+            self._file.write('\n'.join(lines) + '\n')
+            # Sync flush: the log stays readable up to here if the process dies
+            self._file.flush()
+
+
+def read_session(path):
+    """
+    Read a session log
+
+    A log cut short (process killed while recording) is read up to its last
+    complete batch.
+
+    Returns:
+        (header, records) with records as a list of lists
+
+    Raises:
+        ValueError: If the file is not a session log
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline() or 'null')
+        if not isinstance(header, dict) or header.get('format') != LOG_FORMAT:
+            raise ValueError(f"{path} is not a session log")
+        records = []
+        try:
+            for line in f:
+                if line.endswith('\n'):
+                    records.append(json.loads(line))
+        except EOFError:
+            pass
+    return header, records
+
+
+class SessionReplayer:
+    """Feeds session records to handlers on the recorded schedule"""
+
+    def __init__(self, records, handlers, speed=1.0):
+        """
+        Initialize replayer
+
+        Args:
+            records: Records from read_session()
+            handlers: {kind: callable(record) returning a metric key or None};
+                records of kinds without a handler are skipped
+            speed: 1 = recorded pace, N = N times faster, 0 = as fast as possible
+        """
+        self.records = records
+        self.handlers = handlers
+        self.speed = speed
+        self.latency = {}  # {metric key: LatencyStats of handler time}
+        self.lag = LatencyStats(window=max(1, len(records)))
+        self.errors = 0
+        self.replayed = 0
+        self.skipped = 0
+        self.duration = 0.0
+
+    def run(self):
+        """Replay every record; returns get_stats()"""
+        start = time.perf_counter()
+        for record in self.records:
+            handler = self.handlers.get(record[1])
+            if handler is None:
+                self.skipped += 1
+                continue
+
+            if self.speed > 0:
+                due = start + record[0] / self.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                self.lag.add(max(0.0, time.perf_counter() - due))
+
+            began = time.perf_counter()
+            try:
+                key = handler(record)
+            except Exception as e:
+                self.errors += 1
+                log.warning("Replay failed", kind=record[1], error=e)
+                continue
+            self.replayed += 1
+            if key:
+                stats = self.latency.get(key)
+                if stats is None:
+                    stats = self.latency[key] = LatencyStats(window=4096)
+                stats.add(time.perf_counter() - began)
+
+        self.duration = time.perf_counter() - start
+        return self.get_stats()
+
+    def get_stats(self):
+        """
+        Returns:
+            {"replayed", "skipped", "errors", "duration_s", "recorded_s",
+             "lag": schedule lateness (ms), "latency": {key: handler time (us)}}
+        """
+        recorded = self.records[-1][0] if self.records else 0.0
+        return {
+            'replayed': self.replayed,
+            'skipped': self.skipped,
+            'errors': self.errors,
+            'duration_s': round(self.duration, 3),
+            'recorded_s': recorded,
+            'lag': self.lag.summary(digits=3) if self.speed > 0 else None,
+            'latency': {key: stats.summary(scale=1e6, unit='us', digits=1)
+                        for key, stats in sorted(self.latency.items())},
+        }
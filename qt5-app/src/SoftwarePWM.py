@@ -0,0 +1,495 @@
+"""
+Software PWM Engine for reTerminal
+Drives every software-PWM pin from one thread on a shared monotonic timeline
+
+RPi.GPIO.PWM runs a thread per pin that sleeps for relative intervals, so
+every delay adds up and its timing falls apart when the CPU is busy. This
+engine keeps one heap of absolute edge deadlines (time.monotonic_ns) for all
+pins instead:
+    - Deadlines are computed from the previous deadline, never from "now",
+      so lateness never accumulates into drift.
+    - The thread sleeps until shortly before the next edge and busy-waits the
+      rest, the same way clock_nanosleep(TIMER_ABSTIME) plus a short spin is
+      used in real-time loops. The spin window is sized like a TCP
+      retransmission timeout: smoothed wakeup lateness plus four times its
+      mean deviation, kept between spin_us and max_spin_us.
+    - The busy-wait holds the GIL, so its total is capped at max_spin_share
+      of the time (a token bucket). Past the cap the thread sleeps right up
+      to the edge instead: edges get later, but the UI and other Python
+      threads keep running at high frequencies.
+    - Rising edges of all pins are aligned to a common epoch, so pins with
+      related frequencies switch in the same wakeup.
+    - Duty cycle and frequency changes take effect at the next period
+      boundary, so a change never produces a runt pulse.
+
+Each pin keeps a histogram of edge errors (actual minus scheduled edge time,
+including the output call) and a count of whole periods skipped because the
+thread woke up too late.
+
+Usage:
+    engine = SoftwarePWMEngine(GPIO.output)
+    pwm = engine.PWM(17, 100)       # same interface as RPi.GPIO.PWM
+    pwm.start(25)
+    engine.get_stats()
+"""
+import os
+import atexit
+import heapq
+import bisect
+import threading
+import time
+
+from StructuredLog import get_logger
+
+log = get_logger('gpio.softpwm')
+
+# Upper bounds of the edge error histogram buckets in microseconds; the last
+# bucket collects everything later than the last bound
+HISTOGRAM_BOUNDS_US = (5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Delay before the first edge of a newly started pin
+START_LEAD_NS = 1_000_000
+
+# Smoothing of the wakeup lateness estimate (per wakeup)
+LATENESS_GAIN = 1.0 / 8
+DEVIATION_GAIN = 1.0 / 4
+
+NS_PER_S = 1_000_000_000
+
+# Busy-wait a token bucket can save up, in multiples of max_spin_us
+SPIN_BURST = 20
+
+# Frequency new software PWM pins start at: every edge costs Python time,
+# so well below the 1 kHz used for hardware PWM
+DEFAULT_FREQUENCY = 100
+
+
+class EdgeHistogram:
+    """Histogram of edge errors with min/mean/max"""
+
+    def __init__(self, bounds_us=HISTOGRAM_BOUNDS_US):
+        """
+        Args:
+            bounds_us: Ascending bucket upper bounds in microseconds
+        """
+        self.bounds_us = tuple(bounds_us)
+        self._bounds_ns = [bound * 1000 for bound in self.bounds_us]
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * (len(self._bounds_ns) + 1)
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+
+    def add(self, error_ns):
+        self.counts[bisect.bisect_left(self._bounds_ns, error_ns)] += 1
+        self.count += 1
+        self.total_ns += error_ns
+        if self.min_ns is None or error_ns < self.min_ns:
+            self.min_ns = error_ns
+        if error_ns > self.max_ns:
+            self.max_ns = error_ns
+
+    def percentile_us(self, p):
+        """Upper bound of the bucket holding the p-th percentile (None if open-ended)"""
+        if not self.count:
+            return None
+        target = p / 100.0 * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.bounds_us[i] if i < len(self.bounds_us) else None
+        return None
+
+    def as_dict(self):
+        counts = list(self.counts)
+        buckets = [{'le_us': bound, 'count': count}
+                   for bound, count in zip(self.bounds_us, counts)]
+        buckets.append({'le_us': None, 'count': counts[-1]})
+        summary = {
+            'count': self.count,
+            'min_us': None,
+            'mean_us': None,
+            'max_us': None,
+            'p99_le_us': self.percentile_us(99),
+            'buckets': buckets,
+        }
+        if self.count:
+            summary['min_us'] = round(self.min_ns / 1000.0, 1)
+            summary['mean_us'] = round(self.total_ns / self.count / 1000.0, 1)
+            summary['max_us'] = round(self.max_ns / 1000.0, 1)
+        return summary
+
+
+class SoftwarePWMChannel:
+    """
+    One pin driven by a SoftwarePWMEngine
+
+    Mirrors the RPi.GPIO.PWM interface so the controllers can use either.
+    """
+
+    def __init__(self, engine, pin, frequency):
+        if frequency <= 0:
+            raise ValueError("frequency must be greater than 0.0")
+        self._engine = engine
+        self.pin = pin
+        self.frequency = float(frequency)
+        self.duty_cycle = 0.0
+        self.running = False
+
+    def start(self, duty_cycle):
+        self.duty_cycle = self._check_duty(duty_cycle)
+        self.running = True
+        self._engine._update(self.pin, self.frequency, self.duty_cycle)
+
+    def ChangeDutyCycle(self, duty_cycle):
+        self.duty_cycle = self._check_duty(duty_cycle)
+        if self.running:
+            self._engine._update(self.pin, self.frequency, self.duty_cycle)
+
+    def ChangeFrequency(self, frequency):
+        if frequency <= 0:
+            raise ValueError("frequency must be greater than 0.0")
+        self.frequency = float(frequency)
+        if self.running:
+            self._engine._update(self.pin, self.frequency, self.duty_cycle)
+
+    def stop(self):
+        # Like RPi.GPIO, returns once the pin is released (the caller may
+        # GPIO.cleanup() it next)
+        if self.running:
+            self.running = False
+            self._engine._update(self.pin, None, None, wait=True)
+
+    @staticmethod
+    def _check_duty(duty_cycle):
+        if not 0.0 <= duty_cycle <= 100.0:
+            raise ValueError("dutycycle must have a value from 0.0 to 100.0")
+        return float(duty_cycle)
+
+
+class _PinTimeline:
+    """Engine-thread state of one running pin"""
+
+    def __init__(self, frequency, duty_cycle):
+        self.frequency = frequency
+        self.duty_cycle = duty_cycle
+        self.pending = None  # (frequency, duty_cycle) applied at the next period
+        self.generation = 0  # heap entries of older generations are stale
+        self.level = None
+        self.next_rise = None
+        self.edges = 0
+        self.missed_periods = 0
+        self.histogram = EdgeHistogram()
+
+    @property
+    def steady(self):
+        """Duty cycles of 0 and 100 are a constant level with no edges"""
+        return self.duty_cycle <= 0.0 or self.duty_cycle >= 100.0
+
+    def period_ns(self):
+        return int(round(NS_PER_S / self.frequency))
+
+
+class SoftwarePWMEngine:
+    """Schedules the edges of all software-PWM pins from a single thread"""
+
+    def __init__(self, output, spin_us=50, max_spin_us=500, max_spin_share=0.1,
+                 realtime_priority=None):
+        """
+        Initialize engine
+
+        Args:
+            output: Function setting a pin level, e.g. RPi.GPIO.output
+            spin_us: Minimum busy-wait before each edge
+            max_spin_us: Maximum busy-wait before each edge, however late
+                the thread wakes up (bounds the CPU spent spinning)
+            max_spin_share: Largest share of the time spent busy-waiting,
+                across all pins
+            realtime_priority: SCHED_FIFO priority for the engine thread
+                (needs CAP_SYS_NICE; None = normal scheduling)
+        """
+        self._output = output
+        self.min_spin_ns = int(spin_us * 1000)
+        self.max_spin_ns = max(self.min_spin_ns, int(max_spin_us * 1000))
+        self.spin_ns = self.min_spin_ns
+        self._lateness = 0.0
+        self._lateness_dev = 0.0
+        self.max_spin_share = max_spin_share
+        self._spin_credit = float(SPIN_BURST * self.max_spin_ns)
+        self._spin_refilled = time.monotonic_ns()
+        self.spins_skipped = 0  # wakeups that slept to the edge, over the spin budget
+        self.realtime_priority = realtime_priority
+
+        self._lock = threading.Lock()
+        self._applied = threading.Condition(self._lock)
+        self._wake = threading.Event()
+        self._updates = {}  # {pin: (frequency, duty) or None}, applied by the thread
+        self._batches = 0   # update batches fully applied by the thread
+        self._pins = {}     # {pin: _PinTimeline}, owned by the thread
+        self._heap = []     # (deadline_ns, sequence, pin, level, generation)
+        self._sequence = 0
+        self._epoch = time.monotonic_ns()
+
+        self._thread = None
+        self._running = False
+
+    # ------------------------------------------------------------------
+    # Public interface
+    # ------------------------------------------------------------------
+
+    def PWM(self, pin, frequency):
+        """Create a channel for a pin (RPi.GPIO.PWM-compatible)"""
+        return SoftwarePWMChannel(self, pin, frequency)
+
+    def start(self):
+        """Start the engine thread (also started by the first channel)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='SoftwarePWM', daemon=True)
+            self._thread.start()
+        # Leave the pins low on exit, before daemon threads are frozen
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop the engine thread; running pins are driven low"""
+        with self._lock:
+            thread = self._thread
+            self._running = False
+            self._thread = None
+        if thread is None:
+            return
+        atexit.unregister(self.stop)
+        self._wake.set()
+        thread.join()
+
+    def get_stats(self):
+        """
+        Get per-pin timing statistics
+
+        Returns:
+            {pin: {"spin_us", "spins_skipped", "frequency", "duty_cycle",
+                   "edges", "missed_periods", "edge_error": histogram summary}}
+            (spin_us and spins_skipped are engine-wide)
+        """
+        stats = {}
+        for pin, timeline in list(self._pins.items()):
+            stats[pin] = {
+                'spin_us': self.spin_ns // 1000,
+                'spins_skipped': self.spins_skipped,
+                'frequency': timeline.frequency,
+                'duty_cycle': timeline.duty_cycle,
+                'edges': timeline.edges,
+                'missed_periods': timeline.missed_periods,
+                'edge_error': timeline.histogram.as_dict(),
+            }
+        return stats
+
+    def reset_stats(self):
+        """Clear the histograms and counters of all pins"""
+        for timeline in list(self._pins.values()):
+            timeline.histogram.reset()
+            timeline.edges = 0
+            timeline.missed_periods = 0
+        self.spins_skipped = 0
+
+    def _update(self, pin, frequency, duty_cycle, wait=False, timeout=1.0):
+        """
+        Queue a settings change (None frequency = remove the pin)
+
+        With wait=True, blocks until the engine thread has applied it.
+        """
+        with self._lock:
+            if frequency is None and self._thread is None:
+                return  # stopped engines have no pins
+            self._updates[pin] = None if frequency is None else (frequency, duty_cycle)
+            start = self._thread is None
+            target = self._batches + 1
+        if start:
+            self.start()
+        self._wake.set()
+
+        if wait and threading.current_thread() is not self._thread:
+            with self._applied:
+                self._applied.wait_for(
+                    lambda: self._batches >= target or not self._running, timeout)
+
+    # ------------------------------------------------------------------
+    # Engine thread
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        if self.realtime_priority:
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(self.realtime_priority))
+            except (AttributeError, OSError) as e:
+                log.warning("Could not set real-time priority", error=e)
+        log.info("Thread started", max_spin_us=self.max_spin_ns // 1000)
+
+        heap = self._heap
+        clock = time.monotonic_ns
+
+        while self._running:
+            self._apply_updates()
+
+            if not heap:
+                self._wake.wait(0.5)
+                self._wake.clear()
+                continue
+
+            deadline = heap[0][0]
+            wake_at = deadline - self.spin_ns
+            sleep_ns = wake_at - clock()
+            if sleep_ns > 0:
+                if self._wake.wait(sleep_ns / NS_PER_S):
+                    # Settings changed, or stop(): re-evaluate the schedule
+                    self._wake.clear()
+                    continue
+                self._track_lateness(clock() - wake_at)
+
+            if self._take_spin(deadline - clock()):
+                while clock() < deadline:
+                    pass
+            else:
+                self.spins_skipped += 1
+                sleep_ns = deadline - clock()
+                if sleep_ns > 0 and self._wake.wait(sleep_ns / NS_PER_S):
+                    self._wake.clear()
+                    continue
+
+            now = clock()
+            while heap and heap[0][0] <= now:
+                scheduled, _, pin, level, generation = heapq.heappop(heap)
+                timeline = self._pins.get(pin)
+                if timeline is None or timeline.generation != generation:
+                    continue
+                if not self._write(pin, level):
+                    continue
+                timeline.histogram.add(clock() - scheduled)
+                timeline.edges += 1
+                if level:
+                    self._schedule_period(pin, timeline, scheduled, clock())
+                now = clock()
+
+        for pin in list(self._pins):
+            self._write(pin, 0)
+        self._pins.clear()
+        heap.clear()
+        with self._applied:
+            self._applied.notify_all()
+        log.info("Thread stopped")
+
+    def _take_spin(self, spin_ns):
+        """Take spin_ns of busy-wait from the budget; False if it is spent"""
+        if spin_ns <= 0:
+            return True
+        now = time.monotonic_ns()
+        self._spin_credit = min(SPIN_BURST * self.max_spin_ns,
+                                self._spin_credit + (now - self._spin_refilled) * self.max_spin_share)
+        self._spin_refilled = now
+        if self._spin_credit < spin_ns:
+            return False
+        self._spin_credit -= spin_ns
+        return True
+
+    def _track_lateness(self, lateness_ns):
+        """Size the spin window from how late timed waits return"""
+        error = lateness_ns - self._lateness
+        self._lateness += LATENESS_GAIN * error
+        self._lateness_dev += DEVIATION_GAIN * (abs(error) - self._lateness_dev)
+        spin = int(self._lateness + 4 * self._lateness_dev)
+        self.spin_ns = min(self.max_spin_ns, max(self.min_spin_ns, spin))
+
+    def _apply_updates(self):
+        """Apply queued settings changes (engine thread)"""
+        with self._lock:
+            if not self._updates:
+                return
+            updates = self._updates
+            self._updates = {}
+
+        for pin, settings in updates.items():
+            timeline = self._pins.get(pin)
+
+            if settings is None:
+                if timeline is not None:
+                    del self._pins[pin]
+                    self._write(pin, 0)
+                continue
+
+            if timeline is None:
+                timeline = self._pins[pin] = _PinTimeline(*settings)
+                self._restart(pin, timeline)
+            elif timeline.steady or timeline.next_rise is None:
+                # Nothing to keep in phase with, apply right away
+                timeline.frequency, timeline.duty_cycle = settings
+                self._restart(pin, timeline)
+            else:
+                # Picked up by the next rising edge
+                timeline.pending = settings
+
+        with self._applied:
+            self._batches += 1
+            self._applied.notify_all()
+
+    def _restart(self, pin, timeline):
+        """(Re)schedule a pin from the next slot of the shared timeline"""
+        timeline.generation += 1
+        timeline.pending = None
+        timeline.next_rise = None
+
+        if timeline.steady:
+            level = 1 if timeline.duty_cycle >= 100.0 else 0
+            if timeline.level != level:
+                self._write(pin, level)
+            return
+
+        period = timeline.period_ns()
+        earliest = time.monotonic_ns() + START_LEAD_NS
+        slots = -(-(earliest - self._epoch) // period)
+        self._push(self._epoch + slots * period, pin, 1, timeline)
+
+    def _schedule_period(self, pin, timeline, rise_ns, now_ns):
+        """After a rising edge: schedule its falling edge and the next rising edge"""
+        if timeline.pending is not None:
+            timeline.frequency, timeline.duty_cycle = timeline.pending
+            timeline.pending = None
+            if timeline.steady:
+                self._restart(pin, timeline)
+                return
+
+        period = timeline.period_ns()
+        high = int(period * timeline.duty_cycle / 100.0)
+        next_rise = rise_ns + period
+
+        if next_rise <= now_ns:
+            # Woke up too late for whole periods: skip them instead of bursting
+            missed = (now_ns - next_rise) // period + 1
+            timeline.missed_periods += missed
+            next_rise += missed * period
+
+        self._push(rise_ns + high, pin, 0, timeline)
+        self._push(next_rise, pin, 1, timeline)
+        timeline.next_rise = next_rise
+
+    def _push(self, deadline, pin, level, timeline):
+        self._sequence += 1
+        heapq.heappush(self._heap, (deadline, self._sequence, pin, level, timeline.generation))
+
+    def _write(self, pin, level):
+        """Set a pin level; drops the pin if the output fails"""
+        try:
+            self._output(pin, level)
+        except (RuntimeError, ValueError) as e:
+            log.error("Output failed, stopping software PWM", pin=pin, error=e)
+            self._pins.pop(pin, None)
+            return False
+        timeline = self._pins.get(pin)
+        if timeline is not None:
+            timeline.level = level
+        return True
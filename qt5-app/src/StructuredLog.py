@@ -0,0 +1,228 @@
+"""
+Structured Logging for reTerminal
+Levelled, rate-limited logging with key=value fields and a background writer
+
+Usage:
+    from StructuredLog import get_logger, setup_logging
+
+    setup_logging(level='INFO')            # once, at startup
+    log = get_logger('gpio')
+    log.debug("Write pin", pin=17, value=1)
+    -> 2026-01-07 12:00:00,123 DEBUG [reterminal.gpio] Write pin pin=17 value=1
+
+Design notes:
+    - A disabled level costs one isEnabledFor() check; the message, its %-args
+      and the fields are only formatted by the handler.
+    - Each call site (code object, line) is rate limited with a token bucket
+      before any LogRecord is built, so a suppressed message is nearly as
+      cheap as a disabled one. The number of suppressed messages is reported
+      on the next record let through from that site.
+    - Records go through a QueueHandler, so the calling thread never blocks
+      on stderr/journald. A QueueListener thread does the formatting and I/O.
+"""
+import sys
+import time
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+
+ROOT_LOGGER_NAME = 'reterminal'
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+class RateLimiter:
+    """
+    Token bucket per call site
+
+    Each site may log `burst` records at once and `rate` records per second
+    sustained. Records at exempt_level and above are never dropped.
+    """
+
+    def __init__(self, rate=10.0, burst=20, exempt_level=logging.ERROR):
+        self.rate = rate
+        self.burst = burst
+        self.exempt_level = exempt_level
+        self._buckets = {}  # {site: [tokens, last refill time, suppressed]}
+        self._lock = threading.Lock()
+
+    def allow(self, site, level):
+        """
+        Take a token for a call site
+
+        Returns:
+            Number of records suppressed since the last one allowed from this
+            site, or -1 if this record must be dropped
+        """
+        if self.rate <= 0 or level >= self.exempt_level:
+            return 0
+
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(site)
+            if bucket is None:
+                bucket = self._buckets[site] = [float(self.burst), now, 0]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                return -1
+
+            bucket[0] -= 1.0
+            suppressed = bucket[2]
+            bucket[2] = 0
+            return suppressed
+
+
+# Shared by all StructuredLoggers; replaced by setup_logging()
+_rate_limiter = RateLimiter(rate=0)
+
+
+class StructuredLogger:
+    """
+    Thin wrapper around logging.Logger accepting structured fields as kwargs
+
+    Fields are carried on the record as record.fields and rendered by
+    StructuredFormatter as key=value pairs after the message.
+    """
+
+    def __init__(self, logger):
+        self._logger = logger
+
+    @property
+    def name(self):
+        return self._logger.name
+
+    def isEnabledFor(self, level):
+        return self._logger.isEnabledFor(level)
+
+    def _log(self, level, msg, args, fields, exc_info=False):
+        # Frame 2 is the caller of debug()/info()/...
+        caller = sys._getframe(2)
+        suppressed = _rate_limiter.allow((caller.f_code, caller.f_lineno), level)
+        if suppressed < 0:
+            return
+
+        # stacklevel=3 attributes the record to that same caller
+        self._logger._log(level, msg, args, exc_info=exc_info,
+                          extra={'fields': fields, 'suppressed': suppressed}, stacklevel=3)
+
+    def debug(self, msg, *args, **fields):
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._log(logging.DEBUG, msg, args, fields)
+
+    def info(self, msg, *args, **fields):
+        if self._logger.isEnabledFor(logging.INFO):
+            self._log(logging.INFO, msg, args, fields)
+
+    def warning(self, msg, *args, **fields):
+        if self._logger.isEnabledFor(logging.WARNING):
+            self._log(logging.WARNING, msg, args, fields)
+
+    def error(self, msg, *args, **fields):
+        if self._logger.isEnabledFor(logging.ERROR):
+            self._log(logging.ERROR, msg, args, fields)
+
+    def exception(self, msg, *args, **fields):
+        if self._logger.isEnabledFor(logging.ERROR):
+            self._log(logging.ERROR, msg, args, fields, exc_info=True)
+
+
+class StructuredFormatter(logging.Formatter):
+    """Appends record.fields (and a suppressed count) as key=value pairs"""
+
+    def __init__(self, fmt='%(asctime)s %(levelname)s [%(name)s] %(message)s'):
+        super().__init__(fmt)
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, 'fields', None)
+        parts = [f"{key}={value}" for key, value in fields.items()] if fields else []
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            parts.append(f"suppressed={suppressed}")
+        if not parts:
+            return line
+        # Keep a traceback (if any) after the fields
+        head, sep, tail = line.partition('\n')
+        return f"{head} {' '.join(parts)}{sep}{tail}"
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that keeps the record's fields intact
+
+    The stock handler pre-formats the message and drops args; here only the
+    %-interpolation is done (so args need not be thread-safe), and fields are
+    rendered later by the listener's formatter.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def get_logger(name):
+    """
+    Get a structured logger under the 'reterminal' hierarchy
+
+    Args:
+        name: Component name, e.g. 'gpio' -> 'reterminal.gpio'
+    """
+    return StructuredLogger(logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}"))
+
+
+def setup_logging(level='INFO', rate=10.0, burst=20, stream=None):
+    """
+    Configure the 'reterminal' loggers (idempotent)
+
+    Args:
+        level: Minimum level name or number
+        rate: Sustained records per second per call site (0 = unlimited)
+        burst: Records a call site may emit at once before rate limiting
+        stream: Output stream (default stderr, which journald captures)
+    """
+    global _listener, _rate_limiter
+
+    with _setup_lock:
+        _rate_limiter = RateLimiter(rate=rate, burst=burst)
+
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        root.setLevel(level if isinstance(level, int) else level.upper())
+
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(StructuredFormatter())
+
+        log_queue = queue.SimpleQueue()
+        root.addHandler(_QueueHandler(log_queue))
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, output)
+        _listener.start()
+
+
+def shutdown_logging():
+    """Flush queued records and stop the background writer"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,349 @@
+"""
+Vibration Analyzer for reTerminal
+Band-pass filtered RMS and FFT spectrum over sliding accelerometer windows
+
+VibrationAnalyzer is a SensorController pipeline stage. process() runs on the
+sensor thread and only copies the three axis values into a preallocated ring
+buffer; every hop_size samples the analyzer thread wakes up, snapshots the
+latest window and computes:
+    - per-axis RMS of the band-limited signal (in g)
+    - the windowed FFT magnitude spectrum, combined over the three axes
+    - the peak frequency per axis and overall
+
+Filtering is done in the frequency domain with a brick-wall mask, so the
+high-pass/low-pass corners cost nothing beyond the FFT itself. All work
+arrays are allocated once per window size; the FFTs write into a
+preallocated spectrum array on NumPy 2.0 and later (older NumPy has no
+out= for rfft and allocates one spectrum per FFT).
+"""
+import json
+import threading
+
+try:
+    from PySide2.QtCore import QThread, QObject, Signal, Slot, Property
+except ImportError:
+    from PyQt5.QtCore import QThread, QObject, pyqtSignal as Signal, pyqtSlot as Slot, pyqtProperty as Property
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+def _rfft_supports_out():
+    try:
+        np.fft.rfft(np.zeros(2), out=np.empty(2, dtype=complex))
+    except TypeError:
+        return False  # NumPy < 2.0
+    return True
+
+
+RFFT_OUT = NUMPY_AVAILABLE and _rfft_supports_out()
+
+
+def _rfft_into(a, out):
+    """Real FFT of a along its last axis, into out where NumPy allows it"""
+    if RFFT_OUT:
+        return np.fft.rfft(a, axis=-1, out=out)
+    return np.fft.rfft(a, axis=-1)
+
+
+class VibrationAnalyzer(QThread):
+    """
+    Qt thread that analyses accelerometer windows off the UI thread
+    Emits one JSON result per hop
+    """
+    # Signal: emits JSON string with the analysis of the latest window
+    # Format: {"timestamp": float, "rms": [x, y, z], "peak_hz": [x, y, z],
+    #          "peak_frequency": float, "bin_hz": float, "spectrum": [float, ...]}
+    spectrumData = Signal(str)
+
+    def __init__(self, sample_rate, window_size=256, hop_size=64,
+                 highpass_hz=None, lowpass_hz=None):
+        """
+        Initialize vibration analyzer
+
+        Args:
+            sample_rate: Sensor sampling rate in Hz
+            window_size: Samples per analysis window (a power of two is fastest)
+            hop_size: New samples between analyses
+            highpass_hz: Remove content below this frequency (None = DC only)
+            lowpass_hz: Remove content above this frequency (None = Nyquist)
+        """
+        super().__init__()
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy is required for vibration analysis")
+
+        self.sample_rate = float(sample_rate)
+        self.window_size = int(window_size)
+        self.hop_size = max(1, int(hop_size))
+        self.running = True
+
+        n = self.window_size
+        bins = n // 2 + 1
+
+        # Ring buffer written by the sensor thread
+        self._lock = threading.Lock()
+        self._ring = np.zeros((3, n))
+        self._ring_ts = np.zeros(n)
+        self._write_index = 0
+        self._filled = 0
+        self._pending = 0
+        self._ready = threading.Event()
+
+        # Work arrays owned by the analyzer thread
+        self._window = np.empty((3, n))
+        self._mean = np.empty((3, 1))
+        self._tapered = np.empty((3, n))
+        self._spectrum = np.empty((3, bins), dtype=complex)
+        self._power = np.empty((3, bins))
+        self._magnitude = np.empty((3, bins))
+        self._combined = np.empty(bins)
+        self._rms = np.empty(3)
+
+        self._hann = np.hanning(n)
+        # Single-sided amplitude scaling for the Hann-windowed spectrum
+        self._amplitude_scale = 2.0 / self._hann.sum()
+        # Parseval weights: interior bins stand for a positive and negative frequency
+        self._parseval = np.full(bins, 2.0 / (n * n))
+        self._parseval[0] = 1.0 / (n * n)
+        if n % 2 == 0:
+            self._parseval[-1] = 1.0 / (n * n)
+
+        self._mask = np.ones(bins)
+        self.highpass_hz = None
+        self.lowpass_hz = None
+        self.set_filter(highpass_hz, lowpass_hz)
+
+    # ------------------------------------------------------------------
+    # Configuration
+    # ------------------------------------------------------------------
+
+    @property
+    def bin_hz(self):
+        """Frequency resolution of the spectrum"""
+        return self.sample_rate / self.window_size
+
+    def set_filter(self, highpass_hz=None, lowpass_hz=None):
+        """
+        Set the band-pass corners
+
+        Args:
+            highpass_hz: Lower corner in Hz, or None/0 to only remove DC
+            lowpass_hz: Upper corner in Hz, or None/0 for no low-pass
+        """
+        freqs = np.fft.rfftfreq(self.window_size, d=1.0 / self.sample_rate)
+        mask = np.ones_like(freqs)
+        mask[0] = 0.0  # DC is gravity and sensor offset, never vibration
+        if highpass_hz:
+            mask[freqs < highpass_hz] = 0.0
+        if lowpass_hz:
+            mask[freqs > lowpass_hz] = 0.0
+
+        with self._lock:
+            self._mask = mask
+            self.highpass_hz = highpass_hz or None
+            self.lowpass_hz = lowpass_hz or None
+
+    def set_sample_rate(self, sample_rate):
+        """
+        Change the expected sampling rate
+
+        The current window mixes samples taken at the old rate, so it is
+        discarded and analysis resumes once a full window has been collected.
+        """
+        sample_rate = float(sample_rate)
+        if sample_rate == self.sample_rate:
+            return
+        with self._lock:
+            self.sample_rate = sample_rate
+            self._filled = 0
+            self._pending = 0
+        self.set_filter(self.highpass_hz, self.lowpass_hz)
+
+    # ------------------------------------------------------------------
+    # Pipeline stage interface (called on the sensor thread)
+    # ------------------------------------------------------------------
+
+    def process(self, sample):
+        """Append a sample to the ring buffer"""
+        with self._lock:
+            i = self._write_index
+            ring = self._ring
+            ring[0, i] = sample.accel_x
+            ring[1, i] = sample.accel_y
+            ring[2, i] = sample.accel_z
+            self._ring_ts[i] = sample.timestamp
+            self._write_index = (i + 1) % self.window_size
+            if self._filled < self.window_size:
+                self._filled += 1
+            self._pending += 1
+            ready = self._pending >= self.hop_size and self._filled == self.window_size
+
+        if ready:
+            self._ready.set()
+
+    # ------------------------------------------------------------------
+    # Analyzer thread
+    # ------------------------------------------------------------------
+
+    def run(self):
+        """Main thread loop - analyses a window every hop"""
+        print(f"[VibrationAnalyzer] Thread started ({self.window_size}-sample window, "
+              f"{self.bin_hz:.2f}Hz bins)")
+
+        while self.running:
+            if not self._ready.wait(0.5):
+                continue
+            self._ready.clear()
+
+            try:
+                result = self._analyze()
+                if result is not None:
+                    self.spectrumData.emit(json.dumps(result))
+            except Exception as e:
+                print(f"[VibrationAnalyzer] Error: {e}")
+
+        print("[VibrationAnalyzer] Thread stopped")
+
+    def _snapshot(self):
+        """Copy the latest window, oldest sample first, into the work array"""
+        with self._lock:
+            if self._filled < self.window_size:
+                return None
+            i = self._write_index
+            head = self.window_size - i
+            self._window[:, :head] = self._ring[:, i:]
+            self._window[:, head:] = self._ring[:, :i]
+            timestamp = self._ring_ts[i - 1]
+            self._pending = 0
+            return timestamp, self._mask, self.sample_rate
+
+    def _analyze(self):
+        """Compute RMS, spectrum and peaks for the latest window"""
+        snapshot = self._snapshot()
+        if snapshot is None:
+            return None
+        timestamp, mask, sample_rate = snapshot
+
+        window = self._window
+        np.mean(window, axis=1, keepdims=True, out=self._mean)
+        np.subtract(window, self._mean, out=window)
+
+        # RMS of the band-limited signal, from the unwindowed spectrum (Parseval)
+        spectrum = _rfft_into(window, self._spectrum)
+        spectrum *= mask
+        np.abs(spectrum, out=self._power)
+        np.square(self._power, out=self._power)
+        np.dot(self._power, self._parseval, out=self._rms)
+        np.sqrt(self._rms, out=self._rms)
+
+        # Amplitude spectrum of the Hann-windowed, band-limited signal
+        np.multiply(window, self._hann, out=self._tapered)
+        spectrum = _rfft_into(self._tapered, self._spectrum)
+        spectrum *= mask
+        np.abs(spectrum, out=self._magnitude)
+        self._magnitude *= self._amplitude_scale
+
+        # Vector magnitude over the three axes
+        np.square(self._magnitude, out=self._power)
+        np.sum(self._power, axis=0, out=self._combined)
+        np.sqrt(self._combined, out=self._combined)
+
+        bin_hz = sample_rate / self.window_size
+        peak_bins = self._magnitude.argmax(axis=1)
+        peak_bin = int(self._combined.argmax())
+
+        return {
+            'timestamp': float(timestamp),
+            'rms': [round(float(v), 5) for v in self._rms],
+            'peak_hz': [round(float(b) * bin_hz, 3) for b in peak_bins],
+            'peak_frequency': round(peak_bin * bin_hz, 3),
+            'peak_magnitude': round(float(self._combined[peak_bin]), 5),
+            'bin_hz': bin_hz,
+            'spectrum': [round(float(v), 5) for v in self._combined],
+        }
+
+    def stop(self):
+        """Stop the analyzer thread"""
+        print("[VibrationAnalyzer] Stopping...")
+        self.running = False
+        self._ready.set()
+
+
+class VibrationDataModel(QObject):
+    """
+    QObject wrapper to expose vibration analysis results to QML
+    Receives results from the VibrationAnalyzer thread and provides properties
+    """
+    analysisChanged = Signal()
+    availableChanged = Signal()
+
+    def __init__(self):
+        super().__init__()
+        self._available = False
+        self._rms = [0.0, 0.0, 0.0]
+        self._peak_frequency = 0.0
+        self._peak_magnitude = 0.0
+        self._bin_hz = 0.0
+        self._spectrum = []
+
+    def setAvailable(self, available):
+        """Mark whether an analyzer is feeding this model"""
+        if available != self._available:
+            self._available = available
+            self.availableChanged.emit()
+
+    @Slot(str)
+    def updateSpectrum(self, json_data):
+        """
+        Update analysis results from JSON string
+
+        Args:
+            json_data: JSON string emitted by VibrationAnalyzer.spectrumData
+        """
+        try:
+            data = json.loads(json_data)
+            self._rms = data['rms']
+            self._peak_frequency = data['peak_frequency']
+            self._peak_magnitude = data['peak_magnitude']
+            self._bin_hz = data['bin_hz']
+            self._spectrum = data['spectrum']
+            self.analysisChanged.emit()
+
+        except Exception as e:
+            print(f"[VibrationDataModel] Error updating data: {e}")
+
+    # Qt Properties for QML access
+    @Property(bool, notify=availableChanged)
+    def available(self):
+        return self._available
+
+    @Property(float, notify=analysisChanged)
+    def rmsX(self):
+        return self._rms[0]
+
+    @Property(float, notify=analysisChanged)
+    def rmsY(self):
+        return self._rms[1]
+
+    @Property(float, notify=analysisChanged)
+    def rmsZ(self):
+        return self._rms[2]
+
+    @Property(float, notify=analysisChanged)
+    def peakFrequency(self):
+        return self._peak_frequency
+
+    @Property(float, notify=analysisChanged)
+    def peakMagnitude(self):
+        return self._peak_magnitude
+
+    @Property(float, notify=analysisChanged)
+    def binHz(self):
+        return self._bin_hz
+
+    @Property('QVariantList', notify=analysisChanged)
+    def spectrum(self):
+        return self._spectrum
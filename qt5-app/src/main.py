@@ -5,6 +5,9 @@ Main application entry point
 """
 import os
 import sys
+import json
+import time
+import argparse
 import platform
 import logging
 
@@ -12,36 +15,72 @@ import logging
 try:
     from PySide2.QtQml import QQmlApplicationEngine
     from PySide2.QtWidgets import QApplication
-    from PySide2.QtCore import QUrl, QObject, Signal, Slot
+    from PySide2.QtCore import QUrl, QObject, Qt, Signal, Slot
     print("Using PySide2")
 except ImportError:
     from PyQt5.QtQml import QQmlApplicationEngine
     from PyQt5.QtWidgets import QApplication
-    from PyQt5.QtCore import QUrl, QObject, pyqtSignal as Signal, pyqtSlot as Slot
+    from PyQt5.QtCore import QUrl, QObject, Qt, pyqtSignal as Signal, pyqtSlot as Slot
     print("Using PyQt5")
 
 # Import our controllers
 from ButtonHandler import ButtonHandler
 from GPIOController import GPIOController
+import SensorGraph
 from SensorController import SensorController, SensorDataModel
+from SensorCore import SensorHistory
+from SensorRecorder import SensorRecorder
+from SessionLog import SessionRecorder
+from VibrationAnalyzer import VibrationAnalyzer, VibrationDataModel, NUMPY_AVAILABLE
+from LatencyStats import LatencyStats
+from StructuredLog import get_logger, setup_logging
 
 # Logging setup
 LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
 logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
 
+log = get_logger('app')
+
+# F1 = GPIO screen, F2 = Sensors screen, F3 = Control screen
+BUTTON_SCREENS = {
+    'F1': 'gpio',
+    'F2': 'sensors',
+    'F3': 'control',
+}
+
 
 class AppController(QObject):
     """
     Main application controller
     Coordinates button events, screen navigation, and data flow
+
+    Screen switches triggered by physical buttons are timed from the kernel
+    key event to the first frame presented after the switch:
+        dispatch: key event -> this controller (evdev read + queued signal)
+        switch:   key event -> next QQuickWindow::frameSwapped
     """
     # Signal to change screen
-    screenChanged = Signal(str)  # 'gpio' or 'sensors'
+    screenChanged = Signal(str)  # 'gpio', 'sensors' or 'control'
+
+    # Signal: (gesture, detail) for QML, see ButtonHandler.gestureEvent
+    gestureDetected = Signal(str, str)
 
     def __init__(self):
         super().__init__()
         self._current_screen = 'gpio'
 
+        # Clock of the key event timestamps (set by set_event_clock)
+        self._event_clock = time.monotonic
+        # Key timestamp of a screen switch waiting for its first frame
+        self._pending_switch = None
+
+        self.dispatch_latency = LatencyStats(window=256)
+        self.switch_latency = LatencyStats(window=256)
+
+    def set_event_clock(self, clock):
+        """Set the clock function matching ButtonHandler event timestamps"""
+        self._event_clock = clock
+
     @Slot(str, str)
     def handleButtonEvent(self, button, state):
         """
@@ -51,25 +90,75 @@ class AppController(QObject):
             button: Button name ('F1', 'F2', 'F3', 'O')
             state: Button state ('pressed' or 'released')
         """
+        self._handleButton(button, state, None)
+
+    @Slot(str, str, float)
+    def handleKeyEvent(self, button, state, timestamp):
+        """
+        Handle a timestamped button event from ButtonHandler
+
+        Args:
+            button: Button name ('F1', 'F2', 'F3', 'O')
+            state: Button state ('pressed' or 'released')
+            timestamp: Kernel event time in the event clock
+        """
+        if state == 'pressed':
+            self.dispatch_latency.add(self._event_clock() - timestamp)
+        self._handleButton(button, state, timestamp)
+
+    def _handleButton(self, button, state, timestamp):
         # Only act on button press (not release)
         if state != 'pressed':
             return
 
-        print(f"[AppController] Button {button} pressed")
-
-        # F1 = GPIO screen, F2 = Sensors screen, F3 = Control screen
-        if button == 'F1':
-            print("[AppController] Switching to GPIO screen")
-            self._current_screen = 'gpio'
-            self.screenChanged.emit('gpio')
-        elif button == 'F2':
-            print("[AppController] Switching to Sensors screen")
-            self._current_screen = 'sensors'
-            self.screenChanged.emit('sensors')
-        elif button == 'F3':
-            print("[AppController] Switching to Control screen")
-            self._current_screen = 'control'
-            self.screenChanged.emit('control')
+        log.info("Button pressed", button=button)
+
+        screen = BUTTON_SCREENS.get(button)
+        if screen is None:
+            return
+
+        log.info("Switching screen", screen=screen)
+        if timestamp is not None and screen != self._current_screen:
+            self._pending_switch = timestamp
+        self._current_screen = screen
+        self.screenChanged.emit(screen)
+
+    @Slot(str, str, float)
+    def handleGesture(self, gesture, detail, timestamp):
+        """Forward a button gesture to QML"""
+        log.info("Gesture", gesture=gesture, detail=detail)
+        self.gestureDetected.emit(gesture, detail)
+
+    @Slot()
+    def onFrameSwapped(self):
+        """
+        Complete the latency measurement of a pending screen switch
+
+        Connected directly to QQuickWindow::frameSwapped, so with the
+        threaded render loop this runs on the render thread.
+        """
+        timestamp = self._pending_switch
+        if timestamp is None:
+            return
+        self._pending_switch = None
+        latency = self._event_clock() - timestamp
+        self.switch_latency.add(latency)
+        log.debug("Screen switch latency", screen=self._current_screen,
+                  latency_ms=round(latency * 1000.0, 2))
+
+    @Slot(result=str)
+    def getLatencyStats(self):
+        """
+        Get key-to-screen-switch latency statistics
+
+        Returns:
+            JSON string: {"dispatch": {...}, "switch": {...}} with count and
+            min/mean/p50/p99/max in milliseconds
+        """
+        return json.dumps({
+            'dispatch': self.dispatch_latency.summary(),
+            'switch': self.switch_latency.summary(),
+        })
 
     @Slot(result=str)
     def getCurrentScreen(self):
@@ -115,14 +204,63 @@ def find_button_device():
         return None
 
 
+def parse_args(argv):
+    """
+    Parse application options
+
+    Unrecognised arguments are left for Qt (e.g. -platform eglfs)
+
+    Returns:
+        (options, remaining argv for QApplication)
+    """
+    parser = argparse.ArgumentParser(description="reTerminal GPIO Control")
+    parser.add_argument('--log-level', default='INFO',
+                        help="Log level: DEBUG, INFO, WARNING or ERROR (default INFO)")
+    parser.add_argument('--log-rate', type=float, default=10.0,
+                        help="Maximum log records per second per call site (0 = unlimited)")
+    parser.add_argument('--api-port', type=int, default=None,
+                        help="Also serve the REST/Socket.IO API from this process on this "
+                             "port, sharing the GPIO controller (replaces backend/app.py)")
+    parser.add_argument('--api-host', default='0.0.0.0',
+                        help="Address the embedded API listens on (default 0.0.0.0)")
+    parser.add_argument('--sensor-rate', type=float, default=20.0,
+                        help="Sensor sampling rate in Hz (default 20)")
+    parser.add_argument('--sensor-idle-rate', type=float, default=1.0,
+                        help="Sampling rate in Hz while the device is still, the Sensor "
+                             "screen is hidden and nothing records, analyses or alarms on "
+                             "the samples (0 disables adaptive sampling, default 1)")
+    parser.add_argument('--record-dir', default=None,
+                        help="Record every sensor sample to this directory")
+    parser.add_argument('--record-max-mb', type=float, default=64.0,
+                        help="Rotate recording files at this size in MB (default 64)")
+    parser.add_argument('--record-max-minutes', type=float, default=60.0,
+                        help="Rotate recording files after this many minutes (default 60)")
+    parser.add_argument('--record-max-files', type=int, default=None,
+                        help="Keep at most this many recording files")
+    parser.add_argument('--record-session', default=None, metavar='PATH',
+                        help="Record GPIO calls, input changes and sensor samples to a "
+                             "session log for replay (benchmarks/replay_session.py)")
+    parser.add_argument('--vibration-window', type=int, default=256,
+                        help="Samples per vibration analysis window (default 256)")
+    parser.add_argument('--vibration-highpass', type=float, default=None,
+                        help="Vibration high-pass corner in Hz")
+    parser.add_argument('--vibration-lowpass', type=float, default=None,
+                        help="Vibration low-pass corner in Hz")
+    options, qt_args = parser.parse_known_args(argv[1:])
+    return options, argv[:1] + qt_args
+
+
 def main():
     """Main application entry point"""
     print("=" * 60)
     print("reTerminal GPIO Control - Qt5 Application")
     print("=" * 60)
 
+    options, qt_argv = parse_args(sys.argv)
+    setup_logging(level=options.log_level, rate=options.log_rate)
+
     # Create Qt application
-    app = QApplication(sys.argv)
+    app = QApplication(qt_argv)
     app.setApplicationName("reTerminal GPIO Control")
 
     # Create QML engine
@@ -131,20 +269,36 @@ def main():
     # Create controllers
     gpio_controller = GPIOController()
     sensor_data_model = SensorDataModel()
+    vibration_data_model = VibrationDataModel()
     app_controller = AppController()
 
     # Expose controllers to QML
     context = engine.rootContext()
     context.setContextProperty("gpioController", gpio_controller)
     context.setContextProperty("sensorData", sensor_data_model)
+    context.setContextProperty("vibrationData", vibration_data_model)
     context.setContextProperty("appController", app_controller)
 
+    # Optional REST/Socket.IO API sharing this process's GPIO controller
+    api_server = None
+    if options.api_port:
+        try:
+            from EmbeddedAPI import EmbeddedAPIServer
+            api_server = EmbeddedAPIServer(gpio_controller, host=options.api_host,
+                                           port=options.api_port)
+            api_server.start()
+            print(f"[main] API server on http://{options.api_host}:{options.api_port}")
+        except ImportError as e:
+            print(f"[main] Embedded API unavailable ({e}), install backend/requirements.txt")
+
     # Auto-discover and initialize button handler
     button_device_path = find_button_device()
     if button_device_path:
         button_handler = ButtonHandler(button_device_path)
         # Connect button events to app controller
-        button_handler.buttonEvent.connect(app_controller.handleButtonEvent)
+        app_controller.set_event_clock(button_handler.now)
+        button_handler.buttonEvent.connect(app_controller.handleKeyEvent)
+        button_handler.gestureEvent.connect(app_controller.handleGesture)
         button_handler.start()
         print("[main] Button handler started")
     else:
@@ -152,11 +306,83 @@ def main():
         button_handler = None
 
     # Initialize sensor controller
-    sensor_controller = SensorController(interval_ms=50)  # 20Hz update rate
+    # The UI is always fed at 20Hz, whatever the sampling rate
+    idle_interval_ms = 1000.0 / options.sensor_idle_rate if options.sensor_idle_rate > 0 else None
+    sensor_controller = SensorController(
+        interval_ms=1000.0 / options.sensor_rate,
+        ui_interval_ms=50,
+        idle_interval_ms=idle_interval_ms
+    )
     # Connect sensor data to model
     sensor_controller.sensorData.connect(sensor_data_model.updateSensorData)
+
+    # Sensor threshold alarms drive outputs straight from the sensor thread,
+    # ahead of every other stage, and keep sampling at full rate while enabled
+    # so a short spike is not missed at the idle rate
+    sensor_controller.add_stage(gpio_controller.alarm_stage, first=True)
+
+    def sample_for_alarms(enabled):
+        if enabled:
+            sensor_controller.subscribe('alarms')
+        else:
+            sensor_controller.unsubscribe('alarms')
+    gpio_controller.alarmsEnabledChanged.connect(sample_for_alarms)
+    if gpio_controller.alarm_stage.enabled:
+        sample_for_alarms(True)
+
+    # Ring buffer of every sample, read by the SensorGraph items on the sensor screen
+    sensor_history = SensorHistory()
+    sensor_controller.add_stage(sensor_history)
+    SensorGraph.register(sensor_history)
+
+    # Optional on-disk recording of every sample
+    sensor_recorder = None
+    if options.record_dir:
+        sensor_recorder = SensorRecorder(
+            options.record_dir,
+            max_file_bytes=int(options.record_max_mb * 1024 * 1024),
+            max_file_seconds=options.record_max_minutes * 60,
+            max_files=options.record_max_files
+        )
+        sensor_recorder.start()
+        sensor_controller.add_stage(sensor_recorder)
+        # A recording at the idle rate would be useless: never idle while recording
+        sensor_controller.subscribe('recorder')
+
+    # Optional session log of GPIO calls, input changes and sensor samples
+    session_recorder = None
+    if options.record_session:
+        session_recorder = SessionRecorder(options.record_session, source='qt')
+        gpio_controller.set_recorder(session_recorder)
+        sensor_controller.add_stage(session_recorder)
+
+    # Vibration analysis runs on its own thread, fed by the sensor thread
+    vibration_analyzer = None
+    if NUMPY_AVAILABLE:
+        vibration_analyzer = VibrationAnalyzer(
+            sample_rate=options.sensor_rate,
+            window_size=options.vibration_window,
+            hop_size=max(1, options.vibration_window // 4),
+            highpass_hz=options.vibration_highpass,
+            lowpass_hz=options.vibration_lowpass
+        )
+        vibration_analyzer.spectrumData.connect(vibration_data_model.updateSpectrum)
+        vibration_data_model.setAvailable(True)
+        sensor_controller.add_stage(vibration_analyzer)
+        # The analysis assumes --sensor-rate, and restarts its window on a rate change
+        sensor_controller.subscribe('vibration')
+        vibration_analyzer.start()
+    else:
+        print("[main] NumPy not installed, vibration analysis disabled")
+
+    # The API serves sensor data from this sensor thread instead of reading the sensors itself
+    if api_server:
+        api_server.sensors.attach(sensor_controller)
+
     sensor_controller.start()
-    print("[main] Sensor controller started")
+    print(f"[main] Sensor controller started at {options.sensor_rate:g}Hz")
+
+    context.setContextProperty("sensorController", sensor_controller)
 
     # Load QML UI
     qml_file = os.path.join(os.path.dirname(__file__), '../qml/main.qml')
@@ -170,6 +396,10 @@ def main():
         print("[main] ERROR: Failed to load QML")
         return 1
 
+    # Key-to-screen-switch latency ends at the first frame after the switch
+    window = engine.rootObjects()[0]
+    window.frameSwapped.connect(app_controller.onFrameSwapped, Qt.DirectConnection)
+
     print("[main] Application started successfully")
     print("  - Press F1 for GPIO configuration screen")
     print("  - Press F2 for sensor graphing screen")
@@ -181,8 +411,20 @@ def main():
     # Cleanup
     print("[main] Shutting down...")
     sensor_controller.stop()
+    sensor_controller.wait()
+    if sensor_recorder:
+        sensor_recorder.stop()
+    if vibration_analyzer:
+        vibration_analyzer.stop()
+        vibration_analyzer.wait()
     if button_handler:
         button_handler.stop()
+        button_handler.wait()
+        log.info("Key read latency", **button_handler.get_stats())
+        log.info("Key-to-screen-switch latency", **app_controller.switch_latency.summary())
+    if session_recorder:
+        gpio_controller.set_recorder(None)
+        session_recorder.close()
     gpio_controller.cleanup()
 
     return exit_code